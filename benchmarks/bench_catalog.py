@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del catálogo en memoria: memoria por archivo y latencia de los filtros
+
+Construye un catálogo sintético (1M de archivos por defecto), mide lo que
+ocupa frente a la lista de diccionarios equivalente y el tiempo de consultas
+típicas ("grandes", "recientes", por categoría y por nombre).
+
+Uso:
+    python benchmarks/bench_catalog.py
+    python benchmarks/bench_catalog.py --files 200000 --backend array
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_catalog import HAS_NUMPY, FileCatalog  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+
+WORDS = ['informe', 'factura', 'foto', 'notas', 'backup', 'presupuesto', 'proyecto',
+         'datos', 'video', 'cancion', 'resumen', 'contrato', 'plantilla', 'borrador']
+EXTENSIONS = ['.pdf', '.txt', '.docx', '.jpg', '.png', '.py', '.mp4', '.mp3', '.csv', '.zip']
+QUERIES = [
+    "archivos grandes más de 10MB",
+    "archivos recientes del último mes",
+    "imágenes",
+    "documentos grandes",
+    "presupuesto",
+]
+
+
+def build_rows(count: int, seed: int = 11):
+    """Filas (name, extension, size, mtime, directory) agrupadas por directorio"""
+    rng = random.Random(seed)
+    now = time.time()
+    rows = []
+    per_dir = 40
+    for d in range(count // per_dir + 1):
+        directory = f"/home/usuario/proyectos/p{d % 300}/carpeta_{d}"
+        for i in range(min(per_dir, count - d * per_dir)):
+            ext = rng.choice(EXTENSIONS)
+            name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{d}_{i}{ext}"
+            size = int(rng.lognormvariate(11, 2.5))
+            rows.append((name, ext, size, now - rng.uniform(0, 3 * 365 * 86400), directory))
+    return rows
+
+
+def dict_bytes_per_entry(rows, sample: int = 20000) -> float:
+    """Bytes por archivo de la representación en diccionarios (como file_info)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dicts = [{
+        'path': f"{directory}/{name}", 'name': name, 'directory': directory,
+        'size': size, 'size_human': f"{size / 1024:.1f} KB", 'modified': mtime,
+        'modified_human': time.strftime('%d/%m/%Y %H:%M', time.localtime(mtime)),
+        'extension': ext, 'category': 'otros', 'is_hidden': False, 'mime_type': 'application/pdf'
+    } for name, ext, size, mtime, directory in rows[:sample]]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del dicts
+    return used / min(sample, len(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', choices=['numpy', 'array'], default='numpy' if HAS_NUMPY else 'array')
+    args = parser.parse_args()
+
+    if args.backend == 'numpy' and not HAS_NUMPY:
+        print("NumPy no está instalado: se usa el modo array")
+        args.backend = 'array'
+
+    rows = build_rows(args.files)
+    manager = FileManager(use_catalog=False)
+    catalog = FileCatalog.from_rows(rows, manager.extension_categories)
+    catalog.backend = args.backend
+    print(f"📚 {len(catalog)} archivos en {catalog.build_time:.2f}s (modo {catalog.backend})")
+
+    memory = catalog.memory_usage()
+    print(f"💾 Catálogo: {memory['total'] / 1024 / 1024:.1f} MB, {memory['bytes_per_entry']} bytes/archivo "
+          f"({memory['directories']} directorios, {memory['extensions']} extensiones)")
+    for column, size in memory['columns'].items():
+        print(f"   {column:13s} {size / 1024 / 1024:7.1f} MB")
+    print(f"   diccionarios equivalentes: ~{dict_bytes_per_entry(rows):.0f} bytes/archivo")
+
+    for query in QUERIES:
+        plan = manager.compile_query(query)
+        best = None
+        found = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = catalog.query(extensions=plan.extensions, modified_after=plan.modified_after,
+                                  min_size=plan.min_size, max_size=plan.max_size,
+                                  keyword_pattern=plan.keyword_matcher, limit=50)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        total = len(catalog.query(extensions=plan.extensions, modified_after=plan.modified_after,
+                                  min_size=plan.min_size, max_size=plan.max_size,
+                                  keyword_pattern=plan.keyword_matcher, order_by_recent=False))
+        print(f"\n🔍 {query!r}: {total} coincidencias, 50 más recientes en {best * 1e3:.1f} ms")
+        if found:
+            print(f"   1º: {catalog.path(found[0])}")
+
+    if manager.file_index is not None:
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
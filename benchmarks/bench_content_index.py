@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del índice de contenido: indexación, tamaño en disco y latencia de consulta
+
+Uso:
+    python benchmarks/bench_content_index.py                  # corpus sintético temporal
+    python benchmarks/bench_content_index.py --path ~/proyectos --query factura --query import
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.content_index import ContentIndex  # noqa: E402
+from core.content_search import ContentSearcher  # noqa: E402
+from core.file_scanner import DirectoryScanner  # noqa: E402
+
+WORDS = ['factura', 'cliente', 'servidor', 'error', 'importe', 'pedido', 'usuario', 'conexión',
+         'informe', 'proyecto', 'reunión', 'presupuesto', 'función', 'import', 'return', 'class']
+TEXT_EXTENSIONS = {'.txt', '.py', '.js', '.html', '.css', '.json', '.xml', '.md',
+                   '.csv', '.log', '.ini', '.cfg', '.conf', '.yaml', '.yml'}
+
+
+def build_corpus(base: Path, files: int, lines: int, seed: int = 7) -> int:
+    """Crear archivos de texto con vocabulario variado; devuelve los bytes escritos"""
+    rng = random.Random(seed)
+    total = 0
+    for i in range(files):
+        directory = base / f"carpeta_{i % 50}"
+        directory.mkdir(parents=True, exist_ok=True)
+        body = '\n'.join(
+            ' '.join(rng.choice(WORDS) + (str(rng.randint(0, 999)) if rng.random() < 0.2 else '')
+                     for _ in range(12))
+            for _ in range(lines))
+        if i % 97 == 0:
+            body += '\nlínea con la palabra rara zanahoria\n'
+        path = directory / f"doc_{i}.txt"
+        path.write_text(body, encoding='utf-8')
+        total += len(body.encode('utf-8'))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', help='Árbol existente a indexar')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--query', action='append', help='Palabra a buscar (se puede repetir)')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='jarvis_bench_ci_')
+    try:
+        if args.path:
+            root = args.path
+        else:
+            root = os.path.join(tmp, 'corpus')
+            written = build_corpus(Path(root), args.files, args.lines)
+            print(f"📝 Corpus sintético: {args.files} archivos, {written / 1024 / 1024:.1f} MB")
+
+        entries = [e for e in DirectoryScanner().scan([root]) if e.extension in TEXT_EXTENSIONS]
+        index = ContentIndex(Path(tmp) / 'content_index.db')
+
+        start = time.perf_counter()
+        index.sync(entries)
+        elapsed = time.perf_counter() - start
+        stats = index.get_stats()
+        print(f"🗂️ Indexación: {stats['indexed_files']} archivos en {elapsed:.2f}s "
+              f"({stats['files_per_second']:.0f} archivos/s, {stats['mb_per_second']:.1f} MB/s)")
+        print(f"💾 Tamaño en disco: {stats['size_on_disk'] / 1024 / 1024:.1f} MB, "
+              f"{stats['terms']} palabras distintas")
+
+        start = time.perf_counter()
+        index.sync(entries)
+        print(f"🔁 Comprobación sin cambios: {time.perf_counter() - start:.3f}s")
+
+        for query in args.query or ['zanahoria', 'factura', 'servi']:
+            index._query_latencies.clear()
+            candidates = set()
+            for _ in range(args.repeat):
+                candidates = index.lookup([query]) or set()
+            stats = index.get_stats()
+
+            searcher = ContentSearcher([query])
+            start = time.perf_counter()
+            verified = sum(1 for e in entries if e.path in candidates and searcher.contains(e.path))
+            verify_time = time.perf_counter() - start
+
+            full = ContentSearcher([query])
+            start = time.perf_counter()
+            scanned = sum(1 for e in entries if full.contains(e.path))
+            scan_time = time.perf_counter() - start
+
+            print(f"\n🔍 {query!r}: {len(candidates)} candidatos, {verified} verificados "
+                  f"(lectura completa: {scanned})")
+            print(f"   consulta p50 {stats['query_p50'] * 1e3:.1f} ms · p90 {stats['query_p90'] * 1e3:.1f} ms · "
+                  f"p99 {stats['query_p99'] * 1e3:.1f} ms")
+            print(f"   verificar candidatos {verify_time:.3f}s frente a leer todo {scan_time:.3f}s")
+
+        index.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la detección de tipo por contenido
+
+Genera un árbol temporal y añade fotos, PDF, audios y documentos de Office
+sin extensión, con extensiones genéricas (.bin, .tmp) o con nombres como
+"IMG_2024.05.03". Compara cuántos encuentra una búsqueda por categoría sólo
+con la extensión y con la detección por contenido, con el índice y
+recorriendo el disco, y mide la detección en frío, con la caché y la tasa
+de aciertos.
+
+Uso:
+    python benchmarks/bench_content_sniffer.py
+    python benchmarks/bench_content_sniffer.py --files 50000 --hidden 2000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_worker_search import build_tree  # noqa: E402
+from core.content_sniffer import ContentSniffer  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+from core.file_scanner import DirectoryScanner  # noqa: E402
+
+# Cabeceras mínimas de cada formato (categoría de la búsqueda, primeros bytes)
+SAMPLES = {
+    'imagenes': [b'\xff\xd8\xff\xe0\x00\x10JFIF\x00', b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'],
+    'documentos': [b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n',
+                   b'PK\x03\x04\x14\x00\x06\x00\x08\x00\x00\x00!\x00' + b'\x00' * 12
+                   + b'\x13\x00\x00\x00[Content_Types].xml'],
+    'audio': [b'ID3\x04\x00\x00\x00\x00\x00\x00', b'fLaC\x00\x00\x00\x22'],
+}
+NAMES = ['', '.bin', '.tmp', '.dat', '.crdownload']
+
+
+def add_hidden_files(root: Path, count: int, seed: int = 24):
+    """Archivos cuyo nombre no dice su tipo, repartidos por el árbol"""
+    rng = random.Random(seed)
+    directories = [path for path in root.rglob('*') if path.is_dir()]
+    expected = {category: 0 for category in SAMPLES}
+    for i in range(count):
+        category = rng.choice(list(SAMPLES))
+        head = rng.choice(SAMPLES[category])
+        suffix = rng.choice(NAMES)
+        name = f"IMG_2024.05.{i:04d}" if category == 'imagenes' and i % 3 == 0 else f"descarga_{i}{suffix}"
+        (rng.choice(directories) / name).write_bytes(head + rng.randbytes(rng.randint(64, 4096)))
+        expected[category] += 1
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--hidden', type=int, default=600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        build_tree(tree, args.files)
+        expected = add_hidden_files(tree, args.hidden)
+        print(f"🌳 {args.files} archivos y {args.hidden} sin extensión útil: "
+              + ", ".join(f"{count} de {category}" for category, count in expected.items()) + "\n")
+
+        def manager_for(label: str, sniff: bool) -> FileManager:
+            manager = FileManager(index_path=tmp_path / f'index_{label}.db',
+                                  content_index_path=tmp_path / f'content_{label}.db',
+                                  hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json',
+                                  hash_cache_path=tmp_path / 'hashes.db',
+                                  content_types_path=tmp_path / f'types_{label}.db')
+            if not sniff:
+                # Sin detección: el comportamiento anterior, sólo la extensión del nombre
+                manager.content_sniffer.close()
+                manager.content_sniffer = None
+                manager.file_index.sniffer = None
+            manager.search_paths = [tree]
+            return manager
+
+        plain = manager_for('extension', sniff=False)
+        sniffing = manager_for('contenido', sniff=True)
+        for label, manager in (("sólo extensión", plain), ("por contenido", sniffing)):
+            start = time.perf_counter()
+            manager.refresh_index(force=True)
+            print(f"{label:15s} indexar {(time.perf_counter() - start) * 1e3:8.1f} ms")
+        print()
+
+        for category in SAMPLES:
+            for label, manager in (("sólo extensión", plain), ("por contenido", sniffing)):
+                hidden = {}
+                for use_index in (True, False):
+                    start = time.perf_counter()
+                    result = manager.smart_search_files(category, max_results=100000, use_index=use_index,
+                                                        use_cache=False, time_limit=60)
+                    elapsed = time.perf_counter() - start
+                    hidden[use_index] = (sum(1 for item in result['results'] if item['name'].startswith(
+                        ('descarga_', 'IMG_2024.05.'))), elapsed)
+                print(f"{category:11s} {label:15s} índice {hidden[True][0]:4d}/{expected[category]} "
+                      f"({hidden[True][1] * 1e3:6.1f} ms)  recorrido {hidden[False][0]:4d}/{expected[category]} "
+                      f"({hidden[False][1] * 1e3:6.1f} ms)")
+
+        # Detección directa en frío y con la caché sobre los archivos del recorrido
+        entries = [entry for entry in DirectoryScanner().scan([str(tree)])]
+        sniffer = ContentSniffer(tmp_path / 'types_bench.db')
+        start = time.perf_counter()
+        sniffer.sniff_entries(entries)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        sniffer.sniff_entries(entries)
+        warm = time.perf_counter() - start
+        stats = sniffer.get_stats()
+        print(f"\n🔎 {len(entries)} archivos: en frío {cold * 1e3:.1f} ms "
+              f"({len(entries) / max(cold, 1e-9):.0f} archivos/s), con la caché {warm * 1e3:.1f} ms "
+              f"({len(entries) / max(warm, 1e-9):.0f} archivos/s); aciertos {stats['hit_rate']:.0%}, "
+              f"caché de {stats['size_on_disk'] / 1024:.0f} KB")
+        print(f"📊 Detección del gestor: {sniffing.get_content_sniffer_stats()}")
+        sniffer.close()
+        for manager in (plain, sniffing):
+            manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
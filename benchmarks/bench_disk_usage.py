@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los agregados de uso de disco
+
+Genera un árbol temporal con archivos dispersos de tamaños variados (sin
+ocupar disco de verdad) y compara lo que hacía el botón "Grandes" del gestor
+(recorrer o consultar todo y filtrar los de más de 10 MB) con los agregados:
+construirlos desde el índice y desde el catálogo en memoria, responder
+carpetas y archivos más grandes ya construidos, y actualizarlos tras crear
+archivos en una carpeta.
+
+Uso:
+    python benchmarks/bench_disk_usage.py
+    python benchmarks/bench_disk_usage.py --files 100000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_worker_search import build_tree  # noqa: E402
+from core.disk_usage import DiskUsage  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+
+
+def set_sizes(root: Path, seed: int = 23):
+    """Tamaños con cola larga: la mayoría pequeños y unos pocos de cientos de MB"""
+    rng = random.Random(seed)
+    for path in root.rglob('*'):
+        if path.is_file():
+            with open(path, 'r+b') as f:
+                f.truncate(int(rng.paretovariate(1.2) * 20 * 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        build_tree(tree, args.files)
+        set_sizes(tree)
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json',
+                              hash_cache_path=tmp_path / 'hashes.db', use_catalog=True)
+        manager.search_paths = [tree]
+        manager.refresh_index(force=True)
+        print(f"🌳 {args.files} archivos indexados\n")
+
+        query = "archivos grandes más de 10MB"
+        start = time.perf_counter()
+        result = manager.smart_search_files(query, max_results=50, use_index=False)
+        walk = time.perf_counter() - start
+        start = time.perf_counter()
+        manager.smart_search_files(query, max_results=50, use_cache=False)
+        indexed = time.perf_counter() - start
+        print(f"antes: '{query}' recorriendo {walk * 1e3:.1f} ms, con el índice {indexed * 1e3:.1f} ms "
+              f"({len(result['results'])} archivos, sin tamaños por carpeta)")
+
+        start = time.perf_counter()
+        usage = DiskUsage.from_rows(manager.file_index.iter_file_rows(), manager.extension_categories)
+        from_index = time.perf_counter() - start
+        catalog = manager.get_catalog()
+        start = time.perf_counter()
+        DiskUsage.from_rows(catalog.iter_rows(), manager.extension_categories)
+        from_catalog = time.perf_counter() - start
+        print(f"construir los agregados: desde el índice {from_index * 1e3:.1f} ms, "
+              f"desde el catálogo {from_catalog * 1e3:.1f} ms ({usage.get_stats()['folders']} carpetas)")
+
+        manager.get_disk_usage()
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            report = manager.get_disk_usage_report(limit=10, refresh=False)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        top_folder = report['largest_folders'][0]
+        top_file = report['largest_files'][0]
+        print(f"informe ya construido (10 carpetas, 10 archivos, por tipo): {best * 1e3:.2f} ms; "
+              f"mayor carpeta {top_folder['size_human']}, mayor archivo {top_file['size_human']}")
+
+        # Archivos nuevos en una carpeta: sólo esa carpeta se vuelve a leer
+        target = tree / 'Downloads' / 'carpeta_nueva'
+        target.mkdir(parents=True)
+        for i in range(5):
+            with open(target / f"video_{i}.mp4", 'wb') as f:
+                f.truncate((i + 1) * 400 * 1024 * 1024)
+        manager.refresh_index(force=True)
+        start = time.perf_counter()
+        usage = manager.get_disk_usage(refresh=False)
+        update = time.perf_counter() - start
+        report = manager.get_disk_usage_report(limit=3, refresh=False)
+        print(f"actualización incremental: {update * 1e3:.2f} ms ({usage.get_stats()['updated_dirs']} carpetas "
+              f"releídas); mayor archivo ahora {report['largest_files'][0]['name']} "
+              f"({report['largest_files'][0]['size_human']})")
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la búsqueda de duplicados
+
+Genera un árbol temporal con archivos de contenido aleatorio, copias
+exactas, archivos del mismo tamaño con distinto contenido y archivos que
+sólo difieren en el medio (el hash parcial coincide y hace falta el
+completo). Compara el enfoque ingenuo (hash completo de todos los archivos)
+con la búsqueda por etapas, la primera vez y repitiendo con la caché de
+hashes; después modifica un archivo y comprueba que sólo se vuelve a leer
+ese.
+
+Uso:
+    python benchmarks/bench_duplicates.py
+    python benchmarks/bench_duplicates.py --files 5000 --max-kb 2048
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.duplicate_finder import DIGEST_SIZE, full_hash  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+
+
+def build_tree(root: Path, count: int, max_kb: int, seed: int = 22) -> int:
+    """Árbol con un 10% de copias y un 5% de archivos que sólo cambian en el medio; devuelve los bytes"""
+    rng = random.Random(seed)
+    total = 0
+    originals = []
+    for i in range(count):
+        directory = root / f"carpeta_{i % 40}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"archivo_{i}.bin"
+        roll = rng.random()
+        if originals and roll < 0.10:
+            shutil.copyfile(rng.choice(originals), path)
+        elif originals and roll < 0.15:
+            # Mismo tamaño, mismo principio y final, un byte distinto en el medio
+            data = bytearray(Path(rng.choice(originals)).read_bytes())
+            data[len(data) // 2] ^= 0xFF
+            path.write_bytes(bytes(data))
+        else:
+            # Tamaños repetidos a propósito: muchos archivos comparten tamaño sin ser iguales
+            size = rng.choice([4, 16, 64, 256, max_kb]) * 1024
+            path.write_bytes(rng.randbytes(size))
+            originals.append(path)
+        total += path.stat().st_size
+    return total
+
+
+def naive(root: Path):
+    """Hash completo de todos los archivos"""
+    groups = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            groups.setdefault(full_hash(path), []).append(path)
+    return {digest: paths for digest, paths in groups.items() if len(paths) > 1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--max-kb', type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        total = build_tree(tree, args.files, args.max_kb)
+        print(f"🌳 {args.files} archivos, {total / (1024 * 1024):.0f} MB (BLAKE2b de {DIGEST_SIZE} bytes)\n")
+
+        start = time.perf_counter()
+        expected = naive(tree)
+        naive_time = time.perf_counter() - start
+        print(f"ingenuo         {naive_time * 1e3:8.1f} ms  {len(expected)} grupos, "
+              f"{total / (1024 * 1024):.0f} MB leídos")
+
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json',
+                              hash_cache_path=tmp_path / 'hashes.db')
+        manager.search_paths = [tree]
+        manager.refresh_index(force=True)
+
+        def run(label: str):
+            start = time.perf_counter()
+            first_group = None
+            final = None
+            for event in manager.iter_duplicates(min_size=1):
+                if not event['done'] and first_group is None:
+                    first_group = time.perf_counter() - start
+                if event['done']:
+                    final = event
+            elapsed = time.perf_counter() - start
+            stats = final['stats']
+            same = ({tuple(group['paths']) for group in final['results']}
+                    == {tuple(sorted(paths)) for paths in expected.values()})
+            print(f"{label:15s} {elapsed * 1e3:8.1f} ms  {stats['groups']} grupos, "
+                  f"{stats['bytes_read'] / (1024 * 1024):.1f} MB leídos, "
+                  f"{stats['partial_hashes']} parciales, {stats['full_hashes']} completos, "
+                  f"{stats['cache_hits']} de la caché; primer grupo en "
+                  f"{(first_group or 0) * 1e3:.1f} ms{'' if same else '  ⚠️ grupos distintos'}")
+            return elapsed, final
+
+        staged, final = run("por etapas")
+        cached, _ = run("con caché")
+
+        # Un archivo modificado cambia su mtime: sólo ese se vuelve a leer
+        changed = Path(final['results'][0]['paths'][0])
+        with open(changed, 'r+b') as f:
+            f.write(b'cambio')
+        expected = naive(tree)
+        manager.refresh_index(force=True)
+        run("tras modificar")
+
+        print(f"\n💾 {final['stats']['reclaimable_human']} recuperables; "
+              f"{naive_time / max(staged, 1e-9):.1f}x más rápido por etapas, "
+              f"{naive_time / max(cached, 1e-9):.0f}x con la caché")
+        print(f"📊 Caché de hashes: {manager.get_hash_cache_stats()}")
+        manager.file_index.close()
+        manager.hash_cache.close()
+
+
+if __name__ == '__main__':
+    main()
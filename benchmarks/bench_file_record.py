@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los resultados de búsqueda: diccionarios completos frente a FileRecord
+
+Simula una búsqueda con 10k coincidencias: construye la información de cada
+resultado, muestra los 10 primeros (como la interfaz) y mide bloques de
+memoria asignados, pico de memoria y tiempo con cada representación.
+
+Uso:
+    python benchmarks/bench_file_record.py
+    python benchmarks/bench_file_record.py --results 50000 --shown 20
+"""
+
+import argparse
+import mimetypes
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_record import FileRecord, format_date, format_file_size  # noqa: E402
+from core.file_scanner import ScanEntry  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+
+WORDS = ['informe', 'factura', 'foto', 'notas', 'backup', 'presupuesto', 'proyecto', 'datos']
+EXTENSIONS = ['.pdf', '.txt', '.docx', '.jpg', '.png', '.py', '.mp4', '.mp3', '.csv', '.zip']
+
+
+def build_entries(count: int, seed: int = 16):
+    rng = random.Random(seed)
+    now = time.time()
+    entries = []
+    for i in range(count):
+        directory = f"/home/usuario/proyectos/p{i % 300}/carpeta_{i // 40}"
+        name = f"{rng.choice(WORDS)}_{i}{rng.choice(EXTENSIONS)}"
+        entries.append(ScanEntry(f"{directory}/{name}", name, directory,
+                                 int(rng.lognormvariate(11, 2.5)), now - rng.uniform(0, 365 * 86400)))
+    return entries
+
+
+def eager_dict(entry, categories):
+    """La información de resultado tal como se construía antes (todo calculado)"""
+    file_ext = entry.extension
+    return {
+        'path': entry.path,
+        'name': entry.name,
+        'size': entry.size,
+        'size_human': format_file_size(entry.size),
+        'modified': entry.mtime,
+        'modified_human': format_date(datetime.fromtimestamp(entry.mtime)),
+        'extension': file_ext,
+        'category': categories.get(file_ext, 'otros'),
+        'directory': entry.directory,
+        'is_hidden': entry.name.startswith('.'),
+        'mime_type': mimetypes.guess_type(entry.path)[0]
+    }
+
+
+def show(results, shown: int) -> int:
+    """Lo que lee la interfaz de los primeros resultados"""
+    chars = 0
+    for info in results[:shown]:
+        chars += len(f"{info['name']} {info['size_human']} {info['modified_human']} "
+                     f"{info['category']} {info.get('mime_type')}")
+    return chars
+
+
+def measure(label: str, build, entries, shown: int):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    results = [build(entry) for entry in entries]
+    for info in results:
+        info['content_match'] = False
+    show(results, shown)
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print(f"{label:12s} {elapsed * 1e3:8.1f} ms  {blocks:9d} bloques  "
+          f"{size / 1024 / 1024:7.2f} MB retenidos  pico {peak / 1024 / 1024:7.2f} MB  "
+          f"({size / len(entries):.0f} bytes/resultado)")
+    del results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results', type=int, default=10000)
+    parser.add_argument('--shown', type=int, default=10)
+    args = parser.parse_args()
+
+    entries = build_entries(args.results)
+    manager = FileManager(use_catalog=False)
+    categories = manager.extension_categories
+    mimetypes.init()
+    print(f"🔍 {len(entries)} resultados, {args.shown} mostrados\n")
+
+    measure('dict', lambda entry: eager_dict(entry, categories), entries, args.shown)
+    measure('FileRecord', manager._file_info_from_entry, entries, args.shown)
+
+    if manager.file_index is not None:
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las reglas de exclusión: directorios podados y tiempo ahorrado
+
+Crea un árbol sintético con código fuente, salidas de compilación (target/,
+build/), conjuntos de datos e imágenes de máquinas virtuales, y lo recorre
+con y sin reglas (globales y un .jarvisignore por proyecto).
+
+Uso:
+    python benchmarks/bench_ignore_rules.py
+    python benchmarks/bench_ignore_rules.py --projects 80 --path ~/proyectos --pattern "target/"
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_scanner import DirectoryScanner  # noqa: E402
+from core.ignore_rules import IGNORE_FILE_NAME, IgnoreMatcher  # noqa: E402
+
+GLOBAL_PATTERNS = ['target/', '*.vmdk', '*.qcow2']
+PROJECT_RULES = "# generado\nbuild/\n/datasets/raw\n!datasets/raw/README.md\n*.tmp\n"
+
+
+def touch_files(directory: Path, count: int, suffix: str):
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        (directory / f"f{i}{suffix}").touch()
+
+
+def build_tree(base: Path, projects: int, fanout: int) -> int:
+    """Proyectos con fuentes y salidas pesadas; devuelve los directorios creados"""
+    dirs = 0
+    for p in range(projects):
+        project = base / f"proyecto_{p}"
+        (project / IGNORE_FILE_NAME).parent.mkdir(parents=True, exist_ok=True)
+        (project / IGNORE_FILE_NAME).write_text(PROJECT_RULES, encoding='utf-8')
+        for i in range(4):
+            touch_files(project / "src" / f"mod{i}", 10, ".py")
+            dirs += 1
+        for heavy in ("target", "build", "datasets/raw"):
+            for i in range(fanout):
+                touch_files(project / heavy / f"parte{i}" / "sub", 20, ".bin")
+                dirs += 2
+        touch_files(project / "vm", 3, ".vmdk")
+        dirs += 1
+    return dirs
+
+
+def timed_scan(scanner: DirectoryScanner, roots, repeat: int):
+    best = None
+    stats = {}
+    for _ in range(repeat):
+        stats = {}
+        start = time.perf_counter()
+        files = sum(1 for _ in scanner.scan(roots, stats=stats))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, files, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', help='Árbol existente a recorrer')
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--fanout', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pattern', action='append', help='Patrón global (se puede repetir)')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='jarvis_bench_ignore_')
+    try:
+        if args.path:
+            root = os.path.expanduser(args.path)
+        else:
+            root = os.path.join(tmp, 'arbol')
+            created = build_tree(Path(root), args.projects, args.fanout)
+            print(f"🌳 Árbol sintético: {args.projects} proyectos, ~{created} directorios")
+
+        patterns = args.pattern or GLOBAL_PATTERNS
+        plain = DirectoryScanner()
+        ignore = IgnoreMatcher(patterns)
+        pruning = DirectoryScanner(ignore=ignore)
+
+        base_time, base_files, base_stats = timed_scan(plain, [root], args.repeat)
+        rule_time, rule_files, rule_stats = timed_scan(pruning, [root], args.repeat)
+
+        print(f"\nSin reglas:  {base_stats['dirs_scanned']:6d} directorios, {base_files:7d} archivos, "
+              f"{base_time:.3f}s")
+        print(f"Con reglas:  {rule_stats['dirs_scanned']:6d} directorios, {rule_files:7d} archivos, "
+              f"{rule_time:.3f}s")
+        print(f"✂️ Podados {rule_stats['pruned_dirs']} directorios antes de entrar "
+              f"({base_stats['dirs_scanned'] - rule_stats['dirs_scanned']} sin recorrer), "
+              f"{ignore.files_loaded // args.repeat} archivos {IGNORE_FILE_NAME} por pasada")
+        if rule_time > 0:
+            print(f"⏱️ Ahorro: {base_time - rule_time:.3f}s (x{base_time / rule_time:.2f})")
+
+        # Coste de la comprobación por entrada
+        chain = ignore.rules_for(os.path.normpath(root))
+        entries = [(os.path.join(root, f"archivo_{i}.txt"), f"archivo_{i}.txt") for i in range(100000)]
+        match = ignore.match_chain
+        start = time.perf_counter()
+        for path, name in entries:
+            match(chain, path, name, False)
+        per_check = (time.perf_counter() - start) / len(entries)
+        print(f"🔎 Comprobación por entrada: {per_check * 1e9:.0f} ns")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
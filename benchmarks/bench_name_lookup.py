@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la resolución de un nombre de archivo: tabla hash frente a os.walk
+
+Mide la construcción y la memoria de la tabla nombre -> posiciones sobre un
+catálogo sintético (1M de archivos por defecto) y la latencia de buscar un
+nombre único y uno repetido, comparada con el recorrido completo con
+os.walk que hacía buscar_archivo_especifico sobre un árbol temporal real.
+
+Uso:
+    python benchmarks/bench_name_lookup.py
+    python benchmarks/bench_name_lookup.py --files 200000 --walk-files 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_catalog import build_rows  # noqa: E402
+from core.file_catalog import FileCatalog  # noqa: E402
+
+
+def best_of(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def walk_lookup(root: str, name: str):
+    """El recorrido que hacía buscar_archivo_especifico"""
+    for directory, _, files in os.walk(root):
+        for file in files:
+            if file.lower() == name.lower():
+                return os.path.join(directory, file)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=1000000)
+    parser.add_argument('--walk-files', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    now = time.time()
+    rows = build_rows(args.files)
+    rows.extend(('main.py', '.py', 100, now - i * 3600, f'/home/usuario/proyectos/p{i}') for i in range(40))
+    catalog = FileCatalog.from_rows(rows)
+    index = catalog.name_index()
+    memory = index.memory_usage()
+    print(f"#️⃣ {len(index)} nombres ({memory['distinct']} distintos) en {index.build_time:.2f}s, "
+          f"{(memory['table'] + memory['chains']) / 1024 / 1024:.1f} MB")
+
+    unique = catalog.name(len(catalog) // 2)
+    for label, name in (('único', unique), ('repetido', 'main.py'), ('inexistente', 'no_existe.txt')):
+        elapsed = best_of(lambda: catalog.lookup_name(name), args.repeat)
+        print(f"   {label:12s} {name!r}: {len(catalog.lookup_name(name))} archivos en {elapsed * 1e6:.1f} µs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_dir = 50
+        for d in range(args.walk_files // per_dir):
+            directory = os.path.join(tmp, f"d{d % 40}", f"sub{d}")
+            os.makedirs(directory, exist_ok=True)
+            for i in range(per_dir):
+                open(os.path.join(directory, f"archivo_{d}_{i}.txt"), 'w').close()
+        target = f"archivo_{args.walk_files // per_dir - 1}_{per_dir - 1}.txt"
+        elapsed = best_of(lambda: walk_lookup(tmp, target), max(1, args.repeat // 2))
+        print(f"\n🚶 os.walk sobre {args.walk_files} archivos: {elapsed * 1e3:.1f} ms (último archivo del árbol)")
+
+
+if __name__ == '__main__':
+    main()
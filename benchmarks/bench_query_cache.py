@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la caché de búsquedas del gestor de archivos
+
+Genera un árbol de archivos temporal, lo indexa y repite las consultas de
+los botones rápidos del gestor (recientes, grandes, categorías) sin caché y
+con ella; después crea un archivo y comprueba que la entrada afectada se
+invalida por el mtime de su directorio y que el resultado incluye el
+archivo nuevo.
+
+Uso:
+    python benchmarks/bench_query_cache.py
+    python benchmarks/bench_query_cache.py --files 50000 --repeat 20
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_worker_search import build_tree  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+
+# Consultas de search_recent_in_manager, search_large_in_manager y search_category_in_manager
+QUERIES = [
+    "archivos recientes del último mes",
+    "archivos grandes más de 10MB",
+    "archivos tipo documento word excel powerpoint pdf txt",
+    "archivos tipo imagen jpg jpeg png gif bmp",
+    "archivos tipo código python java js html css",
+]
+# Variantes de una consulta anterior que comparten entrada
+NEAR_REPEATS = [
+    "archivos grandes",
+    "archivos tipo imagen png jpg gif bmp jpeg",
+]
+
+
+def timed_search(manager: FileManager, query: str, **kwargs):
+    start = time.perf_counter()
+    result = manager.smart_search_files(query, max_results=50, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        build_tree(tree, args.files)
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json')
+        manager.search_paths = [tree]
+        manager.refresh_index(force=True)
+        print(f"🌳 Árbol de {args.files} archivos indexado\n")
+
+        # Índice al día (vigilante activo o refresco reciente): sólo cuenta la consulta
+        print("Índice al día:")
+        for query in QUERIES:
+            uncached = min(timed_search(manager, query, use_cache=False)[0] for _ in range(args.repeat))
+            timed_search(manager, query)
+            cached = min(timed_search(manager, query)[0] for _ in range(args.repeat))
+            print(f"  {query[:40]:40s} sin caché {uncached * 1e3:7.2f} ms   con caché {cached * 1e3:6.2f} ms "
+                  f"({uncached / max(cached, 1e-9):.0f}x)")
+        for query in NEAR_REPEATS:
+            elapsed, result = timed_search(manager, query)
+            print(f"  {query[:40]:40s} {elapsed * 1e3:7.2f} ms  desde la caché: {result['stats']['cache']['hit']}")
+
+        # Refresco en cada búsqueda: la validez se comprueba con el mtime de todos los directorios
+        manager.index_refresh_interval = 0
+        print("\nComprobando el mtime de los directorios en cada búsqueda:")
+        for query in QUERIES[:2]:
+            uncached = min(timed_search(manager, query, use_cache=False)[0] for _ in range(args.repeat))
+            cached = min(timed_search(manager, query)[0] for _ in range(args.repeat))
+            print(f"  {query[:40]:40s} sin caché {uncached * 1e3:7.2f} ms   con caché {cached * 1e3:6.2f} ms")
+
+        # Un archivo nuevo cambia el mtime de su directorio: la entrada deja de valer
+        query = "informe"
+        timed_search(manager, query)
+        new_file = tree / 'Documents' / 'carpeta_0' / 'informe_nuevo.pdf'
+        new_file.touch()
+        elapsed, result = timed_search(manager, query)
+        found = any(r['path'] == str(new_file) for r in result['results'])
+        print(f"\n📄 Tras crear {new_file.name}: desde la caché {result['stats']['cache']['hit']}, "
+              f"archivo nuevo en los resultados: {found} ({elapsed * 1e3:.1f} ms)")
+
+        stats = manager.get_query_cache_stats()
+        print(f"\n📊 {stats['hits']} aciertos, {stats['misses']} fallos, {stats['evictions']} expulsiones, "
+              f"{stats['invalidations']} invalidaciones; {stats['entries']} entradas, "
+              f"{stats['bytes'] / 1024:.0f} KB")
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark del coste por archivo de evaluar una consulta
+
+Compara los filtros anteriores (lista de extensiones, datetime.now() por
+archivo y any(keyword in name)) con un QueryPlan compilado (frozenset,
+timestamp de corte y un único patrón para todas las palabras clave).
+
+Uso:
+    python benchmarks/bench_query_plan.py
+    python benchmarks/bench_query_plan.py --files 500000 --query "informe presupuesto factura .pdf"
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_manager import FileManager  # noqa: E402
+from core.file_scanner import ScanEntry  # noqa: E402
+
+WORDS = ['informe', 'factura', 'foto', 'notas', 'backup', 'presupuesto', 'proyecto',
+         'datos', 'video', 'cancion', 'resumen', 'contrato', 'plantilla', 'borrador']
+EXTENSIONS = ['.pdf', '.txt', '.docx', '.jpg', '.png', '.py', '.mp4', '.mp3', '.csv', '.zip']
+
+
+def build_entries(count: int, seed: int = 42):
+    """Entradas sintéticas con nombres, tamaños y fechas variados"""
+    rng = random.Random(seed)
+    now = time.time()
+    entries = []
+    for i in range(count):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}{rng.choice(EXTENSIONS)}"
+        entries.append(ScanEntry(f"/tmp/bench/{name}", name, "/tmp/bench",
+                                 rng.randint(0, 50 * 1024 * 1024), now - rng.uniform(0, 90 * 86400)))
+    return entries
+
+
+def legacy_matches(entry, params) -> bool:
+    """Filtros tal como se evaluaban antes de compilar la consulta"""
+    if params['file_types']:
+        if entry.extension not in params['file_types']:
+            return False
+    if params['recent_days']:
+        cutoff_date = datetime.now() - timedelta(days=params['recent_days'])
+        if datetime.fromtimestamp(entry.mtime) < cutoff_date:
+            return False
+    if params.get('size_range'):
+        min_size, max_size = params['size_range']
+        if min_size and entry.size < min_size:
+            return False
+        if max_size and entry.size > max_size:
+            return False
+    keywords = params['keywords']
+    if not keywords:
+        return True
+    filename_lower = entry.name.lower()
+    return any(keyword in filename_lower for keyword in keywords)
+
+
+def plan_matches(entry, plan) -> bool:
+    """Filtros del bucle actual con el plan compilado"""
+    return plan.matches_metadata(entry) and plan.matches_name(entry.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--query', action='append',
+                        help='Consulta a medir (se puede repetir)')
+    args = parser.parse_args()
+
+    queries = args.query or [
+        "informe factura presupuesto",
+        "documentos de este mes",
+        "fotos grandes de la semana contrato",
+        "archivos .py .txt notas backup resumen borrador"
+    ]
+
+    manager = FileManager()
+    entries = build_entries(args.files)
+    print(f"📄 {len(entries)} entradas sintéticas")
+
+    def measure(func, arg):
+        best = None
+        matched = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matched = sum(1 for entry in entries if func(entry, arg))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, matched
+
+    for query in queries:
+        plan = manager.compile_query(query)
+        # Misma consulta con los parámetros ya resueltos (aísla el coste del bucle)
+        legacy, legacy_count = measure(legacy_matches, plan.as_params())
+        compiled, plan_count = measure(plan_matches, plan)
+        per_file = 1e9 / len(entries)
+        print(f"\n🔍 {query!r}  keywords={list(plan.keywords)}")
+        print(f"   antes:     {legacy * per_file:8.1f} ns/archivo  ({legacy_count} coincidencias)")
+        print(f"   compilado: {compiled * per_file:8.1f} ns/archivo  ({plan_count} coincidencias)"
+              f"  x{legacy / compiled:.2f}")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            manager.compile_query(query)
+        print(f"   compilar la consulta: {(time.perf_counter() - start) * 1e3:.1f} µs")
+
+    if manager.file_index is not None:
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las preguntas de seguimiento sobre la última búsqueda
+
+Genera un árbol de archivos temporal, busca una palabra frecuente y
+responde a "sólo los pdf" y "y los de esta semana" de dos formas: con una
+búsqueda nueva (lo que se hacía antes, recorriendo el disco o con el
+índice) y filtrando en memoria el conjunto de resultados de la sesión.
+También mide la página N del listado completo frente a construir el texto
+de todos los resultados.
+
+Uso:
+    python benchmarks/bench_search_session.py
+    python benchmarks/bench_search_session.py --files 50000 --term informe
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_worker_search import build_tree  # noqa: E402
+from core.file_manager import FileManager  # noqa: E402
+from core.search_session import SearchSession  # noqa: E402
+
+# Pregunta de seguimiento y los filtros equivalentes de una búsqueda nueva
+FOLLOW_UPS = [
+    ("sólo los pdf", {'file_types': ['.pdf']}),
+    ("y los de esta semana", {'recent_days': 7}),
+]
+
+
+def best_of(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--term', default='informe')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        build_tree(tree, args.files)
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json')
+        manager.search_paths = [tree]
+        manager.refresh_index(force=True)
+
+        session = SearchSession(manager, max_results=5000)
+        start = time.perf_counter()
+        base = session.search(args.term)
+        print(f"🌳 {args.files} archivos; '{args.term}': {len(base)} resultados en "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms (completo: {base.complete})\n")
+
+        for follow_up, kwargs in FOLLOW_UPS:
+            query = args.term
+            walk = best_of(lambda: manager.smart_search_files(query, max_results=5000, use_index=False,
+                                                              **kwargs), max(1, args.repeat // 2))
+            index = best_of(lambda: manager.smart_search_files(query, max_results=5000, use_cache=False,
+                                                               **kwargs), args.repeat)
+
+            def refine():
+                session.current = session.base
+                return session.follow_up(follow_up)
+            memory = best_of(refine, args.repeat)
+            result = refine()
+            print(f"{follow_up!r:24s} recorrido {walk * 1e3:7.1f} ms   índice {index * 1e3:6.1f} ms   "
+                  f"memoria {memory * 1e3:5.2f} ms  ({len(result)} archivos, {result.source})")
+
+        session.current = session.base
+        full = best_of(lambda: ''.join(f"{r['name']} {r['path']} {r['size_human']}\n" for r in base.records),
+                       args.repeat)
+        page = best_of(lambda: ''.join(f"{r['name']} {r['path']} {r['size_human']}\n"
+                                       for r in session.page(base.total_pages // 2).items), args.repeat)
+        print(f"\n📋 Listado de {len(base)} resultados: todo {full * 1e3:.2f} ms, "
+              f"una página {page * 1e3:.3f} ms")
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la extracción de texto de documentos
+
+Genera un árbol temporal con documentos Word, Excel, PowerPoint,
+OpenDocument y PDF (con flujos FlateDecode y fuentes con CMap ToUnicode)
+que contienen palabras conocidas, y mide:
+- cuántos encuentra "buscar en contenido" antes (sólo archivos de texto)
+  y con la extracción,
+- la extracción en frío en el proceso principal y en el pool de procesos,
+- la repetición con la caché y tras modificar unos pocos documentos.
+
+Uso:
+    python benchmarks/bench_text_extraction.py
+    python benchmarks/bench_text_extraction.py --docs 1000 --paragraphs 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_manager import FileManager  # noqa: E402
+from core.file_scanner import DirectoryScanner  # noqa: E402
+from core.text_extractor import TextExtractor  # noqa: E402
+
+WORDS = ("contrato alquiler factura presupuesto reunión proyecto informe ventas cliente proveedor "
+         "entrega pago revisión acuerdo plazo garantía servicio pedido balance trimestre").split()
+# Palabra que sólo aparece dentro de los documentos
+NEEDLE = "zarzaparrilla"
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+S_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+ODF_NS = ('xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+          'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+          'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"')
+
+
+def make_docx(path: Path, paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(p)}</w:t></w:r></w:p>' for p in paragraphs)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+
+
+def make_xlsx(path: Path, paragraphs):
+    strings = ''.join(f'<si><t>{escape(p)}</t></si>' for p in paragraphs)
+    rows = ''.join(f'<row r="{i + 1}"><c r="A{i + 1}" t="s"><v>{i}</v></c><c r="B{i + 1}"><v>{i * 7}</v></c></row>'
+                   for i in range(len(paragraphs)))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('xl/workbook.xml', f'<workbook xmlns="{S_NS}"/>')
+        archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{S_NS}">{strings}</sst>')
+        archive.writestr('xl/worksheets/sheet1.xml', f'<worksheet xmlns="{S_NS}"><sheetData>{rows}</sheetData></worksheet>')
+
+
+def make_pptx(path: Path, paragraphs):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('ppt/presentation.xml', f'<p:presentation xmlns:p="{P_NS}"/>')
+        for number in range(0, len(paragraphs), 10):
+            texts = ''.join(f'<a:p><a:r><a:t>{escape(p)}</a:t></a:r></a:p>' for p in paragraphs[number:number + 10])
+            archive.writestr(f'ppt/slides/slide{number // 10 + 1}.xml',
+                             f'<p:sld xmlns:p="{P_NS}" xmlns:a="{A_NS}"><p:txBody>{texts}</p:txBody></p:sld>')
+
+
+def make_odt(path: Path, paragraphs):
+    body = ''.join(f'<text:p>{escape(p)}</text:p>' for p in paragraphs)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.text', zipfile.ZIP_STORED)
+        archive.writestr('content.xml', f'<office:document-content {ODF_NS}><office:body><office:text>'
+                                        f'{body}</office:text></office:body></office:document-content>')
+
+
+def _pdf_literal(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def make_pdf(path: Path, paragraphs):
+    """PDF con una página en Helvetica (WinAnsi) y otra con una fuente CID y su CMap ToUnicode"""
+    half = len(paragraphs) // 2
+    first = [b'BT /F1 11 Tf 72 760 Td 14 TL']
+    for paragraph in paragraphs[:half]:
+        words = paragraph.split(' ')
+        # Un array TJ con huecos entre palabras, como los de los procesadores de texto
+        items = b' -300 '.join(_pdf_literal(word) for word in words)
+        first.append(b'[' + items + b'] TJ T*')
+    first.append(b'ET')
+    # Segunda página: cada carácter es un código de 2 bytes (índice en la tabla de caracteres)
+    chars = sorted(set(''.join(paragraphs[half:])))
+    codes = {char: index + 1 for index, char in enumerate(chars)}
+    second = [b'BT /F2 11 Tf']
+    for line, paragraph in enumerate(paragraphs[half:]):
+        encoded = ''.join(f'{codes[char]:04X}' for char in paragraph).encode()
+        second.append(b'1 0 0 1 72 %d Tm <%s> Tj' % (760 - 14 * line, encoded))
+    second.append(b'ET')
+    cmap = [b'/CIDInit /ProcSet findresource begin 12 dict begin begincmap',
+            b'1 begincodespacerange <0000> <FFFF> endcodespacerange',
+            b'%d beginbfchar' % len(chars)]
+    cmap += [b'<%04X> <%04X>' % (codes[char], ord(char)) for char in chars]
+    cmap += [b'endbfchar endcmap CMapName currentdict /CMap defineresource pop end end']
+
+    def stream(data: bytes) -> bytes:
+        packed = zlib.compress(data)
+        return b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(packed) + packed + b'\nendstream'
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 /Resources << /Font << /F1 7 0 R /F2 8 0 R >> >> >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 5 0 R >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents [6 0 R] >>',
+        stream(b'\n'.join(first)),
+        stream(b'\n'.join(second)),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type0 /BaseFont /Subset+Arial /Encoding /Identity-H /ToUnicode 9 0 R >>',
+        stream(b'\n'.join(cmap)),
+    ]
+    out = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+BUILDERS = {'.docx': make_docx, '.xlsx': make_xlsx, '.pptx': make_pptx, '.odt': make_odt, '.pdf': make_pdf}
+
+
+def build_documents(root: Path, count: int, paragraphs: int, seed: int = 25) -> int:
+    """Documentos repartidos en carpetas; uno de cada cinco lleva la palabra buscada. Devuelve cuántos"""
+    rng = random.Random(seed)
+    expected = 0
+    for i in range(count):
+        directory = root / f"carpeta_{i % 20}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(paragraphs)]
+        if i % 5 == 0:
+            lines[rng.randrange(paragraphs)] += f" {NEEDLE}"
+            expected += 1
+        extension = list(BUILDERS)[i % len(BUILDERS)]
+        BUILDERS[extension](directory / f"documento_{i}{extension}", lines)
+    # Unos cuantos archivos de texto con la palabra: lo único que se encontraba antes
+    for i in range(10):
+        (root / f"nota_{i}.txt").write_text(f"apunte {NEEDLE} {i}\n" if i % 2 == 0 else "apunte\n")
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=400)
+    parser.add_argument('--paragraphs', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        expected = build_documents(tree, args.docs, args.paragraphs)
+        entries = [entry for entry in DirectoryScanner().scan([str(tree)]) if entry.extension in BUILDERS]
+        total_mb = sum(entry.size for entry in entries) / (1024 * 1024)
+        print(f"📄 {len(entries)} documentos ({total_mb:.1f} MB), {expected} con '{NEEDLE}' "
+              f"y 5 notas de texto con la palabra\n")
+
+        for label, parallel in (("proceso principal", False), (f"pool de {args.workers} procesos", True)):
+            extractor = TextExtractor(tmp_path / f'texts_{parallel}.db', max_workers=args.workers)
+            start = time.perf_counter()
+            texts = extractor.extract_entries(entries, parallel=parallel)
+            elapsed = time.perf_counter() - start
+            stats = extractor.get_stats()
+            found = sum(1 for text in texts.values() if text and NEEDLE in text)
+            print(f"extracción en frío, {label:19s} {elapsed * 1e3:8.1f} ms  "
+                  f"{len(entries) / elapsed:7.0f} docs/s  {total_mb / elapsed:6.1f} MB/s  "
+                  f"({stats['errors']} errores, {found}/{expected} con la palabra)")
+            extractor.close()
+
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json',
+                              hash_cache_path=tmp_path / 'hashes.db', content_types_path=tmp_path / 'types.db',
+                              text_cache_path=tmp_path / 'texts.db')
+        manager.search_paths = [tree]
+        manager.refresh_index(force=True)
+
+        # Sin extracción: el comportamiento anterior, sólo los archivos de texto
+        extractor = manager.text_extractor
+        saved = (manager.document_extensions, manager.content_extensions)
+        manager.text_extractor = manager.content_index.text_extractor = None
+        manager.document_extensions, manager.content_extensions = frozenset(), manager.text_extensions
+        start = time.perf_counter()
+        before = manager.search_in_content(NEEDLE, max_results=10000, time_limit=120)
+        print(f"\nantes: 'buscar en contenido {NEEDLE}' {(time.perf_counter() - start) * 1e3:.1f} ms, "
+              f"{len(before['results'])} archivos (sólo las notas de texto)")
+        manager.text_extractor = manager.content_index.text_extractor = extractor
+        manager.document_extensions, manager.content_extensions = saved
+
+        def run(label: str):
+            start = time.perf_counter()
+            result = manager.search_in_content(NEEDLE, max_results=10000, time_limit=120)
+            elapsed = time.perf_counter() - start
+            documents = sum(1 for item in result['results'] if item['extension'] in BUILDERS)
+            print(f"{label:20s} {elapsed * 1e3:8.1f} ms  {len(result['results'])} archivos "
+                  f"({documents} documentos, {manager.get_text_extraction_stats()['extracted']} extraídos en total)")
+
+        run("con extracción")
+        run("con la caché")
+        # Unos pocos documentos guardados de nuevo como lo hacen los editores (archivo
+        # temporal y renombrado): sólo esos se vuelven a extraer
+        for entry in entries[:5]:
+            path = Path(entry.path)
+            saved_copy = path.with_name(path.name + '.tmp')
+            BUILDERS[path.suffix](saved_copy, [f"{NEEDLE} revisado"] * 4)
+            os.replace(saved_copy, path)
+        manager.refresh_index(force=True)
+        run("tras modificar 5")
+
+        stats = manager.get_text_extraction_stats()
+        print(f"\n📊 Extracción: {stats['extracted']} extraídos, {stats['files_per_second']:.0f} docs/s, "
+              f"{stats['mb_per_second']:.1f} MB/s, aciertos de la caché {stats['hit_rate']:.0%}, "
+              f"caché de {stats['size_on_disk'] / 1024:.0f} KB")
+        manager.text_extractor.close()
+        manager.file_index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de buscar_archivos_pc: un glob recursivo por extensión frente al motor común
+
+Genera un árbol de archivos temporal y compara la búsqueda anterior de
+JarvisWorker.buscar_archivos_pc (un glob('**/*termino*.ext') por cada una de
+las ~50 extensiones y cada directorio, con deduplicación O(n²)) con el
+motor de FileManager que usa ahora: un único recorrido paralelo y, con el
+índice, una consulta sin recorrer el disco.
+
+Uso:
+    python benchmarks/bench_worker_search.py
+    python benchmarks/bench_worker_search.py --files 50000 --term presupuesto
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_manager import FileManager  # noqa: E402
+
+# Patrones de la versión anterior de buscar_archivos_pc
+LEGACY_PATTERNS = [
+    '*.txt', '*.pdf', '*.docx', '*.doc', '*.xlsx', '*.xls', '*.pptx', '*.ppt',
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp', '*.tiff', '*.webp',
+    '*.mp4', '*.avi', '*.mkv', '*.mov', '*.wmv', '*.flv', '*.webm',
+    '*.mp3', '*.wav', '*.flac', '*.aac', '*.ogg', '*.m4a',
+    '*.zip', '*.rar', '*.7z', '*.tar', '*.gz',
+    '*.py', '*.js', '*.html', '*.css', '*.json', '*.xml',
+    '*.exe', '*.msi', '*.bat', '*.cmd',
+    '*.log', '*.md', '*.ini', '*.cfg', '*.conf'
+]
+WORDS = ['informe', 'factura', 'foto', 'notas', 'backup', 'presupuesto', 'proyecto', 'datos']
+# Archivos buscados: pocos, como en una búsqueda real por nombre
+NEEDLES = ['contrato_alquiler.pdf', 'alquiler_2024.xlsx', 'recibo alquiler marzo.jpg']
+EXTENSIONS = ['.txt', '.pdf', '.docx', '.jpg', '.png', '.py', '.mp3', '.csv', '.bin', '.o']
+
+
+def build_tree(root: Path, count: int, seed: int = 19):
+    """Árbol con carpetas estilo home (Documents, Downloads...) y subcarpetas"""
+    rng = random.Random(seed)
+    tops = ['Desktop', 'Documents', 'Downloads', 'Pictures', 'Music', 'proyectos']
+    per_dir = 25
+    for d in range(count // per_dir):
+        directory = root / rng.choice(tops) / f"carpeta_{d % 60}" / f"sub_{d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(per_dir):
+            (directory / f"{rng.choice(WORDS)}_{d}_{i}{rng.choice(EXTENSIONS)}").touch()
+    for d, name in enumerate(NEEDLES):
+        (root / tops[d] / f"carpeta_{d}" / name).touch()
+
+
+def legacy_search(directories, term: str, limit: int):
+    """La búsqueda anterior de buscar_archivos_pc (para en cuanto reúne limit resultados)"""
+    found = []
+    globs = 0
+    for directory in directories:
+        if len(found) >= limit or not os.path.exists(directory):
+            continue
+        for pattern in LEGACY_PATTERNS:
+            if len(found) >= limit:
+                break
+            globs += 1
+            for path in glob.glob(os.path.join(directory, f"**/*{term}*{pattern[1:]}"), recursive=True):
+                if len(found) >= limit:
+                    break
+                if not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                if any(a['ruta'] == path for a in found):
+                    continue
+                found.append({'ruta': path, 'mtime': stat.st_mtime})
+    found.sort(key=lambda a: a['mtime'], reverse=True)
+    return found, globs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--term', default='alquiler')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        tree = tmp_path / 'home'
+        build_tree(tree, args.files)
+        print(f"🌳 Árbol de {args.files} archivos en {tree}\n")
+
+        # La lista de directorios de la versión anterior: el home y sus carpetas habituales
+        directories = [str(tree)] + [str(tree / name) for name in
+                                     ('Desktop', 'Documents', 'Downloads', 'Pictures', 'Videos', 'Music')]
+        start = time.perf_counter()
+        legacy, globs = legacy_search(directories, args.term, args.limit)
+        legacy_time = time.perf_counter() - start
+        print(f"antes   {legacy_time * 1e3:9.1f} ms  {globs} globs recursivos, {len(legacy)} resultados")
+
+        manager = FileManager(index_path=tmp_path / 'index.db', content_index_path=tmp_path / 'content.db',
+                              hits_path=tmp_path / 'hits.json', access_path=tmp_path / 'access.json')
+        manager.search_paths = [tree]
+        extensions = sorted(pattern[1:] for pattern in LEGACY_PATTERNS)
+        for label, kwargs in (('recorrido', {'use_index': False}),
+                              ('índice 1ª', {}),
+                              ('índice', {})):
+            start = time.perf_counter()
+            result = manager.smart_search_files(args.term, file_types=extensions,
+                                                max_results=args.limit, time_limit=60, **kwargs)
+            elapsed = time.perf_counter() - start
+            if label == 'recorrido':
+                walk_time = elapsed
+            syscalls = result['stats'].get('syscalls', {})
+            same = {r['path'] for r in result['results']} == {a['ruta'] for a in legacy}
+            print(f"{label:9s}{elapsed * 1e3:9.1f} ms  {len(result['results'])} resultados "
+                  f"({syscalls.get('scandir', 0)} scandir, {syscalls.get('stat', 0)} stat)"
+                  f"{'' if same else '  ⚠️ resultados distintos'}")
+        if manager.file_index is not None:
+            manager.file_index.close()
+        print(f"\n⚡ {legacy_time / max(walk_time, 1e-9):.0f}x más rápido recorriendo, "
+              f"{legacy_time / max(elapsed, 1e-9):.0f}x con el índice al día")
+
+
+if __name__ == '__main__':
+    main()
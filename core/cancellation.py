@@ -0,0 +1,37 @@
+"""
+Cancelación cooperativa para Jarvis
+Permite abandonar búsquedas en curso cuando una consulta nueva las sustituye
+"""
+
+import threading
+from typing import Optional
+
+
+class CancellationToken:
+    """
+    Señal de cancelación compartida entre quien lanza una búsqueda y el motor
+
+    El motor consulta is_cancelled() en puntos baratos (por directorio
+    recorrido o por fila del índice) y termina en cuanto la ve activa.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelada"):
+        """Solicitar la cancelación (idempotente)"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Esperar hasta la cancelación o el timeout; True si se canceló"""
+        return self._event.wait(timeout)
+
+    def __repr__(self) -> str:
+        state = f"cancelada ({self.reason})" if self.is_cancelled() else "activa"
+        return f"CancellationToken({state})"
@@ -0,0 +1,369 @@
+"""
+Índice invertido del contenido de archivos de texto para Jarvis
+Guarda en SQLite qué palabras aparecen en cada archivo para que las búsquedas
+en contenido sólo tengan que releer los archivos candidatos
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from core.file_scanner import ScanEntry
+from core.text_extractor import EXTRACTABLE_EXTENSIONS, TextExtractor
+
+TOKEN_PATTERN = re.compile(r'\w{3,}')
+# Una palabra clave sólo se puede resolver con el índice si es una palabra
+# indexable completa: 3 o más caracteres de palabra y no sólo cifras (los
+# números sueltos no se indexan)
+SEARCHABLE_KEYWORD = re.compile(r'\w{3,}')
+# Palabras más largas (hashes, base64...) no se guardan: el archivo queda como
+# "incompleto" y se verifica siempre leyéndolo
+MAX_TOKEN_LENGTH = 64
+# Archivos mayores no se indexan (se leen directamente en cada búsqueda)
+MAX_FILE_SIZE = 16 * 1024 * 1024
+
+
+def default_content_index_path() -> Path:
+    """Ruta por defecto de la base de datos (~/.jarvis/content_index.db)"""
+    return Path.home() / ".jarvis" / "content_index.db"
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[position]
+
+
+class ContentIndex:
+    """
+    Índice invertido palabra -> archivos respaldado por SQLite
+
+    Cada archivo de texto se tokeniza una vez (palabras de 3 o más
+    caracteres, en minúsculas, sin los números sueltos) y se guarda con su
+    tamaño, su mtime y la lista de sus palabras (para poder retirar sus
+    entradas sin un segundo índice); sólo se vuelve a leer cuando cambian.
+    Una palabra clave se resuelve buscando las palabras del vocabulario que
+    la contienen (vale para subcadenas) y uniendo sus listas de archivos. El resultado es un superconjunto: los
+    candidatos se verifican después leyendo el archivo.
+
+    Con un TextExtractor también se indexan documentos (PDF, Word, Excel,
+    OpenDocument): su texto se extrae en un lote, en el pool de procesos,
+    después de indexar los archivos de texto.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            complete INTEGER NOT NULL,
+            terms BLOB
+        );
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            term_id INTEGER NOT NULL,
+            doc_id INTEGER NOT NULL,
+            PRIMARY KEY (term_id, doc_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_file_size: int = MAX_FILE_SIZE,
+                 text_extractor: Optional[TextExtractor] = None):
+        """
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.jarvis/content_index.db)
+            max_file_size: Tamaño máximo de los archivos a indexar (bytes)
+            text_extractor: Extracción del texto de los documentos
+        """
+        self.db_path = Path(db_path) if db_path else default_content_index_path()
+        self.max_file_size = max_file_size
+        self.text_extractor = text_extractor
+        self._term_ids: Optional[Dict[str, int]] = None
+        self._query_latencies: Deque[float] = deque(maxlen=1000)
+        self._indexing = {'files': 0, 'bytes': 0, 'seconds': 0.0}
+        self.last_sync: Dict[str, Any] = {}
+        self.commit_every = 200
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        """Cerrar la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    def sync(self, entries: Iterable[ScanEntry], deadline: Optional[float] = None,
+             prune_roots: Optional[Iterable[Path]] = None) -> Set[str]:
+        """
+        Poner al día el índice para los archivos dados
+
+        Los archivos cuyo tamaño y mtime coinciden con lo indexado no se leen.
+        Los nuevos o modificados se tokenizan hasta agotar el deadline.
+
+        Args:
+            entries: Archivos de texto (y documentos, con text_extractor) actuales
+                (del catálogo o del recorrido)
+            deadline: Instante time.monotonic() a partir del cual no se indexa más
+            prune_roots: Si se indica, se olvidan los archivos indexados bajo
+                estas raíces que ya no están en entries
+
+        Returns:
+            Rutas cuyo contenido indexado está al día y completo (las únicas
+            que se pueden descartar sin leerlas)
+        """
+        started = time.monotonic()
+        stats = {'checked': 0, 'indexed': 0, 'bytes': 0, 'removed': 0, 'complete': True}
+        pending_commit = 0
+        fresh: Set[str] = set()
+        with self._lock:
+            known = {row[0]: (row[1], row[2], row[3], row[4])
+                     for row in self._conn.execute("SELECT path, id, size, mtime, complete FROM docs")}
+            current: Set[str] = set()
+            stale: List[Tuple[ScanEntry, Optional[int]]] = []
+            documents: List[Tuple[ScanEntry, Optional[int]]] = []
+            for entry in entries:
+                stats['checked'] += 1
+                current.add(entry.path)
+                doc = known.get(entry.path)
+                if doc is not None and doc[1] == entry.size and doc[2] == entry.mtime:
+                    if doc[3]:
+                        fresh.add(entry.path)
+                    continue
+                if entry.size > self.max_file_size:
+                    continue
+                if self.text_extractor is not None and entry.extension in EXTRACTABLE_EXTENSIONS:
+                    documents.append((entry, doc[0] if doc else None))
+                else:
+                    stale.append((entry, doc[0] if doc else None))
+
+            for entry, doc_id, text in self._stale_contents(stale, documents, deadline, stats):
+                indexed = self._index_file(entry, doc_id, text)
+                if indexed is None:
+                    continue
+                stats['indexed'] += 1
+                stats['bytes'] += entry.size
+                if indexed:
+                    fresh.add(entry.path)
+                pending_commit += 1
+                if pending_commit >= self.commit_every:
+                    # Transacciones acotadas: el WAL no crece sin límite en la primera indexación
+                    self._conn.commit()
+                    pending_commit = 0
+
+            if prune_roots is not None:
+                stats['removed'] = self._prune(prune_roots, current, known)
+            self._conn.commit()
+
+        elapsed = time.monotonic() - started
+        if stats['indexed']:
+            self._indexing['files'] += stats['indexed']
+            self._indexing['bytes'] += stats['bytes']
+            self._indexing['seconds'] += elapsed
+        stats['duration'] = elapsed
+        self.last_sync = stats
+        return fresh
+
+    def _stale_contents(self, stale: List[Tuple[ScanEntry, Optional[int]]],
+                        documents: List[Tuple[ScanEntry, Optional[int]]], deadline: Optional[float],
+                        stats: Dict[str, Any]) -> Iterator[Tuple[ScanEntry, Optional[int], Optional[str]]]:
+        """
+        Archivos a (re)indexar con su texto: None para los de texto (se leen
+        al indexarlos) y el texto extraído para los documentos
+        """
+        for entry, doc_id in stale:
+            if deadline is not None and time.monotonic() > deadline:
+                stats['complete'] = False
+                break
+            yield entry, doc_id, None
+        if not documents:
+            return
+        if deadline is not None and time.monotonic() > deadline:
+            stats['complete'] = False
+            return
+        texts = self.text_extractor.extract_entries([entry for entry, _ in documents], deadline=deadline)
+        for entry, doc_id in documents:
+            if entry.path not in texts:
+                stats['complete'] = False
+                continue
+            # Un documento ilegible se indexa vacío: tampoco se puede encontrar leyéndolo
+            yield entry, doc_id, texts[entry.path] or ''
+
+    def _index_file(self, entry: ScanEntry, doc_id: Optional[int], text: Optional[str] = None) -> Optional[bool]:
+        """
+        Tokenizar un archivo (o el texto ya extraído de un documento) y reemplazar sus entradas
+
+        Returns:
+            True si todas sus palabras quedaron indexadas, False si alguna era
+            demasiado larga, None si no se pudo leer
+        """
+        conn = self._conn
+        if text is not None:
+            text = text.lower()
+        else:
+            try:
+                with open(entry.path, 'rb') as f:
+                    text = f.read(self.max_file_size + 1).decode('utf-8', errors='ignore').lower()
+            except OSError:
+                if doc_id is not None:
+                    self._delete_doc(doc_id)
+                return None
+
+        tokens = set(TOKEN_PATTERN.findall(text))
+        complete = True
+        skipped = [t for t in tokens if len(t) > MAX_TOKEN_LENGTH or t.isdigit()]
+        if skipped:
+            complete = not any(len(t) > MAX_TOKEN_LENGTH for t in skipped)
+            tokens.difference_update(skipped)
+
+        term_ids = self._term_id_map()
+        doc_terms = array('I')
+        for token in tokens:
+            term_id = term_ids.get(token)
+            if term_id is None:
+                term_id = conn.execute("INSERT INTO terms (term) VALUES (?)", (token,)).lastrowid
+                term_ids[token] = term_id
+            doc_terms.append(term_id)
+
+        if doc_id is not None:
+            self._delete_postings(doc_id)
+            conn.execute("UPDATE docs SET size = ?, mtime = ?, complete = ?, terms = ? WHERE id = ?",
+                         (entry.size, entry.mtime, int(complete), doc_terms.tobytes(), doc_id))
+        else:
+            doc_id = conn.execute(
+                "INSERT INTO docs (path, size, mtime, complete, terms) VALUES (?, ?, ?, ?, ?)",
+                (entry.path, entry.size, entry.mtime, int(complete), doc_terms.tobytes())).lastrowid
+        conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?)",
+                         ((term_id, doc_id) for term_id in doc_terms))
+        return complete
+
+    def _term_id_map(self) -> Dict[str, int]:
+        """Vocabulario en memoria (se carga la primera vez que se indexa)"""
+        if self._term_ids is None:
+            self._term_ids = {row[0]: row[1] for row in self._conn.execute("SELECT term, id FROM terms")}
+        return self._term_ids
+
+    def _delete_postings(self, doc_id: int):
+        """Retirar las entradas de un archivo usando su lista de palabras"""
+        row = self._conn.execute("SELECT terms FROM docs WHERE id = ?", (doc_id,)).fetchone()
+        if not row or not row[0]:
+            return
+        doc_terms = array('I')
+        doc_terms.frombytes(row[0])
+        self._conn.executemany("DELETE FROM postings WHERE term_id = ? AND doc_id = ?",
+                               ((term_id, doc_id) for term_id in doc_terms))
+
+    def _delete_doc(self, doc_id: int):
+        self._delete_postings(doc_id)
+        self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _prune(self, roots: Iterable[Path], current: Set[str], known: Dict[str, tuple]) -> int:
+        """Olvidar los archivos indexados bajo las raíces que ya no existen"""
+        prefixes = []
+        for root in roots:
+            root_str = os.path.normpath(str(root))
+            prefixes.append(root_str if root_str.endswith(os.sep) else root_str + os.sep)
+        prefixes = tuple(prefixes)
+        removed = 0
+        for path, doc in known.items():
+            if path not in current and path.startswith(prefixes):
+                self._delete_doc(doc[0])
+                removed += 1
+        return removed
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def lookup(self, keywords: Sequence[str]) -> Optional[Set[str]]:
+        """
+        Archivos indexados que contienen alguna de las palabras clave
+
+        Cada palabra clave se compara como subcadena con el vocabulario, así
+        que 'servi' encuentra los archivos con 'servicio' o 'servidor'.
+
+        Returns:
+            Conjunto de rutas, o None si alguna palabra no se puede resolver
+            con el índice (menos de 3 caracteres, sólo cifras o con signos)
+        """
+        keywords = list(dict.fromkeys(k.lower() for k in keywords))
+        if not keywords or any(not SEARCHABLE_KEYWORD.fullmatch(k) or k.isdigit() for k in keywords):
+            return None
+        started = time.monotonic()
+        with self._lock:
+            conn = self._conn
+            term_ids: List[int] = []
+            for keyword in keywords:
+                term_ids.extend(row[0] for row in conn.execute(
+                    "SELECT id FROM terms WHERE instr(term, ?) > 0", (keyword,)))
+            doc_ids: Set[int] = set()
+            # Consultas por tandas para no superar el límite de parámetros de SQLite
+            for i in range(0, len(term_ids), 500):
+                batch = term_ids[i:i + 500]
+                doc_ids.update(row[0] for row in conn.execute(
+                    "SELECT doc_id FROM postings WHERE term_id IN (%s)" % ','.join('?' * len(batch)), batch))
+            paths: Set[str] = set()
+            doc_list = list(doc_ids)
+            for i in range(0, len(doc_list), 500):
+                batch = doc_list[i:i + 500]
+                paths.update(row[0] for row in conn.execute(
+                    "SELECT path FROM docs WHERE id IN (%s)" % ','.join('?' * len(batch)), batch))
+        self._query_latencies.append(time.monotonic() - started)
+        return paths
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Estado del índice
+
+        Returns:
+            Tamaño en disco (base de datos + WAL), archivos y palabras
+            indexados, rendimiento acumulado de indexación y percentiles de
+            latencia de las últimas consultas (segundos)
+        """
+        size_on_disk = 0
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                size_on_disk += os.path.getsize(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        with self._lock:
+            docs = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+            terms = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        indexing_seconds = self._indexing['seconds']
+        latencies: List[float] = list(self._query_latencies)
+        return {
+            'size_on_disk': size_on_disk,
+            'documents': docs,
+            'terms': terms,
+            'indexed_files': self._indexing['files'],
+            'indexed_bytes': self._indexing['bytes'],
+            'files_per_second': self._indexing['files'] / indexing_seconds if indexing_seconds else 0.0,
+            'mb_per_second': (self._indexing['bytes'] / (1024 * 1024) / indexing_seconds
+                              if indexing_seconds else 0.0),
+            'queries': len(latencies),
+            'query_p50': _percentile(latencies, 0.50),
+            'query_p90': _percentile(latencies, 0.90),
+            'query_p99': _percentile(latencies, 0.99),
+            'last_sync': dict(self.last_sync)
+        }
@@ -0,0 +1,273 @@
+"""
+Búsqueda en el contenido de archivos para Jarvis
+Recorre archivos completos proyectados en memoria (o el texto extraído de
+documentos) buscando todas las palabras clave en una sola pasada por bloques
+"""
+
+import itertools
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Tamaño de bloque: se pasa a minúsculas y se examina de una vez
+CHUNK_SIZE = 1024 * 1024
+# Archivos que no se pueden proyectar en memoria se leen enteros hasta este tamaño
+MAX_READ_FALLBACK = 64 * 1024 * 1024
+# Límite de combinaciones mayúscula/minúscula de letras no ASCII por palabra
+MAX_CASE_VARIANTS = 16
+
+
+class ContentHit(NamedTuple):
+    """Coincidencia dentro de un archivo"""
+    line: int
+    column: int
+    keyword: str
+    snippet: str
+
+
+class ContentPattern(NamedTuple):
+    """Palabras clave preparadas para buscarse en bytes ya pasados a minúsculas ASCII"""
+    keywords: Tuple[str, ...]
+    # (índice de la palabra, codificación UTF-8), las palabras más largas primero
+    variants: Tuple[Tuple[int, bytes], ...]
+    max_length: int
+
+
+def _case_variants(keyword: str) -> List[bytes]:
+    """
+    Codificaciones UTF-8 de una palabra tal como quedan tras bytes.lower()
+
+    bytes.lower() sólo cambia letras ASCII, así que para 'ñ', 'á'... se
+    generan las variantes en minúscula y mayúscula.
+    """
+    options = []
+    for char in keyword.lower():
+        if char.isascii():
+            options.append((char.encode(),))
+        else:
+            options.append(tuple(dict.fromkeys((char.encode(), char.upper().encode()))))
+    variants = []
+    for combination in itertools.product(*options):
+        variants.append(b''.join(combination))
+        if len(variants) >= MAX_CASE_VARIANTS:
+            break
+    return variants
+
+
+def compile_content_pattern(keywords: Sequence[str]) -> Optional[ContentPattern]:
+    """
+    Preparar las palabras clave para la búsqueda en contenido
+
+    Returns:
+        ContentPattern, o None si no hay palabras clave
+    """
+    unique = sorted(dict.fromkeys(k.lower() for k in keywords if k), key=len, reverse=True)
+    if not unique:
+        return None
+    variants = tuple((index, variant) for index, keyword in enumerate(unique)
+                     for variant in _case_variants(keyword))
+    return ContentPattern(tuple(unique), variants, max(len(v) for _, v in variants))
+
+
+class ContentSearcher:
+    """
+    Buscador de palabras clave en el contenido completo de archivos
+
+    Cada archivo se proyecta con mmap y se recorre por bloques: cada bloque
+    se pasa a minúsculas una vez y todas las palabras se localizan con
+    bytes.find (bucle en C, sin decodificar el texto). Los bloques se solapan
+    lo justo para no perder palabras partidas en la frontera. Los números de
+    línea sólo se calculan cuando hay coincidencias y la búsqueda se detiene
+    al alcanzar max_hits.
+    """
+
+    def __init__(self, keywords: Union[Sequence[str], ContentPattern, None],
+                 snippet_width: int = 120, chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            keywords: Palabras clave o un patrón ya preparado (compile_content_pattern)
+            snippet_width: Caracteres máximos de cada fragmento
+            chunk_size: Bytes examinados por bloque
+        """
+        if keywords is None or isinstance(keywords, ContentPattern):
+            self.pattern = keywords
+        else:
+            self.pattern = compile_content_pattern([keywords] if isinstance(keywords, str) else keywords)
+        self.keywords: Tuple[str, ...] = self.pattern.keywords if self.pattern else ()
+        self.snippet_width = snippet_width
+        self.chunk_size = chunk_size
+        self.bytes_scanned = 0
+        self.files_scanned = 0
+
+    def contains(self, path: Union[str, os.PathLike]) -> bool:
+        """True si el archivo contiene alguna palabra clave (para en el primer bloque que la tenga)"""
+        if self.pattern is None:
+            return False
+        with _open_buffer(path) as buffer:
+            return buffer is not None and self._contains_buffer(buffer)
+
+    def contains_text(self, text: str) -> bool:
+        """True si un texto ya extraído (PDF, Word...) contiene alguna palabra clave"""
+        if self.pattern is None or not text:
+            return False
+        return self._contains_buffer(text.encode('utf-8', errors='replace'))
+
+    def _contains_buffer(self, buffer) -> bool:
+        variants = [variant for _, variant in self.pattern.variants]
+        self.files_scanned += 1
+        for _chunk_start, chunk, limit in self._chunks(buffer):
+            self.bytes_scanned += limit
+            if any(chunk.find(variant) != -1 for variant in variants):
+                return True
+        return False
+
+    def search_file(self, path: Union[str, os.PathLike], max_hits: Optional[int] = None) -> List[ContentHit]:
+        """
+        Coincidencias de un archivo con línea, columna y fragmento
+
+        Varias coincidencias en la misma línea cuentan como una.
+
+        Args:
+            path: Archivo a examinar
+            max_hits: Parar al llegar a este número de coincidencias
+
+        Returns:
+            Lista de ContentHit en orden de aparición (vacía si no hay o no se
+            puede leer)
+        """
+        if self.pattern is None:
+            return []
+        with _open_buffer(path) as buffer:
+            if buffer is None:
+                return []
+            return self._search_buffer(buffer, max_hits)
+
+    def search_text(self, text: str, max_hits: Optional[int] = None) -> List[ContentHit]:
+        """Coincidencias en un texto ya extraído (las líneas son las del texto extraído)"""
+        if self.pattern is None or not text:
+            return []
+        return self._search_buffer(text.encode('utf-8', errors='replace'), max_hits)
+
+    def _search_buffer(self, buffer, max_hits: Optional[int]) -> List[ContentHit]:
+        hits: List[ContentHit] = []
+        self.files_scanned += 1
+        size = len(buffer)
+        line = 1
+        last_line_end = -1
+        for chunk_start, chunk, limit in self._chunks(buffer):
+            self.bytes_scanned += limit
+            counted = 0
+            for offset, index, length in self._find_all(chunk, limit):
+                # Sólo se cuentan los saltos de línea desde la coincidencia anterior
+                line += chunk.count(b'\n', counted, offset)
+                counted = offset
+                start = chunk_start + offset
+                if start <= last_line_end:
+                    continue
+                line_start = buffer.rfind(b'\n', 0, start) + 1
+                line_end = buffer.find(b'\n', start)
+                if line_end == -1:
+                    line_end = size
+                last_line_end = line_end
+                column = len(buffer[line_start:start].decode('utf-8', errors='replace')) + 1
+                hits.append(ContentHit(line, column, self.keywords[index],
+                                       self._snippet(buffer, line_start, line_end, start, start + length)))
+                if max_hits and len(hits) >= max_hits:
+                    return hits
+            line += chunk.count(b'\n', counted, limit)
+        return hits
+
+    def search_files(self, paths: Iterable[Union[str, os.PathLike]], max_hits_per_file: int = 3,
+                     max_files: Optional[int] = None) -> Iterator[Tuple[str, List[ContentHit]]]:
+        """
+        Buscar en varios archivos
+
+        Yields:
+            Tuplas (ruta, [ContentHit]) de los archivos con coincidencias,
+            hasta max_files archivos
+        """
+        found = 0
+        for path in paths:
+            hits = self.search_file(path, max_hits_per_file)
+            if hits:
+                yield path, hits
+                found += 1
+                if max_files and found >= max_files:
+                    return
+
+    def _chunks(self, buffer) -> Iterator[Tuple[int, bytes, int]]:
+        """
+        Bloques en minúsculas ASCII
+
+        Yields:
+            (inicio del bloque, bytes del bloque con solape, límite): sólo
+            cuentan las coincidencias que empiezan antes del límite; el resto
+            se verán en el bloque siguiente
+        """
+        size = len(buffer)
+        overlap = self.pattern.max_length - 1
+        position = 0
+        while position < size:
+            end = min(size, position + self.chunk_size)
+            yield position, buffer[position:min(size, end + overlap)].lower(), end - position
+            position = end
+
+    def _find_all(self, chunk: bytes, limit: int) -> List[Tuple[int, int, int]]:
+        """Posiciones (desplazamiento, palabra, longitud) de todas las palabras en un bloque, en orden"""
+        found = []
+        for index, variant in self.pattern.variants:
+            # La coincidencia debe empezar antes del límite (puede terminar en el solape)
+            stop = limit + len(variant) - 1
+            offset = chunk.find(variant, 0, stop)
+            while offset != -1:
+                found.append((offset, index, len(variant)))
+                offset = chunk.find(variant, offset + 1, stop)
+        found.sort()
+        return found
+
+    def _snippet(self, buffer, line_start: int, line_end: int, start: int, end: int) -> str:
+        """Fragmento de la línea centrado en la coincidencia"""
+        width = self.snippet_width
+        if line_end - line_start > width:
+            margin = max(0, (width - (end - start)) // 2)
+            line_start = max(line_start, start - margin)
+            line_end = min(line_end, end + margin)
+        text = buffer[line_start:line_end].decode('utf-8', errors='replace').strip()
+        if len(text) > width:
+            text = text[:width - 1] + '…'
+        return text
+
+
+@contextmanager
+def _open_buffer(path):
+    """Entregar el archivo como mmap (o bytes si no se puede proyectar); None si no se puede leer"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        yield None
+        return
+    with f:
+        try:
+            size = os.fstat(f.fileno()).st_size
+        except OSError:
+            size = 0
+        if size == 0:
+            yield None
+            return
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Sistemas de archivos sin soporte de mmap
+            data = None
+            if size <= MAX_READ_FALLBACK:
+                try:
+                    data = f.read()
+                except OSError:
+                    pass
+            yield data
+            return
+        with buffer:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            yield buffer
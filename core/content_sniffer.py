@@ -0,0 +1,458 @@
+"""
+Detección del tipo de archivo por su contenido para Jarvis
+Reconoce los formatos más comunes por sus primeros bytes (números mágicos),
+con lecturas en lote en un pool de hilos y una caché por (inodo, mtime)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Bytes leídos del inicio de cada archivo: el tipo MIME de ODF empieza en el byte 38 y una
+# trama MPEG de audio ocupa hasta 1441 bytes (para ver la segunda); sigue siendo una sola lectura
+SNIFF_BYTES = 2048
+# Versión de las reglas de detección: si cambia, los tipos guardados en la caché se descartan
+SNIFF_VERSION = 2
+# Por debajo de estos archivos no compensa repartir las lecturas en hilos
+PARALLEL_THRESHOLD = 8
+# Extensiones que no dicen nada del contenido (descargas a medias, copias, volcados)
+GENERIC_EXTENSIONS = frozenset({
+    '', '.bin', '.dat', '.tmp', '.temp', '.part', '.partial', '.crdownload', '.download',
+    '.bak', '.old', '.orig', '.file', '.unknown', '.data'
+})
+# "IMG_2024.05.03" o "acta final.v2 revisada": lo que sigue al punto no es una extensión
+NOT_AN_EXTENSION = re.compile(r'^\.(?:\d+|.*\s.*|.{9,})$')
+
+
+class ContentType(NamedTuple):
+    """Formato reconocido por los primeros bytes"""
+    key: str
+    mime: str
+    # Extensión canónica: la que se usa para los filtros por tipo
+    extension: str
+    label: str
+    category: str
+    # Extensiones con las que el contenido es coherente
+    aliases: FrozenSet[str]
+
+    def matches_extension(self, extension: str) -> bool:
+        """True si la extensión del nombre corresponde al contenido"""
+        return extension.lower() in self.aliases
+
+
+def _type(key: str, mime: str, extension: str, label: str, category: str, *aliases: str) -> ContentType:
+    return ContentType(key, mime, extension, label, category, frozenset((extension,) + aliases))
+
+
+OOXML_EXTENSIONS = ('.docx', '.docm', '.dotx', '.xlsx', '.xlsm', '.xltx', '.pptx', '.pptm', '.ppsx', '.vsdx')
+
+CONTENT_TYPES: Dict[str, ContentType] = {t.key: t for t in (
+    _type('pdf', 'application/pdf', '.pdf', 'PDF', 'documentos', '.ai'),
+    _type('zip', 'application/zip', '.zip', 'ZIP', 'comprimidos', '.jar', '.apk', '.epub', '.whl', '.xpi',
+          '.odt', '.ods', '.odp', *OOXML_EXTENSIONS),
+    _type('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx',
+          'Documento Word', 'documentos', '.docm', '.dotx'),
+    _type('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx',
+          'Hoja de Excel', 'datos', '.xlsm', '.xltx'),
+    _type('pptx', 'application/vnd.openxmlformats-officedocument.presentationml.presentation', '.pptx',
+          'Presentación PowerPoint', 'documentos', '.pptm', '.ppsx'),
+    # [Content_Types].xml primero: Office Open XML, sin saber cuál sin leer el directorio central
+    _type('ooxml', 'application/vnd.openxmlformats-officedocument', '.docx', 'Documento Office',
+          'documentos', *OOXML_EXTENSIONS),
+    _type('odt', 'application/vnd.oasis.opendocument.text', '.odt', 'Documento OpenDocument', 'documentos'),
+    _type('ods', 'application/vnd.oasis.opendocument.spreadsheet', '.ods', 'Hoja OpenDocument', 'datos'),
+    _type('odp', 'application/vnd.oasis.opendocument.presentation', '.odp', 'Presentación OpenDocument',
+          'documentos'),
+    _type('epub', 'application/epub+zip', '.epub', 'EPUB', 'documentos'),
+    _type('ole', 'application/x-ole-storage', '.doc', 'Documento Office 97-2003', 'documentos',
+          '.xls', '.ppt', '.msi', '.msg', '.dot', '.xlt', '.pps'),
+    _type('png', 'image/png', '.png', 'PNG', 'imagenes'),
+    _type('jpeg', 'image/jpeg', '.jpg', 'JPEG', 'imagenes', '.jpeg', '.jpe', '.jfif'),
+    _type('gif', 'image/gif', '.gif', 'GIF', 'imagenes'),
+    _type('bmp', 'image/bmp', '.bmp', 'BMP', 'imagenes', '.dib'),
+    _type('webp', 'image/webp', '.webp', 'WebP', 'imagenes'),
+    _type('heic', 'image/heic', '.heic', 'HEIC', 'imagenes', '.heif', '.avif'),
+    _type('mp3', 'audio/mpeg', '.mp3', 'MP3', 'audio'),
+    _type('m4a', 'audio/mp4', '.m4a', 'Audio MP4', 'audio', '.m4b', '.mp4', '.aac'),
+    _type('mp4', 'video/mp4', '.mp4', 'MP4', 'videos', '.m4v', '.m4a', '.3gp', '.3g2', '.mov'),
+    _type('mov', 'video/quicktime', '.mov', 'QuickTime', 'videos', '.qt', '.mp4'),
+    _type('wav', 'audio/wav', '.wav', 'WAV', 'audio', '.wave'),
+    _type('avi', 'video/x-msvideo', '.avi', 'AVI', 'videos'),
+    _type('flac', 'audio/flac', '.flac', 'FLAC', 'audio'),
+    _type('ogg', 'audio/ogg', '.ogg', 'Ogg', 'audio', '.oga', '.ogv', '.opus'),
+    _type('mkv', 'video/x-matroska', '.mkv', 'Matroska', 'videos', '.webm', '.mka'),
+    _type('elf', 'application/x-executable', '', 'Ejecutable ELF', 'ejecutables', '.so', '.o', '.bin', '.elf'),
+    _type('pe', 'application/vnd.microsoft.portable-executable', '.exe', 'Ejecutable de Windows', 'ejecutables',
+          '.dll', '.sys', '.scr', '.com', '.efi'),
+    _type('sqlite', 'application/vnd.sqlite3', '.sqlite', 'Base de datos SQLite', 'datos',
+          '.db', '.sqlite3', '.db3'),
+    _type('gzip', 'application/gzip', '.gz', 'GZIP', 'comprimidos', '.tgz'),
+    _type('bz2', 'application/x-bzip2', '.bz2', 'BZIP2', 'comprimidos', '.tbz2'),
+    _type('7z', 'application/x-7z-compressed', '.7z', '7-Zip', 'comprimidos'),
+    _type('rar', 'application/vnd.rar', '.rar', 'RAR', 'comprimidos'),
+)}
+
+# Firmas fijas al inicio del archivo, en orden de comprobación
+SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b'%PDF-', 'pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'SQLite format 3\x00', 'sqlite'),
+    (b'\x7fELF', 'elf'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (b'fLaC', 'flac'),
+    (b'OggS', 'ogg'),
+    (b'\x1a\x45\xdf\xa3', 'mkv'),
+    (b'\x1f\x8b', 'gzip'),
+    (b'7z\xbc\xaf\x27\x1c', '7z'),
+    (b'Rar!\x1a\x07', 'rar'),
+)
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06', b'PK\x07\x08')
+# Primera entrada del ZIP que delata el formato de documento
+OOXML_PREFIXES = ((b'word/', 'docx'), (b'xl/', 'xlsx'), (b'ppt/', 'pptx'))
+ODF_MIMETYPES = {
+    b'application/vnd.oasis.opendocument.text': 'odt',
+    b'application/vnd.oasis.opendocument.spreadsheet': 'ods',
+    b'application/vnd.oasis.opendocument.presentation': 'odp',
+    b'application/epub+zip': 'epub',
+}
+# Marcas de orden de bytes: un archivo que empieza así es texto
+TEXT_BOMS = (b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff')
+# Cabecera de trama MPEG de audio: kbps por índice según (versión 1 o 2/2.5, capa) y Hz por versión
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Marcas ("brands") de la caja ftyp de ISO BMFF
+FTYP_BRANDS = {
+    b'M4A ': 'm4a', b'M4B ': 'm4a', b'M4P ': 'm4a', b'F4A ': 'm4a',
+    b'qt  ': 'mov',
+    b'heic': 'heic', b'heix': 'heic', b'hevc': 'heic', b'mif1': 'heic', b'msf1': 'heic', b'avif': 'heic',
+}
+
+
+def default_content_types_path() -> Path:
+    """Ruta por defecto de la caché de tipos (~/.jarvis/content_types.db)"""
+    return Path.home() / ".jarvis" / "content_types.db"
+
+
+def needs_sniffing(extension: str) -> bool:
+    """True si la extensión no basta para saber el tipo (sin extensión, genérica o que no lo es)"""
+    return extension in GENERIC_EXTENSIONS or NOT_AN_EXTENSION.match(extension) is not None
+
+
+def _sniff_zip(head: bytes) -> str:
+    """Documento empaquetado en ZIP según su primera entrada"""
+    if head[:4] != b'PK\x03\x04' or len(head) < 30:
+        return 'zip'
+    name_length = int.from_bytes(head[26:28], 'little')
+    extra_length = int.from_bytes(head[28:30], 'little')
+    name = head[30:30 + name_length]
+    if name == b'[Content_Types].xml':
+        return 'ooxml'
+    for prefix, key in OOXML_PREFIXES:
+        if name.startswith(prefix):
+            return key
+    if name == b'mimetype':
+        # ODF y EPUB guardan el tipo MIME sin comprimir justo después
+        start = 30 + name_length + extra_length
+        for mimetype, key in ODF_MIMETYPES.items():
+            if head[start:start + len(mimetype)] == mimetype:
+                return key
+    return 'zip'
+
+
+def _mpeg_frame_length(head: bytes, offset: int = 0) -> Optional[int]:
+    """Longitud de la trama MPEG de audio que empieza en offset, o None si la cabecera no es válida"""
+    if len(head) < offset + 4 or head[offset] != 0xFF or head[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (head[offset + 1] >> 3) & 0x03
+    layer = 4 - ((head[offset + 1] >> 1) & 0x03)
+    bitrate_index = head[offset + 2] >> 4
+    rate_index = (head[offset + 2] >> 2) & 0x03
+    # Versión y capa reservadas, velocidad "libre" o no válida y frecuencia reservada
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = MPEG_BITRATES[(1 if version_bits == 3 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version_bits][rate_index]
+    padding = (head[offset + 2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and version_bits != 3:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def _is_pe(head: bytes) -> bool:
+    """Cabecera MZ con un desplazamiento a la cabecera PE (e_lfanew) verosímil"""
+    if len(head) < 64:
+        return False
+    offset = int.from_bytes(head[60:64], 'little')
+    if offset < 64 or offset > 0x10000 or offset % 4:
+        return False
+    # Si la cabecera PE cae dentro de lo leído, se comprueba su firma
+    return len(head) < offset + 4 or head[offset:offset + 4] == b'PE\0\0'
+
+
+def sniff_bytes(head: bytes) -> Optional[ContentType]:
+    """
+    Tipo de un archivo a partir de sus primeros bytes
+
+    Las firmas largas se aceptan tal cual. Las débiles (MZ, tramas MPEG sin
+    etiqueta ID3) sólo si los bytes no parecen texto y su cabecera es
+    coherente: "MZ" o una marca UTF-16 al principio de un texto no lo
+    convierten en ejecutable o en audio.
+
+    Returns:
+        ContentType reconocido o None (texto, formato desconocido o vacío)
+    """
+    for magic, key in SIGNATURES:
+        if head.startswith(magic):
+            return CONTENT_TYPES[key]
+    # Etiqueta ID3v2: versión 2 a 4 y revisión distinta de 0xFF
+    if head[:3] == b'ID3' and len(head) >= 5 and 2 <= head[3] <= 4 and head[4] != 0xFF:
+        return CONTENT_TYPES['mp3']
+    # bzip2: "BZh" y el tamaño de bloque (1-9)
+    if head[:3] == b'BZh' and len(head) >= 4 and 0x31 <= head[3] <= 0x39:
+        return CONTENT_TYPES['bz2']
+    if head[:4] in ZIP_SIGNATURES:
+        return CONTENT_TYPES[_sniff_zip(head)]
+    if head[4:8] == b'ftyp':
+        brand = head[8:12]
+        if brand in FTYP_BRANDS:
+            return CONTENT_TYPES[FTYP_BRANDS[brand]]
+        return CONTENT_TYPES['mp4']
+    if head[:4] == b'RIFF':
+        form = head[8:12]
+        if form == b'WEBP':
+            return CONTENT_TYPES['webp']
+        if form == b'WAVE':
+            return CONTENT_TYPES['wav']
+        if form == b'AVI ':
+            return CONTENT_TYPES['avi']
+        return None
+    if head[:2] == b'BM' and len(head) >= 14 and head[6:10] == b'\0\0\0\0':
+        return CONTENT_TYPES['bmp']
+    # Firmas débiles: antes se descarta el texto
+    if head.startswith(TEXT_BOMS) or looks_like_text(head):
+        return None
+    if head[:2] == b'MZ':
+        return CONTENT_TYPES['pe'] if _is_pe(head) else None
+    # Trama MPEG de audio sin etiqueta ID3: una cabecera válida seguida de otra
+    frame_length = _mpeg_frame_length(head)
+    if frame_length is not None and _mpeg_frame_length(head, frame_length) is not None:
+        return CONTENT_TYPES['mp3']
+    return None
+
+
+def looks_like_text(head: bytes) -> bool:
+    """True si los primeros bytes parecen texto (sin NUL y UTF-8 válido salvo el último carácter cortado)"""
+    if not head or b'\0' in head:
+        return False
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Un carácter multibyte cortado al final de la muestra no cuenta
+        return e.start >= len(head) - 3 and e.reason == 'unexpected end of data'
+    return True
+
+
+def text_encoding(head: bytes) -> str:
+    """Codificación con la que abrir un archivo de texto según su marca de orden de bytes"""
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    return 'utf-8-sig'
+
+
+def read_head(path: str, size: int = SNIFF_BYTES) -> bytes:
+    """Primeros bytes de un archivo"""
+    with open(path, 'rb', buffering=0) as f:
+        return f.read(size)
+
+
+class ContentSniffer:
+    """
+    Detección por contenido con lecturas en lote y caché persistente
+
+    Cada archivo se lee como mucho una vez por versión: el resultado
+    (también "desconocido") se guarda en SQLite por (dispositivo, inodo)
+    junto con su mtime, y sólo se vuelve a leer si el mtime cambia. Las
+    lecturas de un lote se reparten en un pool de hilos.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content_types (
+            device INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            type_key TEXT NOT NULL,
+            PRIMARY KEY (device, inode)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_workers: Optional[int] = None):
+        """
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.jarvis/content_types.db)
+            max_workers: Hilos de lectura (default: min(16, núcleos * 2))
+        """
+        self.db_path = Path(db_path) if db_path else default_content_types_path()
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {'files': 0, 'cache_hits': 0, 'reads': 0, 'errors': 0, 'read_seconds': 0.0}
+        self._counters_lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SNIFF_VERSION:
+                # Reglas de detección distintas: los tipos guardados ya no valen
+                self._conn.execute("DELETE FROM content_types")
+                self._conn.execute(f"PRAGMA user_version = {SNIFF_VERSION}")
+            self._conn.commit()
+
+    def close(self):
+        """Cerrar la conexión con la base de datos y el pool de lectura"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        with self._lock:
+            self._conn.close()
+
+    def sniff_entries(self, entries: Sequence[Any], parallel: bool = True) -> Dict[str, Optional[ContentType]]:
+        """
+        Tipo por contenido de un lote de archivos
+
+        Args:
+            entries: Objetos con path, mtime, inode y device (ScanEntry del
+                recorrido); con inode 0 no se usa la caché
+            parallel: Repartir las lecturas en el pool (False si ya se llama
+                desde un hilo de un pool, como el sondeo del índice)
+
+        Returns:
+            Ruta -> ContentType (None si el formato no se reconoce o no se pudo leer)
+        """
+        found: Dict[str, Optional[ContentType]] = {}
+        missing = []
+        with self._lock:
+            cursor = self._conn.cursor()
+            for entry in entries:
+                row = None
+                if entry.inode:
+                    row = cursor.execute("SELECT mtime, type_key FROM content_types WHERE device = ? AND inode = ?",
+                                         (entry.device, entry.inode)).fetchone()
+                if row is not None and row[0] == entry.mtime:
+                    found[entry.path] = CONTENT_TYPES.get(row[1])
+                else:
+                    missing.append(entry)
+            cursor.close()
+
+        heads = self._read_heads([entry.path for entry in missing], parallel)
+        rows = []
+        errors = 0
+        for entry, head in zip(missing, heads):
+            if head is None:
+                errors += 1
+                found[entry.path] = None
+                continue
+            content_type = sniff_bytes(head)
+            found[entry.path] = content_type
+            if entry.inode:
+                rows.append((entry.device, entry.inode, entry.mtime, content_type.key if content_type else ''))
+        if rows:
+            try:
+                with self._lock:
+                    self._conn.executemany("INSERT OR REPLACE INTO content_types VALUES (?, ?, ?, ?)", rows)
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ No se pudieron guardar los tipos de archivo: {e}")
+
+        with self._counters_lock:
+            self._counters['files'] += len(found)
+            self._counters['cache_hits'] += len(found) - len(missing)
+            self._counters['reads'] += len(missing) - errors
+            self._counters['errors'] += errors
+        return found
+
+    def sniff_path(self, path: str) -> Optional[ContentType]:
+        """Tipo por contenido de un único archivo (con su stat para la caché)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = _StatEntry(path, st.st_mtime, st.st_ino, st.st_dev)
+        return self.sniff_entries([entry], parallel=False).get(path)
+
+    def sniff_paths(self, paths: Iterable[str]) -> Dict[str, Optional[ContentType]]:
+        """Tipo por contenido de varias rutas (stat y lectura en el pool)"""
+        paths = list(paths)
+        entries = [entry for entry in self._map(_stat_entry, paths, len(paths) >= PARALLEL_THRESHOLD)
+                   if entry is not None]
+        return self.sniff_entries(entries)
+
+    def _read_heads(self, paths: List[str], parallel: bool) -> List[Optional[bytes]]:
+        started = time.perf_counter()
+        heads = list(self._map(_safe_read_head, paths, parallel and len(paths) >= PARALLEL_THRESHOLD))
+        with self._counters_lock:
+            self._counters['read_seconds'] += time.perf_counter() - started
+        return heads
+
+    def _map(self, func, items: List[Any], parallel: bool):
+        if not parallel:
+            return map(func, items)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jarvis-sniff')
+        return self._executor.map(func, items)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Archivos consultados, aciertos de la caché, lecturas y tamaño en disco"""
+        with self._counters_lock:
+            stats = dict(self._counters)
+        size_on_disk = 0
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                size_on_disk += os.path.getsize(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        with self._lock:
+            stats['cached'] = self._conn.execute("SELECT COUNT(*) FROM content_types").fetchone()[0]
+        stats['hit_rate'] = stats['cache_hits'] / stats['files'] if stats['files'] else 0.0
+        stats['size_on_disk'] = size_on_disk
+        return stats
+
+
+class _StatEntry(NamedTuple):
+    path: str
+    mtime: float
+    inode: int
+    device: int
+
+
+def _stat_entry(path: str) -> Optional[_StatEntry]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _StatEntry(path, st.st_mtime, st.st_ino, st.st_dev)
+
+
+def _safe_read_head(path: str) -> Optional[bytes]:
+    try:
+        return read_head(path)
+    except OSError:
+        return None
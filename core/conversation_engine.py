@@ -10,6 +10,13 @@ from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 import os
 
+from core.search_session import NARROW_PATTERN, PAGE_PATTERN, RESET_PATTERN, SHOW_ALL_PATTERN, WIDEN_PATTERN
+
+# Comandos tras los que un mensaje puede referirse a los resultados anteriores
+SEARCH_COMMANDS = frozenset({
+    "buscar_archivo", "buscar_archivo_inteligente", "buscar_por_categoria", "seguimiento_busqueda"
+})
+
 class ConversationEngine:
     """Motor de conversación para el asistente"""
     
@@ -17,9 +24,34 @@ class ConversationEngine:
         self.conversation_history: List[Dict[str, str]] = []
         self.user_name = "Usuario"
         self.assistant_name = "Jarvis"
+        # Último comando reconocido (las preguntas de seguimiento sólo valen tras una búsqueda)
+        self.last_command: Optional[str] = None
         
         # Patrones de comando mejorados
         self.command_patterns = {
+            # Preguntas sobre la última búsqueda (sólo justo después de una): van primero
+            # para que "sólo los documentos" refine los resultados en vez de buscar de nuevo
+            "seguimiento_busqueda": [
+                NARROW_PATTERN.pattern,
+                WIDEN_PATTERN.pattern,
+                RESET_PATTERN.pattern,
+                PAGE_PATTERN.pattern,
+                SHOW_ALL_PATTERN.pattern
+            ],
+            # Antes que buscar_archivo: "buscar archivos duplicados" no es una búsqueda por nombre
+            "buscar_duplicados": [
+                r"(?:buscar|encontrar|localizar|ver)\s+(?:(?:los|mis)\s+)?(?:archivos?\s+)?duplicados",
+                r"archivos?\s+(?:duplicados|repetidos)",
+                r"(?:buscar|encontrar)\s+(?:archivos?\s+)?repetidos"
+            ],
+            # "archivos grandes" sin más filtros pregunta por el espacio ocupado, no por un nombre
+            "uso_disco": [
+                r"^(?:ver\s+|mostrar\s+|buscar\s+)?(?:las\s+|los\s+|mis\s+)?(?:carpetas?|archivos?)\s+(?:más\s+)?grandes?$",
+                r"carpetas?\s+(?:que\s+)?(?:más\s+)?(?:grandes?|pesadas?|ocupan)",
+                r"qu[ée]\s+ocupa\s+(?:más\s+|tanto\s+)?espacio",
+                r"uso\s+(?:del?\s+)?disco",
+                r"espacio\s+(?:en\s+|del?\s+)?disco"
+            ],
             "abrir_archivo": [
                 r"abr[ie]r?\s+(?:el\s+)?archivo\s+(.+)",
                 r"mostrar\s+(?:el\s+)?archivo\s+(.+)",
@@ -152,8 +184,11 @@ class ConversationEngine:
         
         # Procesar según el tipo
         if message_type == "command":
-            return self.process_command(message)
-        elif message_type == "question":
+            response = self.process_command(message)
+            self.last_command = response.get("command")
+            return response
+        self.last_command = None
+        if message_type == "question":
             return self.process_question(message)
         elif message_type == "greeting":
             response = random.choice(self.responses["saludo"])
@@ -187,6 +222,8 @@ class ConversationEngine:
         
         # Comandos
         for command_type, patterns in self.command_patterns.items():
+            if command_type == "seguimiento_busqueda" and not self.in_search_context():
+                continue
             for pattern in patterns:
                 if re.search(pattern, message, re.IGNORECASE):
                     return "command"
@@ -210,10 +247,16 @@ class ConversationEngine:
             
         return "general"
     
+    def in_search_context(self) -> bool:
+        """True si el último comando fue una búsqueda de archivos (o un seguimiento de ella)"""
+        return self.last_command in SEARCH_COMMANDS
+    
     def process_command(self, message: str) -> Dict[str, Any]:
         """Procesar comandos específicos con funcionalidades mejoradas"""
         
         for command_type, patterns in self.command_patterns.items():
+            if command_type == "seguimiento_busqueda" and not self.in_search_context():
+                continue
             for pattern in patterns:
                 match = re.search(pattern, message, re.IGNORECASE)
                 if match:
@@ -243,6 +286,13 @@ class ConversationEngine:
                             "parameter": param.strip(),
                             "content": f"🔍 Búsqueda inteligente de archivos: '{param}'"
                         }
+                    elif command_type == "seguimiento_busqueda":
+                        return {
+                            "type": "command",
+                            "command": "seguimiento_busqueda",
+                            "parameter": message.strip(),
+                            "content": f"🔎 Refinando la última búsqueda: '{message.strip()}'"
+                        }
                     elif command_type == "buscar_por_categoria":
                         categoria = match.group(1).lower() if match.groups() else ""
                         return {
@@ -259,6 +309,20 @@ class ConversationEngine:
                             "parameter": param.strip(),
                             "content": f"🔎 Buscando en contenido de archivos: '{param}'"
                         }
+                    elif command_type == "buscar_duplicados":
+                        return {
+                            "type": "command",
+                            "command": "buscar_duplicados",
+                            "parameter": "",
+                            "content": "🔁 Buscando archivos duplicados..."
+                        }
+                    elif command_type == "uso_disco":
+                        return {
+                            "type": "command",
+                            "command": "uso_disco",
+                            "parameter": "",
+                            "content": "💽 Calculando el uso de disco..."
+                        }
                     elif command_type == "conversacion_continua":
                         return {
                             "type": "command",
@@ -0,0 +1,281 @@
+"""
+Uso de disco para Jarvis
+Tamaños acumulados por carpeta (recursivos), totales por extensión y por
+categoría y los archivos más grandes de cada carpeta, calculados en una sola
+pasada y mantenidos al día por directorio
+"""
+
+import bisect
+import heapq
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.file_scanner import ScanEntry
+
+# Archivos más grandes que se recuerdan por carpeta (los top-N mayores se responden sin consultar nada)
+TOP_FILES_PER_DIR = 10
+
+
+class DirectoryUsage:
+    """Archivos que cuelgan directamente de una carpeta: totales, por extensión y los más grandes"""
+
+    __slots__ = ('files', 'size', 'by_extension', 'largest')
+
+    def __init__(self):
+        self.files = 0
+        self.size = 0
+        # Extensión -> [archivos, bytes]
+        self.by_extension: Dict[str, List[int]] = {}
+        # Montículo de mínimos con los (size, name, mtime) más grandes
+        self.largest: List[Tuple[int, str, float]] = []
+
+
+class DiskUsage:
+    """
+    Agregados de uso de disco por carpeta
+
+    Cada carpeta guarda los totales de sus archivos directos (por extensión)
+    y sus archivos más grandes; el tamaño recursivo de cada carpeta y de sus
+    antecesoras se mantiene sumando las diferencias hacia arriba. Para
+    actualizar basta con volver a leer las filas de las carpetas que
+    cambiaron (FileIndex.changes_since): se restan sus totales anteriores y
+    se suman los nuevos, sin recorrer el resto.
+    """
+
+    def __init__(self, extension_categories: Optional[Dict[str, str]] = None,
+                 top_files: int = TOP_FILES_PER_DIR):
+        """
+        Args:
+            extension_categories: Mapa extensión -> categoría ('.py' -> 'codigo')
+            top_files: Archivos más grandes que se recuerdan por carpeta
+        """
+        self.extension_categories = extension_categories or {}
+        self.top_files = top_files
+        # Generación del índice de archivos con la que están al día (ver FileIndex.generation)
+        self.generation = 0
+        self.source = ''
+        self.build_time = 0.0
+        self.updates = 0
+        self.updated_dirs = 0
+
+        self._direct: Dict[str, DirectoryUsage] = {}
+        # Carpeta -> [bytes, archivos] de todo su subárbol (incluye las antecesoras sin archivos propios)
+        self._totals: Dict[str, List[int]] = {}
+        self._sorted: Optional[List[str]] = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Construcción y actualización
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]],
+                  extension_categories: Optional[Dict[str, str]] = None,
+                  generation: int = 0, source: str = 'index',
+                  top_files: int = TOP_FILES_PER_DIR) -> 'DiskUsage':
+        """
+        Calcular los agregados a partir de filas (name, extension, size, mtime, directory)
+
+        Vale FileIndex.iter_file_rows, FileCatalog.iter_rows o las entradas
+        de un recorrido convertidas a filas.
+        """
+        usage = cls(extension_categories, top_files)
+        start = time.perf_counter()
+        usage.add_rows(rows)
+        usage.generation = generation
+        usage.source = source
+        usage.build_time = time.perf_counter() - start
+        return usage
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]):
+        """Sumar archivos (filas name, extension, size, mtime, directory) a sus carpetas"""
+        top_files = self.top_files
+        with self._lock:
+            direct = self._direct
+            touched: Dict[str, List[int]] = {}
+            last_directory = None
+            usage = None
+            delta = None
+            for name, extension, size, mtime, directory in rows:
+                if directory != last_directory:
+                    usage = direct.get(directory)
+                    if usage is None:
+                        usage = direct[directory] = DirectoryUsage()
+                    delta = touched.get(directory)
+                    if delta is None:
+                        delta = touched[directory] = [0, 0]
+                    last_directory = directory
+                usage.files += 1
+                usage.size += size
+                delta[0] += size
+                delta[1] += 1
+                by_ext = usage.by_extension.get(extension)
+                if by_ext is None:
+                    usage.by_extension[extension] = [1, size]
+                else:
+                    by_ext[0] += 1
+                    by_ext[1] += size
+                largest = usage.largest
+                if len(largest) < top_files:
+                    heapq.heappush(largest, (size, name, mtime))
+                elif size > largest[0][0]:
+                    heapq.heapreplace(largest, (size, name, mtime))
+            for directory, (size, files) in touched.items():
+                self._propagate(directory, size, files)
+
+    def update(self, changes: Dict[str, bool], index, generation: int):
+        """
+        Poner al día las carpetas que cambiaron
+
+        Args:
+            changes: Carpeta -> True si cambió todo su subárbol (FileIndex.changes_since)
+            index: FileIndex del que se releen las filas de esas carpetas
+            generation: Generación del índice leída antes de pedir los cambios
+        """
+        with self._lock:
+            start = time.perf_counter()
+            subtrees = [directory for directory, subtree in changes.items() if subtree]
+            plain = [directory for directory, subtree in changes.items() if not subtree]
+            for directory in subtrees:
+                for path in self._subtree(directory):
+                    self._remove_direct(path)
+            for directory in plain:
+                self._remove_direct(directory)
+            self.add_rows(index.iter_directory_rows(subtrees, subtree=True))
+            self.add_rows(index.iter_directory_rows(plain))
+            self.generation = generation
+            self.updates += 1
+            self.updated_dirs += len(changes)
+            self.build_time = time.perf_counter() - start
+
+    def _remove_direct(self, directory: str):
+        usage = self._direct.pop(directory, None)
+        if usage is not None:
+            self._propagate(directory, -usage.size, -usage.files)
+
+    def _propagate(self, directory: str, size: int, files: int):
+        """Sumar una diferencia al total recursivo de una carpeta y de todas sus antecesoras"""
+        totals = self._totals
+        path = directory
+        while True:
+            total = totals.get(path)
+            if total is None:
+                total = totals[path] = [0, 0]
+                self._sorted = None
+            total[0] += size
+            total[1] += files
+            if total[1] <= 0:
+                del totals[path]
+                self._sorted = None
+            parent = os.path.dirname(path)
+            if parent == path or not parent:
+                break
+            path = parent
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _subtree(self, path: str) -> List[str]:
+        """Carpetas con archivos bajo una ruta (incluida), en orden"""
+        if self._sorted is None:
+            self._sorted = sorted(self._totals)
+        ordered = self._sorted
+        prefix = path if path.endswith(os.sep) else path + os.sep
+        start = bisect.bisect_left(ordered, prefix)
+        end = bisect.bisect_left(ordered, prefix + '\U0010ffff')
+        found = ordered[start:end]
+        if path in self._totals:
+            found.insert(0, path)
+        return found
+
+    def total(self, path: str) -> Tuple[int, int]:
+        """(bytes, archivos) de todo lo que cuelga de una carpeta"""
+        with self._lock:
+            size, files = self._totals.get(os.path.normpath(str(path)), (0, 0))
+            return size, files
+
+    def largest_folders(self, path: str, limit: int = 10,
+                        max_depth: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        Carpetas que más ocupan bajo una ruta (sin contarla a ella)
+
+        Args:
+            path: Carpeta de partida
+            limit: Número de carpetas
+            max_depth: Profundidad máxima respecto a path (1 = sólo sus subcarpetas)
+
+        Returns:
+            Lista de (carpeta, bytes, archivos) de mayor a menor
+        """
+        path = os.path.normpath(str(path))
+        base_depth = path.rstrip(os.sep).count(os.sep)
+        with self._lock:
+            candidates = [folder for folder in self._subtree(path) if folder != path]
+            if max_depth is not None:
+                candidates = [folder for folder in candidates
+                              if folder.count(os.sep) - base_depth <= max_depth]
+            totals = self._totals
+            top = heapq.nlargest(limit, candidates, key=lambda folder: totals[folder][0])
+            return [(folder, totals[folder][0], totals[folder][1]) for folder in top]
+
+    def largest_files(self, path: str, limit: int = 10) -> List[ScanEntry]:
+        """
+        Archivos más grandes bajo una ruta, de mayor a menor
+
+        Se combinan los más grandes de cada carpeta del subárbol, así que el
+        resultado es exacto mientras limit no supere top_files.
+        """
+        path = os.path.normpath(str(path))
+        with self._lock:
+            candidates = []
+            for folder in self._subtree(path):
+                usage = self._direct.get(folder)
+                if usage is not None:
+                    candidates.extend((size, name, mtime, folder) for size, name, mtime in usage.largest)
+            top = heapq.nlargest(limit, candidates)
+        return [ScanEntry(os.path.join(folder, name), name, folder, size, mtime)
+                for size, name, mtime, folder in top]
+
+    def breakdown(self, path: str) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Bytes y archivos por extensión y por categoría bajo una ruta
+
+        Returns:
+            {'by_extension': {ext: {'files', 'size'}}, 'by_category': {cat: {'files', 'size'}}}
+        """
+        path = os.path.normpath(str(path))
+        by_extension: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for folder in self._subtree(path):
+                usage = self._direct.get(folder)
+                if usage is None:
+                    continue
+                for extension, (files, size) in usage.by_extension.items():
+                    totals = by_extension.get(extension)
+                    if totals is None:
+                        by_extension[extension] = {'files': files, 'size': size}
+                    else:
+                        totals['files'] += files
+                        totals['size'] += size
+        by_category: Dict[str, Dict[str, int]] = {}
+        for extension, totals in by_extension.items():
+            category = by_category.setdefault(self.extension_categories.get(extension, 'otros'),
+                                              {'files': 0, 'size': 0})
+            category['files'] += totals['files']
+            category['size'] += totals['size']
+        return {'by_extension': by_extension, 'by_category': by_category}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Carpetas agregadas, origen de los datos y coste de la última construcción o actualización"""
+        return {
+            'directories': len(self._direct),
+            'folders': len(self._totals),
+            'generation': self.generation,
+            'source': self.source,
+            'build_time': self.build_time,
+            'updates': self.updates,
+            'updated_dirs': self.updated_dirs
+        }
@@ -0,0 +1,369 @@
+"""
+Buscador de archivos duplicados para Jarvis
+Agrupa por tamaño, descarta los tamaños únicos y compara hashes por etapas:
+primero el inicio y el final de cada archivo y sólo después el contenido completo
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Bytes leídos del inicio y del final de cada archivo en el hash parcial
+BLOCK_SIZE = 64 * 1024
+# Tamaño de lectura del hash completo
+READ_CHUNK = 1024 * 1024
+# Bytes de cada digest BLAKE2b
+DIGEST_SIZE = 32
+# Archivos por tanda: cada tanda se hashea en paralelo y sus grupos salen al terminarla
+BATCH_FILES = 512
+
+
+def default_hash_cache_path() -> Path:
+    """Ruta por defecto de la caché de hashes (~/.jarvis/file_hashes.db)"""
+    return Path.home() / ".jarvis" / "file_hashes.db"
+
+
+class DuplicateGroup(NamedTuple):
+    """Archivos con el mismo contenido"""
+    size: int
+    # Hash BLAKE2b del contenido completo (hex)
+    digest: str
+    paths: Tuple[str, ...]
+    # Bytes que se liberan conservando una sola copia
+    reclaimable: int
+
+
+class HashCandidate:
+    """Archivo que comparte tamaño con otro, con su identidad y los hashes que ya se conocen"""
+
+    __slots__ = ('path', 'size', 'mtime_ns', 'device', 'inode', 'partial', 'full', 'dirty')
+
+    def __init__(self, path: str, size: int, mtime_ns: int, device: int, inode: int):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.device = device
+        self.inode = inode
+        self.partial: Optional[bytes] = None
+        self.full: Optional[bytes] = None
+        # Tiene hashes nuevos que aún no están en la caché
+        self.dirty = False
+
+    @property
+    def identity(self) -> Tuple[int, int]:
+        return self.device, self.inode
+
+
+class FileHashCache:
+    """
+    Caché persistente de hashes respaldada por SQLite
+
+    Cada archivo se identifica por (dispositivo, inodo) y sus hashes sólo
+    valen mientras coincidan el tamaño y el mtime (en nanosegundos) con los
+    del momento en que se calcularon: un archivo movido o renombrado conserva
+    su hash y uno modificado se vuelve a leer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS hashes (
+            device INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            partial BLOB,
+            full BLOB,
+            PRIMARY KEY (device, inode)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.jarvis/file_hashes.db)
+        """
+        self.db_path = Path(db_path) if db_path else default_hash_cache_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        """Cerrar la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+
+    def load(self, candidates: Iterable[HashCandidate]) -> int:
+        """
+        Rellenar los hashes guardados de los archivos que no han cambiado
+
+        Returns:
+            Número de archivos con algún hash recuperado
+        """
+        found = 0
+        with self._lock:
+            cursor = self._conn.cursor()
+            for candidate in candidates:
+                # Sin inodo (algunos sistemas de archivos) no hay identidad estable
+                if not candidate.inode:
+                    continue
+                row = cursor.execute("SELECT size, mtime_ns, partial, full FROM hashes "
+                                     "WHERE device = ? AND inode = ?",
+                                     (candidate.device, candidate.inode)).fetchone()
+                if row is None or row[0] != candidate.size or row[1] != candidate.mtime_ns:
+                    continue
+                candidate.partial = row[2]
+                candidate.full = row[3]
+                found += 1
+            cursor.close()
+        return found
+
+    def store(self, candidates: Iterable[HashCandidate]) -> int:
+        """Guardar los hashes nuevos de los archivos dados; devuelve cuántos se guardaron"""
+        rows = []
+        for candidate in candidates:
+            if candidate.dirty and candidate.inode:
+                rows.append((candidate.device, candidate.inode, candidate.size, candidate.mtime_ns,
+                             candidate.partial, candidate.full))
+                candidate.dirty = False
+        if rows:
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        return len(rows)
+
+    def clear(self):
+        """Olvidar todos los hashes guardados"""
+        with self._lock:
+            self._conn.execute("DELETE FROM hashes")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Archivos con hash guardado y tamaño en disco de la caché"""
+        size_on_disk = 0
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                size_on_disk += os.path.getsize(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        with self._lock:
+            files, full = self._conn.execute("SELECT COUNT(*), COUNT(full) FROM hashes").fetchone()
+        return {'files': files, 'full_hashes': full, 'size_on_disk': size_on_disk}
+
+
+def partial_hash(path: str, size: int, block_size: int = BLOCK_SIZE) -> bytes:
+    """
+    Hash del primer y el último bloque de un archivo
+
+    Si el archivo mide como mucho dos bloques se lee entero y el resultado
+    es igual al hash completo (el mismo contenido en el mismo orden).
+    """
+    digest = blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        digest.update(f.read(block_size))
+        if size > block_size:
+            f.seek(max(block_size, size - block_size))
+            digest.update(f.read(block_size))
+    return digest.digest()
+
+
+def full_hash(path: str) -> bytes:
+    """Hash BLAKE2b del contenido completo de un archivo"""
+    digest = blake2b(digest_size=DIGEST_SIZE)
+    buffer = bytearray(READ_CHUNK)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.digest()
+
+
+def _stat_candidate(path: str) -> Optional[HashCandidate]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return HashCandidate(path, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+
+
+class DuplicateFinder:
+    """
+    Búsqueda de duplicados en etapas cada vez más caras
+
+    1. Agrupar por tamaño (dato que ya trae el índice o el recorrido) y
+       descartar los tamaños que sólo tiene un archivo.
+    2. Hash parcial (primer y último bloque) de los que quedan y descartar
+       los que no comparten tamaño y hash parcial con otro.
+    3. Hash completo sólo de los supervivientes.
+
+    Las lecturas se reparten en un pool de hilos y los grupos salen por
+    tandas, de los tamaños mayores a los menores, para mostrar pronto los
+    que más espacio liberan. Los hashes se guardan en la caché para que una
+    búsqueda posterior sólo lea los archivos nuevos o modificados.
+    """
+
+    def __init__(self, cache: Optional[FileHashCache] = None, max_workers: Optional[int] = None,
+                 block_size: int = BLOCK_SIZE, batch_files: int = BATCH_FILES):
+        """
+        Args:
+            cache: Caché persistente de hashes (None: se calcula todo cada vez)
+            max_workers: Hilos de lectura (default: min(16, núcleos * 2))
+            block_size: Bytes del inicio y del final que entran en el hash parcial
+            batch_files: Archivos por tanda de hashing
+        """
+        self.cache = cache
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+        self.block_size = block_size
+        self.batch_files = batch_files
+
+    def find(self, entries: Iterable[Any], min_size: int = 1,
+             should_stop: Optional[Callable[[], bool]] = None,
+             stats: Optional[Dict[str, Any]] = None) -> Iterator[DuplicateGroup]:
+        """
+        Buscar archivos con el mismo contenido
+
+        Args:
+            entries: Archivos a comparar (objetos con path y size, p. ej. ScanEntry)
+            min_size: Tamaño mínimo en bytes (los archivos vacíos nunca cuentan)
+            should_stop: Función que devuelve True para abandonar la búsqueda
+            stats: Diccionario que se rellena con el progreso y los totales
+
+        Yields:
+            DuplicateGroup a medida que se confirman
+        """
+        stats = stats if stats is not None else {}
+        started = time.monotonic()
+        stats.update({
+            'files': 0, 'candidates': 0, 'hard_links': 0, 'changed': 0, 'errors': 0,
+            'cache_hits': 0, 'partial_hashes': 0, 'full_hashes': 0, 'bytes_read': 0,
+            'groups': 0, 'duplicate_files': 0, 'reclaimable': 0, 'complete': True
+        })
+        min_size = max(1, min_size)
+
+        by_size: Dict[int, List[str]] = {}
+        for entry in entries:
+            stats['files'] += 1
+            if entry.size >= min_size:
+                by_size.setdefault(entry.size, []).append(entry.path)
+        # De mayor a menor: los primeros grupos son los que más espacio liberan
+        buckets = sorted(((size, paths) for size, paths in by_size.items() if len(paths) > 1), reverse=True)
+        del by_size
+        stats['candidates'] = sum(len(paths) for _, paths in buckets)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jarvis-hash')
+        try:
+            batch: List[Tuple[int, List[str]]] = []
+            batch_count = 0
+            for bucket in buckets:
+                batch.append(bucket)
+                batch_count += len(bucket[1])
+                if batch_count < self.batch_files:
+                    continue
+                if should_stop is not None and should_stop():
+                    stats['complete'] = False
+                    break
+                yield from self._process_batch(executor, batch, stats)
+                batch, batch_count = [], 0
+            else:
+                if batch:
+                    yield from self._process_batch(executor, batch, stats)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            stats['elapsed'] = time.monotonic() - started
+            stats['mb_per_second'] = (stats['bytes_read'] / (1024 * 1024) / stats['elapsed']
+                                      if stats['elapsed'] > 0 else 0.0)
+
+    def _process_batch(self, executor: ThreadPoolExecutor, batch: List[Tuple[int, List[str]]],
+                       stats: Dict[str, Any]) -> Iterator[DuplicateGroup]:
+        """Confirmar los duplicados de una tanda de grupos por tamaño"""
+        # Identidad y tamaño actuales: el índice puede estar algo desfasado
+        groups: List[List[HashCandidate]] = []
+        for (size, paths), candidates in zip(batch, executor.map(
+                lambda bucket: [_stat_candidate(path) for path in bucket[1]], batch)):
+            seen = set()
+            group = []
+            for candidate in candidates:
+                if candidate is None or candidate.size != size:
+                    stats['changed'] += 1
+                    continue
+                # Enlaces duros: el mismo archivo con otro nombre no ocupa más espacio
+                if candidate.identity in seen and candidate.inode:
+                    stats['hard_links'] += 1
+                    continue
+                seen.add(candidate.identity)
+                group.append(candidate)
+            if len(group) > 1:
+                groups.append(group)
+
+        candidates = [candidate for group in groups for candidate in group]
+        if self.cache is not None:
+            stats['cache_hits'] += self.cache.load(candidates)
+
+        groups = self._split(executor, groups, 'partial', stats)
+        groups = self._split(executor, groups, 'full', stats)
+
+        if self.cache is not None:
+            try:
+                self.cache.store(candidates)
+            except sqlite3.Error as e:
+                print(f"⚠️ No se pudieron guardar los hashes: {e}")
+
+        for group in groups:
+            size = group[0].size
+            reclaimable = size * (len(group) - 1)
+            stats['groups'] += 1
+            stats['duplicate_files'] += len(group) - 1
+            stats['reclaimable'] += reclaimable
+            yield DuplicateGroup(size, group[0].full.hex(), tuple(sorted(c.path for c in group)), reclaimable)
+
+    def _split(self, executor: ThreadPoolExecutor, groups: List[List[HashCandidate]], kind: str,
+               stats: Dict[str, Any]) -> List[List[HashCandidate]]:
+        """Calcular el hash que falte y dividir cada grupo por su valor, sin los que quedan solos"""
+        block_size = self.block_size
+        pending = [c for group in groups for c in group if getattr(c, kind) is None]
+        if kind == 'full':
+            # Hasta dos bloques el hash parcial ya cubre el archivo entero
+            for candidate in pending:
+                if candidate.size <= 2 * block_size:
+                    candidate.full = candidate.partial
+                    candidate.dirty = True
+            pending = [c for c in pending if c.full is None]
+
+        def compute(candidate: HashCandidate) -> Optional[bytes]:
+            try:
+                if kind == 'partial':
+                    return partial_hash(candidate.path, candidate.size, block_size)
+                return full_hash(candidate.path)
+            except OSError:
+                return None
+
+        for candidate, digest in zip(pending, executor.map(compute, pending)):
+            if digest is None:
+                stats['errors'] += 1
+                continue
+            setattr(candidate, kind, digest)
+            candidate.dirty = True
+            stats[f'{kind}_hashes'] += 1
+            stats['bytes_read'] += (candidate.size if kind == 'full'
+                                    else min(candidate.size, 2 * block_size))
+
+        result = []
+        for group in groups:
+            by_digest: Dict[bytes, List[HashCandidate]] = {}
+            for candidate in group:
+                digest = getattr(candidate, kind)
+                if digest is not None:
+                    by_digest.setdefault(digest, []).append(candidate)
+            result.extend(members for members in by_digest.values() if len(members) > 1)
+        return result
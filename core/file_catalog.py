@@ -0,0 +1,408 @@
+"""
+Catálogo de archivos en memoria para Jarvis
+Guarda el catálogo por columnas (tamaño, fecha, extensión y directorio) con
+los nombres en un único búfer, y evalúa los filtros como máscaras sobre todo
+el catálogo a la vez
+"""
+
+import array
+import bisect
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+from core.fuzzy_names import FuzzyNameIndex
+from core.name_lookup import NameHashIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Separador entre nombres en el búfer (no puede aparecer en un nombre de archivo)
+NAME_SEPARATOR = b'\0'
+
+
+class FileCatalog:
+    """
+    Catálogo compacto por columnas
+
+    Cada archivo ocupa una posición en cuatro columnas numéricas (tamaño,
+    fecha, identificador de extensión e identificador de directorio) y su
+    nombre va en un búfer UTF-8 contiguo; las extensiones y los directorios
+    se guardan una sola vez. Con NumPy las columnas se ven como arrays sin
+    copiarlas y cada filtro es una máscara vectorizada; sin NumPy se usan
+    los mismos array.array con bucles de Python (correcto pero más lento).
+    """
+
+    def __init__(self, extension_categories: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            extension_categories: Mapa extensión -> categoría ('.py' -> 'codigo')
+        """
+        self.extension_categories = extension_categories or {}
+        self.backend = 'numpy' if HAS_NUMPY else 'array'
+        # Generación del índice a partir del que se construyó (ver FileIndex.generation)
+        self.generation = 0
+        self.build_time = 0.0
+
+        self._sizes = array.array('q')
+        self._mtimes = array.array('d')
+        self._ext_ids = array.array('i')
+        self._dir_ids = array.array('i')
+        self._name_offsets = array.array('q', [0])
+        self._names = bytearray()
+        self._extensions: List[str] = []
+        self._extension_ids: Dict[str, int] = {}
+        self._directories: List[str] = []
+        self._directory_ids: Dict[str, int] = {}
+
+        # Derivados que se calculan al consultar y se descartan al añadir filas
+        self._columns: Optional[Dict[str, Any]] = None
+        self._lower: Optional[Tuple[bytes, Any]] = None
+        self._roots_cache: Dict[Tuple[str, ...], Any] = {}
+        self._fuzzy: Optional[FuzzyNameIndex] = None
+        self._by_name: Optional[NameHashIndex] = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]],
+                  extension_categories: Optional[Dict[str, str]] = None,
+                  generation: int = 0) -> 'FileCatalog':
+        """
+        Construir el catálogo a partir de filas (name, extension, size, mtime, directory)
+
+        Las filas agrupadas por directorio (FileIndex.iter_file_rows) evitan
+        buscar el directorio en el diccionario en cada fila.
+        """
+        catalog = cls(extension_categories)
+        start = time.perf_counter()
+        catalog.extend(rows)
+        catalog.generation = generation
+        catalog.build_time = time.perf_counter() - start
+        return catalog
+
+    def extend(self, rows: Iterable[Sequence[Any]]):
+        """Añadir filas (name, extension, size, mtime, directory)"""
+        with self._lock:
+            self._invalidate()
+            sizes, mtimes, ext_ids, dir_ids = self._sizes, self._mtimes, self._ext_ids, self._dir_ids
+            offsets, names = self._name_offsets, self._names
+            extension_ids, directory_ids = self._extension_ids, self._directory_ids
+            last_directory = None
+            dir_id = -1
+            for name, extension, size, mtime, directory in rows:
+                if directory != last_directory:
+                    dir_id = directory_ids.get(directory)
+                    if dir_id is None:
+                        dir_id = directory_ids[directory] = len(self._directories)
+                        self._directories.append(directory)
+                    last_directory = directory
+                ext_id = extension_ids.get(extension)
+                if ext_id is None:
+                    ext_id = extension_ids[extension] = len(self._extensions)
+                    self._extensions.append(extension)
+                names += name.encode('utf-8', 'surrogateescape')
+                names += NAME_SEPARATOR
+                offsets.append(len(names))
+                sizes.append(size)
+                mtimes.append(mtime)
+                ext_ids.append(ext_id)
+                dir_ids.append(dir_id)
+
+    def append(self, name: str, extension: str, size: int, mtime: float, directory: str):
+        """Añadir un archivo"""
+        self.extend([(name, extension, size, mtime, directory)])
+
+    def _invalidate(self):
+        # Las vistas de NumPy deben soltarse antes de que los array.array crezcan
+        self._columns = None
+        self._lower = None
+        self._roots_cache = {}
+        self._fuzzy = None
+        self._by_name = None
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    # ------------------------------------------------------------------
+    # Acceso por fila
+    # ------------------------------------------------------------------
+
+    def name(self, index: int) -> str:
+        start, end = self._name_offsets[index], self._name_offsets[index + 1] - 1
+        return self._names[start:end].decode('utf-8', 'surrogateescape')
+
+    def iter_names(self) -> Iterator[str]:
+        """Nombres en orden de posición"""
+        for name in bytes(self._names).split(NAME_SEPARATOR)[:len(self)]:
+            yield name.decode('utf-8', 'surrogateescape')
+
+    def iter_rows(self) -> Iterator[Tuple[str, str, int, float, str]]:
+        """Todas las filas (name, extension, size, mtime, directory) en orden de posición"""
+        with self._lock:
+            extensions, directories = self._extensions, self._directories
+            for name, ext_id, size, mtime, dir_id in zip(self.iter_names(), self._ext_ids, self._sizes,
+                                                         self._mtimes, self._dir_ids):
+                yield name, extensions[ext_id], size, mtime, directories[dir_id]
+
+    def directory(self, index: int) -> str:
+        return self._directories[self._dir_ids[index]]
+
+    def path(self, index: int) -> str:
+        return os.path.join(self.directory(index), self.name(index))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Fila con las mismas claves que FileIndex.iter_search"""
+        name = self.name(index)
+        directory = self._directories[self._dir_ids[index]]
+        extension = self._extensions[self._ext_ids[index]]
+        return {
+            'path': os.path.join(directory, name),
+            'name': name,
+            'extension': extension,
+            'size': self._sizes[index],
+            'mtime': self._mtimes[index],
+            'category': self.extension_categories.get(extension, 'otros'),
+            'directory': directory
+        }
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def query(self, extensions: Optional[Iterable[str]] = None,
+              modified_after: Optional[float] = None,
+              min_size: Optional[int] = None,
+              max_size: Optional[int] = None,
+              roots: Optional[Iterable[Path]] = None,
+              keyword_pattern: Optional[Pattern] = None,
+              categories: Optional[Iterable[str]] = None,
+              order_by_recent: bool = True,
+              limit: Optional[int] = None) -> List[int]:
+        """
+        Posiciones de los archivos que cumplen todos los filtros
+
+        Args:
+            extensions: Extensiones permitidas
+            modified_after: Timestamp mínimo de modificación
+            min_size: Tamaño mínimo en bytes
+            max_size: Tamaño máximo en bytes
+            roots: Limitar a archivos bajo estas rutas
+            keyword_pattern: Patrón que debe aparecer en el nombre en minúsculas
+                (QueryPlan.keyword_matcher)
+            categories: Categorías permitidas (se suman a extensions)
+            order_by_recent: Ordenar por fecha de modificación descendente
+            limit: Número máximo de posiciones (los más recientes si se ordena)
+
+        Returns:
+            Lista de posiciones (ver row, path)
+        """
+        allowed_extensions = set(extensions or ())
+        if categories:
+            wanted = set(categories)
+            allowed_extensions.update(ext for ext, cat in self.extension_categories.items() if cat in wanted)
+        if not allowed_extensions and (extensions or categories):
+            return []
+        root_key = tuple(sorted(os.path.normpath(str(root)) for root in roots)) if roots else None
+
+        with self._lock:
+            if self.backend == 'numpy':
+                return self._query_numpy(allowed_extensions, modified_after, min_size, max_size,
+                                         root_key, keyword_pattern, order_by_recent, limit)
+            return self._query_array(allowed_extensions, modified_after, min_size, max_size,
+                                     root_key, keyword_pattern, order_by_recent, limit)
+
+    def _numpy_columns(self) -> Dict[str, Any]:
+        """Vistas de NumPy sobre las columnas (sin copiar)"""
+        if self._columns is None:
+            self._columns = {
+                'size': np.frombuffer(self._sizes, dtype=np.int64),
+                'mtime': np.frombuffer(self._mtimes, dtype=np.float64),
+                'ext': np.frombuffer(self._ext_ids, dtype=np.int32),
+                'dir': np.frombuffer(self._dir_ids, dtype=np.int32),
+            }
+        return self._columns
+
+    def _query_numpy(self, allowed_extensions, modified_after, min_size, max_size,
+                     root_key, keyword_pattern, order_by_recent, limit) -> List[int]:
+        columns = self._numpy_columns()
+        mask = None
+
+        def combine(current, other):
+            return other if current is None else current & other
+
+        if modified_after is not None:
+            mask = combine(mask, columns['mtime'] >= modified_after)
+        if min_size:
+            mask = combine(mask, columns['size'] >= min_size)
+        if max_size:
+            mask = combine(mask, columns['size'] <= max_size)
+        if allowed_extensions:
+            # Tabla de consulta por identificador: un único acceso indexado por archivo
+            lookup = np.zeros(len(self._extensions), dtype=bool)
+            for extension in allowed_extensions:
+                ext_id = self._extension_ids.get(extension)
+                if ext_id is not None:
+                    lookup[ext_id] = True
+            mask = combine(mask, lookup[columns['ext']])
+        if root_key:
+            mask = combine(mask, self._directories_under(root_key)[columns['dir']])
+        if keyword_pattern is not None:
+            keyword_mask = np.zeros(len(self), dtype=bool)
+            keyword_mask[self._keyword_rows(keyword_pattern)] = True
+            mask = combine(mask, keyword_mask)
+
+        indices = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        if order_by_recent and len(indices):
+            mtimes = columns['mtime'][indices]
+            if limit is not None and len(indices) > limit:
+                # Sólo se ordenan los K más recientes
+                top = np.argpartition(-mtimes, limit - 1)[:limit]
+                indices, mtimes = indices[top], mtimes[top]
+            indices = indices[np.argsort(-mtimes, kind='stable')]
+        if limit is not None:
+            indices = indices[:limit]
+        return indices.tolist()
+
+    def _query_array(self, allowed_extensions, modified_after, min_size, max_size,
+                     root_key, keyword_pattern, order_by_recent, limit) -> List[int]:
+        sizes, mtimes, ext_ids, dir_ids = self._sizes, self._mtimes, self._ext_ids, self._dir_ids
+        candidates: Iterable[int] = range(len(self))
+        if keyword_pattern is not None:
+            candidates = self._keyword_rows(keyword_pattern)
+        ext_allowed = None
+        if allowed_extensions:
+            ext_allowed = {self._extension_ids[e] for e in allowed_extensions if e in self._extension_ids}
+        dir_allowed = self._directories_under(root_key) if root_key else None
+
+        found = []
+        for i in candidates:
+            if modified_after is not None and mtimes[i] < modified_after:
+                continue
+            if min_size and sizes[i] < min_size:
+                continue
+            if max_size and sizes[i] > max_size:
+                continue
+            if ext_allowed is not None and ext_ids[i] not in ext_allowed:
+                continue
+            if dir_allowed is not None and not dir_allowed[dir_ids[i]]:
+                continue
+            found.append(i)
+
+        if order_by_recent:
+            if limit is not None and len(found) > limit:
+                return heapq.nlargest(limit, found, key=mtimes.__getitem__)
+            found.sort(key=mtimes.__getitem__, reverse=True)
+        return found[:limit] if limit is not None else found
+
+    def _directories_under(self, root_key: Tuple[str, ...]):
+        """Tabla directorio -> bool de los directorios bajo alguna raíz (en caché)"""
+        cached = self._roots_cache.get(root_key)
+        if cached is not None:
+            return cached
+        prefixes = tuple(root if root.endswith(os.sep) else root + os.sep for root in root_key)
+        exact = set(root_key)
+        flags = [d in exact or d.startswith(prefixes) for d in self._directories]
+        table = np.array(flags, dtype=bool) if self.backend == 'numpy' else flags
+        self._roots_cache[root_key] = table
+        return table
+
+    def _keyword_rows(self, keyword_pattern: Pattern):
+        """
+        Posiciones cuyo nombre en minúsculas contiene el patrón
+
+        El patrón se busca de una vez en un búfer con todos los nombres en
+        minúsculas; cada coincidencia se traduce a su fila por bisección en la
+        tabla de desplazamientos.
+        """
+        if self._lower is None:
+            lower = bytearray()
+            offsets = array.array('q', [0])
+            names = self._names
+            start = 0
+            for end in self._name_offsets[1:]:
+                name = names[start:end - 1].decode('utf-8', 'surrogateescape')
+                lower += name.lower().encode('utf-8', 'surrogateescape')
+                lower += NAME_SEPARATOR
+                offsets.append(len(lower))
+                start = end
+            self._lower = (bytes(lower), offsets)
+        lower, offsets = self._lower
+
+        pattern = re.compile(keyword_pattern.pattern.encode('utf-8'))
+        positions = [match.start() for match in pattern.finditer(lower)]
+        if self.backend == 'numpy':
+            offsets_array = np.frombuffer(offsets, dtype=np.int64)
+            rows = np.searchsorted(offsets_array, np.array(positions, dtype=np.int64), side='right') - 1
+            return np.unique(rows)
+        rows = []
+        for position in positions:
+            row = bisect.bisect_right(offsets, position) - 1
+            if not rows or rows[-1] != row:
+                rows.append(row)
+        return rows
+
+    def name_index(self) -> NameHashIndex:
+        """Tabla hash nombre -> posiciones (se construye al pedirla)"""
+        with self._lock:
+            if self._by_name is None:
+                self._by_name = NameHashIndex.from_names(self.iter_names(), self.name, capacity=len(self))
+            return self._by_name
+
+    def lookup_name(self, name: str) -> List[int]:
+        """Posiciones de los archivos con exactamente ese nombre (sin distinguir mayúsculas)"""
+        return self.name_index().lookup(name)
+
+    def fuzzy_index(self) -> FuzzyNameIndex:
+        """Índice de nombres aproximados sobre las mismas posiciones (se construye al pedirlo)"""
+        with self._lock:
+            if self._fuzzy is None:
+                self._fuzzy = FuzzyNameIndex.from_names(self.iter_names())
+            return self._fuzzy
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Bytes ocupados por cada parte del catálogo y por archivo"""
+        columns = {
+            'size': sys.getsizeof(self._sizes),
+            'mtime': sys.getsizeof(self._mtimes),
+            'extension_id': sys.getsizeof(self._ext_ids),
+            'directory_id': sys.getsizeof(self._dir_ids),
+            'name_offsets': sys.getsizeof(self._name_offsets),
+            'names': sys.getsizeof(self._names),
+        }
+        interned = (sys.getsizeof(self._directories) + sys.getsizeof(self._directory_ids)
+                    + sum(sys.getsizeof(d) for d in self._directories)
+                    + sys.getsizeof(self._extensions) + sys.getsizeof(self._extension_ids)
+                    + sum(sys.getsizeof(e) for e in self._extensions))
+        lower = 0
+        if self._lower is not None:
+            lower = sys.getsizeof(self._lower[0]) + sys.getsizeof(self._lower[1])
+        total = sum(columns.values()) + interned + lower
+        return {
+            'backend': self.backend,
+            'entries': len(self),
+            'directories': len(self._directories),
+            'extensions': len(self._extensions),
+            'columns': columns,
+            'interned': interned,
+            'lowercase_names': lower,
+            'total': total,
+            'bytes_per_entry': round(total / len(self), 1) if len(self) else 0.0,
+            'build_time': round(self.build_time, 3)
+        }
@@ -0,0 +1,650 @@
+"""
+Índice persistente de archivos para Jarvis
+Mantiene un catálogo SQLite de nombres de archivo que se refresca de forma incremental
+"""
+
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.content_sniffer import ContentSniffer, ContentType, needs_sniffing
+from core.file_scanner import DirectoryListing, DirectoryScanner, ScanEntry
+from core.ignore_rules import IgnoreMatcher
+from core.mounts import MountPolicy
+from core.scan_scheduler import FairShareScheduler
+
+# Cambios por directorio que se recuerdan para las actualizaciones incrementales
+MAX_CHANGES = 50000
+# Conexiones de sólo lectura que se conservan abiertas para las consultas en flujo
+MAX_IDLE_READERS = 4
+# Directorios cambiados que un refresco acumula en una transacción antes de confirmarla
+REFRESH_COMMIT_DIRS = 256
+
+def default_index_path() -> Path:
+    """Ruta por defecto de la base de datos del índice (~/.jarvis/file_index.db)"""
+    return Path.home() / ".jarvis" / "file_index.db"
+
+
+class FileIndex:
+    """
+    Catálogo de archivos en disco respaldado por SQLite
+
+    Guarda por archivo: ruta, nombre, nombre en minúsculas, extensión, tamaño,
+    fecha de modificación y categoría. Por cada directorio guarda su mtime, de
+    modo que un refresco sólo vuelve a listar los directorios cuyo mtime cambió
+    desde la pasada anterior (crear, borrar o renombrar entradas cambia el mtime
+    del directorio padre). Los cambios de contenido de un archivo no alteran el
+    mtime del directorio, por lo que su tamaño/fecha pueden quedar desfasados
+    hasta que el directorio vuelva a listarse.
+
+    Con un ContentSniffer, los archivos cuya extensión no dice nada (sin
+    extensión, .bin, .tmp...) se identifican por sus primeros bytes al
+    listarse y su columna extension guarda la del formato detectado ('.jpg'
+    para una foto sin extensión), de modo que los filtros por tipo los
+    encuentran.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_lower TEXT NOT NULL,
+            extension TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            category TEXT NOT NULL,
+            directory TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_directory ON files(directory);
+        CREATE INDEX IF NOT EXISTS idx_files_name_lower ON files(name_lower);
+        CREATE INDEX IF NOT EXISTS idx_files_extension ON files(extension);
+        CREATE INDEX IF NOT EXISTS idx_files_mtime ON files(mtime);
+        CREATE INDEX IF NOT EXISTS idx_files_size ON files(size);
+        CREATE TABLE IF NOT EXISTS dirs (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            mtime_ns INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent);
+    """
+
+    def __init__(self, db_path: Optional[Path] = None,
+                 extension_categories: Optional[Dict[str, str]] = None,
+                 skip_dir_names: Optional[Set[str]] = None,
+                 ignore: Optional[IgnoreMatcher] = None,
+                 mounts: Optional[MountPolicy] = None,
+                 sniffer: Optional[ContentSniffer] = None):
+        """
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.jarvis/file_index.db)
+            extension_categories: Mapa extensión -> categoría ('.py' -> 'codigo')
+            skip_dir_names: Nombres de directorio que no se indexan
+            ignore: Reglas de exclusión estilo .gitignore
+            mounts: Política para montajes de red/FUSE y pseudo-sistemas
+            sniffer: Detección por contenido de los archivos sin extensión útil
+        """
+        self.db_path = Path(db_path) if db_path else default_index_path()
+        self.extension_categories = extension_categories or {}
+        self.skip_dir_names = skip_dir_names or set()
+        self.last_refresh: Dict[str, Any] = {}
+        # Aumenta con cada cambio en el catálogo (para invalidar copias en memoria)
+        self.generation = 0
+        # Directorios cambiados en cada generación: (generación, directorio, con subárbol)
+        self._changes: Deque[Tuple[int, str, bool]] = deque()
+        # Generación más reciente de la que se han descartado cambios
+        self._changes_floor = 0
+        # Cambios escritos pero aún sin confirmar: (directorio, con subárbol)
+        self._uncommitted: List[Tuple[str, bool]] = []
+        self.ignore = ignore
+        self.sniffer = sniffer
+        self.scanner = DirectoryScanner(should_skip_dir=self.should_skip_dir, ignore=ignore, mounts=mounts)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Una sola conexión de escritura compartida entre hilos, serializada con un lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+        # Conexiones de sólo lectura libres para las consultas en flujo (ver _reader)
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def close(self):
+        """Cerrar las conexiones con la base de datos"""
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for reader in readers:
+            reader.close()
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _reader(self):
+        """
+        Conexión de sólo lectura para una consulta en flujo
+
+        Con WAL cada lectura ve una instantánea fija del catálogo y no
+        bloquea ni es bloqueada por los refrescos, así que quien recorre
+        los resultados puede tardar lo que quiera entre fila y fila sin
+        retener el lock de la conexión de escritura.
+        """
+        with self._readers_lock:
+            conn = self._readers.pop() if self._readers else None
+        if conn is None:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            with self._readers_lock:
+                if len(self._readers) < MAX_IDLE_READERS:
+                    self._readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    # ------------------------------------------------------------------
+    # Refresco incremental
+    # ------------------------------------------------------------------
+
+    def should_skip_dir(self, name: str) -> bool:
+        """Directorios pesados/ocultos que no se indexan"""
+        return name.startswith('.') or name in self.skip_dir_names
+
+    def _category_for(self, extension: str) -> str:
+        return self.extension_categories.get(extension, 'otros')
+
+    def refresh(self, roots: Iterable[Path], time_limit: Optional[float] = None,
+                should_stop: Optional[Callable[[], bool]] = None,
+                priority: Optional[Callable[[str], float]] = None) -> Dict[str, Any]:
+        """
+        Refrescar el índice recorriendo las raíces indicadas
+
+        Sólo se listan de nuevo los directorios cuyo mtime cambió; para los
+        demás se reutilizan los subdirectorios conocidos del índice. Los
+        directorios se sondean en paralelo con DirectoryScanner y las raíces
+        se turnan (FairShareScheduler) para repartirse el tiempo. Los
+        cambios se confirman por directorio, así que una pasada interrumpida
+        por el límite de tiempo continúa donde quedó en la siguiente.
+
+        Args:
+            roots: Directorios raíz a indexar
+            time_limit: Límite de tiempo en segundos (None = sin límite)
+            should_stop: Función que devuelve True para interrumpir la pasada
+            priority: Tasa de aciertos por directorio (los de mayor tasa se sondean antes)
+
+        Returns:
+            Estadísticas de la pasada (directorios visitados, re-escaneados,
+            archivos actualizados, si la pasada se completó, duración y
+            tiempo/directorios por raíz en 'by_root')
+        """
+        start = time.monotonic()
+        stats = {
+            'dirs_visited': 0,
+            'dirs_rescanned': 0,
+            'files_updated': 0,
+            'stat_calls': 0,
+            'dir_stat_calls': 0,
+            'duplicate_dirs': 0,
+            'pruned_dirs': 0,
+            'complete': True,
+            'duration': 0.0
+        }
+        if self.ignore is not None:
+            self.ignore.clear_cache()
+        mounts = self.scanner.mounts
+        if mounts is not None:
+            mounts.refresh()
+
+        with self._lock:
+            known_mtimes: Dict[str, int] = {}
+            parent_of: Dict[str, Optional[str]] = {}
+            children: Dict[str, List[str]] = {}
+            for row in self._conn.execute("SELECT path, parent, mtime_ns FROM dirs"):
+                known_mtimes[row['path']] = row['mtime_ns']
+                parent_of[row['path']] = row['parent']
+                if row['parent'] is not None:
+                    children.setdefault(row['parent'], []).append(row['path'])
+
+            # (st_dev, st_ino) ya recorridos: un montaje bind o una raíz repetida no se indexa dos veces
+            identities: Set[tuple] = set()
+            # Las raíces se turnan y dentro de cada una se sondean primero los
+            # directorios con más aciertos y los menos profundos; las escrituras
+            # en SQLite se hacen sólo desde este hilo
+            scheduler = FairShareScheduler(roots, priority, mounts)
+            deadline = start + time_limit if time_limit is not None else None
+            probes = self.scanner.run_scheduled(
+                scheduler, lambda d: self._probe_directory(d, known_mtimes.get(d)), deadline, should_stop)
+            try:
+                for task, probe in probes:
+                    directory = task.path
+                    if probe is None:
+                        if directory in known_mtimes:
+                            self._forget_tree(directory)
+                        continue
+
+                    mtime_ns, identity, listing, content_types = probe
+                    if identity in identities:
+                        stats['duplicate_dirs'] += 1
+                        if directory in known_mtimes:
+                            self._forget_tree(directory)
+                        continue
+                    identities.add(identity)
+                    stats['dirs_visited'] += 1
+                    # El sondeo hace un stat del directorio y el listado otro más
+                    stats['dir_stat_calls'] += 1 if listing is None else 2
+                    stats['stat_calls'] += listing.stat_calls if listing else 0
+                    if listing is None:
+                        subdirs = children.get(directory, [])
+                        if self.ignore is not None and subdirs:
+                            subdirs = self._drop_ignored_dirs(directory, subdirs, stats)
+                    else:
+                        parent = parent_of.get(directory) if task.depth == 0 else os.path.dirname(directory)
+                        subdirs = self._store_listing(directory, parent, mtime_ns, listing,
+                                                      children.get(directory, []), stats, content_types)
+                        stats['dirs_rescanned'] += 1
+                        stats['pruned_dirs'] += listing.pruned
+                    for excluded in scheduler.push_children(task, subdirs):
+                        # Montaje excluido (red/FUSE sin incluir o pseudo-sistema): fuera del índice
+                        if excluded in known_mtimes:
+                            self._forget_tree(excluded)
+                    # Una transacción por tanda de directorios, no por directorio
+                    if len(self._uncommitted) >= REFRESH_COMMIT_DIRS:
+                        self._commit()
+            finally:
+                probes.close()
+
+            stats['complete'] = not scheduler.pending_roots()
+            stats['by_root'] = scheduler.root_stats()
+            stats['mounts'] = scheduler.mount_stats()
+            self._commit()
+
+        stats['duration'] = time.monotonic() - start
+        self.last_refresh = stats
+        return stats
+
+    def _drop_ignored_dirs(self, directory: str, subdirs: List[str], stats: Dict[str, Any]) -> List[str]:
+        """Olvidar los subdirectorios conocidos que una regla nueva excluye (el padre no cambió)"""
+        chain = self.ignore.rules_for(directory)
+        if not chain:
+            return subdirs
+        kept = []
+        for subdir in subdirs:
+            if self.ignore.match_chain(chain, subdir, os.path.basename(subdir), True):
+                self._forget_tree(subdir)
+                stats['pruned_dirs'] += 1
+            else:
+                kept.append(subdir)
+        return kept
+
+    def _probe_directory(self, directory: str, known_mtime_ns: Optional[int]):
+        """
+        Comprobar un directorio (en un hilo del pool)
+
+        Returns:
+            None si ya no existe; (mtime_ns, identidad, None, None) si no
+            cambió; (mtime_ns, identidad, DirectoryListing, tipos) si hay que
+            reemplazarlo, con el tipo por contenido de los archivos sin
+            extensión útil (ruta -> ContentType). La identidad es (st_dev, st_ino).
+        """
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return None
+        identity = (st.st_dev, st.st_ino)
+        if known_mtime_ns == st.st_mtime_ns:
+            return st.st_mtime_ns, identity, None, None
+        listing = self.scanner.list_directory(directory)
+        content_types = None
+        if self.sniffer is not None:
+            # Ya en un hilo del pool de sondeo: las lecturas de cada directorio van seguidas
+            ambiguous = [f for f in listing.files if needs_sniffing(f.extension)]
+            if ambiguous:
+                content_types = self.sniffer.sniff_entries(ambiguous, parallel=False)
+        return st.st_mtime_ns, identity, listing, content_types
+
+    def _store_listing(self, directory: str, parent: Optional[str], mtime_ns: int,
+                       listing: DirectoryListing, old_subdirs: List[str],
+                       stats: Dict[str, Any],
+                       content_types: Optional[Dict[str, Optional[ContentType]]] = None) -> List[str]:
+        """Reemplazar en el índice las filas de un directorio recién listado"""
+        subdirs = listing.subdirs
+        content_types = content_types or {}
+        rows = [self._row_for(f.path, f.name, directory, f.size, f.mtime, content_types.get(f.path))
+                for f in listing.files]
+
+        conn = self._conn
+        conn.execute("DELETE FROM files WHERE directory = ?", (directory,))
+        conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        for removed in set(old_subdirs) - set(subdirs):
+            self._forget_tree(removed)
+        # Un directorio sin permisos queda registrado vacío para no reintentarlo
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (directory, parent, mtime_ns))
+        self._uncommitted.append((directory, False))
+
+        stats['files_updated'] += len(rows)
+        return subdirs
+
+    def apply_changes(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """
+        Reconciliar el índice con el estado actual de una tanda de rutas
+
+        Pensado para eventos del sistema de archivos: cada ruta se consulta con
+        lstat y se inserta, actualiza o elimina según exista. Los directorios
+        nuevos se registran con mtime 0 para que el siguiente refresco los liste,
+        y el mtime de los directorios padre conocidos se actualiza para que un
+        refresco posterior no los vuelva a escanear.
+
+        Args:
+            paths: Rutas afectadas (archivos o directorios)
+
+        Returns:
+            Diccionario con archivos actualizados, rutas eliminadas y la lista
+            de directorios nuevos ('new_dirs')
+        """
+        result = {'updated': 0, 'removed': 0, 'new_dirs': []}
+        parents: Set[str] = set()
+
+        with self._lock:
+            conn = self._conn
+            for path in paths:
+                path = os.path.normpath(path)
+                directory, name = os.path.split(path)
+                parents.add(directory)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                    self._forget_tree(path)
+                    result['removed'] += 1
+                    continue
+
+                if self.ignore is not None and self.ignore.is_ignored(path, stat.S_ISDIR(st.st_mode)):
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    if self.should_skip_dir(name):
+                        continue
+                    known = conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone()
+                    if not known:
+                        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, 0)", (path, directory))
+                        result['new_dirs'].append(path)
+                elif stat.S_ISREG(st.st_mode) and not name.startswith('.'):
+                    content_type = None
+                    if self.sniffer is not None and needs_sniffing(os.path.splitext(name)[1].lower()):
+                        entry = ScanEntry(path, name, directory, st.st_size, st.st_mtime, st.st_ino, st.st_dev)
+                        content_type = self.sniffer.sniff_entries([entry], parallel=False).get(path)
+                    conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 self._row_for(path, name, directory, st.st_size, st.st_mtime, content_type))
+                    result['updated'] += 1
+
+            for directory in parents:
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                conn.execute("UPDATE dirs SET mtime_ns = ? WHERE path = ? AND mtime_ns != 0",
+                             (mtime_ns, directory))
+            if result['updated'] or result['removed']:
+                self._uncommitted.extend((directory, False) for directory in parents)
+            self._commit()
+
+        return result
+
+    def list_dirs(self, roots: Iterable[Path]) -> List[str]:
+        """Directorios indexados bajo las raíces dadas (incluidas)"""
+        found: List[str] = []
+        with self._lock:
+            for root in roots:
+                root_str = os.path.normpath(str(root))
+                low, high = self._subtree_bounds(root_str)
+                found.extend(row[0] for row in self._conn.execute(
+                    "SELECT path FROM dirs WHERE path = ? OR (path > ? AND path < ?)",
+                    (root_str, low, high)))
+        return list(dict.fromkeys(found))
+
+    def _row_for(self, path: str, name: str, directory: str, size: int, mtime: float,
+                 content_type: Optional[ContentType] = None) -> tuple:
+        extension = os.path.splitext(name)[1].lower()
+        category = self._category_for(extension)
+        if content_type is not None:
+            # El formato detectado manda sobre una extensión que no dice nada
+            extension = content_type.extension or extension
+            category = content_type.category
+        return (path, name, name.lower(), extension, size, mtime, category, directory)
+
+    def _forget_tree(self, directory: str):
+        """Eliminar del índice un directorio y todo lo que cuelga de él"""
+        low, high = self._subtree_bounds(directory)
+        conn = self._conn
+        conn.execute("DELETE FROM files WHERE directory = ? OR (directory > ? AND directory < ?)",
+                     (directory, low, high))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path > ? AND path < ?)",
+                     (directory, low, high))
+        self._uncommitted.append((directory, True))
+
+    def _commit(self):
+        """
+        Confirmar la transacción en curso y publicar sus cambios
+
+        La generación sólo avanza aquí, una vez por transacción: quien la lea
+        ya puede ver con sus lectores todos los cambios que anota.
+        """
+        self._conn.commit()
+        if not self._uncommitted:
+            return
+        self.generation += 1
+        for directory, subtree in self._uncommitted:
+            self._log_change(directory, subtree)
+        self._uncommitted = []
+
+    def _log_change(self, directory: str, subtree: bool = False):
+        """Anotar que las filas de un directorio (o de todo su subárbol) cambiaron en esta generación"""
+        self._changes.append((self.generation, directory, subtree))
+        if len(self._changes) > MAX_CHANGES:
+            self._changes_floor = self._changes.popleft()[0]
+
+    def changes_since(self, generation: int) -> Optional[Dict[str, bool]]:
+        """
+        Directorios cuyas filas cambiaron después de una generación
+
+        Returns:
+            Directorio -> True si cambió todo su subárbol (se olvidó), o None
+            si esos cambios ya no se recuerdan y hay que releer el catálogo
+        """
+        with self._lock:
+            if generation < self._changes_floor or generation > self.generation:
+                return None
+            changed: Dict[str, bool] = {}
+            for change_generation, directory, subtree in reversed(self._changes):
+                if change_generation <= generation:
+                    break
+                changed[directory] = changed.get(directory, False) or subtree
+            return changed
+
+    @staticmethod
+    def _subtree_bounds(directory: str):
+        """Rango de cadenas que cubre todas las rutas bajo un directorio"""
+        prefix = directory if directory.endswith(os.sep) else directory + os.sep
+        return prefix, prefix + '\U0010ffff'
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def search(self, **kwargs) -> List[Dict[str, Any]]:
+        """Consultar el catálogo y devolver todas las filas (ver iter_search)"""
+        return list(self.iter_search(**kwargs))
+
+    def iter_search(self, keywords: Optional[List[str]] = None,
+                    extensions: Optional[Iterable[str]] = None,
+                    modified_after: Optional[float] = None,
+                    min_size: Optional[int] = None,
+                    max_size: Optional[int] = None,
+                    roots: Optional[Iterable[Path]] = None,
+                    extra_extensions: Optional[Iterable[str]] = None,
+                    order_by_recent: bool = True,
+                    limit: Optional[int] = None,
+                    batch_size: int = 500,
+                    name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Consultar el catálogo en flujo
+
+        Las filas se leen por lotes, de modo que recorrer millones de
+        coincidencias no las materializa todas en memoria. La consulta usa
+        una conexión de lectura propia: mientras el generador está abierto
+        el índice se puede seguir refrescando y consultando desde otros
+        hilos (el generador ve el catálogo tal como estaba al empezar).
+
+        Args:
+            keywords: El nombre debe contener alguna de estas palabras (minúsculas)
+            extensions: Extensiones permitidas
+            modified_after: Timestamp mínimo de modificación
+            min_size: Tamaño mínimo en bytes
+            max_size: Tamaño máximo en bytes
+            roots: Limitar a archivos bajo estas rutas
+            extra_extensions: Archivos con estas extensiones se aceptan aunque
+                el nombre no coincida con las palabras clave (búsqueda en contenido)
+            order_by_recent: Ordenar por fecha de modificación descendente
+            limit: Número máximo de filas
+            batch_size: Filas leídas de SQLite por lote
+            name: Nombre exacto (sin distinguir mayúsculas; usa idx_files_name_lower)
+
+        Yields:
+            Diccionarios con path, name, extension, size, mtime, category y directory
+        """
+        where = []
+        args: List[Any] = []
+
+        if name is not None:
+            where.append("name_lower = ?")
+            args.append(name.lower())
+
+        # Sin palabras clave todos los nombres coinciden
+        if keywords:
+            name_clauses = []
+            for keyword in keywords:
+                name_clauses.append("name_lower LIKE ? ESCAPE '\\'")
+                args.append('%' + self._escape_like(keyword) + '%')
+            extra = list(extra_extensions or [])
+            if extra:
+                name_clauses.append("extension IN (%s)" % ','.join('?' * len(extra)))
+                args.extend(extra)
+            where.append('(' + ' OR '.join(name_clauses) + ')')
+
+        extensions = list(extensions or [])
+        if extensions:
+            where.append("extension IN (%s)" % ','.join('?' * len(extensions)))
+            args.extend(extensions)
+        if modified_after is not None:
+            where.append("mtime >= ?")
+            args.append(modified_after)
+        if min_size:
+            where.append("size >= ?")
+            args.append(min_size)
+        if max_size:
+            where.append("size <= ?")
+            args.append(max_size)
+
+        root_clauses = []
+        for root in roots or []:
+            root_str = os.path.normpath(str(root))
+            low, high = self._subtree_bounds(root_str)
+            root_clauses.append("(directory = ? OR (directory > ? AND directory < ?))")
+            args.extend([root_str, low, high])
+        if root_clauses:
+            where.append('(' + ' OR '.join(root_clauses) + ')')
+
+        sql = "SELECT path, name, extension, size, mtime, category, directory FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if order_by_recent:
+            sql += " ORDER BY mtime DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+
+        with self._reader() as conn:
+            cursor = conn.execute(sql, args)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def iter_file_rows(self, batch_size: int = 5000) -> Iterator[tuple]:
+        """
+        Todas las filas del catálogo como tuplas, agrupadas por directorio
+
+        Yields:
+            (name, extension, size, mtime, directory)
+        """
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            # Tuplas simples: sin el coste de sqlite3.Row por fila
+            cursor.row_factory = None
+            cursor.execute("SELECT name, extension, size, mtime, directory FROM files ORDER BY directory")
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def iter_directory_rows(self, directories: Iterable[str], subtree: bool = False,
+                            batch_size: int = 5000) -> Iterator[tuple]:
+        """
+        Filas de los archivos de unos directorios (y de todo lo que cuelga de ellos si subtree)
+
+        Yields:
+            (name, extension, size, mtime, directory), agrupadas por directorio
+        """
+        # Como iter_file_rows: una conexión de lectura, sin retener el lock de
+        # escritura mientras quien consume las filas trabaja
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            try:
+                for directory in directories:
+                    if subtree:
+                        low, high = self._subtree_bounds(directory)
+                        cursor.execute("SELECT name, extension, size, mtime, directory FROM files "
+                                       "WHERE directory = ? OR (directory > ? AND directory < ?) "
+                                       "ORDER BY directory", (directory, low, high))
+                    else:
+                        cursor.execute("SELECT name, extension, size, mtime, directory FROM files "
+                                       "WHERE directory = ?", (directory,))
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield from rows
+            finally:
+                cursor.close()
+
+    def count(self) -> Dict[str, int]:
+        """Número de archivos y directorios indexados"""
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            dirs = self._conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+        return {'files': files, 'dirs': dirs}
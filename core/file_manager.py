@@ -3,20 +3,57 @@ Gestor de archivos para Jarvis
 Maneja operaciones de búsqueda, lectura y modificación de archivos
 """
 
+import copy
+import json
+import math
 import os
 import shutil
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Sequence, Set, Tuple, Any, Iterable, Iterator
 import mimetypes
-import re
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+
+from core.cancellation import CancellationToken
+from core.content_index import ContentIndex
+from core.content_search import ContentHit, ContentSearcher
+from core.content_sniffer import ContentSniffer, ContentType, TEXT_BOMS, looks_like_text, needs_sniffing
+from core.content_sniffer import read_head, text_encoding
+from core.disk_usage import TOP_FILES_PER_DIR, DiskUsage
+from core.duplicate_finder import DuplicateFinder, DuplicateGroup, FileHashCache
+from core.file_catalog import HAS_NUMPY, FileCatalog
+from core.file_index import FileIndex
+from core.file_record import FileRecord, format_date, format_file_size
+from core.file_scanner import DirectoryScanner, ScanEntry
+from core.query_cache import QueryCache
+from core.query_plan import DAY_SECONDS, QueryCompiler, QueryPlan
+from core.search_ranking import TopKRanker
+from core.text_extractor import EXTRACTABLE_EXTENSIONS, TextExtractor
+from core.scan_scheduler import DirectoryHitStats
+from core.search_roots import RootPlan, plan_search_roots
+from core.file_watcher import FileWatcher
+from core.ignore_rules import IgnoreMatcher
+from core.name_lookup import FileAccessStats
+from core.mounts import MountPolicy
+
+# Archivos sin extensión útil que se identifican juntos durante un recorrido
+SNIFF_BATCH = 64
+# Documentos cuyo texto se extrae junto (repartido en el pool de procesos) al buscar en contenido
+DOCUMENT_BATCH = 32
+
 
 class FileManager:
     """Clase para manejar operaciones con archivos"""
     
-    def __init__(self):
+    def __init__(self, index_path: Optional[Path] = None,
+                 content_index_path: Optional[Path] = None, use_content_index: bool = True,
+                 settings_path: Optional[Path] = None, hits_path: Optional[Path] = None,
+                 use_catalog: Optional[bool] = None, access_path: Optional[Path] = None,
+                 hash_cache_path: Optional[Path] = None, content_types_path: Optional[Path] = None,
+                 text_cache_path: Optional[Path] = None):
         # Rutas comunes de búsqueda con prioridad
-        self.search_paths = [
+        self.default_search_paths = [
             Path.home() / "Desktop",
             Path.home() / "Documents", 
             Path.home() / "Downloads",
@@ -26,6 +63,13 @@ class FileManager:
             Path.home(),
             Path("C:/") if os.name == 'nt' else Path("/"),
         ]
+        # file_search.search_paths de config/settings.json sustituye a las rutas por defecto
+        self.settings_path = settings_path or Path(__file__).resolve().parent.parent / "config" / "settings.json"
+        self.file_search_settings = self._load_file_search_settings()
+        configured_paths = self.file_search_settings.get('search_paths') or []
+        self.search_paths = ([Path(os.path.expanduser(str(p))) for p in configured_paths]
+                             or list(self.default_search_paths))
+        self.last_root_plan: Optional[RootPlan] = None
         
         # Extensiones categorizadas
         self.file_categories = {
@@ -47,6 +91,7 @@ class FileManager:
         self.stop_words = {
             'archivos', 'archivo', 'files', 'file', 'buscar', 'search', 'find', 'encontrar',
             'del', 'de', 'la', 'el', 'en', 'con', 'por', 'para', 'un', 'una', 'los', 'las',
+            'mis', 'tus', 'sus', 'my', 'your',
             'and', 'or', 'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with'
         }
         # Directorios pesados/sistema a evitar
@@ -57,6 +102,112 @@ class FileManager:
             'Windows', 'Program Files', 'Program Files (x86)', 'ProgramData', 'AppData',
             '$Recycle.Bin', 'System Volume Information', 'OneDriveTemp', 'Temp'
         }
+        # Mapa extensión -> categoría precalculado
+        self.extension_categories = {
+            ext: cat for cat, extensions in reversed(list(self.file_categories.items()))
+            for ext in extensions
+        }
+
+        # Analizador de consultas (tablas de categorías y palabras precalculadas)
+        self.query_compiler = QueryCompiler(self.file_categories, self.stop_words)
+
+        # Reglas de exclusión estilo .gitignore: file_search.ignore_patterns de la
+        # configuración y los archivos .jarvisignore que aparezcan en el recorrido
+        self.ignore_rules = IgnoreMatcher(self.file_search_settings.get('ignore_patterns') or [])
+
+        # Montajes de red/FUSE: excluidos o con su propio límite (file_search.slow_mounts);
+        # los pseudo-sistemas (/proc, /sys) nunca se recorren
+        self.mount_policy = MountPolicy.from_settings(self.file_search_settings.get('slow_mounts'))
+
+        # Recorrido paralelo con os.scandir (poda de directorios pesados y ocultos)
+        self.scanner = DirectoryScanner(
+            should_skip_dir=lambda name: name.startswith('.') or name in self.skip_dir_names,
+            ignore=self.ignore_rules,
+            mounts=self.mount_policy
+        )
+
+        # Tasa de aciertos por directorio aprendida de búsquedas anteriores:
+        # el recorrido visita antes los directorios donde suele haber resultados
+        self.directory_hits = DirectoryHitStats(hits_path)
+        # Archivos abiertos por el usuario: deciden entre varios archivos con el mismo nombre
+        self.file_access = FileAccessStats(access_path)
+
+        # Índice persistente de archivos (si SQLite no está disponible se recorre el disco)
+        self.index_refresh_interval = 30.0
+        self._last_index_refresh = 0.0
+        self.file_watcher: Optional[FileWatcher] = None
+        # Tipo por contenido de los archivos sin extensión útil, guardado por (inodo, mtime)
+        self.content_sniffer: Optional[ContentSniffer] = None
+        try:
+            self.content_sniffer = ContentSniffer(content_types_path)
+        except Exception as e:
+            print(f"⚠️ Detección por contenido deshabilitada: {e}")
+        try:
+            self.file_index: Optional[FileIndex] = FileIndex(
+                index_path,
+                extension_categories=self.extension_categories,
+                skip_dir_names=self.skip_dir_names,
+                ignore=self.ignore_rules,
+                mounts=self.mount_policy,
+                sniffer=self.content_sniffer
+            )
+        except Exception as e:
+            print(f"⚠️ Índice de archivos deshabilitado: {e}")
+            self.file_index = None
+
+        # Búsquedas recientes ya resueltas (botones rápidos del gestor, consultas repetidas):
+        # valen mientras no cambie el índice de archivos
+        cache_settings = self.file_search_settings.get('query_cache') or {}
+        self.query_cache = QueryCache(max_entries=int(cache_settings.get('max_entries', 64)),
+                                      max_bytes=int(float(cache_settings.get('max_mb', 16)) * 1024 * 1024))
+
+        # Catálogo por columnas en memoria para filtrar sin SQL (por defecto sólo con NumPy:
+        # sin él los filtros son bucles de Python y SQLite responde antes)
+        self.use_catalog = HAS_NUMPY if use_catalog is None else use_catalog
+        self._catalog: Optional[FileCatalog] = None
+        self._catalog_lock = threading.Lock()
+        self._catalog_thread: Optional[threading.Thread] = None
+
+        # Tamaños por carpeta, extensión y categoría ("archivos/carpetas grandes"),
+        # actualizados con los directorios que cambian en el índice
+        self._disk_usage: Optional[DiskUsage] = None
+        self._disk_usage_lock = threading.Lock()
+
+        # Texto de PDF, Word, Excel y OpenDocument para la búsqueda en contenido y las
+        # vistas previas (extraído en un pool de procesos y guardado por ruta, tamaño y mtime)
+        extraction_settings = self.file_search_settings.get('text_extraction') or {}
+        self.text_extractor: Optional[TextExtractor] = None
+        try:
+            self.text_extractor = TextExtractor(
+                text_cache_path,
+                max_workers=extraction_settings.get('workers') or None,
+                max_file_size=int(float(extraction_settings.get('max_file_mb', 64)) * 1024 * 1024))
+        except Exception as e:
+            print(f"⚠️ Extracción de texto de documentos deshabilitada: {e}")
+        self.document_extensions = frozenset(EXTRACTABLE_EXTENSIONS) if self.text_extractor else frozenset()
+        # Extensiones en cuyo contenido se busca: texto plano y documentos
+        self.content_extensions = self.text_extensions | self.document_extensions
+
+        # Índice invertido del contenido de los archivos de texto y documentos (opcional;
+        # sus candidatos salen del catálogo, así que requiere el índice de archivos)
+        self.content_index: Optional[ContentIndex] = None
+        # Fracción del límite de tiempo de una búsqueda que se puede dedicar a indexar contenido
+        self.content_index_budget = 0.5
+        if use_content_index and self.file_index is not None:
+            try:
+                self.content_index = ContentIndex(content_index_path, text_extractor=self.text_extractor)
+            except Exception as e:
+                print(f"⚠️ Índice de contenido deshabilitado: {e}")
+
+        # Búsqueda de duplicados con los hashes ya calculados guardados por (inodo, tamaño, mtime)
+        duplicate_settings = self.file_search_settings.get('duplicates') or {}
+        self.duplicate_min_size = int(float(duplicate_settings.get('min_size_kb', 1)) * 1024)
+        self.hash_cache: Optional[FileHashCache] = None
+        try:
+            self.hash_cache = FileHashCache(hash_cache_path)
+        except Exception as e:
+            print(f"⚠️ Caché de hashes deshabilitada: {e}")
+        self.duplicate_finder = DuplicateFinder(self.hash_cache)
         
     def smart_search_files(self, query: str, **kwargs) -> Dict[str, Any]:
         """
@@ -73,141 +224,988 @@ class FileManager:
                 - file_types: Lista de extensiones a incluir (['.py', '.txt'])
                 - time_limit: Límite de tiempo en segundos (float)
                 - include_system: Incluir raíz del sistema (C:/) en Windows
+                - search_paths: Rutas donde buscar en lugar de las configuradas
+                - match_all: Exigir todas las palabras clave en el nombre (default: False)
+                - use_index: Consultar el índice persistente (default: True)
+                - use_cache: Reutilizar una búsqueda idéntica ya resuelta (default: True)
+                - plan: QueryPlan ya compilado (p. ej. refinado con narrow/widen);
+                  sustituye al análisis de query y de los filtros explícitos
+                - cancel_token: CancellationToken para abandonar la búsqueda
         
         Returns:
             Diccionario con resultados de búsqueda y estadísticas
         """
+        final: Dict[str, Any] = {}
+        for event in self.iter_search(query, **kwargs):
+            if event['done']:
+                final = event
+        final.pop('done', None)
+        final.pop('progress', None)
+        return final
+
+    def iter_search(self, query: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Búsqueda inteligente en flujo: produce lotes de resultados con su progreso
+        
+        Acepta los mismos parámetros que smart_search_files, más:
+            - batch_interval: Segundos mínimos entre lotes (default: 0.05)
+        
+        Yields:
+            Lotes intermedios {'done': False, 'results': [nuevas coincidencias],
+            'progress': {...}} en el orden en que se encuentran (como mucho
+            max_results en total), y un último evento {'done': True, ...} con
+            los mismos campos que smart_search_files (resultados ya ordenados
+            por relevancia). 'progress' incluye directorios recorridos, archivos
+            examinados, archivos por segundo, coincidencias y tiempo transcurrido.
+            Si la misma consulta ya se resolvió y el índice no ha cambiado, sus
+            resultados se entregan de la caché (stats['cache']).
+        """
         max_results = kwargs.get('max_results', 100)
         include_content = kwargs.get('include_content', False)
-        recent_days = kwargs.get('recent_days')
-        min_size = kwargs.get('min_size')
-        max_size = kwargs.get('max_size')
         time_limit = kwargs.get('time_limit', 8.0)
         include_system = kwargs.get('include_system', False)
+        batch_interval = kwargs.get('batch_interval', 0.05)
+        cancel_token: Optional[CancellationToken] = kwargs.get('cancel_token')
 
-        # Analizar consulta natural
-        search_params = self._parse_natural_query(query)
-
-        # Combinar parámetros
-        if recent_days is not None:
-            search_params['recent_days'] = recent_days
-        # Filtro por tamaño (usar tupla size_range esperada por _matches_criteria)
-        if min_size is not None or max_size is not None:
-            search_params['size_range'] = (min_size, max_size)
-        # Permitir pasar tipos de archivo explícitos por kwargs
-        kw_file_types = kwargs.get('file_types')
-        if kw_file_types:
-            for ext in kw_file_types:
-                e = str(ext).lower()
-                if not e.startswith('.'):
-                    e = '.' + e
-                search_params['file_types'].append(e)
+        # Analizar la consulta una sola vez (los parámetros explícitos tienen prioridad)
+        plan: QueryPlan = kwargs.get('plan') or self.compile_query(query, **kwargs)
 
-        results: List[Dict[str, Any]] = []
         stats: Dict[str, Any] = {
             'total_found': 0,
             'by_type': {},
             'by_location': {},
             'search_time': 0,
-            'content_matches': 0
+            'content_matches': 0,
+            'progress': {'dirs_scanned': 0, 'files_seen': 0}
         }
 
         start_time = datetime.now()
+        started = time.monotonic()
 
-        # Realizar búsqueda
-        for search_path in self.search_paths:
-            # Evitar raíz del sistema salvo que se solicite (Windows)
-            if (os.name == 'nt' and str(search_path).rstrip('\\/').upper() == 'C:' and not include_system):
-                continue
-            if not search_path.exists():
-                continue
+        # Todos los candidatos se puntúan y sólo se conservan los max_results mejores
+        ranker = TopKRanker(max_results, plan.keywords, now=start_time.timestamp())
+        # Un único patrón para todas las palabras clave sobre el archivo completo
+        content_searcher = ContentSearcher(plan.keywords) if include_content else None
 
-            location_name = search_path.name or str(search_path)
-            stats['by_location'][location_name] = 0
+        # Realizar búsqueda: desde el índice si está disponible, si no recorriendo el disco
+        # (raíces solapadas fusionadas: cada directorio se recorre una sola vez)
+        root_plan = self._plan_search_roots(include_system, kwargs.get('search_paths'))
+        roots = root_plan.roots
+        locations = root_plan.locations
+        stats['roots'] = [str(root) for root in roots]
+        for search_path in locations:
+            stats['by_location'][search_path.name or str(search_path)] = 0
 
-            try:
-                for file_path in self._iter_files(search_path, start_time, time_limit):
-                    # Verificar tiempo límite global
-                    if (datetime.now() - start_time).total_seconds() > time_limit:
-                        break
-                    if len(results) >= max_results:
-                        break
+        # Búsquedas por contenido y recorridos del disco no se guardan: el índice
+        # no refleja los cambios dentro de los archivos ni vale sin él
+        cache_key = None
+        if (self.file_index is not None and kwargs.get('use_index', True)
+                and kwargs.get('use_cache', True) and content_searcher is None):
+            cache_key = self._query_cache_key(plan, roots, max_results)
+            cached = self._get_cached_search(cache_key, roots, time_limit, cancel_token)
+            if cached is not None:
+                yield from self._replay_cached_search(query, cached, started)
+                return
 
-                    if not file_path.is_file():
-                        continue
+        if self.file_index is not None and kwargs.get('use_index', True):
+            matches = self._iter_index_matches(roots, plan, stats, max_results,
+                                               content_searcher, start_time, time_limit, cancel_token)
+        else:
+            matches = self._iter_walk_matches(roots, plan, stats,
+                                              content_searcher, start_time, time_limit, cancel_token)
 
-                    # Aplicar filtros
-                    if not self._matches_criteria(file_path, search_params):
-                        continue
+        # Los primeros max_results encontrados se envían en lotes a medida que aparecen
+        pending: List[FileRecord] = []
+        streamed = 0
+        last_emit = float('-inf')
+        # La coincidencia más antigua decide cuándo caduca una ventana temporal en la caché
+        oldest_match = math.inf
+        try:
+            for entry, content_match in matches:
+                self._rank_match(entry, content_match, ranker, stats, locations)
+                if entry.mtime < oldest_match:
+                    oldest_match = entry.mtime
+                if streamed < max_results:
+                    file_info = self._file_info_from_entry(entry)
+                    file_info['content_match'] = content_match
+                    pending.append(file_info)
+                    streamed += 1
+                if pending and time.monotonic() - last_emit >= batch_interval:
+                    yield {'done': False, 'results': pending, 'progress': self._progress(stats, started)}
+                    pending = []
+                    last_emit = time.monotonic()
+        finally:
+            matches.close()
+        if pending:
+            yield {'done': False, 'results': pending, 'progress': self._progress(stats, started)}
 
-                    # Buscar en contenido si se especifica
-                    content_match = False
-                    if include_content and self._is_text_file(file_path):
-                        content_match = self._search_in_content(file_path, search_params['keywords'])
-                        if content_match:
-                            stats['content_matches'] += 1
+        # Sin coincidencias exactas en el nombre: nombres parecidos (errores del reconocimiento de voz)
+        fuzzy_results: List[FileRecord] = []
+        if (stats['total_found'] == 0 and plan.keywords and self.file_index is not None
+                and kwargs.get('use_index', True) and not (cancel_token and cancel_token.is_cancelled())):
+            fuzzy_started = time.monotonic()
+            fuzzy_results = self.find_similar_files(' '.join(plan.keywords), max_results=max_results,
+                                                    plan=plan, roots=roots)
+            for file_info in fuzzy_results:
+                self._count_match(file_info['path'], file_info['extension'], stats, locations)
+                oldest_match = min(oldest_match, file_info['modified'])
+            stats['fuzzy'] = {'matches': len(fuzzy_results),
+                              'time': round(time.monotonic() - fuzzy_started, 4)}
 
-                    # Si no coincide ni nombre ni contenido, saltar
-                    if not (self._matches_filename(file_path, search_params['keywords']) or content_match):
-                        continue
+        # Resultados ya ordenados por relevancia; la información detallada sólo para los K finales
+        results = fuzzy_results
+        for entry, content_match in ranker.results():
+            file_info = self._file_info_from_entry(entry)
+            file_info['content_match'] = content_match
+            results.append(file_info)
 
-                    # Obtener información del archivo
-                    file_info = self._get_detailed_file_info(file_path)
-                    file_info['content_match'] = content_match
+        # Contador de llamadas al sistema por búsqueda (verificación en frío); el
+        # cociente sólo cuenta los stat de archivos, los de directorios van en 'dir_stat'
+        syscalls = stats.get('syscalls')
+        if syscalls and syscalls['candidates']:
+            syscalls['stat_per_candidate'] = round(syscalls['stat'] / syscalls['candidates'], 3)
 
-                    results.append(file_info)
-                    stats['total_found'] += 1
-                    stats['by_location'][location_name] += 1
+        progress = self._progress(stats, started)
+        del stats['progress']
+        stats['search_time'] = (datetime.now() - start_time).total_seconds()
+        stats['cancelled'] = bool(cancel_token and cancel_token.is_cancelled())
+        stats['truncated'] = (stats.get('time_limited', False) or stats['cancelled']
+                              or not stats.get('index_complete', True))
+        if not stats['cancelled']:
+            self.directory_hits.record((r['path'] for r in results), roots)
 
-                    # Actualizar estadísticas por tipo
-                    file_type = file_info.get('category', 'otros')
-                    stats['by_type'][file_type] = stats['by_type'].get(file_type, 0) + 1
+        generation = stats.pop('index_generation', None)
+        if cache_key is not None:
+            stats['cache'] = {'hit': False}
+            # Sólo búsquedas completas resueltas sobre un índice que no cambió mientras tanto
+            if not stats['truncated'] and generation == self.file_index.generation:
+                expires_at = min((ranker.recency_expiry(file_info['modified']) for file_info in results
+                                  if 'fuzzy_score' not in file_info), default=math.inf)
+                if plan.recent_days is not None:
+                    expires_at = min(expires_at, oldest_match + plan.recent_days * DAY_SECONDS)
+                # Copias: quien recibe los resultados puede modificarlos sin tocar la caché
+                self.query_cache.put(cache_key, [record.copy() for record in results], copy.deepcopy(stats),
+                                     generation, expires_at)
 
-            except (PermissionError, OSError):
-                continue
+        yield {
+            'done': True,
+            'success': True,
+            'query': query,
+            'results': results,
+            'stats': stats,
+            'progress': progress,
+            'suggestions': self._get_search_suggestions(query, stats)
+        }
 
-            # Verificar tiempo después de cada carpeta
-            if (datetime.now() - start_time).total_seconds() > time_limit:
-                break
+    def _query_cache_key(self, plan: QueryPlan, roots: List[Path], max_results: int) -> tuple:
+        """
+        Clave de caché de una búsqueda: el plan normalizado, no el texto
 
-        # Ordenar resultados por relevancia
-        results = self._sort_by_relevance(results, search_params['keywords'])
+        Consultas con las mismas palabras clave en otro orden o con otras
+        palabras de relleno ("archivos grandes" / "archivos grandes más de
+        10MB") comparten entrada; la ventana temporal entra en días porque su
+        timestamp de corte cambia con cada compilación.
+        """
+        return (tuple(sorted(plan.keywords)), tuple(m.pattern for m in plan.required_matchers),
+                plan.extensions, plan.recent_days, plan.min_size, plan.max_size,
+                tuple(str(root) for root in roots), max_results)
 
-        stats['search_time'] = (datetime.now() - start_time).total_seconds()
-        stats['truncated'] = len(results) >= max_results or stats['search_time'] >= time_limit
+    def _get_cached_search(self, cache_key: tuple, roots: List[Path], time_limit: float,
+                           cancel_token: Optional[CancellationToken] = None):
+        """
+        Búsqueda guardada, si el índice sigue igual que cuando se resolvió
 
-        return {
+        Antes de compararla se pone al día el índice (lo mismo que haría la
+        búsqueda): los directorios con otro mtime o los eventos del vigilante
+        cambian su generación e invalidan la entrada.
+        """
+        generation = None
+        if cache_key in self.query_cache:
+            refresh_stats = self.refresh_index(roots, time_limit=time_limit, cancel_token=cancel_token)
+            if refresh_stats['complete']:
+                generation = self.file_index.generation
+        return self.query_cache.get(cache_key, generation)
+
+    def _replay_cached_search(self, query: str, cached, started: float) -> Iterator[Dict[str, Any]]:
+        """Entregar una búsqueda guardada con los mismos eventos que una búsqueda nueva"""
+        results = [record.copy() for record in cached.results]
+        stats = copy.deepcopy(cached.stats)
+        stats['search_time'] = time.monotonic() - started
+        stats['cache'] = {'hit': True, 'age': round(time.time() - cached.created, 3)}
+        stats['progress'] = {'dirs_scanned': 0, 'files_seen': 0}
+        progress = self._progress(stats, started)
+        del stats['progress']
+        if results:
+            yield {'done': False, 'results': list(results), 'progress': progress}
+        yield {
+            'done': True,
             'success': True,
             'query': query,
             'results': results,
             'stats': stats,
+            'progress': progress,
             'suggestions': self._get_search_suggestions(query, stats)
         }
 
-    def _iter_files(self, base_path: Path, start_time: datetime, time_limit: float):
-        """Iterar archivos evitando directorios pesados y respetando timeouts."""
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos, expulsiones y memoria de la caché de búsquedas"""
+        return self.query_cache.get_stats()
+
+    def find_duplicates(self, **kwargs) -> Dict[str, Any]:
+        """
+        Buscar archivos con el mismo contenido en las rutas de búsqueda
+
+        Args:
+            **kwargs: Parámetros de iter_duplicates
+
+        Returns:
+            Diccionario con los grupos de duplicados (de más a menos espacio
+            recuperable) y estadísticas
+        """
+        final: Dict[str, Any] = {}
+        for event in self.iter_duplicates(**kwargs):
+            if event['done']:
+                final = event
+        final.pop('done', None)
+        final.pop('progress', None)
+        return final
+
+    def iter_duplicates(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Búsqueda de duplicados en flujo: produce los grupos según se confirman
+
+        Los candidatos (ruta y tamaño) salen del índice si está disponible y,
+        si no, de un recorrido del disco. Sólo se leen los archivos que
+        comparten tamaño con otro.
+
+        Args:
+            **kwargs:
+                - min_size: Tamaño mínimo en bytes (default: file_search.duplicates.min_size_kb)
+                - file_types: Lista de extensiones a incluir (['.jpg', '.png'])
+                - include_system: Incluir raíz del sistema (C:/) en Windows
+                - use_index: Tomar los candidatos del índice persistente (default: True)
+                - time_limit: Límite de tiempo del recorrido o del refresco del índice
+                - cancel_token: CancellationToken para abandonar la búsqueda
+
+        Yields:
+            {'done': False, 'results': [grupos], 'progress': {...}} por cada
+            tanda y al final {'done': True, 'success': True, 'results',
+            'stats'}; cada grupo es un diccionario con size, hash, paths,
+            count y reclaimable (más sus versiones legibles)
+        """
+        min_size = kwargs.get('min_size')
+        min_size = self.duplicate_min_size if min_size is None else min_size
+        extensions = {ext.lower() if ext.startswith('.') else f".{ext.lower()}"
+                      for ext in kwargs.get('file_types') or []}
+        time_limit = kwargs.get('time_limit', 60.0)
+        cancel_token: Optional[CancellationToken] = kwargs.get('cancel_token')
+        should_stop = cancel_token.is_cancelled if cancel_token else None
+        roots = self._active_search_roots(kwargs.get('include_system', False))
+
+        stats: Dict[str, Any] = {'roots': [str(root) for root in roots]}
+        if self.file_index is not None and kwargs.get('use_index', True):
+            refresh_stats = self.refresh_index(roots, time_limit=time_limit, cancel_token=cancel_token)
+            stats['source'] = 'index'
+            stats['index_complete'] = refresh_stats['complete']
+            # Se consumen enteras antes de leer ningún archivo: el índice no queda bloqueado
+            entries: Iterator[ScanEntry] = (
+                self._entry_from_row(row)
+                for row in self.file_index.iter_search(min_size=min_size, roots=roots, order_by_recent=False)
+            )
+        else:
+            stats['source'] = 'walk'
+            entries = self.scanner.scan([str(root) for root in roots], deadline=time.monotonic() + time_limit,
+                                        should_stop=should_stop)
+        if extensions:
+            entries = (entry for entry in entries if entry.extension in extensions)
+
+        groups: List[Dict[str, Any]] = []
+        finder_stats: Dict[str, Any] = {}
+        for group in self.duplicate_finder.find(entries, min_size, should_stop, finder_stats):
+            record = self._duplicate_record(group)
+            groups.append(record)
+            yield {'done': False, 'results': [record], 'progress': self._duplicate_progress(finder_stats)}
+
+        stats.update(finder_stats)
+        stats['cancelled'] = bool(cancel_token and cancel_token.is_cancelled())
+        stats['reclaimable_human'] = format_file_size(stats.get('reclaimable', 0))
+        groups.sort(key=lambda record: record['reclaimable'], reverse=True)
+        yield {
+            'done': True,
+            'success': True,
+            'results': groups,
+            'stats': stats,
+            'progress': self._duplicate_progress(finder_stats)
+        }
+
+    def _duplicate_record(self, group: DuplicateGroup) -> Dict[str, Any]:
+        """Grupo de duplicados como diccionario para la interfaz"""
+        return {
+            'size': group.size,
+            'size_human': format_file_size(group.size),
+            'hash': group.digest,
+            'paths': list(group.paths),
+            'count': len(group.paths),
+            'name': os.path.basename(group.paths[0]),
+            'reclaimable': group.reclaimable,
+            'reclaimable_human': format_file_size(group.reclaimable)
+        }
+
+    def _duplicate_progress(self, finder_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Instantánea del progreso de una búsqueda de duplicados"""
+        return {
+            'files': finder_stats.get('files', 0),
+            'candidates': finder_stats.get('candidates', 0),
+            'groups': finder_stats.get('groups', 0),
+            'reclaimable': finder_stats.get('reclaimable', 0),
+            'bytes_read': finder_stats.get('bytes_read', 0),
+            'cache_hits': finder_stats.get('cache_hits', 0)
+        }
+
+    def get_hash_cache_stats(self) -> Dict[str, Any]:
+        """Archivos con hash guardado y tamaño en disco de la caché de hashes"""
+        if self.hash_cache is None:
+            return {'enabled': False}
+        stats = self.hash_cache.get_stats()
+        stats['enabled'] = True
+        return stats
+
+    def get_content_sniffer_stats(self) -> Dict[str, Any]:
+        """Archivos identificados por contenido, aciertos de la caché y tiempo de lectura"""
+        if self.content_sniffer is None:
+            return {'enabled': False}
+        stats = self.content_sniffer.get_stats()
+        stats['enabled'] = True
+        return stats
+
+    def get_text_extraction_stats(self) -> Dict[str, Any]:
+        """Documentos extraídos, rendimiento de la extracción y aciertos de la caché de texto"""
+        if self.text_extractor is None:
+            return {'enabled': False}
+        stats = self.text_extractor.get_stats()
+        stats['enabled'] = True
+        return stats
+
+    def extract_text(self, file_path: str) -> Optional[str]:
+        """
+        Texto de un documento (PDF, Word, Excel, PowerPoint, OpenDocument)
+
+        Returns:
+            El texto extraído (de la caché si el archivo no cambió), o None si
+            no es un documento soportado o no se pudo leer
+        """
+        if self.text_extractor is None:
+            return None
+        if Path(file_path).suffix.lower() not in self.document_extensions:
+            # Sin extensión de documento sólo si el contenido lo es (un PDF descargado como .bin)
+            content_type = self.detect_content_type(file_path)
+            if content_type is None or content_type.extension not in self.document_extensions:
+                return None
+        return self.text_extractor.extract_path(str(file_path))
+
+    def detect_content_type(self, file_path: str) -> Optional[ContentType]:
+        """
+        Tipo de un archivo según sus primeros bytes
+
+        Returns:
+            ContentType reconocido o None (texto, formato desconocido o sin detección)
+        """
+        if self.content_sniffer is None:
+            return None
+        return self.content_sniffer.sniff_path(str(file_path))
+
+    def _progress(self, stats: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Instantánea del progreso de una búsqueda en curso"""
+        progress = stats['progress']
+        elapsed = time.monotonic() - started
+        return {
+            'dirs_scanned': progress.get('dirs_scanned', 0),
+            'files_seen': progress.get('files_seen', 0),
+            'files_per_second': progress.get('files_seen', 0) / elapsed if elapsed > 0 else 0.0,
+            'matches': stats['total_found'],
+            'elapsed': elapsed
+        }
+
+    def _load_file_search_settings(self) -> Dict[str, Any]:
+        """Sección file_search de la configuración (vacía si no hay)"""
+        if not self.settings_path.exists():
+            return {}
         try:
-            for root, dirs, files in os.walk(base_path, topdown=True):
-                # Prune directorios pesados por nombre
-                dirs[:] = [d for d in dirs if d not in self.skip_dir_names]
-                # También evitar directorios ocultos
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
+            with open(self.settings_path, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+            return settings.get('file_search', {}) or {}
+        except Exception as e:
+            print(f"Error cargando la configuración de búsqueda de {self.settings_path}: {e}")
+            return {}
+
+    def _plan_search_roots(self, include_system: bool = False,
+                           search_paths: Optional[List[Path]] = None) -> RootPlan:
+        """
+        Conjunto mínimo de raíces que cubre las rutas de búsqueda
 
-                # Timeout
+        La raíz del sistema sólo se incluye si se pide (en Windows, o si las
+        rutas vienen de la configuración).
+
+        Args:
+            include_system: Incluir la raíz del sistema
+            search_paths: Rutas a cubrir (default: las configuradas)
+        """
+        system_root = Path("C:/") if os.name == 'nt' else Path("/")
+        paths = []
+        for search_path in (self.search_paths if search_paths is None else search_paths):
+            # Evitar raíz del sistema salvo que se solicite (Windows)
+            if (os.name == 'nt' and str(search_path).rstrip('\\/').upper() == 'C:' and not include_system):
+                continue
+            paths.append(search_path)
+        if include_system and system_root not in paths:
+            paths.append(system_root)
+        self.last_root_plan = plan_search_roots(paths)
+        return self.last_root_plan
+
+    def _active_search_roots(self, include_system: bool = False) -> List[Path]:
+        """Raíces de búsqueda existentes, sin solapamientos"""
+        return self._plan_search_roots(include_system).roots
+
+    def refresh_index(self, roots: Optional[List[Path]] = None, force: bool = False,
+                      time_limit: Optional[float] = None,
+                      cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """
+        Refrescar el índice de archivos de forma incremental
+
+        Args:
+            roots: Raíces a refrescar (default: rutas de búsqueda activas)
+            force: Refrescar aunque no haya pasado index_refresh_interval
+            time_limit: Límite de tiempo en segundos
+            cancel_token: Interrumpe el refresco si se cancela
+
+        Returns:
+            Estadísticas del refresco ('skipped' si no fue necesario)
+        """
+        if self.file_index is None:
+            return {'complete': False, 'error': 'Índice deshabilitado'}
+        active_roots = self._active_search_roots()
+        roots = roots or active_roots
+        # El intervalo y el vigilante sólo responden de las rutas configuradas;
+        # otras raíces (search_paths de una búsqueda) se refrescan siempre
+        covered = all(any(root == active or active in root.parents for active in active_roots)
+                      for root in roots)
+        if covered and not force and time.monotonic() - self._last_index_refresh < self.index_refresh_interval:
+            return {'complete': True, 'skipped': True}
+        # Con el vigilante activo los eventos ya mantienen el índice al día
+        if covered and not force and self.file_watcher is not None and self.file_watcher.is_live():
+            return {'complete': True, 'skipped': True, 'watcher': True}
+
+        should_stop = cancel_token.is_cancelled if cancel_token else None
+        refresh_stats = self.file_index.refresh(roots, time_limit, should_stop,
+                                                priority=self.directory_hits.hit_rate)
+        if refresh_stats['complete'] and covered:
+            self._last_index_refresh = time.monotonic()
+        return refresh_stats
+
+    def start_watcher(self, **kwargs) -> bool:
+        """
+        Iniciar el vigilante que mantiene el índice al día en segundo plano
+
+        Args:
+            **kwargs: Parámetros de FileWatcher (batch_interval, rescan_interval...)
+
+        Returns:
+            True si el vigilante quedó en marcha
+        """
+        if self.file_index is None:
+            return False
+        if self.file_watcher is None:
+            self.file_watcher = FileWatcher(self.file_index, self._active_search_roots(), **kwargs)
+        self.file_watcher.start()
+        return True
+
+    def stop_watcher(self):
+        """Detener el vigilante del índice"""
+        if self.file_watcher is not None:
+            self.file_watcher.stop()
+
+    def shutdown(self):
+        """Detener el vigilante y guardar el historial de aciertos pendiente (al cerrar)"""
+        self.stop_watcher()
+        self.directory_hits.flush()
+
+    def get_watcher_status(self) -> Dict[str, Any]:
+        """Estado del vigilante (watches en uso, retraso de actualización...)"""
+        if self.file_watcher is None:
+            return {'mode': 'stopped', 'watches_in_use': 0}
+        return self.file_watcher.get_status()
+
+    def _iter_index_matches(self, roots: List[Path], plan: QueryPlan,
+                            stats: Dict[str, Any], max_results: int,
+                            content_searcher: Optional[ContentSearcher],
+                            start_time: datetime, time_limit: float,
+                            cancel_token: Optional[CancellationToken] = None) -> Iterator[Tuple[ScanEntry, bool]]:
+        """Resolver la búsqueda consultando el índice persistente (produce coincidencias)"""
+        refresh_stats = self.refresh_index(roots, time_limit=time_limit, cancel_token=cancel_token)
+        stats['index_complete'] = refresh_stats['complete']
+        stats['index_generation'] = self.file_index.generation
+        stats['progress']['dirs_scanned'] = refresh_stats.get('dirs_visited', 0)
+        stats['by_root'] = refresh_stats.get('by_root', {})
+        stats['mounts'] = refresh_stats.get('mounts', {})
+
+        # Sin palabras clave ni contenido la relevancia sólo depende de la fecha:
+        # el índice ya devuelve los K más recientes
+        limit = None
+        if not plan.keywords and content_searcher is None:
+            limit = max_results
+
+        # Los datos de cada candidato salen del índice: ningún stat por archivo
+        syscalls = {'stat': refresh_stats.get('stat_calls', 0), 'dir_stat': refresh_stats.get('dir_stat_calls', 0),
+                    'scandir': refresh_stats.get('dirs_rescanned', 0), 'open': 0, 'candidates': 0}
+        stats['syscalls'] = syscalls
+
+        # Archivos que el índice de contenido garantiza que no contienen las palabras
+        no_content_match: Set[str] = set()
+        if content_searcher is not None:
+            no_content_match = self._content_index_exclusions(
+                roots, content_searcher.keywords, time.monotonic() + time_limit * self.content_index_budget, stats)
+
+        # Si el catálogo está desfasado se reconstruye en segundo plano y esta consulta va a SQLite
+        catalog = self.get_catalog(wait=False) if content_searcher is None else None
+        if catalog is not None:
+            # Filtros de nombre, tipo, fecha, tamaño y raíces como máscaras sobre el catálogo en memoria
+            stats['catalog'] = catalog.backend
+            positions = catalog.query(
+                extensions=plan.extensions,
+                modified_after=plan.modified_after,
+                min_size=plan.min_size,
+                max_size=plan.max_size,
+                roots=roots,
+                keyword_pattern=plan.keyword_matcher,
+                limit=limit
+            )
+            rows = (catalog.row(position) for position in positions)
+        else:
+            rows = self.file_index.iter_search(
+                keywords=plan.keywords,
+                extensions=plan.extensions,
+                modified_after=plan.modified_after,
+                min_size=plan.min_size,
+                max_size=plan.max_size,
+                roots=roots,
+                # En búsqueda por contenido también son candidatos los archivos de texto
+                extra_extensions=self.content_extensions if content_searcher else None,
+                limit=limit
+            )
+        try:
+            for row in rows:
+                if cancel_token is not None and cancel_token.is_cancelled():
+                    break
                 if (datetime.now() - start_time).total_seconds() > time_limit:
+                    stats['time_limited'] = True
                     break
+                syscalls['candidates'] += 1
+                stats['progress']['files_seen'] += 1
+
+                entry = self._entry_from_row(row)
+                name_match = plan.matches_name(entry.name)
+                content_match = False
+                if (content_searcher and entry.extension in self.content_extensions
+                        and entry.path not in no_content_match):
+                    syscalls['open'] += 1
+                    content_match = self._search_in_content(Path(entry.path), content_searcher)
+                    if content_match:
+                        stats['content_matches'] += 1
+                if not (name_match or content_match):
+                    continue
+
+                yield entry, content_match
+        finally:
+            rows.close()
+
+    def _content_index_exclusions(self, roots: List[Path], keywords: Sequence[str],
+                                  deadline: float, stats: Dict[str, Any]) -> Set[str]:
+        """
+        Poner al día el índice de contenido y devolver los archivos que se
+        pueden descartar sin leerlos (indexados, sin cambios y sin ninguna palabra)
+        """
+        if self.content_index is None or not keywords:
+            return set()
+        text_files = [self._entry_from_row(row) for row in self.file_index.search(
+            extensions=self.content_extensions, roots=roots)]
+        fresh = self.content_index.sync(text_files, deadline=deadline,
+                                        prune_roots=roots if stats.get('index_complete', True) else None)
+        matching = self.content_index.lookup(keywords)
+        if matching is None:
+            return set()
+        excluded = fresh - matching
+        stats['content_index'] = {
+            'text_files': len(text_files),
+            'indexed': len(fresh),
+            'candidates': len(text_files) - len(excluded),
+            'skipped': len(excluded),
+            'sync': self.content_index.last_sync
+        }
+        return excluded
+
+    def get_catalog(self, wait: bool = True, force: bool = False) -> Optional[FileCatalog]:
+        """
+        Catálogo en memoria sincronizado con el índice de archivos
+
+        Se reconstruye (una lectura completa del índice) sólo cuando el
+        índice cambió desde la última construcción.
+
+        Args:
+            wait: Reconstruirlo ahora si está desfasado; con False se
+                reconstruye en segundo plano y se devuelve None mientras tanto
+            force: Usarlo aunque use_catalog esté desactivado (búsqueda de
+                nombres parecidos, que no depende de NumPy)
+
+        Returns:
+            El catálogo al día, o None si está deshabilitado o aún no está listo
+        """
+        if not (self.use_catalog or force) or self.file_index is None:
+            return None
+        catalog = self._catalog
+        if catalog is not None and catalog.generation == self.file_index.generation:
+            return catalog
+        if not wait:
+            if self._catalog_thread is None or not self._catalog_thread.is_alive():
+                self._catalog_thread = threading.Thread(target=self._rebuild_catalog, daemon=True,
+                                                        name='jarvis-catalog')
+                self._catalog_thread.start()
+            return None
+        return self._rebuild_catalog()
+
+    def _rebuild_catalog(self) -> FileCatalog:
+        with self._catalog_lock:
+            generation = self.file_index.generation
+            if self._catalog is None or self._catalog.generation != generation:
+                self._catalog = FileCatalog.from_rows(self.file_index.iter_file_rows(),
+                                                      self.extension_categories, generation)
+            return self._catalog
+
+    def find_files_by_name(self, name: str, max_results: int = 10,
+                           time_limit: float = 2.0) -> List[FileRecord]:
+        """
+        Archivos indexados con exactamente ese nombre (sin distinguir mayúsculas)
+
+        Con el catálogo al día la búsqueda es una consulta a su tabla hash;
+        si está desfasado se reconstruye en segundo plano y se consulta el
+        índice de nombres de SQLite. Los candidatos se comprueban en disco y
+        se ordenan por accesos recientes del usuario y fecha de modificación.
+
+        Args:
+            name: Nombre del archivo (sin directorio)
+            max_results: Número máximo de resultados
+            time_limit: Segundos para poner al día el índice antes de consultarlo
+
+        Returns:
+            Información de los archivos, del más al menos probable
+        """
+        if self.file_index is None:
+            return []
+        self.refresh_index(self._active_search_roots(), time_limit=time_limit)
+        catalog = self.get_catalog(wait=False, force=True)
+        if catalog is not None:
+            paths = [catalog.path(position) for position in catalog.lookup_name(name)]
+        else:
+            paths = [row['path'] for row in self.file_index.iter_search(name=name, order_by_recent=False)]
+
+        # El índice puede ir unos segundos por detrás del disco: un stat por candidato
+        candidates = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            candidates.append((path, stat.st_mtime, stat.st_size))
+        results = []
+        for path, mtime, size in self.file_access.rank(candidates)[:max_results]:
+            results.append(self._file_info_from_entry(
+                ScanEntry(path, os.path.basename(path), os.path.dirname(path), size, mtime)))
+        return results
+
+    def record_file_access(self, path: str):
+        """Anotar que el usuario abrió un archivo (desempata futuras búsquedas por nombre)"""
+        self.file_access.record(os.path.normpath(path))
+
+    def find_similar_files(self, query: str, max_results: int = 10, min_score: float = 0.6,
+                           plan: Optional[QueryPlan] = None,
+                           roots: Optional[List[Path]] = None) -> List[FileRecord]:
+        """
+        Archivos cuyo nombre se parece a la consulta aunque no la contenga
+
+        Tolera erratas del reconocimiento de voz ("reporte finansiero",
+        "presupuesto 2O24"): compara las palabras del nombre sin tildes por
+        trigramas sobre el catálogo en memoria. El índice de nombres se
+        construye la primera vez y se reutiliza mientras el índice de
+        archivos no cambie.
+
+        Args:
+            query: Palabras o nombre de archivo buscado
+            max_results: Número máximo de resultados
+            min_score: Parecido mínimo (0-1)
+            plan: Filtros de tipo, fecha y tamaño a respetar (opcional)
+            roots: Raíces de búsqueda (default: las activas, tras poner el índice al día)
+
+        Returns:
+            Información de los archivos, del más al menos parecido, con 'fuzzy_score'
+        """
+        if self.file_index is None:
+            return []
+        if roots is None:
+            roots = self._active_search_roots()
+            self.refresh_index(roots, time_limit=2.0)
+        catalog = self.get_catalog(force=True)
+        if catalog is None:
+            return []
+        root_strs = [os.path.normpath(str(root)) for root in roots]
+        prefixes = tuple(root if root.endswith(os.sep) else root + os.sep for root in root_strs)
+        exact_roots = set(root_strs)
+
+        def accept(position: int) -> bool:
+            directory = catalog.directory(position)
+            if not (directory in exact_roots or directory.startswith(prefixes)):
+                return False
+            return plan is None or plan.matches_metadata(self._entry_from_row(catalog.row(position)))
+
+        results = []
+        for position, score in catalog.fuzzy_index().search(query, limit=max_results,
+                                                            min_score=min_score, accept=accept):
+            file_info = self._file_info_from_entry(self._entry_from_row(catalog.row(position)))
+            file_info['fuzzy_score'] = score
+            results.append(file_info)
+        return results
+
+    def get_disk_usage(self, refresh: bool = True, time_limit: Optional[float] = None,
+                       cancel_token: Optional[CancellationToken] = None,
+                       top_files: int = TOP_FILES_PER_DIR) -> DiskUsage:
+        """
+        Agregados de uso de disco de las rutas de búsqueda
+
+        La primera vez se calculan en una pasada por el catálogo en memoria
+        (si está al día) o por las filas del índice; después sólo se releen
+        las carpetas que cambiaron desde la generación con la que se
+        calcularon. Sin índice se recorre el disco cada vez.
+
+        Args:
+            refresh: Refrescar antes el índice (por mtime de directorios)
+            time_limit: Límite de tiempo del refresco o del recorrido
+            cancel_token: Interrumpe el refresco o el recorrido si se cancela
+            top_files: Archivos más grandes que hay que recordar por carpeta
+                (largest_files sólo es exacto hasta ese límite); si los
+                agregados guardados recuerdan menos, se recalculan
+        """
+        roots = self._active_search_roots()
+        if self.file_index is None:
+            should_stop = cancel_token.is_cancelled if cancel_token else None
+            deadline = time.monotonic() + time_limit if time_limit is not None else None
+            scan = self.scanner.scan([str(root) for root in roots], deadline=deadline, should_stop=should_stop)
+            return DiskUsage.from_rows(((entry.name, entry.extension, entry.size, entry.mtime, entry.directory)
+                                        for entry in scan), self.extension_categories, source='walk',
+                                       top_files=top_files)
+
+        if refresh:
+            self.refresh_index(roots, time_limit=time_limit, cancel_token=cancel_token)
+        with self._disk_usage_lock:
+            usage = self._disk_usage
+            if usage is not None and usage.top_files < top_files:
+                # Se pide más de lo que se recuerda por carpeta: hay que recalcular
+                usage = None
+            # La generación se lee antes que las filas: un cambio concurrente se vuelve a aplicar después
+            generation = self.file_index.generation
+            if usage is not None and usage.generation == generation:
+                return usage
+            changes = self.file_index.changes_since(usage.generation) if usage is not None else None
+            if changes is not None:
+                usage.update(changes, self.file_index, generation)
+                return usage
+            catalog = self._catalog
+            if catalog is not None and catalog.generation == generation:
+                usage = DiskUsage.from_rows(catalog.iter_rows(), self.extension_categories, generation, 'catalog',
+                                            top_files=top_files)
+            else:
+                usage = DiskUsage.from_rows(self.file_index.iter_file_rows(), self.extension_categories,
+                                            generation, 'index', top_files=top_files)
+            self._disk_usage = usage
+            return usage
+
+    def get_disk_usage_report(self, path: Optional[str] = None, limit: int = 10,
+                              max_depth: Optional[int] = 2, **kwargs) -> Dict[str, Any]:
+        """
+        Carpetas y archivos que más ocupan, con totales por categoría
+
+        Args:
+            path: Carpeta a analizar (default: todas las rutas de búsqueda)
+            limit: Número de carpetas y de archivos a devolver
+            max_depth: Profundidad máxima de las carpetas respecto a la de partida
+            **kwargs: Parámetros de get_disk_usage (refresh, time_limit, cancel_token)
+
+        Returns:
+            Diccionario con el total de cada raíz ('roots'), 'largest_folders',
+            'largest_files' (registros como los de la búsqueda), 'by_category'
+            y 'by_extension' (de más a menos bytes) y 'stats'
+        """
+        start = time.perf_counter()
+        kwargs.setdefault('top_files', max(TOP_FILES_PER_DIR, limit))
+        usage = self.get_disk_usage(**kwargs)
+        paths = [os.path.normpath(os.path.expanduser(path))] if path else [str(root) for root in
+                                                                          self._active_search_roots()]
+        roots = []
+        folders = []
+        files = []
+        by_category: Dict[str, Dict[str, int]] = {}
+        by_extension: Dict[str, Dict[str, int]] = {}
+        for root in paths:
+            size, count = usage.total(root)
+            roots.append({'path': root, 'name': os.path.basename(root) or root, 'size': size,
+                          'size_human': format_file_size(size), 'files': count})
+            folders.extend(usage.largest_folders(root, limit, max_depth))
+            files.extend(usage.largest_files(root, limit))
+            breakdown = usage.breakdown(root)
+            for target, source in ((by_category, breakdown['by_category']),
+                                   (by_extension, breakdown['by_extension'])):
+                for key, totals in source.items():
+                    current = target.setdefault(key, {'files': 0, 'size': 0})
+                    current['files'] += totals['files']
+                    current['size'] += totals['size']
+
+        def ranked(totals: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+            return [{'name': key, 'files': value['files'], 'size': value['size'],
+                     'size_human': format_file_size(value['size'])}
+                    for key, value in sorted(totals.items(), key=lambda item: item[1]['size'], reverse=True)]
+
+        folders.sort(key=lambda folder: folder[1], reverse=True)
+        files.sort(key=lambda entry: entry.size, reverse=True)
+        stats = usage.get_stats()
+        stats['elapsed'] = time.perf_counter() - start
+        return {
+            'success': True,
+            'roots': roots,
+            'largest_folders': [{'path': folder, 'name': os.path.basename(folder), 'size': size,
+                                 'size_human': format_file_size(size), 'files': count}
+                                for folder, size, count in folders[:limit]],
+            'largest_files': [FileRecord.from_entry(entry, self.extension_categories) for entry in files[:limit]],
+            'by_category': ranked(by_category),
+            'by_extension': ranked(by_extension),
+            'stats': stats
+        }
+
+    def get_catalog_stats(self) -> Dict[str, Any]:
+        """Memoria ocupada por el catálogo en memoria (por columna y por archivo)"""
+        catalog = self.get_catalog()
+        if catalog is None:
+            return {'enabled': False}
+        stats = catalog.memory_usage()
+        stats['enabled'] = True
+        return stats
+
+    def get_content_index_stats(self) -> Dict[str, Any]:
+        """Tamaño en disco, rendimiento de indexación y latencias del índice de contenido"""
+        if self.content_index is None:
+            return {'enabled': False}
+        stats = self.content_index.get_stats()
+        stats['enabled'] = True
+        return stats
+
+    def _rank_match(self, entry: ScanEntry, content_match: bool, ranker: TopKRanker,
+                    stats: Dict[str, Any], roots: List[Path]):
+        """Registrar una coincidencia en las estadísticas y ofrecerla al ranking"""
+        self._count_match(entry.path, entry.extension, stats, roots)
+        ranker.push((entry, content_match), entry.name, entry.mtime, content_match)
+
+    def _count_match(self, path: str, extension: str, stats: Dict[str, Any], roots: List[Path]):
+        """Sumar una coincidencia a los totales por tipo y por ubicación"""
+        stats['total_found'] += 1
+        location_name = self._location_for(path, roots)
+        stats['by_location'][location_name] = stats['by_location'].get(location_name, 0) + 1
+        file_type = self.extension_categories.get(extension, 'otros')
+        stats['by_type'][file_type] = stats['by_type'].get(file_type, 0) + 1
+
+    def _entry_from_row(self, row: Dict[str, Any]) -> ScanEntry:
+        """Convertir una fila del índice en el registro común del recorrido"""
+        return ScanEntry(row['path'], row['name'], row['directory'], row['size'], row['mtime'])
+
+    def _location_for(self, path: str, roots: List[Path]) -> str:
+        """Primera raíz de búsqueda que contiene la ruta (de la más a la menos profunda)"""
+        for root in roots:
+            root_str = str(root)
+            prefix = root_str if root_str.endswith(os.sep) else root_str + os.sep
+            if path.startswith(prefix):
+                return root.name or root_str
+        return os.path.dirname(path)
+
+    def _iter_walk_matches(self, roots: List[Path], plan: QueryPlan,
+                           stats: Dict[str, Any], content_searcher: Optional[ContentSearcher],
+                           start_time: datetime, time_limit: float,
+                           cancel_token: Optional[CancellationToken] = None) -> Iterator[Tuple[ScanEntry, bool]]:
+        """Resolver la búsqueda recorriendo el disco (sin índice) con el recorrido paralelo"""
+        deadline = time.monotonic() + time_limit - (datetime.now() - start_time).total_seconds()
+        open_calls = 0
+        # El progreso se lee en vivo del diccionario que rellena el recorrido
+        scan_stats: Dict[str, Any] = {}
+        stats['progress'] = scan_stats
+        # La cancelación se comprueba por directorio dentro del recorrido
+        should_stop = cancel_token.is_cancelled if cancel_token else None
+        scan = self.scanner.scan([str(root) for root in roots], deadline=deadline,
+                                 should_stop=should_stop, stats=scan_stats,
+                                 priority=self.directory_hits.hit_rate)
+        # Con filtro por tipo, los archivos sin extensión útil que cumplen el resto
+        # se identifican por contenido en lotes (una foto sin extensión es una imagen)
+        sniff_plan = None
+        if plan.extensions and self.content_sniffer is not None:
+            sniff_plan = plan._replace(extensions=frozenset())
+        to_sniff: List[ScanEntry] = []
+        try:
+            # Cada entrada trae el único stat hecho durante el recorrido
+            for entry in scan:
+                # Aplicar filtros (tipo, fecha y tamaño ya resueltos en el plan)
+                if not plan.matches_metadata(entry):
+                    if (sniff_plan is not None and needs_sniffing(entry.extension)
+                            and sniff_plan.matches_metadata(entry) and plan.matches_name(entry.name)):
+                        to_sniff.append(entry)
+                        if len(to_sniff) >= SNIFF_BATCH:
+                            yield from self._sniffed_matches(to_sniff, plan, stats)
+                            to_sniff = []
+                    continue
+
+                # Buscar en contenido si se especifica
+                content_match = False
+                if content_searcher and entry.extension in self.content_extensions:
+                    open_calls += 1
+                    content_match = self._search_in_content(Path(entry.path), content_searcher)
+                    if content_match:
+                        stats['content_matches'] += 1
+
+                # Si no coincide ni nombre ni contenido, saltar (un único patrón para todas las palabras)
+                if not (content_match or plan.matches_name(entry.name)):
+                    continue
+
+                yield entry, content_match
+            if to_sniff:
+                yield from self._sniffed_matches(to_sniff, plan, stats)
+        finally:
+            scan.close()
+        stats['scan'] = dict(scan_stats)
+        stats['by_root'] = scan_stats.get('by_root', {})
+        stats['mounts'] = scan_stats.get('mounts', {})
+        stats['time_limited'] = (not scan_stats.get('complete', True)
+                                 and not (cancel_token and cancel_token.is_cancelled()))
+        stats['syscalls'] = {
+            'stat': scan_stats.get('stat_calls', 0),
+            'dir_stat': scan_stats.get('dir_stat_calls', 0),
+            'scandir': scan_stats.get('dirs_scanned', 0),
+            'open': open_calls,
+            'candidates': scan_stats.get('files_seen', 0)
+        }
+
+    def _sniffed_matches(self, entries: List[ScanEntry], plan: QueryPlan,
+                         stats: Dict[str, Any]) -> Iterator[Tuple[ScanEntry, bool]]:
+        """Coincidencias por contenido de un lote de archivos sin extensión útil"""
+        content_types = self.content_sniffer.sniff_entries(entries)
+        stats['sniffed'] = stats.get('sniffed', 0) + len(entries)
+        for entry in entries:
+            content_type = content_types.get(entry.path)
+            if content_type is not None and content_type.extension in plan.extensions:
+                stats['sniffed_matches'] = stats.get('sniffed_matches', 0) + 1
+                yield entry, False
 
-                for fname in files:
-                    # Timeout
-                    if (datetime.now() - start_time).total_seconds() > time_limit:
-                        break
-                    # Saltar archivos ocultos
-                    if fname.startswith('.'):
-                        continue
-                    yield Path(root) / fname
-        except Exception:
-            return
-    
     def _parse_natural_query(self, query: str) -> Dict[str, Any]:
         """
         Analizar consulta en lenguaje natural y extraer parámetros
@@ -218,127 +1216,72 @@ class FileManager:
         Returns:
             Diccionario con parámetros de búsqueda
         """
-        query_lower = query.lower()
-        params = {
-            'keywords': [],
-            'file_types': [],
-            'categories': [],
-            'recent_days': None,
-            'size_range': None
-        }
-        
-        # Extraer categorías de archivos
-        for category, extensions in self.file_categories.items():
-            if category in query_lower or any(cat in query_lower for cat in [category[:-1], category.rstrip('s')]):
-                params['categories'].append(category)
-                params['file_types'].extend(extensions)
-        
-        # Extraer extensiones específicas
-        extension_pattern = r'\.([\w]+)'
-        extensions = re.findall(extension_pattern, query)
-        for ext in extensions:
-            if not ext.startswith('.'):
-                ext = '.' + ext
-            params['file_types'].append(ext.lower())
-        
-        # Extraer términos temporales
-        if any(term in query_lower for term in ['hoy', 'today', 'reciente']):
-            params['recent_days'] = 1
-        elif any(term in query_lower for term in ['ayer', 'yesterday']):
-            params['recent_days'] = 2
-        elif any(term in query_lower for term in ['esta semana', 'this week', 'semana']):
-            params['recent_days'] = 7
-        elif any(term in query_lower for term in ['este mes', 'this month', 'mes']):
-            params['recent_days'] = 30
-        elif 'último' in query_lower or 'last' in query_lower:
-            # Buscar números seguidos de tiempo
-            time_match = re.search(r'(\d+)\s*(día|días|day|days|semana|semanas|week|weeks)', query_lower)
-            if time_match:
-                num = int(time_match.group(1))
-                unit = time_match.group(2)
-                if 'día' in unit or 'day' in unit:
-                    params['recent_days'] = num
-                elif 'semana' in unit or 'week' in unit:
-                    params['recent_days'] = num * 7
-        
-        # Extraer términos de tamaño
-        if any(term in query_lower for term in ['grande', 'grandes', 'large', 'big']):
-            params['size_range'] = (10*1024*1024, None)  # Más de 10MB
-        elif any(term in query_lower for term in ['pequeño', 'pequeños', 'small', 'tiny']):
-            params['size_range'] = (None, 1024*1024)  # Menos de 1MB
-        
-        # Extraer palabras clave (excluir palabras funcionales)
-        # Limpiar query y extraer keywords
-        clean_keywords = []
-        words = re.findall(r'\b\w+\b', query_lower)
-        for word in words:
-            if len(word) > 2 and word not in self.stop_words:
-                # No incluir si ya es una categoría o extensión
-                if not any(word in cat for cat in self.file_categories.keys()):
-                    clean_keywords.append(word)
-        
-        params['keywords'] = clean_keywords
-        
-        return params
+        return self.query_compiler.compile(query).as_params()
     
-    def _matches_criteria(self, file_path: Path, params: Dict[str, Any]) -> bool:
+    def compile_query(self, query: str, **kwargs) -> QueryPlan:
         """
-        Verificar si un archivo cumple con los criterios de búsqueda
+        Compilar una consulta y los parámetros explícitos en un plan inmutable
+        
+        Args:
+            query: Consulta en lenguaje natural
+            **kwargs: recent_days, min_size, max_size, file_types y match_all de smart_search_files
         """
-        try:
-            stat = file_path.stat()
-            
-            # Filtro por tipo de archivo
-            if params['file_types']:
-                file_ext = file_path.suffix.lower()
-                if file_ext not in params['file_types']:
-                    return False
-            
-            # Filtro temporal
-            if params['recent_days']:
-                cutoff_date = datetime.now() - timedelta(days=params['recent_days'])
-                file_date = datetime.fromtimestamp(stat.st_mtime)
-                if file_date < cutoff_date:
-                    return False
-            
-            # Filtro por tamaño
-            if params.get('size_range'):
-                min_size, max_size = params['size_range']
-                if min_size and stat.st_size < min_size:
-                    return False
-                if max_size and stat.st_size > max_size:
-                    return False
-            
-            return True
-            
-        except (OSError, PermissionError):
-            return False
+        return self.query_compiler.compile(
+            query,
+            recent_days=kwargs.get('recent_days'),
+            min_size=kwargs.get('min_size'),
+            max_size=kwargs.get('max_size'),
+            file_types=kwargs.get('file_types'),
+            match_all=kwargs.get('match_all', False)
+        )
     
-    def _matches_filename(self, file_path: Path, keywords: List[str]) -> bool:
+    def _search_in_content(self, file_path: Path, searcher: ContentSearcher) -> bool:
         """
-        Verificar si el nombre del archivo coincide con las palabras clave
+        Buscar palabras clave en el contenido completo del archivo (para en la primera);
+        en los documentos se busca en su texto extraído
         """
-        if not keywords:
-            return True
-            
-        filename_lower = file_path.name.lower()
-        return any(keyword in filename_lower for keyword in keywords)
+        if file_path.suffix.lower() in self.document_extensions:
+            return searcher.contains_text(self.text_extractor.extract_path(str(file_path)) or '')
+        return searcher.contains(file_path)
     
-    def _search_in_content(self, file_path: Path, keywords: List[str]) -> bool:
+    def _iter_content_hits(self, candidates: Iterable[ScanEntry], searcher: ContentSearcher,
+                           max_hits: int, deadline: float, cancel_token: Optional[CancellationToken],
+                           stats: Dict[str, Any]) -> Iterator[Tuple[ScanEntry, List[ContentHit]]]:
         """
-        Buscar palabras clave en el contenido del archivo
+        Coincidencias de cada candidato: los archivos de texto se leen al
+        llegar y los documentos se agrupan para extraer su texto en lote
         """
-        if not keywords:
-            return False
-            
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Leer solo los primeros 10KB para evitar archivos muy grandes
-                content = f.read(10240).lower()
-                return any(keyword in content for keyword in keywords)
-        except:
-            return False
-    
+        documents: List[ScanEntry] = []
+        for entry in candidates:
+            if (cancel_token is not None and cancel_token.is_cancelled()) or time.monotonic() > deadline:
+                stats['truncated'] = True
+                break
+            if entry.extension in self.document_extensions:
+                documents.append(entry)
+                if len(documents) >= DOCUMENT_BATCH:
+                    yield from self._document_hits(documents, searcher, max_hits, deadline, stats)
+                    documents = []
+                continue
+            hits = searcher.search_file(entry.path, max_hits)
+            if hits:
+                yield entry, hits
+        if documents:
+            # Aunque se haya agotado el tiempo, los que ya están en la caché se miran igual
+            yield from self._document_hits(documents, searcher, max_hits, deadline, stats)
+
+    def _document_hits(self, documents: List[ScanEntry], searcher: ContentSearcher, max_hits: int,
+                       deadline: float, stats: Dict[str, Any]) -> Iterator[Tuple[ScanEntry, List[ContentHit]]]:
+        """Coincidencias en el texto extraído de un lote de documentos"""
+        texts = self.text_extractor.extract_entries(documents, deadline=deadline)
+        for entry in documents:
+            if entry.path not in texts:
+                stats['truncated'] = True
+                continue
+            stats['documents'] += 1
+            hits = searcher.search_text(texts[entry.path] or '', max_hits)
+            if hits:
+                yield entry, hits
+
     def _is_text_file(self, file_path: Path) -> bool:
         """
         Verificar si un archivo es de texto (searchable)
@@ -351,28 +1294,15 @@ class FileManager:
         """
         try:
             stat = file_path.stat()
-            
-            # Determinar categoría
-            category = 'otros'
-            file_ext = file_path.suffix.lower()
-            for cat, extensions in self.file_categories.items():
-                if file_ext in extensions:
-                    category = cat
-                    break
-            
-            return {
-                'path': str(file_path),
-                'name': file_path.name,
-                'size': stat.st_size,
-                'size_human': self._format_file_size(stat.st_size),
-                'modified': stat.st_mtime,
-                'modified_human': self._format_date(datetime.fromtimestamp(stat.st_mtime)),
-                'extension': file_ext,
-                'category': category,
-                'directory': str(file_path.parent),
-                'is_hidden': file_path.name.startswith('.'),
-                'mime_type': mimetypes.guess_type(str(file_path))[0]
-            }
+            entry = ScanEntry(str(file_path), file_path.name, str(file_path.parent),
+                              stat.st_size, stat.st_mtime, stat.st_ino, stat.st_dev)
+            record = FileRecord.from_entry(entry, self.extension_categories)
+            if self.content_sniffer is not None:
+                # En la vista de detalle también se corrige una extensión que no corresponde al contenido
+                content_type = self.content_sniffer.sniff_entries([entry], parallel=False).get(entry.path)
+                if content_type is not None and not content_type.matches_extension(record.extension):
+                    self._apply_content_type(record, content_type)
+            return record
         except:
             return {
                 'path': str(file_path),
@@ -380,76 +1310,49 @@ class FileManager:
                 'error': 'No se pudo acceder al archivo'
             }
     
+    def _file_info_from_entry(self, entry: ScanEntry) -> FileRecord:
+        """
+        Construir la información detallada a partir del registro del recorrido
+        o del índice, sin volver a consultar el disco (los campos legibles se
+        calculan al mostrarse)
+        """
+        record = FileRecord.from_entry(entry, self.extension_categories)
+        if self.content_sniffer is not None and needs_sniffing(record.extension):
+            # Sin extensión útil: tipo y categoría según el contenido (de la caché si ya se leyó)
+            content_type = self.content_sniffer.sniff_entries([entry], parallel=False).get(entry.path)
+            if content_type is not None:
+                self._apply_content_type(record, content_type)
+        return record
+
+    def _apply_content_type(self, record: FileRecord, content_type: ContentType):
+        """Tipo MIME y categoría del registro según su contenido"""
+        record.mime_type = content_type.mime
+        record.category = content_type.category
+        record['content_type'] = content_type.label
+        if record.extension and not content_type.matches_extension(record.extension):
+            record['extension_mismatch'] = True
+
     def _format_file_size(self, size_bytes: int) -> str:
         """
         Formatear tamaño de archivo en formato legible
         """
-        if size_bytes == 0:
-            return '0 B'
-        
-        size_names = ['B', 'KB', 'MB', 'GB', 'TB']
-        i = 0
-        size = float(size_bytes)
-        
-        while size >= 1024.0 and i < len(size_names) - 1:
-            size /= 1024.0
-            i += 1
-        
-        return f'{size:.1f} {size_names[i]}'
+        return format_file_size(size_bytes)
     
     def _format_date(self, date_obj: datetime) -> str:
         """
         Formatear fecha en formato legible
         """
-        now = datetime.now()
-        diff = now - date_obj
-        
-        if diff.days == 0:
-            return 'Hoy'
-        elif diff.days == 1:
-            return 'Ayer'
-        elif diff.days < 7:
-            return f'Hace {diff.days} días'
-        elif diff.days < 30:
-            weeks = diff.days // 7
-            return f'Hace {weeks} semana{"s" if weeks > 1 else ""}'
-        else:
-            return date_obj.strftime('%d/%m/%Y')
+        return format_date(date_obj)
     
     def _sort_by_relevance(self, results: List[Dict], keywords: List[str]) -> List[Dict]:
         """
-        Ordenar resultados por relevancia
+        Ordenar resultados por relevancia (misma puntuación que TopKRanker)
         """
-        def relevance_score(file_info):
-            score = 0
-            filename = file_info['name'].lower()
-            
-            for keyword in keywords:
-                # Más puntos si coincide exactamente
-                if keyword == filename.lower():
-                    score += 100
-                # Puntos si el keyword está al inicio del nombre
-                elif filename.startswith(keyword):
-                    score += 50
-                # Puntos por cada coincidencia en el nombre
-                elif keyword in filename:
-                    score += 20
-                # Puntos extra por coincidencia en contenido
-                if file_info.get('content_match'):
-                    score += 10
-            
-            # Puntos por fecha reciente
-            days_old = (datetime.now().timestamp() - file_info.get('modified', 0)) / 86400
-            if days_old < 1:
-                score += 30
-            elif days_old < 7:
-                score += 20
-            elif days_old < 30:
-                score += 10
-            
-            return score
-        
-        return sorted(results, key=relevance_score, reverse=True)
+        ranker = TopKRanker(len(results), keywords)
+        for file_info in results:
+            ranker.push(file_info, file_info['name'], file_info.get('modified', 0),
+                        bool(file_info.get('content_match')))
+        return ranker.results()
     
     def _get_search_suggestions(self, query: str, stats: Dict) -> List[str]:
         """
@@ -496,16 +1399,28 @@ class FileManager:
             return {"error": "La ruta no corresponde a un archivo", "path": file_path}
             
         try:
-            # Determinar el tipo de archivo
+            # Determinar el tipo de archivo: por el contenido si se reconoce, si no por el nombre
             mime_type, _ = mimetypes.guess_type(str(path))
+            content_type = self.detect_content_type(str(path))
+            if content_type is not None:
+                mime_type = content_type.mime
             
-            # Leer archivos de texto
-            if mime_type and mime_type.startswith('text'):
-                with open(path, 'r', encoding='utf-8') as f:
+            # Leer archivos de texto (también los de extensión desconocida que lo parecen)
+            extracted = None
+            head = read_head(str(path)) if content_type is None else b''
+            if content_type is None and ((mime_type and mime_type.startswith('text'))
+                                         or head.startswith(TEXT_BOMS) or looks_like_text(head)):
+                # Los "Unicode" del Bloc de notas son UTF-16 con marca de orden de bytes
+                with open(path, 'r', encoding=text_encoding(head)) as f:
                     content = f.read()
+                mime_type = mime_type or 'text/plain'
             else:
-                # Para archivos binarios, solo mostrar información
-                content = f"[Archivo binario - {mime_type or 'tipo desconocido'}]"
+                # Documentos: su texto extraído; otros binarios, solo información
+                extracted = self.extract_text(str(path))
+                if extracted is not None:
+                    content = extracted
+                else:
+                    content = f"[Archivo binario - {mime_type or 'tipo desconocido'}]"
                 
             return {
                 "path": str(path),
@@ -513,7 +1428,8 @@ class FileManager:
                 "size": path.stat().st_size,
                 "modified": path.stat().st_mtime,
                 "content": content,
-                "mime_type": mime_type
+                "mime_type": mime_type,
+                "extracted_text": extracted is not None
             }
             
         except Exception as e:
@@ -629,12 +1545,24 @@ class FileManager:
         Returns:
             Lista de archivos ordenados por fecha de modificación
         """
+        if self.file_index is not None:
+            roots = self._active_search_roots()
+            self.refresh_index(roots)
+            return [
+                {
+                    "path": entry['path'],
+                    "name": entry['name'],
+                    "size": entry['size'],
+                    "modified": entry['mtime'],
+                    "extension": os.path.splitext(entry['name'])[1],
+                    "parent": entry['directory']
+                }
+                for entry in self.file_index.search(roots=roots, limit=max_results)
+            ]
+
         files = []
         
-        for search_path in self.search_paths:
-            if not search_path.exists():
-                continue
-                
+        for search_path in self._active_search_roots():
             try:
                 for file_path in search_path.rglob("*"):
                     if not file_path.is_file():
@@ -710,3 +1638,142 @@ class FileManager:
             kwargs['file_types'] = norm
 
         return self.smart_search_files(query, **kwargs)
+
+    def search_in_content(self, query: str, max_results: int = 20, **kwargs) -> Dict[str, Any]:
+        """
+        Buscar palabras clave dentro del contenido completo de los archivos de
+        texto y del texto extraído de los documentos (PDF, Word, Excel...)
+        
+        Args:
+            query: Palabras a buscar (admite los mismos filtros naturales que
+                smart_search_files: tipo, fecha, tamaño)
+            max_results: Número máximo de archivos con coincidencias
+            **kwargs: Parámetros adicionales:
+                - max_hits_per_file: Coincidencias a mostrar por archivo (default: 3)
+                - time_limit: Tiempo máximo en segundos (default: 8.0)
+                - include_system: Incluir rutas del sistema (default: False)
+                - use_index: Tomar los candidatos del índice (default: True)
+                - cancel_token: CancellationToken para abandonar la búsqueda
+                - recent_days, min_size, max_size, file_types
+            
+        Returns:
+            Diccionario con los archivos encontrados (cada uno con
+            'content_hits': línea, columna, palabra y fragmento) y estadísticas
+        """
+        final: Dict[str, Any] = {}
+        for event in self.iter_search_in_content(query, max_results=max_results, **kwargs):
+            if event['done']:
+                final = event
+        final.pop('done', None)
+        final.pop('progress', None)
+        return final
+
+    def iter_search_in_content(self, query: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Búsqueda en contenido en flujo: produce los archivos con coincidencias según aparecen
+
+        Acepta los mismos parámetros que search_in_content (max_results
+        incluido), más:
+            - batch_interval: Segundos mínimos entre lotes (default: 0.05)
+
+        Yields:
+            Lotes intermedios {'done': False, 'results': [archivos nuevos],
+            'progress': {files_scanned, matches, elapsed}} y un último evento
+            {'done': True, ...} con los mismos campos que search_in_content
+        """
+        max_results = kwargs.get('max_results', 20)
+        max_hits_per_file = kwargs.get('max_hits_per_file', 3)
+        time_limit = kwargs.get('time_limit', 8.0)
+        batch_interval = kwargs.get('batch_interval', 0.05)
+        cancel_token: Optional[CancellationToken] = kwargs.get('cancel_token')
+        started = time.monotonic()
+        deadline = started + time_limit
+
+        plan = self.compile_query(query, **kwargs)
+        searcher = ContentSearcher(plan.keywords)
+        stats: Dict[str, Any] = {
+            'files_scanned': 0,
+            'bytes_scanned': 0,
+            'content_matches': 0,
+            'search_time': 0,
+            'mb_per_second': 0.0,
+            'documents': 0,
+            'truncated': False
+        }
+        if searcher.pattern is None:
+            yield {
+                'done': True,
+                'success': False,
+                'query': query,
+                'error': 'No hay palabras que buscar en el contenido',
+                'results': [],
+                'stats': stats
+            }
+            return
+
+        # Candidatos: archivos de texto y documentos que cumplen los filtros de tipo, fecha y tamaño
+        extensions = plan.extensions & self.content_extensions if plan.extensions else self.content_extensions
+        roots = self._active_search_roots(kwargs.get('include_system', False))
+        if self.file_index is not None and kwargs.get('use_index', True):
+            refresh_stats = self.refresh_index(roots, time_limit=time_limit, cancel_token=cancel_token)
+            stats['index_complete'] = refresh_stats['complete']
+            # Se materializan las rutas para no bloquear el índice mientras se lee el disco
+            candidates = [self._entry_from_row(row) for row in self.file_index.search(
+                extensions=extensions,
+                modified_after=plan.modified_after,
+                min_size=plan.min_size,
+                max_size=plan.max_size,
+                roots=roots
+            )]
+            # Con el índice de contenido sólo se leen los archivos que pueden coincidir
+            excluded = self._content_index_exclusions(
+                roots, searcher.keywords, started + time_limit * self.content_index_budget, stats)
+            if excluded:
+                candidates = [entry for entry in candidates if entry.path not in excluded]
+        else:
+            should_stop = cancel_token.is_cancelled if cancel_token else None
+            candidates = (entry for entry in self.scanner.scan([str(root) for root in roots], deadline=deadline,
+                                                               should_stop=should_stop)
+                          if entry.extension in extensions and plan.matches_metadata(entry))
+
+        results = []
+        pending = []
+        last_batch = time.monotonic()
+        for entry, hits in self._iter_content_hits(candidates, searcher, max_hits_per_file,
+                                                   deadline, cancel_token, stats):
+            file_info = self._file_info_from_entry(entry)
+            file_info['content_match'] = True
+            file_info['content_hits'] = [hit._asdict() for hit in hits]
+            results.append(file_info)
+            pending.append(file_info)
+            if len(results) >= max_results:
+                break
+            now = time.monotonic()
+            if now - last_batch >= batch_interval:
+                last_batch = now
+                yield {
+                    'done': False,
+                    'results': pending,
+                    'progress': {'files_scanned': searcher.files_scanned, 'matches': len(results),
+                                 'elapsed': now - started}
+                }
+                pending = []
+        if cancel_token is not None and cancel_token.is_cancelled():
+            stats['truncated'] = True
+
+        elapsed = time.monotonic() - started
+        stats.update({
+            'files_scanned': searcher.files_scanned,
+            'bytes_scanned': searcher.bytes_scanned,
+            'content_matches': len(results),
+            'search_time': elapsed,
+            'mb_per_second': searcher.bytes_scanned / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        })
+        yield {
+            'done': True,
+            'success': True,
+            'query': query,
+            'keywords': list(plan.keywords),
+            'results': results,
+            'stats': stats
+        }
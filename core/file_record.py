@@ -0,0 +1,204 @@
+"""
+Registro compacto de un resultado de búsqueda para Jarvis
+Guarda sólo los datos del stat en __slots__ y calcula los campos legibles
+(tamaño, fecha, tipo MIME) la primera vez que se piden
+"""
+
+import copy
+import mimetypes
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Marca de campo opcional sin valor (p. ej. content_match antes de asignarse)
+_MISSING = object()
+
+
+def format_file_size(size_bytes: int) -> str:
+    """Formatear tamaño de archivo en formato legible"""
+    if size_bytes == 0:
+        return '0 B'
+
+    size_names = ['B', 'KB', 'MB', 'GB', 'TB']
+    i = 0
+    size = float(size_bytes)
+
+    while size >= 1024.0 and i < len(size_names) - 1:
+        size /= 1024.0
+        i += 1
+
+    return f'{size:.1f} {size_names[i]}'
+
+
+def format_date(date_obj: datetime) -> str:
+    """Formatear fecha en formato legible (relativa a hoy si es reciente)"""
+    now = datetime.now()
+    diff = now - date_obj
+
+    if diff.days == 0:
+        return 'Hoy'
+    elif diff.days == 1:
+        return 'Ayer'
+    elif diff.days < 7:
+        return f'Hace {diff.days} días'
+    elif diff.days < 30:
+        weeks = diff.days // 7
+        return f'Hace {weeks} semana{"s" if weeks > 1 else ""}'
+    else:
+        return date_obj.strftime('%d/%m/%Y')
+
+
+class FileRecord(MutableMapping):
+    """
+    Resultado de búsqueda con interfaz de diccionario
+
+    Los campos del recorrido (ruta, nombre, tamaño, fecha...) se guardan en
+    __slots__; size_human, modified_human y mime_type se calculan al leerse
+    por primera vez y quedan memorizados en el registro, así que una
+    búsqueda con miles de coincidencias sólo formatea las que se muestran.
+    El acceso por clave (record['size_human'], get, keys, items, in) se
+    mantiene para la interfaz; las claves añadidas que no son campos
+    (content_hits...) van a un diccionario que sólo se crea si hace falta.
+    """
+
+    __slots__ = ('path', 'name', 'directory', 'size', 'modified', 'extension', 'category',
+                 'content_match', '_size_human', '_modified_human', '_mime_type', '_extra')
+
+    # Claves en el orden del antiguo diccionario de file_info
+    FIELDS = ('path', 'name', 'size', 'size_human', 'modified', 'modified_human',
+              'extension', 'category', 'directory', 'is_hidden', 'mime_type')
+    # Clave -> atributo; las subclases pueden exponer otros nombres
+    _KEYS = {key: key for key in FIELDS + ('content_match',)}
+    # Claves que sólo existen una vez asignadas
+    _OPTIONAL = ('content_match',)
+
+    format_size = staticmethod(format_file_size)
+
+    def __init__(self, path: str, name: str, directory: str, size: int, modified: float,
+                 extension: str = '', category: str = 'otros'):
+        self.path = path
+        self.name = name
+        self.directory = directory
+        self.size = size
+        self.modified = modified
+        self.extension = extension
+        self.category = category
+        self.content_match = _MISSING
+        self._size_human = None
+        self._modified_human = None
+        self._mime_type = _MISSING
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_entry(cls, entry, extension_categories: Dict[str, str]) -> 'FileRecord':
+        """Crear el registro desde un ScanEntry con el mapa extensión -> categoría precalculado"""
+        extension = entry.extension
+        return cls(entry.path, entry.name, entry.directory, entry.size, entry.mtime,
+                   extension, extension_categories.get(extension, 'otros'))
+
+    # Campos calculados bajo demanda
+
+    @property
+    def size_human(self) -> str:
+        if self._size_human is None:
+            self._size_human = self.format_size(self.size)
+        return self._size_human
+
+    @size_human.setter
+    def size_human(self, value: str):
+        self._size_human = value
+
+    @property
+    def modified_human(self) -> str:
+        if self._modified_human is None:
+            self._modified_human = format_date(datetime.fromtimestamp(self.modified))
+        return self._modified_human
+
+    @modified_human.setter
+    def modified_human(self, value: str):
+        self._modified_human = value
+
+    @property
+    def mime_type(self) -> Optional[str]:
+        if self._mime_type is _MISSING:
+            self._mime_type = mimetypes.guess_type(self.path)[0]
+        return self._mime_type
+
+    @mime_type.setter
+    def mime_type(self, value: Optional[str]):
+        self._mime_type = value
+
+    @property
+    def is_hidden(self) -> bool:
+        return self.name.startswith('.')
+
+    # Interfaz de diccionario
+
+    def __getitem__(self, key: str) -> Any:
+        attr = self._KEYS.get(key)
+        if attr is not None:
+            value = getattr(self, attr)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        attr = self._KEYS.get(key)
+        if attr is not None:
+            setattr(self, attr, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        attr = self._KEYS.get(key)
+        if attr is not None and key in self._OPTIONAL and getattr(self, attr) is not _MISSING:
+            setattr(self, attr, _MISSING)
+        elif attr is None and self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        attr = self._KEYS.get(key)
+        if attr is not None:
+            return key not in self._OPTIONAL or getattr(self, attr) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FIELDS
+        for key in self._OPTIONAL:
+            if getattr(self, self._KEYS[key]) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        optional = sum(1 for key in self._OPTIONAL if getattr(self, self._KEYS[key]) is not _MISSING)
+        return len(self.FIELDS) + optional + (len(self._extra) if self._extra else 0)
+
+    def copy(self) -> 'FileRecord':
+        """
+        Registro independiente con los mismos datos (p. ej. para guardarlo en una caché)
+
+        Los campos legibles memorizados no se copian: se vuelven a calcular
+        al pedirse ("Hoy" deja de valer al día siguiente). El tipo MIME sí,
+        porque puede venir del contenido y no sólo del nombre.
+        """
+        clone = type(self).__new__(type(self))
+        for slot in FileRecord.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        clone._size_human = None
+        clone._modified_human = None
+        clone._extra = copy.deepcopy(self._extra) if self._extra else None
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con todos los campos (calcula los legibles), p. ej. para JSON"""
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r}, size={self.size})"
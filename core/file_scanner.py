@@ -0,0 +1,285 @@
+"""
+Motor de recorrido de directorios para Jarvis
+Recorre árboles de directorios en paralelo con os.scandir
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from core.ignore_rules import IgnoreMatcher
+from core.mounts import MountPolicy
+from core.scan_scheduler import FairShareScheduler, ScheduledDir
+
+
+def default_max_workers() -> int:
+    """Hilos por defecto: el trabajo es de E/S y libera el GIL"""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+class ScanEntry:
+    """Archivo encontrado durante el recorrido, con los datos de su único stat"""
+
+    __slots__ = ('path', 'name', 'directory', 'size', 'mtime', 'inode', 'device')
+
+    def __init__(self, path: str, name: str, directory: str, size: int, mtime: float,
+                 inode: int = 0, device: int = 0):
+        self.path = path
+        self.name = name
+        self.directory = directory
+        self.size = size
+        self.mtime = mtime
+        self.inode = inode
+        self.device = device
+
+    @property
+    def extension(self) -> str:
+        # Igual que os.path.splitext(name)[1].lower() pero sin su coste por llamada
+        name = self.name
+        dot = name.rfind('.')
+        if dot <= 0 or (name[0] == '.' and not name[:dot].lstrip('.')):
+            return ''
+        return name[dot:].lower()
+
+    def __repr__(self) -> str:
+        return f"ScanEntry({self.path!r}, size={self.size})"
+
+
+class DirectoryListing(NamedTuple):
+    """Resultado de listar un directorio"""
+    files: List[ScanEntry]
+    subdirs: List[str]
+    # stat() de los archivos (el del propio directorio se cuenta aparte)
+    stat_calls: int
+    # (st_dev, st_ino) del directorio: identifica montajes bind y rutas duplicadas
+    identity: Optional[Tuple[int, int]] = None
+    # Subdirectorios descartados por las reglas de exclusión
+    pruned: int = 0
+
+
+class DirectoryScanner:
+    """
+    Recorrido paralelo basado en os.scandir
+
+    Cada directorio se lista una sola vez con os.scandir; el tipo de cada
+    entrada sale de DirEntry (sin llamada extra) y el tamaño/fecha del único
+    stat por archivo. Los subdirectorios se reparten entre un pool acotado de
+    hilos y todos los archivos salen por un único flujo de resultados.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 should_skip_dir: Optional[Callable[[str], bool]] = None,
+                 include_hidden: bool = False,
+                 ignore: Optional[IgnoreMatcher] = None,
+                 mounts: Optional[MountPolicy] = None):
+        """
+        Args:
+            max_workers: Hilos del pool (default: min(32, núcleos * 4))
+            should_skip_dir: Función nombre -> bool para podar directorios
+            include_hidden: Incluir archivos ocultos (que empiezan por '.')
+            ignore: Reglas de exclusión estilo .gitignore (configuración y .jarvisignore)
+            mounts: Política para montajes de red/FUSE y pseudo-sistemas
+        """
+        self.max_workers = max_workers or default_max_workers()
+        self.should_skip_dir = should_skip_dir or (lambda name: name.startswith('.'))
+        self.include_hidden = include_hidden
+        self.ignore = ignore
+        self.mounts = mounts
+        self.stop_poll_interval = 0.005
+        self.last_stats: Dict[str, Any] = {}
+
+    def list_directory(self, directory: str) -> DirectoryListing:
+        """
+        Listar un directorio
+
+        Returns:
+            DirectoryListing con los archivos, los subdirectorios a recorrer,
+            el número de stat() de archivos, la identidad del directorio y los
+            subdirectorios podados por las reglas. Un directorio sin permisos
+            devuelve listas vacías.
+        """
+        files: List[ScanEntry] = []
+        subdirs: List[str] = []
+        stat_calls = 0
+        identity = None
+        pruned = 0
+        try:
+            st = os.stat(directory)
+            identity = (st.st_dev, st.st_ino)
+            candidates = []
+            has_ignore_file = False
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.should_skip_dir(name):
+                                subdirs.append(entry.path)
+                            continue
+                        if self.ignore is not None and name == self.ignore.file_name:
+                            has_ignore_file = True
+                        if not self.include_hidden and name.startswith('.'):
+                            continue
+                        if entry.is_file():
+                            candidates.append(entry)
+                    except OSError:
+                        continue
+
+            # Las reglas se aplican antes de entrar en los subdirectorios y antes del stat de cada archivo
+            chain = self.ignore.rules_for(directory, has_ignore_file) if self.ignore is not None else ()
+            if chain:
+                match = self.ignore.match_chain
+                kept = [path for path in subdirs if not match(chain, path, os.path.basename(path), True)]
+                pruned = len(subdirs) - len(kept)
+                subdirs = kept
+                candidates = [entry for entry in candidates if not match(chain, entry.path, entry.name, False)]
+
+            for entry in candidates:
+                try:
+                    stat_calls += 1
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append(ScanEntry(entry.path, entry.name, directory, st.st_size, st.st_mtime,
+                                       st.st_ino, st.st_dev))
+        except OSError:
+            pass
+        return DirectoryListing(files, subdirs, stat_calls, identity, pruned)
+
+    def scan(self, roots: Iterable[str], deadline: Optional[float] = None,
+             should_stop: Optional[Callable[[], bool]] = None,
+             stats: Optional[Dict[str, Any]] = None,
+             priority: Optional[Callable[[str], float]] = None) -> Iterator[ScanEntry]:
+        """
+        Recorrer las raíces en paralelo y producir los archivos encontrados
+
+        Cada directorio se recorre una sola vez aunque se llegue a él por dos
+        rutas (raíces solapadas, montajes bind): se identifica por
+        (st_dev, st_ino) y la segunda copia se descarta. Las raíces se turnan
+        con FairShareScheduler, de modo que con límite de tiempo todas reciben
+        una parte parecida del presupuesto; los montajes lentos que se crucen
+        llevan sus propios límites o se excluyen (ver MountPolicy).
+
+        Args:
+            roots: Directorios raíz
+            deadline: Instante time.monotonic() a partir del cual se deja de recorrer
+            should_stop: Función que devuelve True para abandonar el recorrido
+            stats: Diccionario a rellenar con el progreso en vivo (también
+                queda en last_stats)
+            priority: Tasa de aciertos por directorio (los de mayor tasa se recorren antes)
+
+        Yields:
+            ScanEntry por cada archivo (el orden entre directorios no está definido)
+        """
+        start = time.monotonic()
+        stats = stats if stats is not None else {}
+        stats.update({'dirs_scanned': 0, 'files_seen': 0, 'stat_calls': 0, 'dir_stat_calls': 0, 'duplicate_dirs': 0,
+                      'pruned_dirs': 0, 'complete': True, 'elapsed': 0.0, 'files_per_second': 0.0, 'by_root': {}})
+        self.last_stats = stats
+
+        if self.ignore is not None:
+            # Releer los .jarvisignore en cada recorrido
+            self.ignore.clear_cache()
+        if self.mounts is not None:
+            self.mounts.refresh()
+        scheduler = FairShareScheduler(roots, priority, self.mounts)
+        visited_ids = set()
+        listings = self.run_scheduled(scheduler, self.list_directory, deadline, should_stop)
+        try:
+            for task, listing in listings:
+                stats['stat_calls'] += listing.stat_calls
+                stats['dir_stat_calls'] += 1
+                if listing.identity is not None:
+                    if listing.identity in visited_ids:
+                        stats['duplicate_dirs'] += 1
+                        continue
+                    visited_ids.add(listing.identity)
+                stats['dirs_scanned'] += 1
+                stats['pruned_dirs'] += listing.pruned
+                scheduler.push_children(task, listing.subdirs)
+                for entry in listing.files:
+                    stats['files_seen'] += 1
+                    yield entry
+        finally:
+            listings.close()
+            if scheduler.pending_roots():
+                stats['complete'] = False
+            stats['by_root'] = scheduler.root_stats()
+            stats['mounts'] = scheduler.mount_stats()
+            stats['elapsed'] = time.monotonic() - start
+            if stats['elapsed'] > 0:
+                stats['files_per_second'] = stats['files_seen'] / stats['elapsed']
+
+    def run_scheduled(self, scheduler: FairShareScheduler, func: Callable[[str], Any],
+                      deadline: Optional[float] = None,
+                      should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[ScheduledDir, Any]]:
+        """
+        Aplicar una función de E/S a los directorios que entrega un planificador
+
+        Los directorios se piden al planificador a medida que quedan hilos
+        libres, y el tiempo de cada llamada se le anota a su raíz. Quien
+        consume el generador encola los subdirectorios (push_children) antes
+        de pedir el siguiente resultado.
+
+        Yields:
+            Tuplas (ScheduledDir, resultado) en orden de finalización; se
+            detiene al vencer deadline o cuando should_stop devuelve True
+        """
+        max_in_flight = self.max_workers * 4
+        in_flight: Dict[Future, ScheduledDir] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jarvis-scan')
+
+        def timed(directory: str):
+            started = time.perf_counter()
+            result = func(directory)
+            return result, time.perf_counter() - started
+
+        try:
+            while scheduler.pending() or in_flight:
+                if ((deadline is not None and time.monotonic() > deadline)
+                        or (should_stop is not None and should_stop())):
+                    break
+
+                while len(in_flight) < max_in_flight:
+                    task = scheduler.pop()
+                    if task is None:
+                        break
+                    in_flight[executor.submit(timed, task.path)] = task
+
+                if not in_flight:
+                    continue
+
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - time.monotonic())
+                if should_stop is not None:
+                    # Despertar a menudo para ver la cancelación aunque un directorio tarde
+                    timeout = self.stop_poll_interval if timeout is None else min(timeout, self.stop_poll_interval)
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    result, elapsed = future.result()
+                    scheduler.finish(task, elapsed)
+                    yield task, result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def map_directories(self, directories: Iterable[str],
+                        func: Callable[[str], Any]) -> Iterator[Tuple[str, Any]]:
+        """
+        Aplicar una función de E/S a varios directorios en paralelo
+
+        Yields:
+            Tuplas (directorio, resultado) en orden de finalización
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jarvis-scan') as executor:
+            futures = {executor.submit(func, d): d for d in directories}
+            try:
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield futures.pop(future), future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,364 @@
+"""
+Vigilante del sistema de archivos para Jarvis
+Mantiene el índice de archivos al día usando inotify (Linux) o refrescos periódicos
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.file_index import FileIndex
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE
+              | IN_MODIFY | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_EVENT_HEADER = struct.Struct('iIII')
+MAX_USER_WATCHES_PATH = '/proc/sys/fs/inotify/max_user_watches'
+
+
+def read_max_user_watches() -> Optional[int]:
+    """Límite de watches de inotify por usuario (None si no está disponible)"""
+    try:
+        with open(MAX_USER_WATCHES_PATH, 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class _Inotify:
+    """Envoltorio mínimo sobre las llamadas inotify de libc vía ctypes"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[tuple]:
+        """Leer los eventos pendientes como tuplas (wd, mask, cookie, nombre)"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    Servicio en segundo plano que aplica los cambios del disco al índice
+
+    En Linux se suscribe con inotify a todos los directorios indexados bajo
+    las raíces de búsqueda y aplica los eventos de creación, borrado, renombrado
+    y modificación en tandas. Si inotify no está disponible, o se agota el
+    límite max_user_watches, recurre a refrescos incrementales periódicos.
+    """
+
+    def __init__(self, file_index: FileIndex, roots: List[Path],
+                 batch_interval: float = 0.5, max_batch: int = 2000,
+                 rescan_interval: float = 300.0):
+        """
+        Args:
+            file_index: Índice a mantener
+            roots: Raíces de búsqueda a vigilar
+            batch_interval: Segundos que se acumulan eventos antes de aplicarlos
+            max_batch: Número de rutas que fuerza aplicar la tanda antes de tiempo
+            rescan_interval: Segundos entre refrescos periódicos (modo respaldo)
+        """
+        self.file_index = file_index
+        self.roots = [Path(r) for r in roots]
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.rescan_interval = rescan_interval
+
+        self.mode = 'stopped'
+        self.watch_limit_reached = False
+        self._inotify: Optional[_Inotify] = None
+        self._wd_to_path: Dict[int, str] = {}
+        self._path_to_wd: Dict[str, int] = {}
+
+        # Rutas pendientes -> instante (monotonic) del primer evento
+        self._pending: Dict[str, float] = {}
+        self._needs_rescan = False
+        self._last_rescan = 0.0
+
+        self._stats: Dict[str, Any] = {
+            'events_received': 0,
+            'batches_applied': 0,
+            'paths_applied': 0,
+            'overflows': 0,
+            'rescans': 0,
+            'last_batch_lag': 0.0,
+            'max_batch_lag': 0.0
+        }
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Iniciar el vigilante en un hilo daemon"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='jarvis-file-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Detener el vigilante
+
+        El descriptor de inotify y los watches los libera el propio hilo al
+        salir; si sigue ocupado (p. ej. en un refresco) tras el timeout, se
+        liberarán en cuanto termine.
+        """
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        else:
+            self.mode = 'stopped'
+
+    def is_live(self) -> bool:
+        """True si el índice se mantiene por eventos (sin depender de refrescos)"""
+        return self.mode == 'inotify' and not self.watch_limit_reached
+
+    def _run(self):
+        try:
+            self._watch_loop()
+        finally:
+            self._release()
+
+    def _watch_loop(self):
+        try:
+            self._inotify = _Inotify()
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify no disponible, usando refrescos periódicos: {e}")
+            self.mode = 'polling'
+        else:
+            # Vigilar antes del refresco inicial para no perder los cambios
+            # que ocurran mientras dura; el refresco vigila luego lo que descubra
+            self.mode = 'inotify'
+            self._watch_dirs([str(root) for root in self.roots if root.is_dir()])
+            self._watch_dirs(self.file_index.list_dirs(self.roots))
+
+        # Refresco inicial para partir de un índice completo
+        self._rescan()
+
+        while not self._stop_event.is_set():
+            if self.mode == 'inotify':
+                self._poll_events()
+                if self._needs_rescan:
+                    self._rescan()
+            else:
+                self._stop_event.wait(self.rescan_interval)
+                if not self._stop_event.is_set():
+                    self._rescan()
+                continue
+
+            if self.watch_limit_reached and time.monotonic() - self._last_rescan >= self.rescan_interval:
+                self._rescan()
+
+    # ------------------------------------------------------------------
+    # Watches y eventos
+    # ------------------------------------------------------------------
+
+    def _release(self):
+        """Cerrar inotify y olvidar los watches (sólo desde el hilo del vigilante)"""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._wd_to_path.clear()
+        self._path_to_wd.clear()
+        self.mode = 'stopped'
+
+    def _watch_dirs(self, directories: List[str]):
+        """Vigilar los directorios que aún no tengan watch"""
+        for directory in directories:
+            if directory in self._path_to_wd:
+                continue
+            if not self._add_watch(directory):
+                break
+
+    def _add_watch(self, directory: str) -> bool:
+        """Añadir un watch; devuelve False si se agotó el límite de watches"""
+        if self.watch_limit_reached:
+            return False
+        try:
+            wd = self._inotify.add_watch(directory)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.watch_limit_reached = True
+                print(f"⚠️ Límite de inotify alcanzado ({len(self._wd_to_path)} watches), "
+                      "se usarán refrescos periódicos")
+                return False
+            return True
+        old_path = self._wd_to_path.get(wd)
+        if old_path is not None:
+            self._path_to_wd.pop(old_path, None)
+        self._wd_to_path[wd] = directory
+        self._path_to_wd[directory] = wd
+        return True
+
+    def _drop_watches_under(self, directory: str):
+        """Quitar los watches de un directorio movido/borrado y sus subdirectorios"""
+        prefix = directory.rstrip(os.sep) + os.sep
+        for path in [p for p in self._path_to_wd if p == directory or p.startswith(prefix)]:
+            wd = self._path_to_wd.pop(path)
+            self._wd_to_path.pop(wd, None)
+            self._inotify.rm_watch(wd)
+
+    def _poll_events(self):
+        """Esperar eventos y aplicar la tanda pendiente cuando corresponda"""
+        timeout = self.batch_interval
+        with self._lock:
+            if self._pending:
+                oldest = min(self._pending.values())
+                timeout = max(0.0, self.batch_interval - (time.monotonic() - oldest))
+
+        ready, _, _ = select.select([self._inotify.fd], [], [], timeout)
+        if ready:
+            now = time.monotonic()
+            with self._lock:
+                for wd, mask, _cookie, name in self._inotify.read_events():
+                    self._stats['events_received'] += 1
+                    if mask & IN_Q_OVERFLOW:
+                        # Se perdieron eventos: sólo un refresco garantiza coherencia
+                        self._stats['overflows'] += 1
+                        self._needs_rescan = True
+                        continue
+                    directory = self._wd_to_path.get(wd)
+                    if directory is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        self._wd_to_path.pop(wd, None)
+                        if self._path_to_wd.get(directory) == wd:
+                            del self._path_to_wd[directory]
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        self._pending.setdefault(directory, now)
+                        continue
+                    path = os.path.join(directory, name) if name else directory
+                    if mask & IN_ISDIR and mask & (IN_MOVED_FROM | IN_DELETE):
+                        self._drop_watches_under(path)
+                    self._pending.setdefault(path, now)
+
+        with self._lock:
+            if not self._pending:
+                return
+            oldest = min(self._pending.values())
+            due = time.monotonic() - oldest >= self.batch_interval or len(self._pending) >= self.max_batch
+        if due:
+            self._flush()
+
+    def _flush(self):
+        """Aplicar al índice la tanda de rutas pendientes"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if not pending:
+            return
+
+        result = self.file_index.apply_changes(pending.keys())
+        if result['new_dirs']:
+            # Indexar y vigilar los directorios nuevos (y lo que contengan)
+            self.file_index.refresh(result['new_dirs'])
+            if self._inotify:
+                self._watch_dirs(self.file_index.list_dirs(result['new_dirs']))
+
+        lag = time.monotonic() - min(pending.values())
+        self._stats['batches_applied'] += 1
+        self._stats['paths_applied'] += len(pending)
+        self._stats['last_batch_lag'] = lag
+        self._stats['max_batch_lag'] = max(self._stats['max_batch_lag'], lag)
+
+    def _rescan(self):
+        """Refresco incremental completo de las raíces"""
+        self._needs_rescan = False
+        self.file_index.refresh(self.roots)
+        if self._inotify:
+            # Vigilar también los directorios aparecidos desde el último refresco
+            self._watch_dirs(self.file_index.list_dirs(self.roots))
+        self._last_rescan = time.monotonic()
+        self._stats['rescans'] += 1
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Estado del vigilante
+
+        Returns:
+            Diccionario con el modo ('inotify', 'polling', 'stopped'), watches en
+            uso frente a max_user_watches, eventos pendientes, retraso actual
+            (segundos desde el evento pendiente más antiguo) y contadores
+        """
+        with self._lock:
+            pending = len(self._pending)
+            current_lag = time.monotonic() - min(self._pending.values()) if self._pending else 0.0
+            status = dict(self._stats)
+        status.update({
+            'mode': self.mode,
+            'watches_in_use': len(self._wd_to_path),
+            'max_user_watches': read_max_user_watches(),
+            'watch_limit_reached': self.watch_limit_reached,
+            'pending_events': pending,
+            'lag_seconds': current_lag,
+            'seconds_since_rescan': time.monotonic() - self._last_rescan if self._last_rescan else None
+        })
+        return status
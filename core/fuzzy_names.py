@@ -0,0 +1,290 @@
+"""
+Búsqueda aproximada de nombres de archivo para Jarvis
+Tolera los errores del reconocimiento de voz ("reporte finansiero",
+"presupuesto 2O24") comparando las palabras del nombre por trigramas
+"""
+
+import array
+import difflib
+import heapq
+import math
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.query_plan import fold_accents
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Palabras: letras o dígitos seguidos (el '_' separa como el espacio)
+_RUN_PATTERN = re.compile(r'[^\W_]+')
+_TOKEN_PATTERN = re.compile(r'\d+|[^\W\d_]+')
+# Letras entre cifras que el reconocedor confunde con dígitos ('2o24' -> '2024')
+_CONFUSABLE_PATTERN = re.compile(r'(?<=\d)[oli]{1,2}(?=\d)')
+_DIGIT_CONFUSABLES = str.maketrans({'o': '0', 'l': '1', 'i': '1'})
+
+# Palabras de un nombre que se comparan como máximo (los nombres muy largos se recortan)
+MAX_NAME_TOKENS = 16
+# Palabras parecidas del vocabulario que se prueban por palabra de la consulta
+MAX_EXPANSIONS = 32
+# Parecido mínimo por trigramas para comparar después letra a letra (las
+# transposiciones 'fatcura' / 'factura' sólo comparten la mitad de los trigramas)
+GRAM_PREFILTER = 0.3
+
+
+def name_tokens(text: str) -> List[str]:
+    """
+    Palabras normalizadas de un nombre o de una consulta
+
+    Minúsculas y sin tildes; letras y cifras se separan ('informe2024' ->
+    ['informe', '2024']) y una 'o', 'l' o 'i' entre cifras se lee como '0'
+    o '1' ('2O24' -> '2024').
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = fold_accents(text)
+    tokens = []
+    for run in _RUN_PATTERN.findall(text):
+        if run.isalpha() or run.isdigit():
+            tokens.append(run)
+            continue
+        run = _CONFUSABLE_PATTERN.sub(lambda match: match.group().translate(_DIGIT_CONFUSABLES), run)
+        tokens.extend(_TOKEN_PATTERN.findall(run))
+    return tokens
+
+
+def trigrams(token: str) -> Set[str]:
+    """Trigramas de una palabra con relleno ('  ab ' -> '  a', ' ab', 'ab ')"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def gram_similarity(a: Set[str], b: Set[str]) -> float:
+    """Coeficiente de Dice entre dos conjuntos de trigramas (0-1)"""
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def token_similarity(a: str, b: str) -> float:
+    """Parecido letra a letra entre dos palabras (0-1, difflib)"""
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class FuzzyNameIndex:
+    """
+    Índice de nombres para búsquedas aproximadas
+
+    Cada nombre se parte en palabras normalizadas; el vocabulario (mucho
+    menor que el número de archivos) tiene una lista de trigramas -> palabras
+    y cada palabra la lista de nombres que la contienen. Una consulta busca,
+    para cada una de sus palabras, las palabras del vocabulario con
+    trigramas en común y puntúa los nombres por la media de la mejor
+    similitud de cada palabra de la consulta (con NumPy, por bisección
+    vectorizada sobre las listas). Las posiciones son las del origen de los
+    nombres (las filas del FileCatalog).
+    """
+
+    def __init__(self, token_threshold: float = 0.7):
+        """
+        Args:
+            token_threshold: Similitud mínima entre dos palabras para considerarlas la misma
+        """
+        self.token_threshold = token_threshold
+        self.build_time = 0.0
+        self._token_ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._gram_postings: Dict[str, array.array] = {}
+        self._token_postings: List[array.array] = []
+        # Palabras de cada nombre, en un único array con desplazamientos
+        self._name_tokens = array.array('i')
+        self._name_offsets = array.array('q', [0])
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], token_threshold: float = 0.7) -> 'FuzzyNameIndex':
+        """Construir el índice con los nombres en orden de posición"""
+        index = cls(token_threshold)
+        start = time.perf_counter()
+        for name in names:
+            index.add(name)
+        index.build_time = time.perf_counter() - start
+        return index
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    def add(self, name: str) -> int:
+        """Añadir un nombre y devolver su posición"""
+        position = len(self)
+        token_ids = self._token_ids
+        seen = set()
+        for token in name_tokens(name)[:MAX_NAME_TOKENS]:
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = len(self._tokens)
+                self._tokens.append(token)
+                self._token_postings.append(array.array('i'))
+                for gram in trigrams(token):
+                    postings = self._gram_postings.get(gram)
+                    if postings is None:
+                        postings = self._gram_postings[gram] = array.array('i')
+                    postings.append(token_id)
+            if token_id in seen:
+                continue
+            seen.add(token_id)
+            self._token_postings[token_id].append(position)
+            self._name_tokens.append(token_id)
+        self._name_offsets.append(len(self._name_tokens))
+        return position
+
+    def similar_tokens(self, token: str) -> Dict[int, float]:
+        """
+        Palabras del vocabulario parecidas a una palabra: id -> similitud
+
+        Con un umbral t de trigramas, una palabra parecida comparte al menos
+        t·|q| / (2 - t) trigramas con la consulta, así que basta con contar
+        en las listas más cortas; las que pasan el filtro se comparan letra
+        a letra.
+        """
+        exact = self._token_ids.get(token)
+        # Palabras muy cortas y números: sólo la coincidencia exacta es fiable
+        if len(token) < 3 or token.isdigit():
+            return {exact: 1.0} if exact is not None else {}
+        grams = trigrams(token)
+        postings = sorted((self._gram_postings.get(gram, ()) for gram in grams), key=len)
+        min_common = math.ceil(GRAM_PREFILTER * len(grams) / (2 - GRAM_PREFILTER))
+        counts: Dict[int, int] = {}
+        for posting in postings[:max(1, len(postings) - min_common + 1)]:
+            for token_id in posting:
+                counts[token_id] = counts.get(token_id, 0) + 1
+
+        similar = {}
+        tokens = self._tokens
+        threshold = self.token_threshold
+        for token_id in counts:
+            candidate = tokens[token_id]
+            if gram_similarity(grams, trigrams(candidate)) < GRAM_PREFILTER:
+                continue
+            similarity = token_similarity(token, candidate)
+            if similarity >= threshold:
+                similar[token_id] = similarity
+        if exact is not None:
+            similar[exact] = 1.0
+        if len(similar) > MAX_EXPANSIONS:
+            similar = dict(heapq.nlargest(MAX_EXPANSIONS, similar.items(), key=lambda item: item[1]))
+        return similar
+
+    def search(self, query: str, limit: int = 20, min_score: float = 0.6,
+               accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """
+        Nombres parecidos a la consulta, del más al menos parecido
+
+        Args:
+            query: Texto de la consulta (palabras sueltas o un nombre de archivo)
+            limit: Número máximo de resultados
+            min_score: Puntuación mínima (media de la similitud de cada palabra)
+            accept: Filtro opcional posición -> bool (tipo, fecha, raíces...)
+
+        Returns:
+            Lista de (posición, puntuación)
+        """
+        query_tokens = list(dict.fromkeys(name_tokens(query)))
+        if not query_tokens or not len(self):
+            return []
+        expansions = [self.similar_tokens(token) for token in query_tokens]
+
+        # Un nombre con puntuación >= min_score coincide en al menos m palabras de
+        # la consulta, así que aparece en alguna de las (n - m + 1) más raras
+        token_postings = self._token_postings
+        by_rarity = sorted(expansions, key=lambda similar: sum(len(token_postings[t]) for t in similar))
+        needed = math.ceil(min_score * len(query_tokens) - 1e-9)
+        rare = by_rarity[:max(1, len(query_tokens) - needed + 1)]
+        if not any(rare):
+            return []
+        if np is not None:
+            scored = self._score_numpy(expansions, rare, min_score)
+        else:
+            scored = self._score_python(expansions, rare, min_score)
+
+        results = []
+        for position, score in scored:
+            if accept is not None and not accept(position):
+                continue
+            results.append((position, score))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _score_python(self, expansions, rare, min_score) -> List[Tuple[int, float]]:
+        token_postings = self._token_postings
+        candidates: Set[int] = set()
+        for similar in rare:
+            for token_id in similar:
+                candidates.update(token_postings[token_id])
+
+        name_tokens_flat, offsets = self._name_tokens, self._name_offsets
+        scored = []
+        for position in candidates:
+            tokens = name_tokens_flat[offsets[position]:offsets[position + 1]]
+            total = 0.0
+            matched = 0
+            for similar in expansions:
+                best = max((similar.get(token_id, 0.0) for token_id in tokens), default=0.0)
+                if best:
+                    matched += 1
+                    total += best
+            score = total / len(expansions)
+            if score < min_score:
+                continue
+            # A igual parecido, mejor el nombre sin palabras de sobra
+            score *= 0.9 + 0.1 * min(1.0, matched / len(tokens))
+            scored.append((position, round(score, 4)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+    def _score_numpy(self, expansions, rare, min_score) -> List[Tuple[int, float]]:
+        # Las listas de cada palabra están ordenadas por posición: la pertenencia
+        # de los candidatos se comprueba por bisección vectorizada
+        postings = self._token_postings
+
+        def view(token_id):
+            return np.frombuffer(postings[token_id], dtype=np.int32)
+
+        candidates = np.unique(np.concatenate([view(token_id) for similar in rare for token_id in similar]))
+        total = np.zeros(len(candidates), dtype=np.float64)
+        matched = np.zeros(len(candidates), dtype=np.int32)
+        for similar in expansions:
+            best = np.zeros(len(candidates), dtype=np.float64)
+            for token_id, similarity in similar.items():
+                posting = view(token_id)
+                if not len(posting):
+                    continue
+                found = np.searchsorted(posting, candidates)
+                found[found == len(posting)] = 0
+                hit = posting[found] == candidates
+                np.maximum(best, np.where(hit, similarity, 0.0), out=best)
+            total += best
+            matched += best > 0
+        score = total / len(expansions)
+        keep = score >= min_score
+        candidates, score, matched = candidates[keep], score[keep], matched[keep]
+        offsets = np.frombuffer(self._name_offsets, dtype=np.int64)
+        name_sizes = np.maximum(1, offsets[candidates + 1] - offsets[candidates])
+        score *= 0.9 + 0.1 * np.minimum(1.0, matched / name_sizes)
+        order = np.argsort(-score, kind='stable')
+        return list(zip(candidates[order].tolist(), np.round(score[order], 4).tolist()))
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes aproximados del vocabulario y de las listas"""
+        postings = sum(p.itemsize * len(p) for p in self._gram_postings.values())
+        postings += sum(p.itemsize * len(p) for p in self._token_postings)
+        return {
+            'names': len(self),
+            'vocabulary': len(self._tokens),
+            'postings': postings,
+            'name_tokens': self._name_tokens.itemsize * len(self._name_tokens)
+                           + self._name_offsets.itemsize * len(self._name_offsets)
+        }
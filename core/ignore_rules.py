@@ -0,0 +1,299 @@
+"""
+Reglas de exclusión al estilo .gitignore para Jarvis
+Compila los patrones de la configuración y de los archivos .jarvisignore en
+comprobaciones rápidas que se aplican antes de entrar en cada directorio
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+# Archivo de reglas por directorio (sus patrones se anclan en ese directorio)
+IGNORE_FILE_NAME = '.jarvisignore'
+# Caracteres que convierten un patrón en comodín
+GLOB_CHARS = frozenset('*?[\\')
+# Directorios cuya cadena de reglas se guarda antes de vaciar la caché
+MAX_CACHED_DIRS = 200000
+
+
+class IgnoreRule(NamedTuple):
+    """Patrón ya analizado de una línea"""
+    pattern: str
+    negated: bool
+    dir_only: bool
+    # Con '/' al principio o en medio: se compara con la ruta relativa a la base
+    anchored: bool
+    regex: Pattern
+
+
+def _translate(pattern: str) -> str:
+    """Traducir un patrón glob de gitignore a expresión regular ('*' no cruza '/')"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            if j - i >= 2 and (i == 0 or pattern[i - 1] == '/') and (j == n or pattern[j] == '/'):
+                # '**' completo: cualquier número de directorios
+                if j == n:
+                    out.append('.*')
+                    i = j
+                else:
+                    out.append('(?:.*/)?')
+                    i = j + 1
+                continue
+            out.append('[^/]*')
+            i = j
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:j].replace('\\', '\\\\')
+            if body[:1] in ('!', '^'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = j + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+def parse_ignore_line(line: str, flags: int = 0) -> Optional[IgnoreRule]:
+    """
+    Analizar una línea con la sintaxis de .gitignore
+
+    Returns:
+        IgnoreRule, o None para líneas vacías y comentarios
+    """
+    line = line.rstrip('\n\r')
+    # Los espacios finales se ignoran salvo que estén escapados
+    stripped = line.rstrip()
+    if stripped.endswith('\\') and len(line) > len(stripped):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+
+    negated = False
+    if line.startswith('!'):
+        negated = True
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    line = line.lstrip('/')
+    return IgnoreRule(line, negated, dir_only, anchored, re.compile(_translate(line), flags))
+
+
+class IgnoreRules:
+    """
+    Reglas de una fuente (configuración o un .jarvisignore) ancladas en una base
+
+    Sin negaciones, todos los patrones se funden en un conjunto de nombres
+    literales, una tupla de sufijos ('*.iso') y unas pocas expresiones
+    regulares alternativas, de modo que comprobar una entrada cuesta una
+    búsqueda en un conjunto, un endswith y, como mucho, un par de fullmatch. Con negaciones se respeta el orden: decide la última
+    regla que coincide.
+    """
+
+    def __init__(self, base: str, rules: List[IgnoreRule], source: str = '', case_sensitive: bool = True):
+        """
+        Args:
+            base: Directorio en el que se anclan los patrones ('' = ruta absoluta)
+            rules: Reglas en el orden en que aparecen
+            source: Origen de las reglas (para mostrarlo)
+            case_sensitive: Distinguir mayúsculas (False en Windows)
+        """
+        self.base = base
+        self.rules = rules
+        self.source = source
+        self.case_sensitive = case_sensitive
+        self.has_negation = any(rule.negated for rule in rules)
+        self.needs_path = any(rule.anchored for rule in rules)
+        self._prefix = base if base.endswith(os.sep) or not base else base + os.sep
+
+        # Nombres literales (sin comodines ni anclaje): una búsqueda en un conjunto
+        self._names = {False: set(), True: set()}
+        # Patrones '*.ext' y similares: un único str.endswith con una tupla
+        suffixes = {False: [], True: []}
+        # Expresiones fundidas por (anclada, sólo directorios)
+        groups: Dict[Tuple[bool, bool], List[str]] = {}
+        for rule in rules:
+            pattern = rule.pattern if case_sensitive else rule.pattern.lower()
+            if not rule.anchored and not (GLOB_CHARS & set(pattern)):
+                self._names[rule.dir_only].add(pattern)
+            elif not rule.anchored and pattern.startswith('*') and not (GLOB_CHARS & set(pattern[1:])):
+                suffixes[rule.dir_only].append(pattern[1:])
+            else:
+                groups.setdefault((rule.anchored, rule.dir_only), []).append(rule.regex.pattern)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self._merged = {key: re.compile('|'.join(f'(?:{p})' for p in patterns), flags)
+                        for key, patterns in groups.items()}
+        self._suffixes = {key: tuple(values) for key, values in suffixes.items()}
+
+    @classmethod
+    def from_lines(cls, base: str, lines: Iterable[str], source: str = '',
+                   case_sensitive: bool = True) -> 'IgnoreRules':
+        flags = 0 if case_sensitive else re.IGNORECASE
+        rules = [rule for rule in (parse_ignore_line(line, flags) for line in lines) if rule]
+        return cls(base, rules, source, case_sensitive)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def relative(self, path: str) -> Optional[str]:
+        """Ruta relativa a la base con '/' como separador (None si queda fuera)"""
+        if self.base:
+            if not path.startswith(self._prefix):
+                return None
+            rel = path[len(self._prefix):]
+        else:
+            rel = path.lstrip(os.sep)
+        return rel.replace(os.sep, '/') if os.sep != '/' else rel
+
+    def match(self, path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """
+        Decisión de estas reglas sobre una entrada
+
+        Returns:
+            True si se excluye, False si una negación la vuelve a incluir,
+            None si ninguna regla coincide
+        """
+        if self.has_negation:
+            rel = self.relative(path) if self.needs_path else None
+            for rule in reversed(self.rules):
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.anchored:
+                    if rel is None or not rule.regex.fullmatch(rel):
+                        continue
+                elif not rule.regex.fullmatch(name):
+                    continue
+                return not rule.negated
+            return None
+
+        key = name if self.case_sensitive else name.lower()
+        if key in self._names[False] or (is_dir and key in self._names[True]):
+            return True
+        if key.endswith(self._suffixes[False]) or (is_dir and key.endswith(self._suffixes[True])):
+            return True
+        merged = self._merged
+        for dir_only in ((False, True) if is_dir else (False,)):
+            regex = merged.get((False, dir_only))
+            if regex is not None and regex.fullmatch(name):
+                return True
+        if self.needs_path:
+            rel = self.relative(path)
+            if rel is not None:
+                for dir_only in ((False, True) if is_dir else (False,)):
+                    regex = merged.get((True, dir_only))
+                    if regex is not None and regex.fullmatch(rel):
+                        return True
+        return None
+
+
+class IgnoreMatcher:
+    """
+    Reglas de exclusión activas: las globales más los .jarvisignore del camino
+
+    Cada directorio hereda la cadena de reglas de su padre y añade las de su
+    propio .jarvisignore; las cadenas se guardan en caché (un directorio sin
+    archivo de reglas comparte la tupla de su padre). Las reglas más
+    profundas tienen prioridad, como en git.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), file_name: str = IGNORE_FILE_NAME,
+                 case_sensitive: Optional[bool] = None):
+        """
+        Args:
+            patterns: Patrones globales (los anclados son rutas absolutas; admiten '~')
+            file_name: Nombre de los archivos de reglas por directorio
+            case_sensitive: Distinguir mayúsculas (default: todos menos Windows)
+        """
+        self.file_name = file_name
+        self.case_sensitive = os.name != 'nt' if case_sensitive is None else case_sensitive
+        lines = []
+        for pattern in patterns:
+            pattern = str(pattern)
+            negated = pattern.startswith('!')
+            body = pattern[1:] if negated else pattern
+            if body.startswith('~'):
+                body = os.path.expanduser(body)
+            lines.append(('!' if negated else '') + body.replace(os.sep, '/'))
+        global_rules = IgnoreRules.from_lines('', lines, 'settings', self.case_sensitive)
+        self.global_chain: Tuple[IgnoreRules, ...] = (global_rules,) if len(global_rules) else ()
+        self.files_loaded = 0
+        self._chains: Dict[str, Tuple[IgnoreRules, ...]] = {}
+
+    def clear_cache(self):
+        """Olvidar las cadenas calculadas (para releer los .jarvisignore)"""
+        self._chains = {}
+
+    def _load_file(self, directory: str) -> Optional[IgnoreRules]:
+        path = os.path.join(directory, self.file_name)
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        self.files_loaded += 1
+        rules = IgnoreRules.from_lines(directory, lines, path, self.case_sensitive)
+        return rules if len(rules) else None
+
+    def rules_for(self, directory: str, has_file: Optional[bool] = None) -> Tuple[IgnoreRules, ...]:
+        """
+        Cadena de reglas que se aplica a las entradas de un directorio
+
+        Args:
+            directory: Directorio (ruta normalizada)
+            has_file: Si ya se sabe que tiene (o no) archivo de reglas; None = comprobarlo
+        """
+        chain = self._chains.get(directory)
+        if chain is not None:
+            return chain
+        parent = os.path.dirname(directory)
+        inherited = self.global_chain if parent == directory else self.rules_for(parent)
+        own = self._load_file(directory) if has_file is not False else None
+        chain = inherited + (own,) if own is not None else inherited
+        if len(self._chains) >= MAX_CACHED_DIRS:
+            self._chains = {}
+        self._chains[directory] = chain
+        return chain
+
+    @staticmethod
+    def match_chain(chain: Tuple[IgnoreRules, ...], path: str, name: str, is_dir: bool) -> bool:
+        """True si la cadena de reglas excluye la entrada (decide la regla más profunda)"""
+        for rules in reversed(chain):
+            decision = rules.match(path, name, is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """True si una entrada queda excluida por las reglas de su directorio"""
+        directory, name = os.path.split(path)
+        chain = self.rules_for(directory)
+        return bool(chain) and self.match_chain(chain, path, name, is_dir)
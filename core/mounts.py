@@ -0,0 +1,173 @@
+"""
+Clasificación de puntos de montaje para Jarvis
+Distingue discos locales, sistemas de archivos de red, FUSE y pseudo-sistemas
+a partir de /proc/self/mountinfo para que el recorrido no se atasque en ellos
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# Sistemas de archivos de red: cada stat puede ser un viaje de ida y vuelta
+NETWORK_FS_TYPES = frozenset({
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', '9p', 'afs', 'ceph', 'glusterfs',
+    'lustre', 'gpfs', 'davfs', 'coda', 'ocfs2', 'beegfs', 'virtiofs'
+})
+# Pseudo-sistemas del núcleo: no contienen archivos del usuario
+VIRTUAL_FS_TYPES = frozenset({
+    'proc', 'sysfs', 'devtmpfs', 'devpts', 'cgroup', 'cgroup2', 'debugfs', 'tracefs',
+    'securityfs', 'pstore', 'bpf', 'configfs', 'mqueue', 'hugetlbfs', 'autofs',
+    'binfmt_misc', 'fusectl', 'efivarfs', 'selinuxfs', 'nsfs', 'rpc_pipefs', 'ramfs'
+})
+# FUSE respaldado por un dispositivo de bloques local (ntfs-3g, exfat)
+LOCAL_FUSE_TYPES = frozenset({'fuseblk'})
+
+KIND_LOCAL = 'local'
+KIND_NETWORK = 'network'
+KIND_FUSE = 'fuse'
+KIND_VIRTUAL = 'virtual'
+# Tipos que reciben su propio límite de concurrencia y de tiempo
+SLOW_KINDS = frozenset({KIND_NETWORK, KIND_FUSE})
+
+
+class MountInfo(NamedTuple):
+    """Punto de montaje con su tipo de sistema de archivos"""
+    mount_point: str
+    fs_type: str
+    source: str
+    kind: str
+
+
+def classify_fs_type(fs_type: str) -> str:
+    """Tipo de montaje (local, network, fuse o virtual) según el sistema de archivos"""
+    if fs_type in VIRTUAL_FS_TYPES:
+        return KIND_VIRTUAL
+    if fs_type in NETWORK_FS_TYPES:
+        return KIND_NETWORK
+    if fs_type in LOCAL_FUSE_TYPES:
+        return KIND_LOCAL
+    if fs_type == 'fuse' or fs_type.startswith('fuse.'):
+        return KIND_FUSE
+    return KIND_LOCAL
+
+
+def _unescape(field: str) -> str:
+    # mountinfo escapa espacio, tabulador, salto de línea y '\' como \ooo
+    if '\\' not in field:
+        return field
+    out = []
+    i = 0
+    while i < len(field):
+        if field[i] == '\\' and i + 4 <= len(field) and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return ''.join(out)
+
+
+def parse_mountinfo(lines) -> List[MountInfo]:
+    """
+    Analizar el formato de /proc/self/mountinfo
+
+    Cada línea: id padre mayor:menor raíz punto_de_montaje opciones
+    [campos opcionales] - tipo origen opciones_del_superbloque
+    """
+    mounts = []
+    for line in lines:
+        fields = line.split()
+        try:
+            separator = fields.index('-')
+            mount_point = _unescape(fields[4])
+            fs_type = fields[separator + 1]
+            source = _unescape(fields[separator + 2]) if len(fields) > separator + 2 else ''
+        except (ValueError, IndexError):
+            continue
+        mounts.append(MountInfo(os.path.normpath(mount_point), fs_type, source, classify_fs_type(fs_type)))
+    return mounts
+
+
+class MountTable:
+    """
+    Puntos de montaje del sistema indexados por ruta
+
+    En sistemas sin /proc/self/mountinfo (Windows, macOS) la tabla queda
+    vacía y todo se trata como disco local.
+    """
+
+    def __init__(self, mounts: Optional[List[MountInfo]] = None):
+        self.by_path: Dict[str, MountInfo] = {}
+        for mount in mounts or []:
+            # Si se monta dos veces en la misma ruta, manda el último
+            self.by_path[mount.mount_point] = mount
+
+    @classmethod
+    def load(cls, path: str = MOUNTINFO_PATH) -> 'MountTable':
+        """Leer la tabla de montajes actual (vacía si no está disponible)"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(parse_mountinfo(f))
+        except OSError:
+            return cls()
+
+    def at(self, directory: str) -> Optional[MountInfo]:
+        """Montaje cuyo punto de montaje es exactamente este directorio"""
+        return self.by_path.get(directory)
+
+    def containing(self, path: str) -> Optional[MountInfo]:
+        """Montaje que contiene la ruta (el punto de montaje más largo que es prefijo)"""
+        path = os.path.normpath(path)
+        while True:
+            mount = self.by_path.get(path)
+            if mount is not None:
+                return mount
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+class MountPolicy:
+    """
+    Qué hacer con cada tipo de montaje durante un recorrido
+
+    Los pseudo-sistemas (/proc, /sys...) nunca se recorren. Los montajes de
+    red y FUSE que se cruzan al bajar por un árbol se excluyen por defecto;
+    si se incluyen, cada uno lleva su propio límite de directorios en curso y
+    de tiempo, de modo que un servidor lento no frena el disco local. Una
+    raíz de búsqueda que está en un montaje lento se recorre siempre, con
+    esos mismos límites.
+    """
+
+    def __init__(self, include_slow: bool = False, max_concurrency: int = 2,
+                 time_budget: Optional[float] = 2.0, table: Optional[MountTable] = None):
+        """
+        Args:
+            include_slow: Recorrer los montajes de red/FUSE que se crucen
+            max_concurrency: Directorios en curso a la vez por montaje lento
+            time_budget: Segundos de listado por montaje lento (None = sin límite)
+            table: Tabla de montajes fija (default: se relee en cada recorrido)
+        """
+        self.include_slow = include_slow
+        self.max_concurrency = max(1, max_concurrency)
+        self.time_budget = time_budget
+        self._fixed_table = table
+        self.table = table or MountTable()
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict]) -> 'MountPolicy':
+        """Crear la política desde file_search.slow_mounts de la configuración"""
+        settings = settings or {}
+        return cls(include_slow=bool(settings.get('include', False)),
+                   max_concurrency=int(settings.get('max_concurrency', 2)),
+                   time_budget=settings.get('time_budget', 2.0))
+
+    def refresh(self):
+        """Releer la tabla de montajes (al empezar cada recorrido)"""
+        if self._fixed_table is None:
+            self.table = MountTable.load()
+
+    def is_slow(self, mount: Optional[MountInfo]) -> bool:
+        return mount is not None and mount.kind in SLOW_KINDS
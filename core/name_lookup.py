@@ -0,0 +1,207 @@
+"""
+Resolución de nombres de archivo para Jarvis
+Tabla hash nombre -> archivos sobre las posiciones del catálogo en memoria
+e historial de accesos para elegir entre varios archivos con el mismo nombre
+"""
+
+import array
+import heapq
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Días en que la puntuación de un acceso (o la de una modificación) se reduce a la mitad
+ACCESS_HALF_LIFE_DAYS = 30.0
+
+
+def default_access_path() -> Path:
+    """Ruta por defecto del historial de accesos (~/.jarvis/file_access.json)"""
+    return Path.home() / ".jarvis" / "file_access.json"
+
+
+class NameHashIndex:
+    """
+    Tabla hash (direccionamiento abierto) nombre en minúsculas -> posiciones
+
+    Cada casilla guarda el hash del nombre y la primera posición con ese
+    nombre; las demás posiciones con el mismo nombre se encadenan en un
+    array paralelo a las filas. Todo son array.array: unos 30 bytes por
+    archivo y una búsqueda en tiempo constante.
+    """
+
+    def __init__(self, name_at: Callable[[int], str], capacity: int = 0):
+        """
+        Args:
+            name_at: Función posición -> nombre (para descartar colisiones de hash)
+            capacity: Número previsto de nombres
+        """
+        self.name_at = name_at
+        self.build_time = 0.0
+        size = 8
+        while size < capacity * 2:
+            size *= 2
+        self._mask = size - 1
+        self._hashes = array.array('q', bytes(8 * size))
+        # Posición + 1 del primer archivo con el nombre (0 = casilla libre)
+        self._heads = array.array('i', bytes(4 * size))
+        self._next = array.array('i')
+        self.distinct = 0
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], name_at: Callable[[int], str],
+                   capacity: int = 0) -> 'NameHashIndex':
+        """Construir la tabla con los nombres en orden de posición"""
+        index = cls(name_at, capacity)
+        start = time.perf_counter()
+        for name in names:
+            index.add(name)
+        index.build_time = time.perf_counter() - start
+        return index
+
+    def __len__(self) -> int:
+        return len(self._next)
+
+    def _slot(self, key: str, key_hash: int) -> int:
+        """Casilla del nombre: la que ya lo contiene o la libre donde iría"""
+        hashes, heads, mask = self._hashes, self._heads, self._mask
+        slot = key_hash & mask
+        while heads[slot]:
+            if hashes[slot] == key_hash and self.name_at(heads[slot] - 1).lower() == key:
+                return slot
+            slot = (slot + 1) & mask
+        return slot
+
+    def add(self, name: str) -> int:
+        """Añadir el nombre de la siguiente posición"""
+        position = len(self._next)
+        if (self.distinct + 1) * 2 > self._mask + 1:
+            self._grow()
+        key = name.lower()
+        key_hash = hash(key)
+        slot = self._slot(key, key_hash)
+        head = self._heads[slot]
+        if not head:
+            self._hashes[slot] = key_hash
+            self.distinct += 1
+        self._next.append(head - 1)
+        self._heads[slot] = position + 1
+        return position
+
+    def _grow(self):
+        old_hashes, old_heads = self._hashes, self._heads
+        size = (self._mask + 1) * 2
+        self._mask = size - 1
+        self._hashes = array.array('q', bytes(8 * size))
+        self._heads = array.array('i', bytes(4 * size))
+        for key_hash, head in zip(old_hashes, old_heads):
+            if head:
+                slot = key_hash & self._mask
+                while self._heads[slot]:
+                    slot = (slot + 1) & self._mask
+                self._hashes[slot] = key_hash
+                self._heads[slot] = head
+
+    def lookup(self, name: str) -> List[int]:
+        """Posiciones de los archivos con ese nombre (sin distinguir mayúsculas)"""
+        key = name.lower()
+        position = self._heads[self._slot(key, hash(key))] - 1
+        positions = []
+        while position >= 0:
+            positions.append(position)
+            position = self._next[position]
+        return positions
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes de la tabla y de las cadenas de nombres repetidos"""
+        return {
+            'names': len(self),
+            'distinct': self.distinct,
+            'table': self._hashes.itemsize * len(self._hashes) + self._heads.itemsize * len(self._heads),
+            'chains': self._next.itemsize * len(self._next)
+        }
+
+
+class FileAccessStats:
+    """
+    Historial de archivos abiertos por el usuario, persistido entre sesiones
+
+    Cada archivo guarda cuántas veces se abrió y cuándo fue la última; la
+    puntuación se reduce a la mitad cada ACCESS_HALF_LIFE_DAYS sin usarlo.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 5000):
+        """
+        Args:
+            path: Archivo JSON del historial (default: ~/.jarvis/file_access.json)
+            max_entries: Archivos conservados (los de mayor puntuación)
+        """
+        self.path = Path(path) if path else default_access_path()
+        self.max_entries = max_entries
+        # Ruta -> [veces abierto, timestamp del último acceso]
+        self.accesses: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.accesses = {str(path): [float(count), float(last)]
+                             for path, (count, last) in data.get('accesses', {}).items()}
+        except Exception as e:
+            print(f"Error cargando historial de accesos de {self.path}: {e}")
+
+    def save(self):
+        """Guardar el historial (escritura atómica)"""
+        with self._lock:
+            data = {'accesses': dict(self.accesses)}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error guardando historial de accesos en {self.path}: {e}")
+
+    def score(self, path: str, now: Optional[float] = None) -> float:
+        """Veces abierto, atenuadas por el tiempo desde el último acceso"""
+        entry = self.accesses.get(path)
+        if entry is None:
+            return 0.0
+        now = time.time() if now is None else now
+        age_days = max(0.0, now - entry[1]) / 86400
+        return entry[0] * 0.5 ** (age_days / ACCESS_HALF_LIFE_DAYS)
+
+    def record(self, path: str, save: bool = True):
+        """Anotar que el usuario abrió el archivo"""
+        now = time.time()
+        with self._lock:
+            # La cuenta anterior se atenúa hasta ahora antes de sumar el acceso
+            self.accesses[path] = [self.score(path, now) + 1.0, now]
+            if len(self.accesses) > self.max_entries:
+                kept = heapq.nlargest(self.max_entries, self.accesses,
+                                      key=lambda item: self.score(item, now))
+                self.accesses = {item: self.accesses[item] for item in kept}
+        if save:
+            self.save()
+
+    def rank(self, paths_mtimes: Iterable[tuple], now: Optional[float] = None) -> List[tuple]:
+        """
+        Ordenar candidatos (ruta, mtime, ...) del más al menos probable
+
+        La puntuación suma los accesos atenuados y la recencia de la
+        modificación (1 hoy, 0.5 hace ACCESS_HALF_LIFE_DAYS días).
+        """
+        now = time.time() if now is None else now
+
+        def key(candidate):
+            age_days = max(0.0, now - candidate[1]) / 86400
+            return self.score(candidate[0], now) + 0.5 ** (age_days / ACCESS_HALF_LIFE_DAYS)
+
+        return sorted(paths_mtimes, key=key, reverse=True)
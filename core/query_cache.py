@@ -0,0 +1,148 @@
+"""
+Caché de búsquedas para Jarvis
+LRU de búsquedas ya resueltas, acotada en memoria, que se invalida cuando
+cambia el índice de archivos (y no pasado un tiempo fijo)
+"""
+
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+# Bytes que se suman por entrada por las estadísticas de la búsqueda
+STATS_OVERHEAD = 2048
+
+
+class CachedSearch(NamedTuple):
+    """Búsqueda resuelta guardada en la caché"""
+    results: List[Any]
+    stats: Dict[str, Any]
+    # Generación del índice de archivos con la que se resolvió
+    generation: int
+    # Timestamp a partir del cual el paso del tiempo cambia el resultado
+    # (archivos que salen de la ventana "último mes" o bajan de tramo de recencia)
+    expires_at: float
+    created: float
+    size: int
+
+
+def estimate_size(results: List[Any]) -> int:
+    """Bytes aproximados de una lista de resultados (registros y sus cadenas)"""
+    size = sys.getsizeof(results) + STATS_OVERHEAD
+    for record in results:
+        size += sys.getsizeof(record)
+        for key in ('path', 'name', 'directory'):
+            size += sys.getsizeof(record.get(key, ''))
+    return size
+
+
+class QueryCache:
+    """
+    Caché LRU de búsquedas indexada por la consulta normalizada
+
+    Cada entrada recuerda la generación del índice de archivos con la que se
+    resolvió: si el índice cambió (refresco por mtime de directorios o
+    eventos del vigilante) la entrada deja de valer. Cuando una entrada
+    nueva no cabe se expulsan las menos usadas recientemente.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Número máximo de búsquedas guardadas
+            max_bytes: Memoria aproximada máxima de todas las entradas
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, CachedSearch]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, generation: Optional[int],
+            now: Optional[float] = None) -> Optional[CachedSearch]:
+        """
+        Búsqueda guardada si sigue siendo válida
+
+        Args:
+            key: Consulta normalizada
+            generation: Generación actual del índice (None si no se pudo
+                comprobar que está al día: la entrada se descarta)
+            now: Timestamp actual (default: ahora)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (generation is None or entry.generation != generation
+                                      or now >= entry.expires_at):
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, results: List[Any], stats: Dict[str, Any],
+            generation: int, expires_at: float = math.inf) -> bool:
+        """
+        Guardar una búsqueda resuelta
+
+        Returns:
+            False si la búsqueda sola supera el límite de memoria y no se guardó
+        """
+        size = estimate_size(results)
+        if size > self.max_bytes:
+            return False
+        entry = CachedSearch(list(results), stats, generation, expires_at, time.time(), size)
+        with self._lock:
+            # Las entradas de generaciones anteriores ya no pueden acertar
+            stale = [k for k, e in self._entries.items() if e.generation != generation]
+            for stale_key in stale:
+                self._remove(stale_key)
+            self.invalidations += len(stale)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        """Vaciar la caché (los contadores se conservan)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos, expulsiones, invalidaciones y memoria en uso"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
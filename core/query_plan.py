@@ -0,0 +1,347 @@
+"""
+Planes de consulta compilados para Jarvis
+Traduce una consulta en lenguaje natural, una sola vez, a un plan inmutable
+con los filtros listos para el bucle por archivo
+"""
+
+import re
+import time
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+DAY_SECONDS = 86400
+
+# Términos temporales -> días hacia atrás (el primero que aparezca en este orden gana)
+TIME_TERMS: Tuple[Tuple[int, Tuple[str, ...]], ...] = (
+    (1, ('hoy', 'today', 'reciente', 'recientes', 'recent', 'recently')),
+    (2, ('ayer', 'yesterday')),
+    (7, ('semana', 'week')),
+    (30, ('mes', 'month')),
+)
+# "últimos N días/semanas"
+RELATIVE_TIME_PATTERN = re.compile(r'(\d+)\s*(d[ií]as?|days?|semanas?|weeks?)\b')
+RELATIVE_TIME_MARKERS = frozenset({'último', 'últimos', 'última', 'últimas', 'ultimo', 'ultimos', 'last'})
+
+# Términos de tamaño -> (mínimo, máximo) en bytes
+SIZE_TERMS: Tuple[Tuple[Tuple[Optional[int], Optional[int]], Tuple[str, ...]], ...] = (
+    ((10 * 1024 * 1024, None), ('grande', 'grandes', 'large', 'big')),
+    ((None, 1024 * 1024), ('pequeño', 'pequeños', 'small', 'tiny')),
+)
+
+# Palabras que describen la consulta (fecha, tamaño) y no forman parte del nombre buscado
+QUALIFIER_WORDS = frozenset(
+    [term for _, terms in TIME_TERMS for term in terms]
+    + [term for _, terms in SIZE_TERMS for term in terms]
+    + list(RELATIVE_TIME_MARKERS)
+    + ['esta', 'este', 'this', 'días', 'dias', 'día', 'dia', 'days', 'day', 'semanas', 'weeks',
+       'meses', 'months', 'más', 'mas', 'menos', 'more', 'less', 'than']
+)
+# Cantidades con unidad ("10mb", o "10" seguido de "mb" o "días") no son palabras
+# clave; un número suelto sí ("presupuesto 2024")
+QUANTITY_PATTERN = re.compile(r'\d+[kmgt]?b')
+UNIT_PATTERN = re.compile(r'[kmgt]?b|bytes?')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+EXTENSION_PATTERN = re.compile(r'\.(\w+)')
+# Filtro de tipos que ningún archivo cumple (ninguna extensión contiene '/')
+NO_EXTENSIONS = frozenset({'/'})
+
+
+def fold_accents(text: str) -> str:
+    """Quitar tildes y diéresis ('imágenes' -> 'imagenes')"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_extension(ext: str) -> str:
+    """Extensión en minúsculas y con punto inicial"""
+    ext = str(ext).lower()
+    return ext if ext.startswith('.') else '.' + ext
+
+
+def compile_keyword_matcher(keywords: Sequence[str]) -> Optional[Pattern]:
+    """
+    Un único patrón con todas las palabras clave en alternancia
+
+    Las palabras más largas van primero para que el motor de re no se quede
+    con un prefijo corto. None si no hay palabras clave.
+    """
+    if not keywords:
+        return None
+    alternatives = sorted(set(keywords), key=lambda k: (-len(k), k))
+    return re.compile('|'.join(re.escape(keyword) for keyword in alternatives))
+
+
+class QueryPlan(NamedTuple):
+    """
+    Consulta ya analizada y lista para evaluarse archivo a archivo
+
+    Todo se resuelve al compilar: las extensiones son un frozenset, la
+    ventana temporal un timestamp de corte y las palabras clave un único
+    patrón precompilado, de modo que cada archivo sólo paga unas pocas
+    comparaciones.
+    """
+    query: str
+    keywords: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    extensions: FrozenSet[str]
+    recent_days: Optional[int]
+    modified_after: Optional[float]
+    min_size: Optional[int]
+    max_size: Optional[int]
+    keyword_matcher: Optional[Pattern]
+    # Grupos de palabras que además deben aparecer todos (consultas refinadas:
+    # "informe" y después "sólo los de presupuesto")
+    required_matchers: Tuple[Pattern, ...] = ()
+
+    def matches_name(self, name: str) -> bool:
+        """True si el nombre contiene alguna palabra clave (o no hay palabras clave)"""
+        if self.keyword_matcher is None:
+            return True
+        name_lower = name.lower()
+        if self.keyword_matcher.search(name_lower) is None:
+            return False
+        return all(matcher.search(name_lower) is not None for matcher in self.required_matchers)
+
+    def matches_metadata(self, entry) -> bool:
+        """
+        Filtros de tipo, fecha y tamaño con los datos del único stat
+
+        Args:
+            entry: Objeto con name, extension, size y mtime (p. ej. ScanEntry);
+                la extensión sólo se calcula si el plan filtra por tipo
+        """
+        if self.modified_after is not None and entry.mtime < self.modified_after:
+            return False
+        if self.min_size is not None and entry.size < self.min_size:
+            return False
+        if self.max_size is not None and entry.size > self.max_size:
+            return False
+        if self.extensions and entry.extension not in self.extensions:
+            return False
+        return True
+
+    def narrow(self, other: 'QueryPlan') -> 'QueryPlan':
+        """
+        Plan que exige los filtros de los dos (refinar una búsqueda anterior)
+
+        Las palabras clave de cada plan forman un grupo que debe aparecer en
+        el nombre; tipos, fechas y tamaños se intersecan. Si los dos filtran
+        por tipos sin ninguno en común el plan no admite ningún archivo
+        (is_empty()).
+        """
+        keyword_matcher = self.keyword_matcher or other.keyword_matcher
+        required = self.required_matchers + other.required_matchers
+        if self.keyword_matcher is not None and other.keyword_matcher is not None:
+            required += (other.keyword_matcher,)
+        extensions = self.extensions or other.extensions
+        if self.extensions and other.extensions:
+            extensions = self.extensions & other.extensions or NO_EXTENSIONS
+        return QueryPlan(
+            query=f"{self.query} + {other.query}",
+            keywords=tuple(dict.fromkeys(self.keywords + other.keywords)),
+            categories=tuple(dict.fromkeys(self.categories + other.categories)),
+            extensions=extensions,
+            recent_days=_tightest(self.recent_days, other.recent_days, min),
+            modified_after=_tightest(self.modified_after, other.modified_after, max),
+            min_size=_tightest(self.min_size, other.min_size, max),
+            max_size=_tightest(self.max_size, other.max_size, min),
+            keyword_matcher=keyword_matcher,
+            required_matchers=required
+        )
+
+    def widen(self, other: 'QueryPlan') -> 'QueryPlan':
+        """
+        Plan que admite lo de los dos ("y también los docx")
+
+        Cada filtro se queda con el más amplio: palabras clave y tipos en
+        alternancia si los dos los usan (si uno no filtra, sin filtro), la
+        ventana temporal y el rango de tamaño más anchos. Los grupos de
+        palabras obligatorias de un plan refinado se descartan.
+        """
+        keywords: Tuple[str, ...] = ()
+        if self.keywords and other.keywords:
+            keywords = tuple(dict.fromkeys(self.keywords + other.keywords))
+        extensions: FrozenSet[str] = frozenset()
+        if self.extensions and other.extensions:
+            extensions = (self.extensions | other.extensions) - NO_EXTENSIONS or NO_EXTENSIONS
+        return QueryPlan(
+            query=f"{self.query} + {other.query}",
+            keywords=keywords,
+            categories=tuple(dict.fromkeys(self.categories + other.categories)),
+            extensions=extensions,
+            recent_days=_loosest(self.recent_days, other.recent_days, max),
+            modified_after=_loosest(self.modified_after, other.modified_after, min),
+            min_size=_loosest(self.min_size, other.min_size, min),
+            max_size=_loosest(self.max_size, other.max_size, max),
+            keyword_matcher=compile_keyword_matcher(keywords)
+        )
+
+    def is_empty(self) -> bool:
+        """True si ningún archivo puede cumplir el plan (tipos incompatibles al refinar)"""
+        return self.extensions == NO_EXTENSIONS
+
+    def as_params(self) -> Dict[str, object]:
+        """Vista como diccionario con las claves del antiguo _parse_natural_query"""
+        size_range = None
+        if self.min_size is not None or self.max_size is not None:
+            size_range = (self.min_size, self.max_size)
+        return {
+            'keywords': list(self.keywords),
+            'file_types': sorted(self.extensions),
+            'categories': list(self.categories),
+            'recent_days': self.recent_days,
+            'size_range': size_range
+        }
+
+
+def _tightest(a, b, pick):
+    """El límite más estricto de dos (None = sin límite)"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return pick(a, b)
+
+
+def _loosest(a, b, pick):
+    """El límite más amplio de dos (None = sin límite)"""
+    if a is None or b is None:
+        return None
+    return pick(a, b)
+
+
+class QueryCompiler:
+    """
+    Analizador de consultas en lenguaje natural
+
+    Las tablas de categorías y palabras excluidas se preparan una vez al
+    crear el compilador; cada consulta se tokeniza en una sola pasada.
+    """
+
+    def __init__(self, file_categories: Dict[str, List[str]], stop_words: Iterable[str]):
+        """
+        Args:
+            file_categories: Categoría -> lista de extensiones
+            stop_words: Palabras funcionales a ignorar como palabras clave
+        """
+        self.file_categories = {cat: tuple(exts) for cat, exts in file_categories.items()}
+        self.stop_words = frozenset(stop_words)
+
+        # Alias de cada categoría ('imagenes', 'imagene', ...), comparados sin tildes
+        aliases: Dict[str, str] = {}
+        for category in self.file_categories:
+            folded = fold_accents(category)
+            for alias in (folded, folded[:-1], folded.rstrip('s')):
+                aliases.setdefault(alias, category)
+        self._category_aliases = aliases
+        self._category_pattern = re.compile(
+            '|'.join(re.escape(a) for a in sorted(aliases, key=lambda a: (-len(a), a)))
+        )
+        self._category_names = tuple(fold_accents(cat) for cat in self.file_categories)
+
+        self._excluded_words = self.stop_words | QUALIFIER_WORDS
+        # Caché de palabras ya clasificadas como "parte de una categoría"
+        self._category_word_cache: Dict[str, bool] = {}
+
+    def _is_category_word(self, word: str) -> bool:
+        cached = self._category_word_cache.get(word)
+        if cached is None:
+            folded = fold_accents(word)
+            cached = any(folded in name for name in self._category_names)
+            self._category_word_cache[word] = cached
+        return cached
+
+    def compile(self, query: str, recent_days: Optional[int] = None,
+                min_size: Optional[int] = None, max_size: Optional[int] = None,
+                file_types: Optional[Iterable[str]] = None,
+                now: Optional[float] = None, match_all: bool = False) -> QueryPlan:
+        """
+        Compilar una consulta
+
+        Args:
+            query: Consulta en lenguaje natural
+            recent_days: Fuerza la ventana temporal (días)
+            min_size / max_size: Fuerzan los límites de tamaño (bytes)
+            file_types: Extensiones adicionales
+            now: Timestamp de referencia para la ventana temporal (default: ahora)
+            match_all: Exigir todas las palabras clave en el nombre, no sólo alguna
+
+        Returns:
+            QueryPlan inmutable
+        """
+        query_lower = query.lower()
+        words = WORD_PATTERN.findall(query_lower)
+        word_set = set(words)
+
+        # Categorías (como subcadena, igual que antes, pero sin tildes y en una pasada)
+        categories: List[str] = []
+        for match in self._category_pattern.finditer(fold_accents(query_lower)):
+            category = self._category_aliases[match.group(0)]
+            if category not in categories:
+                categories.append(category)
+        extensions = {ext for cat in categories for ext in self.file_categories[cat]}
+        extensions.update(normalize_extension(ext) for ext in EXTENSION_PATTERN.findall(query_lower))
+        # Sólo las extensiones nombradas en la consulta dejan de ser palabras clave
+        named_extensions = frozenset(extensions)
+        if file_types:
+            extensions.update(normalize_extension(ext) for ext in file_types)
+
+        # Ventana temporal: el término más reciente que aparezca gana
+        parsed_days = None
+        for days, terms in TIME_TERMS:
+            if word_set.intersection(terms):
+                parsed_days = days
+                break
+        if parsed_days is None and word_set & RELATIVE_TIME_MARKERS:
+            time_match = RELATIVE_TIME_PATTERN.search(query_lower)
+            if time_match:
+                num = int(time_match.group(1))
+                parsed_days = num if time_match.group(2).startswith(('d', 'day')) else num * 7
+        if recent_days is not None:
+            parsed_days = recent_days
+
+        # Tamaño
+        size_min = size_max = None
+        for bounds, terms in SIZE_TERMS:
+            if word_set.intersection(terms):
+                size_min, size_max = bounds
+                break
+        if min_size is not None or max_size is not None:
+            size_min, size_max = min_size, max_size
+
+        # Palabras clave: lo que queda tras quitar funcionales, calificativos,
+        # categorías y extensiones escritas como ".pdf"
+        keywords: List[str] = []
+        for position, word in enumerate(words):
+            if word.isdigit() and position + 1 < len(words):
+                unit = words[position + 1]
+                if UNIT_PATTERN.fullmatch(unit) or unit in QUALIFIER_WORDS:
+                    continue
+            if (len(word) > 2 and word not in self._excluded_words
+                    and '.' + word not in named_extensions
+                    and not QUANTITY_PATTERN.fullmatch(word)
+                    and not self._is_category_word(word)
+                    and word not in keywords):
+                keywords.append(word)
+
+        modified_after = None
+        if parsed_days:
+            reference = time.time() if now is None else now
+            modified_after = reference - parsed_days * DAY_SECONDS
+
+        required_matchers: Tuple[Pattern, ...] = ()
+        if match_all and len(keywords) > 1:
+            required_matchers = tuple(compile_keyword_matcher([keyword]) for keyword in keywords)
+
+        return QueryPlan(
+            query=query,
+            keywords=tuple(keywords),
+            categories=tuple(categories),
+            extensions=frozenset(extensions),
+            recent_days=parsed_days,
+            modified_after=modified_after,
+            min_size=size_min,
+            max_size=size_max,
+            keyword_matcher=compile_keyword_matcher(keywords),
+            required_matchers=required_matchers
+        )
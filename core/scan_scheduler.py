@@ -0,0 +1,333 @@
+"""
+Planificador del recorrido de directorios para Jarvis
+Reparte el tiempo de una búsqueda entre las raíces y visita primero los
+directorios donde suelen aparecer resultados
+"""
+
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.mounts import KIND_VIRTUAL, MountInfo, MountPolicy
+
+# Latencias guardadas por montaje lento para calcular percentiles
+MAX_LATENCY_SAMPLES = 4096
+
+
+def default_hits_path() -> Path:
+    """Ruta por defecto del historial de aciertos (~/.jarvis/directory_hits.json)"""
+    return Path.home() / ".jarvis" / "directory_hits.json"
+
+
+class DirectoryHitStats:
+    """
+    Tasa histórica de aciertos por directorio, persistida entre sesiones
+
+    Tras cada búsqueda, el directorio de cada resultado y sus antecesores
+    (hasta la raíz de búsqueda) suman un acierto; los contadores se atenúan
+    en cada búsqueda, de modo que la tasa de un directorio es la fracción
+    (ponderada hacia lo reciente) de búsquedas con algún resultado en su
+    subárbol.
+
+    Las búsquedas no reescriben el JSON cada vez: se guarda cada save_every
+    búsquedas, o si pasó save_interval desde el último guardado, y lo que
+    quede pendiente con flush() (también al salir del intérprete).
+    """
+
+    def __init__(self, path: Optional[Path] = None, decay: float = 0.95, max_entries: int = 2000,
+                 save_every: int = 20, save_interval: float = 60.0):
+        """
+        Args:
+            path: Archivo JSON del historial (default: ~/.jarvis/directory_hits.json)
+            decay: Factor de atenuación aplicado en cada búsqueda
+            max_entries: Directorios conservados (los de más aciertos)
+            save_every: Búsquedas registradas que fuerzan un guardado
+            save_interval: Segundos tras los que una búsqueda registrada fuerza un guardado
+        """
+        self.path = Path(path) if path else default_hits_path()
+        self.decay = decay
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.searches = 0
+        self.hits: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Búsquedas registradas desde el último guardado
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.searches = int(data.get('searches', 0))
+            self.hits = {str(k): float(v) for k, v in data.get('hits', {}).items()}
+        except Exception as e:
+            print(f"Error cargando historial de aciertos de {self.path}: {e}")
+
+    def save(self):
+        """Guardar el historial (escritura atómica)"""
+        with self._lock:
+            data = {'searches': self.searches, 'hits': dict(self.hits)}
+            self._unsaved = 0
+            self._last_save = time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error guardando historial de aciertos en {self.path}: {e}")
+
+    def flush(self):
+        """Guardar el historial si hay búsquedas sin guardar"""
+        if self._unsaved:
+            self.save()
+
+    def hit_rate(self, directory: str) -> float:
+        """Fracción (0-1) de las búsquedas recientes con resultados bajo el directorio"""
+        hits = self.hits.get(directory)
+        if not hits:
+            return 0.0
+        # Suma de la serie geométrica: el peso total de las búsquedas registradas
+        weight = (1 - self.decay ** self.searches) / (1 - self.decay)
+        return min(1.0, hits / weight) if weight > 0 else 0.0
+
+    def record(self, result_paths: Iterable[str], roots: Iterable[Path], save: bool = True):
+        """
+        Registrar una búsqueda y los archivos que devolvió
+
+        Args:
+            result_paths: Rutas de los resultados
+            roots: Raíces de la búsqueda (el ascenso por antecesores se detiene en ellas)
+            save: Guardar el historial si toca (ver save_every / save_interval);
+                con False queda pendiente hasta el siguiente guardado o flush()
+        """
+        root_set = {os.path.normpath(str(root)) for root in roots}
+        directories = set()
+        for path in result_paths:
+            directory = os.path.dirname(path)
+            while directory and directory not in directories:
+                directories.add(directory)
+                if directory in root_set:
+                    break
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+
+        with self._lock:
+            self.searches += 1
+            decay = self.decay
+            hits = {directory: value * decay for directory, value in self.hits.items()
+                    if value * decay >= 0.01}
+            for directory in directories:
+                hits[directory] = hits.get(directory, 0.0) + 1.0
+            if len(hits) > self.max_entries:
+                hits = dict(heapq.nlargest(self.max_entries, hits.items(), key=lambda item: item[1]))
+            self.hits = hits
+            self._unsaved += 1
+            due = (self._unsaved >= self.save_every
+                   or time.monotonic() - self._last_save >= self.save_interval)
+        if save and due:
+            self.save()
+
+
+class ScheduledDir(NamedTuple):
+    """Directorio pendiente de recorrer"""
+    path: str
+    root: str
+    depth: int
+
+
+class FairShareScheduler:
+    """
+    Cola de directorios por raíz con reparto equitativo del tiempo
+
+    Cada raíz tiene su propio montículo ordenado por tasa de aciertos
+    (mayor primero) y profundidad (menor primero). Al pedir el siguiente
+    directorio se elige la raíz con pendientes que menos tiempo ha consumido
+    (y, a igualdad, la que menos directorios tiene en curso), así que una
+    raíz enorme no agota el presupuesto antes de que se visiten las demás.
+
+    Con una MountPolicy, los montajes de red/FUSE que se cruzan forman su
+    propia cola con un límite de directorios en curso y de tiempo (o se
+    excluyen), y los pseudo-sistemas como /proc no se recorren.
+    """
+
+    def __init__(self, roots: Iterable[str], priority: Optional[Callable[[str], float]] = None,
+                 mounts: Optional[MountPolicy] = None):
+        """
+        Args:
+            roots: Directorios raíz
+            priority: Función directorio -> tasa de aciertos (mayor se visita antes)
+            mounts: Política para los montajes lentos y virtuales
+        """
+        self.priority = priority
+        self.mounts = mounts
+        self.time_by_root: Dict[str, float] = {}
+        self.dirs_by_root: Dict[str, int] = {}
+        # Montajes que no se recorren: punto de montaje -> motivo
+        self.excluded_mounts: Dict[str, str] = {}
+        self._heaps: Dict[str, List[Tuple[float, int, int, str]]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._roots: List[str] = []
+        # Colas de montajes lentos: montaje, límite en curso, presupuesto y latencias
+        self._mount_of: Dict[str, MountInfo] = {}
+        self._limits: Dict[str, Tuple[Optional[int], Optional[float]]] = {}
+        self._latencies: Dict[str, List[float]] = {}
+        self._seen = set()
+        self._counter = 0
+        for root in roots:
+            root = os.path.normpath(str(root))
+            if root in self._heaps:
+                continue
+            self._roots.append(root)
+            mount = mounts.table.containing(root) if mounts is not None else None
+            self._add_lane(root, mount if mounts is not None and mounts.is_slow(mount) else None)
+            self._push(root, root, 0)
+
+    def _add_lane(self, lane: str, mount: Optional[MountInfo]):
+        self._heaps[lane] = []
+        self._in_flight[lane] = 0
+        self.time_by_root[lane] = 0.0
+        self.dirs_by_root[lane] = 0
+        self._limits[lane] = (None, None)
+        if mount is not None:
+            self._mount_of[lane] = mount
+            self._limits[lane] = (self.mounts.max_concurrency, self.mounts.time_budget)
+            self._latencies[lane] = []
+
+    def _push(self, directory: str, root: str, depth: int):
+        if directory in self._seen:
+            return
+        self._seen.add(directory)
+        rate = self.priority(directory) if self.priority is not None else 0.0
+        self._counter += 1
+        heapq.heappush(self._heaps[root], (-rate, depth, self._counter, directory))
+
+    def push_children(self, parent: ScheduledDir, subdirs: Iterable[str]) -> List[str]:
+        """
+        Encolar los subdirectorios de un directorio ya recorrido
+
+        Returns:
+            Subdirectorios descartados por ser montajes excluidos
+        """
+        depth = parent.depth + 1
+        excluded = []
+        table = self.mounts.table.by_path if self.mounts is not None else None
+        for subdir in subdirs:
+            lane = parent.root
+            mount = table.get(subdir) if table else None
+            if mount is not None:
+                if mount.kind == KIND_VIRTUAL:
+                    self.excluded_mounts[subdir] = mount.fs_type
+                    excluded.append(subdir)
+                    continue
+                if self.mounts.is_slow(mount):
+                    if not self.mounts.include_slow:
+                        self.excluded_mounts[subdir] = mount.fs_type
+                        excluded.append(subdir)
+                        continue
+                    # Cada montaje lento tiene su propia cola y sus propios límites
+                    lane = subdir
+                    if lane not in self._heaps:
+                        self._add_lane(lane, mount)
+            self._push(subdir, lane, depth)
+        return excluded
+
+    def _available(self, lane: str) -> bool:
+        """True si la cola puede entregar otro directorio (sin pasar sus límites)"""
+        max_in_flight, budget = self._limits[lane]
+        if budget is not None and self.time_by_root[lane] >= budget:
+            return False
+        return max_in_flight is None or self._in_flight[lane] < max_in_flight
+
+    def pop(self) -> Optional[ScheduledDir]:
+        """Siguiente directorio a recorrer (None si no hay ninguno disponible ahora)"""
+        best = None
+        for root, heap in self._heaps.items():
+            if not heap or not self._available(root):
+                continue
+            key = (self.time_by_root[root], self._in_flight[root])
+            if best is None or key < best[0]:
+                best = (key, root)
+        if best is None:
+            return None
+        root = best[1]
+        _, depth, _, directory = heapq.heappop(self._heaps[root])
+        self._in_flight[root] += 1
+        return ScheduledDir(directory, root, depth)
+
+    def finish(self, task: ScheduledDir, elapsed: float):
+        """Anotar el tiempo dedicado a un directorio ya recorrido"""
+        self._in_flight[task.root] -= 1
+        self.time_by_root[task.root] += elapsed
+        self.dirs_by_root[task.root] += 1
+        latencies = self._latencies.get(task.root)
+        if latencies is not None and len(latencies) < MAX_LATENCY_SAMPLES:
+            latencies.append(elapsed)
+
+    def pending(self) -> bool:
+        """True si quedan directorios que se pueden recorrer (sin contar colas agotadas)"""
+        for lane, heap in self._heaps.items():
+            if heap:
+                budget = self._limits[lane][1]
+                if budget is None or self.time_by_root[lane] < budget:
+                    return True
+        return False
+
+    def pending_roots(self) -> List[str]:
+        """Raíces (o montajes) con directorios sin recorrer o en curso"""
+        return [root for root, heap in self._heaps.items() if heap or self._in_flight[root]]
+
+    def root_stats(self) -> Dict[str, Dict[str, float]]:
+        """Tiempo (suma de los hilos) y directorios recorridos por raíz"""
+        pending = set(self.pending_roots())
+        return {
+            root: {
+                'time': round(self.time_by_root[root], 4),
+                'dirs': self.dirs_by_root[root],
+                'complete': root not in pending
+            }
+            for root in self._roots
+        }
+
+    def mount_stats(self) -> Dict[str, Dict[str, object]]:
+        """Latencia por directorio y uso del presupuesto de cada montaje lento recorrido, y los excluidos"""
+        pending = set(self.pending_roots())
+        stats: Dict[str, Dict[str, object]] = {}
+        for lane, mount in self._mount_of.items():
+            latencies = sorted(self._latencies[lane])
+            budget = self._limits[lane][1]
+
+            def percentile(fraction: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1e3, 2)
+
+            stats[lane] = {
+                'mount_point': mount.mount_point,
+                'fs_type': mount.fs_type,
+                'kind': mount.kind,
+                'dirs': self.dirs_by_root[lane],
+                'time': round(self.time_by_root[lane], 4),
+                'latency_ms_p50': percentile(0.5),
+                'latency_ms_p90': percentile(0.9),
+                'latency_ms_max': round(latencies[-1] * 1e3, 2) if latencies else 0.0,
+                'budget_exhausted': budget is not None and self.time_by_root[lane] >= budget,
+                'complete': lane not in pending
+            }
+        for mount_point, fs_type in self.excluded_mounts.items():
+            stats[mount_point] = {'mount_point': mount_point, 'fs_type': fs_type, 'excluded': True}
+        return stats
@@ -0,0 +1,114 @@
+"""
+Ranking de resultados de búsqueda para Jarvis
+Mantiene los K mejores candidatos en un heap acotado mientras se recorren
+"""
+
+import heapq
+import math
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Puntos por fecha reciente: (días de antigüedad por debajo de los que se suman, puntos)
+RECENCY_POINTS: Tuple[Tuple[int, int], ...] = ((1, 30), (7, 20), (30, 10))
+
+
+class TopKRanker:
+    """
+    Ranking en flujo de los K resultados más relevantes
+
+    Cada candidato se puntúa una única vez al llegar, con una marca de tiempo
+    de referencia calculada al crear el ranker, y sólo se conservan los K
+    mejores en un min-heap: la memoria es O(K) aunque se examinen millones de
+    archivos. A igual puntuación gana el candidato visto antes.
+    """
+
+    def __init__(self, k: int, keywords: Sequence[str], now: Optional[float] = None):
+        """
+        Args:
+            k: Número de resultados a conservar
+            keywords: Palabras clave de la consulta (en minúsculas)
+            now: Timestamp de referencia para la antigüedad (default: ahora)
+        """
+        self.k = max(0, int(k))
+        self.keywords = tuple(keywords)
+        self.now = time.time() if now is None else now
+        self.seen = 0
+        self._heap: List[Tuple[int, int, Any]] = []
+
+    def score(self, name_lower: str, mtime: float, content_match: bool = False) -> int:
+        """
+        Puntuación de relevancia
+
+        Nombre exacto (+100), prefijo (+50) o subcadena (+20) por palabra clave,
+        +10 por palabra si hubo coincidencia en contenido y +30/+20/+10 si se
+        modificó hace menos de un día/semana/mes.
+        """
+        score = 0
+        for keyword in self.keywords:
+            # Más puntos si coincide exactamente
+            if keyword == name_lower:
+                score += 100
+            # Puntos si el keyword está al inicio del nombre
+            elif name_lower.startswith(keyword):
+                score += 50
+            # Puntos por cada coincidencia en el nombre
+            elif keyword in name_lower:
+                score += 20
+            # Puntos extra por coincidencia en contenido
+            if content_match:
+                score += 10
+
+        # Puntos por fecha reciente
+        days_old = (self.now - (mtime or 0)) / 86400
+        for days, points in RECENCY_POINTS:
+            if days_old < days:
+                score += points
+                break
+
+        return score
+
+    def recency_expiry(self, mtime: float) -> float:
+        """
+        Momento en que la puntuación por fecha de un archivo bajará de tramo
+
+        Hasta entonces el ranking calculado con este now sigue siendo válido
+        para ese archivo (inf si ya no suma puntos por fecha).
+        """
+        for days, _ in RECENCY_POINTS:
+            boundary = (mtime or 0) + days * 86400
+            if boundary > self.now:
+                return boundary
+        return math.inf
+
+    def push(self, item: Any, name: str, mtime: float, content_match: bool = False) -> bool:
+        """
+        Ofrecer un candidato al ranking
+
+        Returns:
+            True si el candidato entró (de momento) entre los K mejores
+        """
+        self.seen += 1
+        if not self.k:
+            return False
+        # El contador negativo hace que, a igual puntuación, se expulse antes al más reciente
+        key = (self.score(name.lower(), mtime, content_match), -self.seen, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, key)
+            return True
+        if key[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, key)
+            return True
+        return False
+
+    def min_score(self) -> Optional[int]:
+        """Puntuación mínima para entrar en el ranking (None si aún no está lleno)"""
+        if len(self._heap) < self.k:
+            return None
+        return self._heap[0][0]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def results(self) -> List[Any]:
+        """Candidatos conservados, del más al menos relevante"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
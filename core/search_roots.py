@@ -0,0 +1,91 @@
+"""
+Planificación de raíces de búsqueda para Jarvis
+Reduce la lista de rutas de búsqueda al conjunto mínimo que las cubre
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class RootPlan(NamedTuple):
+    """Resultado de planificar las raíces"""
+    roots: List[Path]
+    # Ruta pedida -> raíz que la cubre (las que no existen no aparecen)
+    covered_by: Dict[str, str]
+    # Rutas descartadas: inexistentes, duplicadas (mismo dispositivo e inodo) o anidadas
+    dropped: List[str]
+    # Rutas reales de todas las rutas pedidas que existen, las más profundas
+    # primero (para etiquetar cada resultado con la ruta de búsqueda que lo contiene)
+    locations: List[Path]
+
+
+def path_identity(path: str) -> Optional[Tuple[int, int]]:
+    """(st_dev, st_ino) de un directorio, o None si no existe o no es accesible"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def _is_under(path: str, root: str) -> bool:
+    if path == root:
+        return True
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    return path.startswith(prefix)
+
+
+def plan_search_roots(paths: Iterable[Path]) -> RootPlan:
+    """
+    Conjunto mínimo de raíces que cubre todas las rutas pedidas
+
+    Cada ruta se expande ('~') y se resuelve a su ruta real; se descartan las
+    que no existen, las que son el mismo directorio que otra (enlaces
+    simbólicos, montajes bind) y las que quedan dentro de otra raíz. Se
+    conserva el orden en que aparecen las raíces que sobreviven.
+
+    Args:
+        paths: Rutas de búsqueda en orden de prioridad
+
+    Returns:
+        RootPlan con las raíces a recorrer
+    """
+    candidates: List[Tuple[str, str]] = []
+    identities: Dict[Tuple[int, int], str] = {}
+    covered_by: Dict[str, str] = {}
+    dropped: List[str] = []
+
+    for path in paths:
+        requested = str(path)
+        real = os.path.realpath(os.path.expanduser(requested))
+        identity = path_identity(real)
+        if identity is None or not os.path.isdir(real):
+            dropped.append(requested)
+            continue
+        if identity in identities:
+            covered_by[requested] = identities[identity]
+            dropped.append(requested)
+            continue
+        identities[identity] = real
+        candidates.append((requested, real))
+
+    # Las raíces menos profundas primero: así basta comparar con las ya aceptadas
+    accepted: List[str] = []
+    for requested, real in sorted(candidates, key=lambda c: c[1].count(os.sep) - (c[1] == os.sep)):
+        owner = next((root for root in accepted if _is_under(real, root)), None)
+        if owner is None:
+            accepted.append(real)
+            owner = real
+        else:
+            dropped.append(requested)
+        covered_by[requested] = owner
+    for requested in list(covered_by):
+        # Las rutas resueltas por identidad apuntan a una raíz que a su vez puede estar cubierta
+        target = covered_by[requested]
+        covered_by[requested] = next((root for root in accepted if _is_under(target, root)), target)
+
+    order = {real: i for i, (_, real) in enumerate(candidates)}
+    roots = [Path(root) for root in sorted(accepted, key=order.get)]
+    locations = [Path(real) for _, real in sorted(candidates, key=lambda c: c[1].count(os.sep), reverse=True)]
+    return RootPlan(roots, covered_by, dropped, locations)
@@ -0,0 +1,337 @@
+"""
+Sesión de búsqueda para Jarvis
+Conserva el último conjunto de resultados con su plan compilado para
+responder a las preguntas de seguimiento ("sólo los pdf", "y los de esta
+semana", "siguiente página") sin repetir la búsqueda
+"""
+
+import math
+import re
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from core.query_plan import QueryPlan
+
+# Frases de seguimiento: se comprueban al principio del mensaje
+NARROW_PATTERN = re.compile(
+    r'^(?:y\s+)?(?:s[oó]lo|solamente|[uú]nicamente)\b'
+    r'|^y\s+(?:los|las)\b'
+    r'|^de\s+(?:esos|esas|estos|estas|ellos|ellas)\b'
+    r'|^(?:filtra(?:r)?|qu[eé]date\s+con)\b'
+)
+WIDEN_PATTERN = re.compile(
+    r'^(?:y\s+)?(?:tambi[eé]n|adem[aá]s)\b'
+    r'|^(?:incluye|incluir|a[nñ]ade|a[nñ]adir|agrega|agregar)\b'
+)
+RESET_PATTERN = re.compile(r'^(?:sin\s+filtros?|quita(?:r)?\s+(?:el|los)\s+filtros?|todos\s+otra\s+vez)\b')
+PAGE_PATTERN = re.compile(
+    r'\b(?P<next>(?:siguiente|pr[oó]xima)\s+p[aá]gina|m[aá]s\s+resultados)\b'
+    r'|\b(?P<previous>p[aá]gina\s+anterior)\b'
+    r'|\bp[aá]gina\s+(?P<number>\d+)\b'
+)
+SHOW_ALL_PATTERN = re.compile(
+    r'\b(?:listado|lista)\s+complet[oa]\b'
+    r'|\btodos\s+los\s+(?:resultados|archivos)\b'
+    r'|\b(?:mu[eé]strame|ens[eé][nñ]ame|ver)\s+todos\b'
+)
+# Palabras de las frases de seguimiento que no son palabras clave del nombre
+FOLLOW_UP_FILLER = frozenset({
+    'y', 'solo', 'sólo', 'solamente', 'únicamente', 'unicamente', 'también', 'tambien',
+    'además', 'ademas', 'esos', 'esas', 'estos', 'estas', 'ellos', 'ellas', 'que', 'sean',
+    'son', 'tipo', 'filtra', 'filtrar', 'quédate', 'quedate', 'incluye', 'incluir',
+    'añade', 'añadir', 'agrega', 'agregar', 'los', 'las', 'de', 'del', 'con'
+})
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class FollowUp(NamedTuple):
+    """Pregunta de seguimiento reconocida"""
+    kind: str           # 'narrow', 'widen', 'reset', 'page' o 'all' (todo el conjunto)
+    text: str           # Mensaje original
+    page: Optional[int] = None      # Página pedida (kind == 'page')
+    step: int = 0                   # +1 siguiente, -1 anterior (kind == 'page')
+
+
+def parse_follow_up(message: str) -> Optional[FollowUp]:
+    """
+    Reconocer una pregunta de seguimiento sobre la última búsqueda
+
+    Returns:
+        FollowUp, o None si el mensaje no se refiere a los resultados anteriores
+    """
+    text = message.strip().lower()
+    page = PAGE_PATTERN.search(text)
+    if page:
+        if page.group('number'):
+            return FollowUp('page', text, page=int(page.group('number')))
+        return FollowUp('page', text, step=1 if page.group('next') else -1)
+    if SHOW_ALL_PATTERN.search(text):
+        return FollowUp('all', text)
+    if RESET_PATTERN.match(text):
+        return FollowUp('reset', text)
+    if NARROW_PATTERN.match(text):
+        return FollowUp('narrow', text)
+    if WIDEN_PATTERN.match(text):
+        return FollowUp('widen', text)
+    return None
+
+
+class ResultPage(NamedTuple):
+    """Una página de un conjunto de resultados"""
+    number: int         # Desde 1
+    total_pages: int
+    start: int          # Posición (desde 0) del primer registro de la página
+    items: List[Any]
+    total: int
+
+
+class SearchResultSet:
+    """
+    Resultados completos de una búsqueda junto con su plan compilado
+
+    complete indica que records contiene todas las coincidencias del plan
+    (la búsqueda no se cortó por tiempo ni por max_results): sólo entonces
+    se puede refinar en memoria. El cursor de paginación recuerda la última
+    página mostrada.
+    """
+
+    def __init__(self, plan: QueryPlan, records: List[Any], complete: bool,
+                 stats: Optional[Dict[str, Any]] = None, source: str = 'disk',
+                 page_size: int = 10):
+        self.plan = plan
+        self.records = records
+        self.complete = complete
+        self.stats = stats or {}
+        # 'disk' si se resolvió con el motor de búsqueda, 'memory' si se filtró otro conjunto
+        self.source = source
+        self.page_size = max(1, page_size)
+        self.created = time.time()
+        self.current_page = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def refine(self, plan: QueryPlan) -> 'SearchResultSet':
+        """Filtrar en memoria con un plan más estricto (resultado de narrow)"""
+        if plan.is_empty():
+            records = []
+        else:
+            records = [record for record in self.records if record_matches(plan, record)]
+        return SearchResultSet(plan, records, self.complete, source='memory', page_size=self.page_size)
+
+    def union(self, other: 'SearchResultSet', plan: QueryPlan,
+              order_by: Optional[str] = None) -> 'SearchResultSet':
+        """Registros de los dos conjuntos (cada ruta una vez) con el plan que los abarca"""
+        seen = {record['path'] for record in self.records}
+        records = self.records + [record for record in other.records if record['path'] not in seen]
+        if order_by:
+            records.sort(key=lambda record: record[order_by], reverse=True)
+        source = 'memory' if self.source == other.source == 'memory' else 'disk'
+        return SearchResultSet(plan, records, self.complete and other.complete,
+                               source=source, page_size=self.page_size)
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, math.ceil(len(self.records) / self.page_size))
+
+    def page(self, number: Optional[int] = None) -> ResultPage:
+        """
+        Página number (desde 1; por defecto la primera) y mover el cursor a ella
+
+        Los números fuera de rango se ajustan a la primera o a la última página.
+        """
+        number = min(max(1, number or 1), self.total_pages)
+        self.current_page = number
+        start = (number - 1) * self.page_size
+        return ResultPage(number, self.total_pages, start,
+                          self.records[start:start + self.page_size], len(self.records))
+
+    def next_page(self, step: int = 1) -> ResultPage:
+        """Página siguiente (step=-1: anterior) a la última mostrada"""
+        return self.page(self.current_page + step if self.current_page else 1)
+
+
+def record_matches(plan: QueryPlan, record: Any) -> bool:
+    """Comprobar un registro de resultado (FileRecord o diccionario) contra un plan"""
+    if plan.modified_after is not None and record['modified'] < plan.modified_after:
+        return False
+    if plan.min_size is not None and record['size'] < plan.min_size:
+        return False
+    if plan.max_size is not None and record['size'] > plan.max_size:
+        return False
+    if plan.extensions and record['extension'] not in plan.extensions:
+        return False
+    return plan.matches_name(record['name'])
+
+
+class SearchSession:
+    """
+    Búsqueda en curso de una conversación
+
+    Guarda el conjunto de la búsqueda original (base) y el que se está
+    mostrando (current). Las preguntas que restringen se resuelven
+    filtrando current en memoria si está completo. Las que amplían añaden a
+    current lo que pide la pregunta dentro de la búsqueda original: se
+    filtra base en memoria si está completo y sólo se vuelve al motor de
+    búsqueda si base está recortado o la pregunta trae palabras nuevas
+    ("también los de presupuesto").
+    """
+
+    def __init__(self, file_manager, max_results: int = 500, page_size: int = 10,
+                 order_by: Optional[str] = None):
+        """
+        Args:
+            file_manager: FileManager con el motor de búsqueda
+            max_results: Resultados que se conservan por búsqueda
+            page_size: Registros por página
+            order_by: Campo por el que se ordenan los registros (descendente);
+                None mantiene el orden de relevancia del motor
+        """
+        self.file_manager = file_manager
+        self.max_results = max_results
+        self.page_size = page_size
+        self.order_by = order_by
+        self.base: Optional[SearchResultSet] = None
+        self.current: Optional[SearchResultSet] = None
+        # Parámetros de la búsqueda original (raíces, tiempo...) para las ampliaciones
+        self._search_kwargs: Dict[str, Any] = {}
+
+    def search(self, query: str, on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+               **kwargs) -> SearchResultSet:
+        """
+        Nueva búsqueda: sustituye a la anterior como base de la sesión
+
+        Args:
+            query: Consulta en lenguaje natural
+            on_batch: Recibe cada lote intermedio de iter_search
+            **kwargs: Parámetros de smart_search_files (max_results por defecto el de la sesión)
+        """
+        kwargs.setdefault('max_results', self.max_results)
+        self._search_kwargs = {k: v for k, v in kwargs.items() if k not in ('plan', 'cancel_token')}
+        plan = self.file_manager.compile_query(query, **kwargs)
+        result_set = self._run(query, plan, on_batch, **kwargs)
+        self.base = self.current = result_set
+        return result_set
+
+    def record(self, query: str, result: Dict[str, Any], **kwargs) -> SearchResultSet:
+        """
+        Adoptar como base una búsqueda ya terminada (p. ej. la mostrada en flujo)
+
+        Args:
+            query: Consulta de la búsqueda
+            result: Resultado final de smart_search_files / iter_search
+            **kwargs: Parámetros con los que se lanzó
+        """
+        self._search_kwargs = {k: v for k, v in kwargs.items() if k not in ('plan', 'cancel_token')}
+        plan = kwargs.get('plan') or self.file_manager.compile_query(query, **kwargs)
+        result_set = self._result_set(plan, result)
+        self.base = self.current = result_set
+        return result_set
+
+    def clear(self):
+        """Olvidar la búsqueda (p. ej. al empezar otra que no se registra en la sesión)"""
+        self.base = self.current = None
+        self._search_kwargs = {}
+
+    def follow_up(self, message: str, follow_up: Optional[FollowUp] = None) -> Optional[SearchResultSet]:
+        """
+        Responder a una pregunta de seguimiento
+
+        Args:
+            message: Mensaje del usuario
+            follow_up: Resultado de parse_follow_up si ya se analizó
+
+        Returns:
+            El nuevo conjunto actual (su primera página ya seleccionada), o
+            None si no hay búsqueda previa o el mensaje no es de seguimiento
+        """
+        follow_up = follow_up or parse_follow_up(message)
+        if follow_up is None or self.current is None:
+            return None
+        if follow_up.kind == 'all':
+            # El conjunto completo tal cual: quien lo muestra no pagina
+            self.current.page(1)
+            return self.current
+        if follow_up.kind == 'page':
+            if follow_up.page is not None:
+                self.current.page(follow_up.page)
+            else:
+                self.current.next_page(follow_up.step)
+            return self.current
+        if follow_up.kind == 'reset':
+            self.current = self.base
+        else:
+            refinement = self.compile_refinement(follow_up.text)
+            if follow_up.kind == 'narrow':
+                plan = self.current.plan.narrow(refinement)
+                if self.current.complete or plan.is_empty():
+                    self.current = self.current.refine(plan)
+                else:
+                    self.current = self._run(plan.query, plan, **self._search_kwargs)
+            else:
+                self.current = self._widen(refinement)
+        self.current.page(1)
+        return self.current
+
+    def compile_refinement(self, text: str) -> QueryPlan:
+        """
+        Plan de la parte nueva de una pregunta de seguimiento
+
+        Sin las palabras de la frase ("sólo", "y los", "también"...) y con
+        las extensiones escritas sin punto ("los pdf") como filtro de tipo.
+        """
+        extensions = []
+        words = []
+        for word in _WORD_PATTERN.findall(text.lower()):
+            if word in FOLLOW_UP_FILLER:
+                continue
+            if '.' + word in self.file_manager.extension_categories:
+                extensions.append(word)
+            else:
+                words.append(word)
+        plan = self.file_manager.compile_query(' '.join(words), file_types=extensions or None)
+        return plan._replace(query=text.strip())
+
+    def _widen(self, refinement: QueryPlan) -> SearchResultSet:
+        """Conjunto actual más lo que pide la ampliación"""
+        base_plan = self.base.plan
+        if refinement.keywords:
+            # Palabras nuevas: sustituyen a las de la búsqueda original, hay que ir al disco
+            base_plan = base_plan._replace(keywords=(), keyword_matcher=None, required_matchers=())
+        added_plan = base_plan.narrow(refinement)
+        if added_plan.is_empty():
+            added = SearchResultSet(added_plan, [], True, source='memory', page_size=self.page_size)
+        elif self.base.complete and not refinement.keywords:
+            added = self.base.refine(added_plan)
+        else:
+            added = self._run(added_plan.query, added_plan, **self._search_kwargs)
+        return self.current.union(added, self.current.plan.widen(added_plan), self.order_by)
+
+    def page(self, number: Optional[int] = None) -> Optional[ResultPage]:
+        """Página del conjunto actual (None si no hay búsqueda)"""
+        if self.current is None:
+            return None
+        return self.current.page(number)
+
+    def _run(self, query: str, plan: QueryPlan,
+             on_batch: Optional[Callable[[Dict[str, Any]], None]] = None, **kwargs) -> SearchResultSet:
+        """Resolver un plan con el motor de búsqueda"""
+        kwargs['plan'] = plan
+        kwargs.setdefault('max_results', self.max_results)
+        final: Dict[str, Any] = {}
+        for event in self.file_manager.iter_search(query, **kwargs):
+            if event['done']:
+                final = event
+            elif on_batch is not None:
+                on_batch(event)
+        return self._result_set(plan, final)
+
+    def _result_set(self, plan: QueryPlan, result: Dict[str, Any]) -> SearchResultSet:
+        records = list(result.get('results', []))
+        stats = result.get('stats', {})
+        # Completo si no se recortó ni por tiempo ni por número de resultados
+        complete = (bool(result) and not stats.get('truncated', False)
+                    and stats.get('total_found', 0) <= len(records))
+        if self.order_by:
+            records.sort(key=lambda record: record[self.order_by], reverse=True)
+        return SearchResultSet(plan, records, complete, stats, page_size=self.page_size)
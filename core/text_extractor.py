@@ -0,0 +1,1012 @@
+"""
+Extracción de texto de documentos para Jarvis
+Saca el texto de PDF, Word, Excel, PowerPoint y OpenDocument sólo con la
+biblioteca estándar (zip y XML para los formatos de oficina y un lector
+ligero de los flujos de texto de PDF), en un pool de procesos y con una
+caché por (ruta, tamaño, mtime)
+"""
+
+import base64
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+DOCX_EXTENSIONS = ('.docx', '.docm', '.dotx')
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx')
+PPTX_EXTENSIONS = ('.pptx', '.pptm', '.ppsx')
+ODF_EXTENSIONS = ('.odt', '.ods', '.odp')
+# Extensiones de las que se extrae texto
+EXTRACTABLE_EXTENSIONS = frozenset(('.pdf',) + DOCX_EXTENSIONS + XLSX_EXTENSIONS
+                                   + PPTX_EXTENSIONS + ODF_EXTENSIONS)
+# Documentos mayores no se procesan
+MAX_EXTRACT_SIZE = 64 * 1024 * 1024
+# Texto máximo que se guarda por documento (caracteres)
+MAX_TEXT_CHARS = 4 * 1024 * 1024
+# Tamaño máximo descomprimido de una parte XML o un flujo PDF (bombas zip)
+MAX_PART_BYTES = 128 * 1024 * 1024
+# Con menos documentos pendientes se extrae en el propio proceso
+PARALLEL_THRESHOLD = 4
+# Anidamiento máximo de formularios (XObject) dentro de una página PDF
+MAX_FORM_DEPTH = 4
+
+
+class ExtractionError(Exception):
+    """El documento no se pudo leer (formato desconocido, dañado o cifrado)"""
+
+
+def default_text_cache_path() -> Path:
+    """Ruta por defecto de la caché de texto extraído (~/.jarvis/extracted_text.db)"""
+    return Path.home() / ".jarvis" / "extracted_text.db"
+
+
+class _TextOut:
+    """Texto acumulado con límite de tamaño"""
+
+    __slots__ = ('parts', 'size', 'last')
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.size = 0
+        self.last = '\n'
+
+    @property
+    def full(self) -> bool:
+        return self.size >= MAX_TEXT_CHARS
+
+    def add(self, text: Optional[str]):
+        if text:
+            self.parts.append(text)
+            self.size += len(text)
+            self.last = text[-1]
+
+    def newline(self):
+        """Salto de línea sin repetir los vacíos"""
+        if self.last != '\n':
+            self.add('\n')
+
+    def text(self) -> str:
+        return ''.join(self.parts)[:MAX_TEXT_CHARS]
+
+
+# ----------------------------------------------------------------------
+# Formatos de oficina (zip + XML)
+# ----------------------------------------------------------------------
+
+def _local(tag: str) -> str:
+    """Nombre del elemento sin el espacio de nombres"""
+    return tag.rpartition('}')[2]
+
+
+def _open_part(archive: zipfile.ZipFile, name: str):
+    info = archive.getinfo(name)
+    if info.file_size > MAX_PART_BYTES:
+        raise ExtractionError(f"{name} ocupa {info.file_size} bytes descomprimido")
+    return archive.open(info)
+
+
+def _numbered(names: Sequence[str], pattern: str) -> List[str]:
+    """Partes numeradas (slide1.xml, slide2.xml, slide10.xml...) en orden"""
+    regex = re.compile(pattern)
+    found = [(int(match.group(1)), name) for name in names for match in [regex.fullmatch(name)] if match]
+    return [name for _, name in sorted(found)]
+
+
+def _docx_text(archive: zipfile.ZipFile, names: Sequence[str], out: _TextOut):
+    parts = ['word/document.xml']
+    parts += _numbered(names, r'word/header(\d+)\.xml') + _numbered(names, r'word/footer(\d+)\.xml')
+    parts += [name for name in ('word/footnotes.xml', 'word/endnotes.xml') if name in names]
+    for name in parts:
+        for _, elem in ElementTree.iterparse(_open_part(archive, name)):
+            tag = _local(elem.tag)
+            if tag == 't':
+                out.add(elem.text)
+            elif tag == 'tab' and not elem.attrib:
+                # Las w:tab con atributos son tabulaciones definidas en el formato, no texto
+                out.add('\t')
+            elif tag in ('br', 'cr'):
+                out.add('\n')
+            elif tag == 'p':
+                out.add('\n')
+                elem.clear()
+                if out.full:
+                    return
+
+
+def _xlsx_text(archive: zipfile.ZipFile, names: Sequence[str], out: _TextOut):
+    shared: List[str] = []
+    if 'xl/sharedStrings.xml' in names:
+        pieces: List[str] = []
+        for _, elem in ElementTree.iterparse(_open_part(archive, 'xl/sharedStrings.xml')):
+            tag = _local(elem.tag)
+            if tag == 't':
+                pieces.append(elem.text or '')
+            elif tag == 'si':
+                shared.append(''.join(pieces))
+                pieces = []
+                elem.clear()
+
+    for name in _numbered(names, r'xl/worksheets/sheet(\d+)\.xml'):
+        row: List[str] = []
+        value = None
+        inline: List[str] = []
+        for _, elem in ElementTree.iterparse(_open_part(archive, name)):
+            tag = _local(elem.tag)
+            if tag == 'v':
+                value = elem.text
+            elif tag == 't':
+                inline.append(elem.text or '')
+            elif tag == 'c':
+                kind = elem.get('t')
+                if kind == 's':
+                    try:
+                        cell = shared[int(value)]
+                    except (TypeError, ValueError, IndexError):
+                        cell = ''
+                elif kind == 'inlineStr':
+                    cell = ''.join(inline)
+                else:
+                    cell = value or ''
+                if cell:
+                    row.append(cell)
+                value = None
+                inline = []
+                elem.clear()
+            elif tag == 'row':
+                if row:
+                    out.add('\t'.join(row))
+                    out.add('\n')
+                row = []
+                elem.clear()
+                if out.full:
+                    return
+        out.newline()
+
+
+def _pptx_text(archive: zipfile.ZipFile, names: Sequence[str], out: _TextOut):
+    for name in _numbered(names, r'ppt/slides/slide(\d+)\.xml'):
+        for _, elem in ElementTree.iterparse(_open_part(archive, name)):
+            tag = _local(elem.tag)
+            if tag == 't':
+                out.add(elem.text)
+            elif tag == 'br':
+                out.add('\n')
+            elif tag == 'p':
+                out.newline()
+                elem.clear()
+        out.newline()
+        if out.full:
+            return
+
+
+_ODF_SPACES = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}c'
+
+
+def _odf_walk(elem, out: _TextOut, block_end: str = '\n'):
+    """Texto de un elemento ODF con el de sus hijos y los separadores de párrafo y tabla"""
+    out.add(elem.text)
+    for child in elem:
+        if out.full:
+            return
+        tag = _local(child.tag)
+        if tag == 's':
+            try:
+                count = int(child.get(_ODF_SPACES, '1'))
+            except ValueError:
+                count = 1
+            out.add(' ' * max(1, min(count, 64)))
+        elif tag == 'tab':
+            out.add('\t')
+        elif tag == 'line-break':
+            out.add('\n')
+        elif tag == 'table-cell':
+            # Los párrafos de una celda se separan con espacios y las celdas con tabuladores
+            _odf_walk(child, out, ' ')
+            out.add('\t')
+        else:
+            _odf_walk(child, out, block_end)
+            if tag in ('p', 'h'):
+                out.add(block_end)
+            elif tag == 'table-row':
+                out.add('\n')
+        out.add(child.tail)
+
+
+def _odf_text(archive: zipfile.ZipFile, names: Sequence[str], out: _TextOut):
+    root = ElementTree.parse(_open_part(archive, 'content.xml')).getroot()
+    for elem in root:
+        if _local(elem.tag) == 'body':
+            _odf_walk(elem, out)
+
+
+def extract_zip_text(archive: zipfile.ZipFile) -> str:
+    """Texto de un documento de oficina empaquetado en zip (según sus partes, no su extensión)"""
+    names = archive.namelist()
+    present = set(names)
+    out = _TextOut()
+    if 'word/document.xml' in present:
+        _docx_text(archive, present, out)
+    elif 'xl/workbook.xml' in present:
+        _xlsx_text(archive, names, out)
+    elif 'ppt/presentation.xml' in present:
+        _pptx_text(archive, names, out)
+    elif 'content.xml' in present:
+        _odf_text(archive, names, out)
+    else:
+        raise ExtractionError("zip sin documento reconocible")
+    return out.text()
+
+
+# ----------------------------------------------------------------------
+# PDF
+# ----------------------------------------------------------------------
+
+_PDF_OBJECT = re.compile(rb'(?<!\d)(\d+)\s+\d+\s+obj\b')
+_PDF_ENCRYPT = re.compile(rb'/Encrypt\s*(?:\d+\s+\d+\s+R|<<)')
+_PDF_DICT_BRACKETS = re.compile(rb'<<|>>')
+_PDF_REF = re.compile(rb'(\d+)\s+\d+\s+R')
+_PDF_NAMED_REF = re.compile(rb'/([^\s/<>\[\]()]+)\s*(\d+)\s+\d+\s+R')
+_PDF_FILTER = re.compile(rb'/Filter\s*(\[[^\]]*\]|/\w+)')
+_PDF_LENGTH = re.compile(rb'/Length\s+(\d+)\b(?!\s+\d+\s+R)')
+_PDF_ENCODINGS = {b'WinAnsiEncoding': 'cp1252', b'MacRomanEncoding': 'mac_roman', b'PDFDocEncoding': 'latin-1'}
+
+_CMAP_CHAR = re.compile(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>')
+_CMAP_RANGE = re.compile(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])')
+_CMAP_HEX = re.compile(rb'<([0-9A-Fa-f]*)>')
+
+# Elementos de un flujo de contenido: cadena literal, cadena hexadecimal,
+# corchetes, nombre, número, operador y lo que se ignora (comentarios, diccionarios)
+_CONTENT_TOKEN = re.compile(rb'''\s*(?:
+      (\()
+    | <([0-9A-Fa-f\s]*)>
+    | (\[)
+    | (\])
+    | /([^\s/\[\]()<>{}%]*)
+    | ([-+]?(?:\d+\.?\d*|\.\d+))
+    | ([A-Za-z'"*][A-Za-z0-9'"*]*)
+    | (%[^\r\n]*|<<|>>|[{}])
+    )''', re.X)
+_LITERAL_SPECIAL = re.compile(rb'[()\\]')
+_LITERAL_ESCAPE = re.compile(rb'\\([0-7]{1,3}|\r\n|[\s\S])')
+_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+_INLINE_IMAGE_END = re.compile(rb'\sEI(?=\s|$)')
+# Hueco en un array TJ (milésimas de em) a partir del cual se considera un espacio
+# (el espacio de Times mide 250; los ajustes entre letras rara vez pasan de 100)
+TJ_SPACE = -150
+# Nombres de glifo de /Differences que no son una sola letra
+_GLYPH_NAMES = {
+    'fi': 'fi', 'fl': 'fl', 'ff': 'ff', 'ffi': 'ffi', 'ffl': 'ffl', 'space': ' ', 'hyphen': '-',
+    'period': '.', 'comma': ',', 'colon': ':', 'semicolon': ';', 'quoteright': '’', 'quoteleft': '‘',
+    'quotesingle': "'", 'quotedbl': '"', 'quotedblleft': '“', 'quotedblright': '”', 'endash': '–',
+    'emdash': '—', 'bullet': '•', 'parenleft': '(', 'parenright': ')', 'slash': '/', 'ellipsis': '…',
+    'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6',
+    'seven': '7', 'eight': '8', 'nine': '9', 'aacute': 'á', 'eacute': 'é', 'iacute': 'í',
+    'oacute': 'ó', 'uacute': 'ú', 'ntilde': 'ñ', 'Aacute': 'Á', 'Eacute': 'É', 'Iacute': 'Í',
+    'Oacute': 'Ó', 'Uacute': 'Ú', 'Ntilde': 'Ñ', 'udieresis': 'ü', 'ccedilla': 'ç',
+    'exclamdown': '¡', 'questiondown': '¿', 'Euro': '€',
+}
+
+
+def _glyph_char(name: str) -> Optional[str]:
+    """Texto de un nombre de glifo ('a', 'fi', 'uni00E9'...), None si no se conoce"""
+    if len(name) == 1:
+        return name
+    found = _GLYPH_NAMES.get(name)
+    if found is None and name.startswith('uni') and len(name) == 7:
+        try:
+            found = chr(int(name[3:], 16))
+        except ValueError:
+            pass
+    return found
+
+
+def _parse_differences(encoding: bytes) -> Dict[int, str]:
+    """Códigos redefinidos por el array /Differences de una codificación"""
+    match = re.search(rb'/Differences\s*\[([^\]]*)\]', encoding)
+    if match is None:
+        return {}
+    differences: Dict[int, str] = {}
+    code = 0
+    for item in re.findall(rb'\d+|/[^\s/\[\]]+', match.group(1)):
+        if item[:1] != b'/':
+            code = int(item)
+            continue
+        char = _glyph_char(item[1:].decode('latin-1'))
+        if char is not None:
+            differences[code] = char
+        code += 1
+    return differences
+
+
+def _hex_bytes(value: bytes) -> bytes:
+    value = re.sub(rb'\s+', b'', value)
+    if len(value) % 2:
+        value += b'0'
+    return bytes.fromhex(value.decode('ascii'))
+
+
+def _utf16(value: bytes) -> str:
+    return _hex_bytes(value).decode('utf-16-be', errors='ignore')
+
+
+def _unescape_literal(raw: bytes) -> bytes:
+    if b'\\' not in raw:
+        return raw
+
+    def replace(match):
+        escape = match.group(1)
+        if escape[:1] in b'01234567':
+            return bytes((int(escape, 8) & 0xFF,))
+        if escape in (b'\r\n', b'\n', b'\r'):
+            return b''
+        return _ESCAPES.get(escape, escape)
+
+    return _LITERAL_ESCAPE.sub(replace, raw)
+
+
+def _literal_string(data: bytes, pos: int) -> Tuple[bytes, int]:
+    """Cadena literal (con paréntesis anidados) que empieza en pos; devuelve (bytes, posición siguiente)"""
+    depth = 1
+    start = pos
+    while True:
+        match = _LITERAL_SPECIAL.search(data, pos)
+        if match is None:
+            return _unescape_literal(data[start:]), len(data)
+        char = data[match.start()]
+        if char == 0x5C:
+            pos = match.start() + 2
+            continue
+        depth += 1 if char == 0x28 else -1
+        if depth == 0:
+            return _unescape_literal(data[start:match.start()]), match.end()
+        pos = match.end()
+
+
+def _parse_cmap(data: bytes) -> Tuple[Dict[int, str], int]:
+    """Tabla código -> texto de un CMap ToUnicode y los bytes por código"""
+    mapping: Dict[int, str] = {}
+    width = 0
+    space = re.search(rb'begincodespacerange\s*<([0-9A-Fa-f]+)>', data)
+    if space:
+        width = len(space.group(1)) // 2
+    for block in re.findall(rb'beginbfchar(.*?)endbfchar', data, re.S):
+        for source, target in _CMAP_CHAR.findall(block):
+            width = width or len(source) // 2
+            mapping[int(source, 16)] = _utf16(target)
+    for block in re.findall(rb'beginbfrange(.*?)endbfrange', data, re.S):
+        for low, high, target in _CMAP_RANGE.findall(block):
+            width = width or len(low) // 2
+            low, high = int(low, 16), int(high, 16)
+            if high < low or high - low > 0xFFFF:
+                continue
+            if target.startswith(b'['):
+                for offset, item in enumerate(_CMAP_HEX.findall(target)[:high - low + 1]):
+                    mapping[low + offset] = _utf16(item)
+                continue
+            base = _utf16(target[1:-1])
+            if not base:
+                continue
+            prefix, first = base[:-1], ord(base[-1])
+            for code in range(low, high + 1):
+                char = first + code - low
+                if char > 0x10FFFF or 0xD800 <= char <= 0xDFFF:
+                    break
+                mapping[code] = prefix + chr(char)
+    return mapping, width or 1
+
+
+class _PdfFont(NamedTuple):
+    """Cómo convertir en texto las cadenas de una fuente"""
+    cmap: Optional[Dict[int, str]]
+    width: int
+    # Codificación de las fuentes simples; None si no hay forma de leerla (CID sin ToUnicode)
+    encoding: Optional[str]
+    # Códigos redefinidos con /Differences (ligaduras, comillas...)
+    differences: Optional[Dict[int, str]] = None
+
+    def decode(self, raw: bytes) -> str:
+        if self.cmap is not None:
+            cmap = self.cmap
+            if self.width == 1:
+                return ''.join(cmap.get(code, '') for code in raw)
+            width = self.width
+            return ''.join(cmap.get(int.from_bytes(raw[i:i + width], 'big'), '')
+                           for i in range(0, len(raw) - width + 1, width))
+        if self.encoding is None:
+            return ''
+        if self.differences:
+            differences = self.differences
+            encoding = self.encoding
+            return ''.join(differences.get(code) or bytes((code,)).decode(encoding, errors='replace')
+                           for code in raw)
+        return raw.decode(self.encoding, errors='replace')
+
+
+_DEFAULT_FONT = _PdfFont(None, 1, 'latin-1')
+
+
+class _PdfReader:
+    """
+    Lector mínimo de PDF para sacar el texto
+
+    Localiza los objetos buscando "N 0 obj" (también los de los flujos de
+    objetos comprimidos), recorre el árbol de páginas en orden y ejecuta
+    sólo los operadores de texto de sus flujos de contenido, con el CMap
+    ToUnicode o la codificación de cada fuente. No interpreta la tabla xref
+    ni los filtros de imagen: lo que no se sabe leer se omite.
+    """
+
+    def __init__(self, data: bytes):
+        if _PDF_ENCRYPT.search(data):
+            raise ExtractionError("PDF cifrado")
+        self.data = data
+        # Número -> (diccionario, (inicio, fin) del flujo o None)
+        self.objects: Dict[int, Tuple[bytes, Optional[Tuple[int, int]]]] = {}
+        self._fonts: Dict[int, _PdfFont] = {}
+        self._scan_objects()
+        self._expand_object_streams()
+
+    def _scan_objects(self):
+        data = self.data
+        pos = 0
+        while True:
+            match = _PDF_OBJECT.search(data, pos)
+            if match is None:
+                return
+            number = int(match.group(1))
+            start = match.end()
+            end = data.find(b'endobj', start)
+            if end == -1:
+                end = len(data)
+            stream_at = data.find(b'stream', start, end)
+            if stream_at == -1 or data[stream_at - 3:stream_at] == b'end':
+                self.objects[number] = (data[start:end], None)
+                pos = end
+                continue
+            header = data[start:stream_at]
+            raw_start = stream_at + 6
+            if data[raw_start:raw_start + 2] == b'\r\n':
+                raw_start += 2
+            elif data[raw_start:raw_start + 1] in (b'\n', b'\r'):
+                raw_start += 1
+            raw_end = -1
+            length = _PDF_LENGTH.search(header)
+            if length:
+                candidate = raw_start + int(length.group(1))
+                if data[candidate:candidate + 32].lstrip().startswith(b'endstream'):
+                    raw_end = candidate
+            if raw_end == -1:
+                raw_end = data.find(b'endstream', raw_start)
+                if raw_end == -1:
+                    raw_end = len(data)
+            self.objects[number] = (header, (raw_start, raw_end))
+            end = data.find(b'endobj', raw_end)
+            pos = len(data) if end == -1 else end
+
+    def _expand_object_streams(self):
+        """Añadir los objetos guardados dentro de flujos /ObjStm"""
+        for number, (header, span) in list(self.objects.items()):
+            if span is None or not re.search(rb'/Type\s*/ObjStm', header):
+                continue
+            first = re.search(rb'/First\s+(\d+)', header)
+            data = self.stream(number)
+            if first is None or data is None:
+                continue
+            first = int(first.group(1))
+            numbers = [int(value) for value in data[:first].split()]
+            pairs = list(zip(numbers[0::2], numbers[1::2]))
+            for index, (child, offset) in enumerate(pairs):
+                end = pairs[index + 1][1] if index + 1 < len(pairs) else len(data) - first
+                if child not in self.objects:
+                    self.objects[child] = (data[first + offset:first + end], None)
+
+    # Objetos y diccionarios
+
+    def body(self, number: Optional[int]) -> bytes:
+        if number is None:
+            return b''
+        found = self.objects.get(number)
+        return found[0] if found else b''
+
+    def stream(self, number: int) -> Optional[bytes]:
+        """Contenido decodificado de un flujo (None si usa un filtro no soportado)"""
+        found = self.objects.get(number)
+        if found is None or found[1] is None:
+            return None
+        header, (start, end) = found
+        data = self.data[start:end]
+        match = _PDF_FILTER.search(header)
+        filters = re.findall(rb'/(\w+)', match.group(1)) if match else []
+        for name in filters:
+            if name in (b'FlateDecode', b'Fl'):
+                try:
+                    data = zlib.decompressobj().decompress(data, MAX_PART_BYTES)
+                except zlib.error:
+                    return None
+            elif name in (b'ASCIIHexDecode', b'AHx'):
+                data = _hex_bytes(data.split(b'>', 1)[0])
+            elif name in (b'ASCII85Decode', b'A85'):
+                try:
+                    data = base64.a85decode(data.strip().split(b'~>', 1)[0].lstrip(b'<~'))
+                except ValueError:
+                    return None
+            else:
+                return None
+        return data
+
+    @staticmethod
+    def _inline_dict(body: bytes, key: bytes) -> Optional[bytes]:
+        match = re.search(rb'/' + key + rb'\s*<<', body)
+        if match is None:
+            return None
+        start = match.end() - 2
+        depth = 0
+        for bracket in _PDF_DICT_BRACKETS.finditer(body, start):
+            depth += 1 if bracket.group() == b'<<' else -1
+            if depth == 0:
+                return body[start:bracket.end()]
+        return body[start:]
+
+    @staticmethod
+    def _ref(body: bytes, key: bytes) -> Optional[int]:
+        match = re.search(rb'/' + key + rb'\s*(\d+)\s+\d+\s+R', body)
+        return int(match.group(1)) if match else None
+
+    def _dict(self, body: bytes, key: bytes) -> Optional[bytes]:
+        """Diccionario de una clave, escrito dentro o como referencia a otro objeto"""
+        inline = self._inline_dict(body, key)
+        if inline is not None:
+            return inline
+        ref = self._ref(body, key)
+        return self.body(ref) if ref is not None else None
+
+    # Páginas
+
+    def pages(self) -> List[Tuple[bytes, bytes]]:
+        """(diccionario de la página, recursos heredados) en el orden del documento"""
+        pages: List[Tuple[bytes, bytes]] = []
+        roots = re.findall(rb'/Root\s*(\d+)\s+\d+\s+R', self.data)
+        if roots:
+            catalog = self.body(int(roots[-1]))
+            self._walk_pages(self._ref(catalog, b'Pages'), b'', pages, set())
+        if not pages:
+            # Sin árbol de páginas legible: las páginas en el orden de sus números
+            for number in sorted(self.objects):
+                body = self.objects[number][0]
+                if re.search(rb'/Type\s*/Page(?![s\w])', body):
+                    pages.append((body, self._dict(body, b'Resources') or b''))
+        return pages
+
+    def _walk_pages(self, number: Optional[int], resources: bytes,
+                    pages: List[Tuple[bytes, bytes]], seen: set):
+        if number is None or number in seen:
+            return
+        seen.add(number)
+        body = self.body(number)
+        resources = self._dict(body, b'Resources') or resources
+        kids = re.search(rb'/Kids\s*\[([^\]]*)\]', body)
+        if kids:
+            for kid in _PDF_REF.findall(kids.group(1)):
+                self._walk_pages(int(kid), resources, pages, seen)
+        elif re.search(rb'/Type\s*/Page(?![s\w])', body):
+            pages.append((body, resources))
+
+    def _contents(self, page: bytes) -> bytes:
+        """Flujos de contenido de una página unidos (un operador puede quedar partido entre dos)"""
+        refs: List[int] = []
+        match = re.search(rb'/Contents\s*\[([^\]]*)\]', page)
+        if match:
+            refs = [int(ref) for ref in _PDF_REF.findall(match.group(1))]
+        else:
+            ref = self._ref(page, b'Contents')
+            if ref is not None:
+                found = self.objects.get(ref)
+                if found is not None and found[1] is None:
+                    # Referencia a un array de flujos
+                    refs = [int(value) for value in _PDF_REF.findall(found[0])]
+                else:
+                    refs = [ref]
+        streams = [self.stream(ref) for ref in refs]
+        return b'\n'.join(stream for stream in streams if stream)
+
+    def _font(self, number: int) -> _PdfFont:
+        font = self._fonts.get(number)
+        if font is not None:
+            return font
+        body = self.body(number)
+        cmap = None
+        width = 1
+        to_unicode = self._ref(body, b'ToUnicode')
+        if to_unicode is not None:
+            data = self.stream(to_unicode)
+            if data:
+                cmap, width = _parse_cmap(data)
+        encoding: Optional[str] = 'latin-1'
+        differences = None
+        if re.search(rb'/Subtype\s*/Type0', body):
+            # Fuentes CID: sin ToUnicode los códigos no dicen qué letra es
+            encoding = None
+            width = width if cmap is not None else 2
+        else:
+            match = re.search(rb'/Encoding\s*/(\w+)', body)
+            if match is None:
+                encoding_dict = self._dict(body, b'Encoding')
+                if encoding_dict:
+                    match = re.search(rb'/BaseEncoding\s*/(\w+)', encoding_dict)
+                    differences = _parse_differences(encoding_dict)
+            if match:
+                encoding = _PDF_ENCODINGS.get(match.group(1), 'latin-1')
+        font = self._fonts[number] = _PdfFont(cmap, width, encoding, differences)
+        return font
+
+    def _named(self, resources: bytes, key: bytes) -> Dict[str, int]:
+        """Nombre -> objeto de un diccionario de recursos (/Font, /XObject)"""
+        found = self._dict(resources, key) if resources else None
+        if not found:
+            return {}
+        return {name.decode('latin-1'): int(ref) for name, ref in _PDF_NAMED_REF.findall(found)}
+
+    # Texto
+
+    def text(self) -> str:
+        out = _TextOut()
+        for page, resources in self.pages():
+            self._run(self._contents(page), resources, out, 0)
+            out.newline()
+            if out.full:
+                break
+        return out.text()
+
+    def _run(self, data: bytes, resources: bytes, out: _TextOut, depth: int):
+        """Ejecutar los operadores de texto de un flujo de contenido"""
+        fonts = {name: self._font(ref) for name, ref in self._named(resources, b'Font').items()}
+        xobjects: Optional[Dict[str, int]] = None
+        font = _DEFAULT_FONT
+        operands: List[Any] = []
+        array: Optional[List[Any]] = None
+        line_y = None
+        pos = 0
+        size = len(data)
+        match_token = _CONTENT_TOKEN.match
+        while pos < size:
+            match = match_token(data, pos)
+            if match is None:
+                pos += 1
+                continue
+            pos = match.end()
+            kind = match.lastindex
+            if kind == 1:
+                value, pos = _literal_string(data, pos)
+                (operands if array is None else array).append(value)
+            elif kind == 2:
+                (operands if array is None else array).append(_hex_bytes(match.group(2)))
+            elif kind == 3:
+                array = []
+            elif kind == 4:
+                if array is not None:
+                    operands.append(array)
+                array = None
+            elif kind == 5:
+                (operands if array is None else array).append(match.group(5).decode('latin-1'))
+            elif kind == 6:
+                (operands if array is None else array).append(float(match.group(6)))
+            elif kind == 7:
+                operator = match.group(7)
+                if operator == b'Tj' and operands and isinstance(operands[-1], bytes):
+                    out.add(font.decode(operands[-1]))
+                elif operator == b'TJ' and operands and isinstance(operands[-1], list):
+                    for item in operands[-1]:
+                        if isinstance(item, bytes):
+                            out.add(font.decode(item))
+                        elif isinstance(item, float) and item <= TJ_SPACE and out.last not in ' \n':
+                            out.add(' ')
+                elif operator in (b"'", b'"'):
+                    out.newline()
+                    if operands and isinstance(operands[-1], bytes):
+                        out.add(font.decode(operands[-1]))
+                elif operator == b'Tf':
+                    if len(operands) >= 2 and isinstance(operands[-2], str):
+                        font = fonts.get(operands[-2], _DEFAULT_FONT)
+                elif operator in (b'Td', b'TD'):
+                    # Los fragmentos de una misma línea se unen sin espacio: una palabra partida
+                    # en dos se sigue encontrando y dos palabras juntas también
+                    if len(operands) >= 2 and isinstance(operands[-1], float) and abs(operands[-1]) > 0.01:
+                        out.newline()
+                elif operator == b'Tm':
+                    if operands and isinstance(operands[-1], float):
+                        if line_y is not None and abs(operands[-1] - line_y) > 0.01:
+                            out.newline()
+                        line_y = operands[-1]
+                elif operator == b'T*':
+                    out.newline()
+                elif operator == b'ID':
+                    # Imagen en línea: datos binarios hasta EI
+                    end = _INLINE_IMAGE_END.search(data, pos)
+                    pos = end.end() if end else size
+                elif operator == b'Do' and depth < MAX_FORM_DEPTH and operands and isinstance(operands[-1], str):
+                    if xobjects is None:
+                        xobjects = self._named(resources, b'XObject')
+                    ref = xobjects.get(operands[-1])
+                    header = self.body(ref)
+                    if ref is not None and re.search(rb'/Subtype\s*/Form', header):
+                        form = self.stream(ref)
+                        if form:
+                            self._run(form, self._dict(header, b'Resources') or resources, out, depth + 1)
+                operands = []
+                if out.full:
+                    return
+
+
+def extract_pdf_text(data: bytes) -> str:
+    """Texto de un PDF a partir de sus bytes"""
+    return _PdfReader(data).text()
+
+
+# ----------------------------------------------------------------------
+# Entrada común y trabajo del pool
+# ----------------------------------------------------------------------
+
+def extract_text(path: str, max_size: int = MAX_EXTRACT_SIZE) -> str:
+    """
+    Texto de un documento según su contenido (no según la extensión)
+
+    Raises:
+        ExtractionError: Formato no reconocido, demasiado grande, dañado o cifrado
+        OSError: No se pudo leer el archivo
+    """
+    size = os.path.getsize(path)
+    if size > max_size:
+        raise ExtractionError(f"demasiado grande ({size} bytes)")
+    with open(path, 'rb') as f:
+        head = f.read(1024)
+        if b'%PDF-' in head:
+            f.seek(0)
+            return extract_pdf_text(f.read())
+    if head[:4] == b'PK\x03\x04':
+        try:
+            with zipfile.ZipFile(path) as archive:
+                return extract_zip_text(archive)
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise ExtractionError(f"zip dañado: {e}")
+        except ElementTree.ParseError as e:
+            raise ExtractionError(f"XML dañado: {e}")
+    raise ExtractionError("formato no reconocido")
+
+
+def _extract_job(path: str, max_size: int) -> Tuple[Optional[str], Optional[str]]:
+    """Trabajo de un proceso del pool: (texto, None) o (None, error)"""
+    try:
+        return extract_text(path, max_size), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _inflate(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode('utf-8')
+
+
+class TextExtractor:
+    """
+    Extracción de texto con pool de procesos y caché persistente
+
+    Descomprimir, recorrer XML e interpretar flujos PDF es trabajo de CPU en
+    Python, así que los documentos de un lote se reparten en procesos (un
+    pool "spawn" que se crea al primer lote grande y se reutiliza). El texto
+    se guarda comprimido en SQLite con el tamaño y el mtime del archivo y no
+    se vuelve a extraer mientras no cambien; los errores también se guardan
+    para no reintentar en cada búsqueda un documento dañado o cifrado.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS texts (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            chars INTEGER NOT NULL,
+            text BLOB,
+            error TEXT
+        );
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_workers: Optional[int] = None,
+                 max_file_size: int = MAX_EXTRACT_SIZE):
+        """
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.jarvis/extracted_text.db)
+            max_workers: Procesos de extracción (default: núcleos, como mucho 8)
+            max_file_size: Tamaño máximo de los documentos a procesar (bytes)
+        """
+        self.db_path = Path(db_path) if db_path else default_text_cache_path()
+        self.max_workers = max_workers or max(1, min(8, os.cpu_count() or 1))
+        self.max_file_size = max_file_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pool_disabled = False
+        self._counters = {'files': 0, 'cache_hits': 0, 'extracted': 0, 'errors': 0, 'timed_out': 0,
+                          'bytes': 0, 'chars': 0, 'extract_seconds': 0.0}
+        self._counters_lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        """Cerrar el pool de procesos y la conexión con la base de datos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            self._conn.close()
+
+    def extract_entries(self, entries: Sequence[Any], deadline: Optional[float] = None,
+                        parallel: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Texto de un lote de documentos
+
+        Args:
+            entries: Objetos con path, size y mtime (ScanEntry)
+            deadline: Instante time.monotonic() a partir del cual no se
+                extrae más (lo que ya está en la caché se devuelve igual)
+            parallel: Repartir la extracción en el pool de procesos
+
+        Returns:
+            Ruta -> texto (None si el documento no se pudo leer); los que no
+            dio tiempo a extraer no aparecen
+        """
+        found: Dict[str, Optional[str]] = {}
+        missing = []
+        with self._lock:
+            cursor = self._conn.cursor()
+            for entry in entries:
+                row = cursor.execute("SELECT size, mtime, text FROM texts WHERE path = ?",
+                                     (entry.path,)).fetchone()
+                if row is not None and row[0] == entry.size and row[1] == entry.mtime:
+                    found[entry.path] = _inflate(row[2])
+                else:
+                    missing.append(entry)
+            cursor.close()
+        with self._counters_lock:
+            self._counters['files'] += len(entries)
+            self._counters['cache_hits'] += len(found)
+
+        if missing:
+            results = self._run_jobs(missing, deadline, parallel)
+            self._store([(entry, results[entry.path]) for entry in missing if entry.path in results])
+            for entry in missing:
+                if entry.path in results:
+                    found[entry.path] = results[entry.path][0]
+            with self._counters_lock:
+                self._counters['timed_out'] += len(missing) - len(results)
+        return found
+
+    def extract_path(self, path: str) -> Optional[str]:
+        """Texto de un único documento (de la caché si no ha cambiado)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self.extract_entries([_StatEntry(path, st.st_size, st.st_mtime)], parallel=False).get(path)
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and not self._pool_disabled:
+            try:
+                # "spawn": los procesos no heredan los hilos ni las conexiones abiertas de la aplicación
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            except (OSError, NotImplementedError, ValueError) as e:
+                print(f"⚠️ Pool de procesos no disponible, la extracción irá en el proceso principal: {e}")
+                self._pool_disabled = True
+        return self._executor
+
+    def _run_jobs(self, entries: List[Any], deadline: Optional[float],
+                  parallel: bool) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        Extraer los documentos que faltan en la caché, en el pool si son
+        bastantes y hay más de un núcleo (con uno el pool sólo añade coste)
+        """
+        started = time.perf_counter()
+        results: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        use_pool = parallel and self.max_workers > 1 and len(entries) >= PARALLEL_THRESHOLD
+        executor = self._pool() if use_pool else None
+        if executor is not None:
+            try:
+                futures = {executor.submit(_extract_job, entry.path, self.max_file_size): entry
+                           for entry in entries}
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    for future in as_completed(futures, timeout=timeout):
+                        results[futures[future].path] = future.result()
+                except FutureTimeoutError:
+                    for future, entry in futures.items():
+                        if not future.done() and not future.cancel():
+                            # Ya en marcha: su texto se guarda en la caché cuando termine
+                            future.add_done_callback(lambda done, entry=entry: self._store_late(entry, done))
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                print(f"⚠️ Pool de extracción caído, se continúa en el proceso principal: {e}")
+                self._executor = None
+                self._pool_disabled = True
+        for entry in entries:
+            if entry.path in results or executor is not None and not self._pool_disabled:
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            results[entry.path] = _extract_job(entry.path, self.max_file_size)
+        with self._counters_lock:
+            self._counters['extract_seconds'] += time.perf_counter() - started
+        return results
+
+    def _store_late(self, entry: Any, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._store([(entry, future.result())])
+
+    def _store(self, items: List[Tuple[Any, Tuple[Optional[str], Optional[str]]]]):
+        """Guardar textos (comprimidos) y errores con el tamaño y el mtime de cada documento"""
+        rows = []
+        extracted = errors = size = chars = 0
+        for entry, (text, error) in items:
+            blob = None
+            if text is not None:
+                blob = zlib.compress(text.encode('utf-8', errors='replace'), 6)
+                extracted += 1
+                size += entry.size
+                chars += len(text)
+            else:
+                errors += 1
+            rows.append((entry.path, entry.size, entry.mtime, len(text or ''), blob, error))
+        with self._counters_lock:
+            self._counters['extracted'] += extracted
+            self._counters['errors'] += errors
+            self._counters['bytes'] += size
+            self._counters['chars'] += chars
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo guardar el texto extraído: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Documentos consultados y extraídos, rendimiento de la extracción, aciertos de la caché y tamaño"""
+        with self._counters_lock:
+            stats = dict(self._counters)
+        size_on_disk = 0
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                size_on_disk += os.path.getsize(str(self.db_path) + suffix)
+            except OSError:
+                pass
+        with self._lock:
+            stats['cached'] = self._conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+        seconds = stats['extract_seconds']
+        processed = stats['extracted'] + stats['errors']
+        stats['files_per_second'] = processed / seconds if seconds else 0.0
+        stats['mb_per_second'] = stats['bytes'] / (1024 * 1024) / seconds if seconds else 0.0
+        stats['hit_rate'] = stats['cache_hits'] / stats['files'] if stats['files'] else 0.0
+        stats['workers'] = self.max_workers if self._executor is not None else 0
+        stats['size_on_disk'] = size_on_disk
+        return stats
+
+
+class _StatEntry(NamedTuple):
+    path: str
+    size: int
+    mtime: float
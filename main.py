@@ -29,6 +29,7 @@ class JarvisAssistant:
         
         # Inicializar componentes
         self.file_manager = FileManager()
+        self.file_manager.start_watcher()
         self.web_manager = WebManager()
         self.conversation_engine = ConversationEngine()
         self.voice_manager = VoiceManager()
@@ -51,7 +52,14 @@ class JarvisAssistant:
     def run(self):
         """Ejecutar la aplicación principal"""
         print("🤖 Jarvis iniciando...")
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Liberar los servicios en segundo plano al cerrar"""
+        self.file_manager.shutdown()
 
 if __name__ == "__main__":
     app = JarvisAssistant()
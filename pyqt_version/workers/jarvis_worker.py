@@ -9,6 +9,7 @@ import google.generativeai as genai
 import requests
 import json
 import os
+import sys
 import glob
 import pathlib
 import datetime
@@ -20,6 +21,87 @@ import mimetypes
 from typing import Dict, Any, Optional, List
 import logging
 
+# El núcleo de búsqueda (core/) está en la raíz del repositorio, junto a pyqt_version/
+_RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _RAIZ_REPOSITORIO not in sys.path:
+    sys.path.append(_RAIZ_REPOSITORIO)
+
+from core.content_sniffer import needs_sniffing
+from core.file_record import FileRecord
+from core.file_manager import FileManager
+from core.conversation_engine import SEARCH_COMMANDS
+from core.search_session import FollowUp, SearchResultSet, SearchSession, parse_follow_up
+
+# Extensiones que busca buscar_archivos_pc
+EXTENSIONES_BUSQUEDA = frozenset({
+    '.txt', '.pdf', '.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp',
+    '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm',
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a',
+    '.zip', '.rar', '.7z', '.tar', '.gz',
+    '.py', '.js', '.html', '.css', '.json', '.xml',
+    '.exe', '.msi', '.bat', '.cmd',
+    '.log', '.md', '.ini', '.cfg', '.conf'
+})
+
+# Dónde busca buscar_archivos_pc: toda la carpeta del usuario (Escritorio,
+# Documentos, OneDrive... quedan dentro) y las carpetas públicas de Windows
+RUTAS_BUSQUEDA = (
+    "~",
+    "C:/Users/Public/Desktop",
+    "C:/Users/Public/Documents",
+    "C:/Users/Public/Downloads",
+    "C:/temp",
+    "C:/tmp"
+)
+
+
+def formatear_tamaño(tamaño_bytes: int) -> str:
+    """Formatear tamaño de archivo en formato legible"""
+    try:
+        if tamaño_bytes < 1024:
+            return f"{tamaño_bytes} B"
+        elif tamaño_bytes < 1024**2:
+            return f"{tamaño_bytes/1024:.1f} KB"
+        elif tamaño_bytes < 1024**3:
+            return f"{tamaño_bytes/(1024**2):.1f} MB"
+        else:
+            return f"{tamaño_bytes/(1024**3):.1f} GB"
+    except:
+        return "Desconocido"
+
+
+class ArchivoEncontrado(FileRecord):
+    """
+    Resultado de buscar_archivos_pc con las claves que usa la interfaz PyQt
+
+    El tamaño legible y la fecha se calculan sólo para los archivos que se
+    muestran; el acceso por clave ('nombre', 'ruta', 'tamaño'...) se mantiene.
+    """
+
+    __slots__ = ()
+
+    FIELDS = ('nombre', 'ruta', 'tamaño', 'tipo', 'directorio', 'fecha_modificacion')
+    _KEYS = {'nombre': 'name', 'ruta': 'path', 'tamaño': 'size_human', 'tipo': 'tipo',
+             'directorio': 'directory', 'fecha_modificacion': 'fecha_modificacion'}
+    _OPTIONAL = ()
+
+    format_size = staticmethod(formatear_tamaño)
+
+    @classmethod
+    def desde_registro(cls, registro: FileRecord) -> 'ArchivoEncontrado':
+        """Crear el resultado a partir de un registro del motor de búsqueda"""
+        return cls(registro['path'], registro['name'], registro['directory'], registro['size'],
+                   registro['modified'], registro['extension'])
+
+    @property
+    def tipo(self) -> str:
+        return self.extension.upper().replace('.', '') or 'ARCHIVO'
+
+    @property
+    def fecha_modificacion(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.modified)
+
 
 class JarvisWorker(QThread):
     """Worker thread para manejar la lógica del asistente"""
@@ -46,12 +128,13 @@ class JarvisWorker(QThread):
         self.conversation_history = []
         self.max_history = 10  # Mantener últimos 10 intercambios
         
-        # Almacenar últimos resultados de búsqueda para referencias futuras
-        self.ultima_busqueda = {
-            'termino': None,
-            'archivos': [],
-            'timestamp': None
-        }
+        # Gestor de archivos del núcleo (índice y catálogo), creado al usarse por primera vez
+        self._gestor_archivos: Optional[FileManager] = None
+        # Última búsqueda (plan y resultados completos) para las preguntas de seguimiento
+        # ("sólo los pdf", "siguiente página"); se crea con la primera búsqueda
+        self._sesion_busqueda: Optional[SearchSession] = None
+        # Tipo del último comando atendido (las preguntas de seguimiento sólo valen tras una búsqueda)
+        self.ultimo_comando: Optional[str] = None
         
         self.setup_apis()
         self.setup_speech_recognition()
@@ -202,10 +285,16 @@ class JarvisWorker(QThread):
     
     def procesar_con_gemini(self, comando: str) -> Optional[str]:
         """Procesar comando con Google Gemini manteniendo contexto conversacional"""
+        # Como en ConversationEngine: "sólo...", "también..." sólo se refieren a los
+        # resultados si el comando anterior fue una búsqueda; cada rama de búsqueda
+        # vuelve a marcarlo y, si no, la sesión se olvida al terminar (ver finally)
+        en_contexto_busqueda = self.ultimo_comando in SEARCH_COMMANDS
+        self.ultimo_comando = None
         try:
             # Verificar si solicita ver los últimos resultados de búsqueda
             if self.es_solicitud_resultados(comando):
-                if self.ultima_busqueda['archivos']:
+                if self.hay_busqueda_previa():
+                    self.ultimo_comando = "seguimiento_busqueda"
                     resultado = self.mostrar_ultimos_resultados()
                     
                     # Añadir al historial de conversación
@@ -311,19 +400,34 @@ class JarvisWorker(QThread):
                 
                 return resultado
             
+            # Preguntas sobre la última búsqueda: se filtran sus resultados en memoria
+            seguimiento = None
+            if en_contexto_busqueda and self.hay_busqueda_previa():
+                seguimiento = parse_follow_up(comando)
+            if seguimiento:
+                self.ultimo_comando = "seguimiento_busqueda"
+                resultado = self.responder_seguimiento_busqueda(comando, seguimiento)
+                
+                # Añadir al historial de conversación
+                self.conversation_history.append({
+                    'user': comando,
+                    'assistant': resultado
+                })
+                
+                # Mantener solo los últimos intercambios
+                if len(self.conversation_history) > self.max_history:
+                    self.conversation_history.pop(0)
+                
+                return resultado
+            
             # Primero verificar si es una búsqueda local de archivos
             termino_busqueda = self.detectar_busqueda_local(comando)
             if termino_busqueda:
                 self.logger.info(f"Detectada búsqueda local: {termino_busqueda}")
+                self.ultimo_comando = "buscar_archivo"
+                # Los resultados quedan en la sesión de búsqueda para referencias futuras
                 archivos = self.buscar_archivos_pc(termino_busqueda)
                 
-                # Guardar resultados para referencias futuras
-                self.ultima_busqueda = {
-                    'termino': termino_busqueda,
-                    'archivos': archivos,
-                    'timestamp': datetime.datetime.now()
-                }
-                
                 resultado_busqueda = self.formatear_resultados_busqueda(archivos, termino_busqueda)
                 
                 # Añadir al historial de conversación
@@ -390,6 +494,9 @@ JARVIS:"""
             self.logger.error(f"Error con Gemini: {e}")
             self.errorOcurrido.emit(f"Error de IA: {e}")
             return "Lo siento, no pude procesar tu solicitud en este momento."
+        finally:
+            if self.ultimo_comando not in SEARCH_COMMANDS and self._sesion_busqueda is not None:
+                self._sesion_busqueda.clear()
     
     def crear_prompt_sistema(self) -> str:
         """Crear prompt del sistema para Gemini"""
@@ -481,8 +588,14 @@ Mantén las respuestas claras y conversacionales para síntesis de voz."""
             self.logger.error(f"Error verificando permisos: {e}")
             return False
     
-    def buscar_archivos_pc(self, termino_busqueda: str, limite: int = 20) -> List[Dict[str, str]]:
-        """Buscar archivos en el PC del usuario"""
+    def buscar_archivos_pc(self, termino_busqueda: str, limite: int = 200,
+                           limite_tiempo: float = 8.0) -> List[ArchivoEncontrado]:
+        """
+        Buscar archivos en el PC del usuario
+        
+        Los resultados (como mucho limite, del más al menos reciente) quedan
+        en la sesión de búsqueda para las preguntas de seguimiento.
+        """
         try:
             self.logger.info(f"Buscando archivos con término: {termino_busqueda}")
             
@@ -491,95 +604,34 @@ Mantén las respuestas claras y conversacionales para síntesis de voz."""
                 self.logger.error("No se tienen permisos suficientes para buscar archivos")
                 return []
             
-            archivos_encontrados = []
-            
-            # Directorios comunes donde buscar (expandidos)
-            directorios_busqueda = [
-                os.path.expanduser("~"),  # Directorio del usuario
-                os.path.expanduser("~/Desktop"),
-                os.path.expanduser("~/Documents"),
-                os.path.expanduser("~/Downloads"),
-                os.path.expanduser("~/Pictures"),
-                os.path.expanduser("~/Videos"),
-                os.path.expanduser("~/Music"),
-                os.path.expanduser("~/OneDrive"),  # OneDrive común en Windows
-                "C:/Users/Public/Desktop",
-                "C:/Users/Public/Documents",
-                "C:/Users/Public/Downloads",
-                "C:/temp",
-                "C:/tmp"
-            ]
-            
-            # Extensiones de archivos comunes (expandidas)
-            extensiones = [
-                '*.txt', '*.pdf', '*.docx', '*.doc', '*.xlsx', '*.xls', '*.pptx', '*.ppt',
-                '*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp', '*.tiff', '*.webp',
-                '*.mp4', '*.avi', '*.mkv', '*.mov', '*.wmv', '*.flv', '*.webm',
-                '*.mp3', '*.wav', '*.flac', '*.aac', '*.ogg', '*.m4a',
-                '*.zip', '*.rar', '*.7z', '*.tar', '*.gz',
-                '*.py', '*.js', '*.html', '*.css', '*.json', '*.xml',
-                '*.exe', '*.msi', '*.bat', '*.cmd',
-                '*.log', '*.md', '*.ini', '*.cfg', '*.conf'
-            ]
-            
-            for directorio in directorios_busqueda:
-                if len(archivos_encontrados) >= limite:
-                    break
-                    
-                if not os.path.exists(directorio):
-                    continue
-                    
-                try:
-                    self.logger.info(f"Buscando en: {directorio}")
-                    
-                    # Buscar archivos que contengan el término en el nombre
-                    for extension in extensiones:
-                        if len(archivos_encontrados) >= limite:
-                            break
-                            
-                        patron = f"**/*{termino_busqueda}*{extension}"
-                        ruta_patron = os.path.join(directorio, patron)
-                        
-                        try:
-                            for archivo in glob.glob(ruta_patron, recursive=True):
-                                if len(archivos_encontrados) >= limite:
-                                    break
-                                    
-                                try:
-                                    # Verificar que el archivo existe y es accesible
-                                    if not os.path.isfile(archivo):
-                                        continue
-                                        
-                                    stat = os.stat(archivo)
-                                    tamaño = self.formatear_tamaño(stat.st_size)
-                                    
-                                    # Evitar duplicados
-                                    if any(a['ruta'] == archivo for a in archivos_encontrados):
-                                        continue
-                                    
-                                    archivos_encontrados.append({
-                                        'nombre': os.path.basename(archivo),
-                                        'ruta': archivo,
-                                        'tamaño': tamaño,
-                                        'tipo': pathlib.Path(archivo).suffix.upper().replace('.', '') or 'ARCHIVO',
-                                        'directorio': os.path.dirname(archivo),
-                                        'fecha_modificacion': datetime.datetime.fromtimestamp(stat.st_mtime)
-                                    })
-                                    
-                                except (OSError, PermissionError) as e:
-                                    self.logger.debug(f"Error accediendo a {archivo}: {e}")
-                                    continue
-                                    
-                        except (OSError, PermissionError) as e:
-                            self.logger.debug(f"Error en patrón {ruta_patron}: {e}")
-                            continue
-                            
-                except (OSError, PermissionError) as e:
-                    self.logger.debug(f"Error accediendo al directorio {directorio}: {e}")
-                    continue
-            
-            # Ordenar por fecha de modificación (más recientes primero)
-            archivos_encontrados.sort(key=lambda x: x['fecha_modificacion'], reverse=True)
+            def registrar_progreso(evento):
+                progreso = evento['progress']
+                self.logger.debug(f"{progreso['matches']} coincidencias, "
+                                  f"{progreso['files_seen']} archivos examinados")
+            
+            # El mismo motor que la versión Tk: un único recorrido (o el índice),
+            # extensiones en un conjunto y resultados en flujo. Las extensiones
+            # escritas sin punto ("mis pdf") filtran por tipo, como en los
+            # seguimientos; las habituales sólo acotan las consultas que no
+            # nombran ningún tipo ("fotos" ya lo hace), y el nombre debe
+            # contener todas las palabras
+            palabras = []
+            tipos = []
+            for palabra in termino_busqueda.split():
+                extension = '.' + palabra.lower()
+                if extension in EXTENSIONES_BUSQUEDA:
+                    tipos.append(extension)
+                else:
+                    palabras.append(palabra)
+            consulta = ' '.join(palabras)
+            plan = self.gestor_archivos.compile_query(consulta, file_types=tipos)
+            if not plan.extensions:
+                tipos = sorted(EXTENSIONES_BUSQUEDA)
+            conjunto = self.sesion_busqueda.search(consulta, on_batch=registrar_progreso,
+                                                   file_types=tipos, match_all=True,
+                                                   search_paths=[pathlib.Path(ruta) for ruta in RUTAS_BUSQUEDA],
+                                                   max_results=limite, time_limit=limite_tiempo)
+            archivos_encontrados = self.archivos_de_conjunto(conjunto)
             
             self.logger.info(f"Encontrados {len(archivos_encontrados)} archivos")
             return archivos_encontrados
@@ -588,19 +640,45 @@ Mantén las respuestas claras y conversacionales para síntesis de voz."""
             self.logger.error(f"Error buscando archivos: {e}")
             return []
     
+    @property
+    def sesion_busqueda(self) -> SearchSession:
+        """Sesión con la última búsqueda (registros ordenados del más al menos reciente)"""
+        if self._sesion_busqueda is None:
+            self._sesion_busqueda = SearchSession(self.gestor_archivos, page_size=20, order_by='modified')
+        return self._sesion_busqueda
+    
+    def hay_busqueda_previa(self) -> bool:
+        """True si hay resultados de una búsqueda anterior a los que referirse"""
+        return self._sesion_busqueda is not None and self._sesion_busqueda.current is not None
+    
+    def archivos_de_conjunto(self, conjunto: SearchResultSet) -> List[ArchivoEncontrado]:
+        """Resultados de la sesión con las claves de la interfaz (cada ruta una sola vez)"""
+        vistos = set()
+        archivos = []
+        for registro in conjunto.records:
+            if registro['path'] in vistos:
+                continue
+            vistos.add(registro['path'])
+            archivos.append(ArchivoEncontrado.desde_registro(registro))
+        return archivos
+    
+    def responder_seguimiento_busqueda(self, comando: str, seguimiento: FollowUp) -> str:
+        """Refinar, ampliar o paginar la última búsqueda según la pregunta de seguimiento"""
+        conjunto = self.sesion_busqueda.follow_up(comando, seguimiento)
+        if seguimiento.kind in ('page', 'all'):
+            return self.mostrar_ultimos_resultados(conjunto.current_page)
+        
+        if conjunto.source == 'memory':
+            origen = "📌 Filtrado sobre los resultados anteriores, sin volver a buscar.\n"
+        else:
+            origen = "🔄 Búsqueda ampliada en el disco.\n"
+        self.logger.info(f"Seguimiento '{seguimiento.kind}': {len(conjunto)} archivos ({conjunto.source})")
+        return origen + self.formatear_resultados_busqueda(self.archivos_de_conjunto(conjunto),
+                                                           conjunto.plan.query)
+    
     def formatear_tamaño(self, tamaño_bytes: int) -> str:
         """Formatear tamaño de archivo en formato legible"""
-        try:
-            if tamaño_bytes < 1024:
-                return f"{tamaño_bytes} B"
-            elif tamaño_bytes < 1024**2:
-                return f"{tamaño_bytes/1024:.1f} KB"
-            elif tamaño_bytes < 1024**3:
-                return f"{tamaño_bytes/(1024**2):.1f} MB"
-            else:
-                return f"{tamaño_bytes/(1024**3):.1f} GB"
-        except:
-            return "Desconocido"
+        return formatear_tamaño(tamaño_bytes)
     
     def formatear_resultados_busqueda(self, archivos: List[Dict[str, str]], termino: str) -> str:
         """Formatear resultados de búsqueda para mostrar al usuario"""
@@ -1165,6 +1243,23 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
         
         return None
     
+    def _preview_texto_documento(self, archivo_path: str) -> str:
+        """Sección con el texto extraído de un PDF o documento de Office (vacía si no se pudo extraer)"""
+        texto = self.gestor_archivos.extract_text(archivo_path)
+        if not texto or not texto.strip():
+            return ""
+        texto = texto.strip()
+        return f"""
+📊 **TEXTO DEL DOCUMENTO**:
+📝 **Líneas**: {texto.count(chr(10)) + 1}
+🔤 **Palabras**: {len(texto.split())}
+
+📋 **Preview** (primeras 500 caracteres):
+```text
+{texto[:500]}{'...' if len(texto) > 500 else ''}
+```
+                """
+
     def visualizar_archivo(self, archivo_nombre: str) -> str:
         """Visualizar y analizar un archivo"""
         try:
@@ -1186,8 +1281,19 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
             fecha_mod = datetime.datetime.fromtimestamp(stat_info.st_mtime).strftime("%d/%m/%Y %H:%M")
             extension = pathlib.Path(archivo_path).suffix.lower()
             
-            # Determinar tipo MIME
+            # Determinar tipo MIME: por el contenido si se reconoce (fotos sin extensión,
+            # descargas .bin, extensiones cambiadas), si no por el nombre
             tipo_mime, _ = mimetypes.guess_type(archivo_path)
+            tipo_contenido = self.gestor_archivos.detect_content_type(archivo_path)
+            aviso_tipo = ""
+            if tipo_contenido is not None:
+                tipo_mime = tipo_contenido.mime
+                if not tipo_contenido.matches_extension(extension):
+                    if not needs_sniffing(extension):
+                        aviso_tipo = (f"⚠️ **Aviso**: el contenido es {tipo_contenido.label}, "
+                                      f"no corresponde a la extensión {extension}\n\n")
+                    # La vista se elige por lo que el archivo es realmente
+                    extension = tipo_contenido.extension or extension
             
             resultado = f"""📄 **ANÁLISIS DE ARCHIVO**
 
@@ -1199,6 +1305,7 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
 🔧 **Extensión**: {extension}
 
 """
+            resultado += aviso_tipo
             
             # Analizar contenido según el tipo de archivo
             if extension in ['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.sql', '.csv']:
@@ -1264,8 +1371,9 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
 ✅ **PDF detectado - Requiere visor de PDF**
 🔧 **Acciones disponibles**: Extracción de texto, análisis de contenido
                 """
+                resultado += self._preview_texto_documento(archivo_path)
                 
-            elif extension in ['.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt']:
+            elif extension in ['.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt', '.odt', '.ods', '.odp']:
                 # Archivos de Office
                 resultado += f"""📊 **ARCHIVO DE OFFICE**:
 🏢 **Formato**: Microsoft Office ({extension[1:].upper()})
@@ -1274,6 +1382,7 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
 ✅ **Documento de Office detectado**
 🔧 **Acciones disponibles**: Conversión a texto, análisis de contenido
                 """
+                resultado += self._preview_texto_documento(archivo_path)
                 
             elif extension in ['.zip', '.rar', '.7z', '.tar', '.gz']:
                 # Archivos comprimidos
@@ -1312,46 +1421,96 @@ Proporciona SOLO el código SQL migrado, sin explicaciones adicionales."""
     def buscar_archivo_especifico(self, nombre_archivo: str) -> Optional[str]:
         """Buscar un archivo específico en el sistema"""
         try:
-            # Directorios donde buscar
-            directorios_busqueda = [
-                os.path.expanduser("~"),
-                os.path.expanduser("~/Desktop"),
-                os.path.expanduser("~/Documents"),
-                os.path.expanduser("~/Downloads"),
-                os.path.expanduser("~/Pictures"),
-                os.path.expanduser("~/Videos"),
-                os.path.expanduser("~/Music"),
-                os.path.expanduser("~/OneDrive"),
-                "C:/temp",
-                "C:/tmp"
-            ]
-            
-            for directorio in directorios_busqueda:
-                if not os.path.exists(directorio):
-                    continue
-                    
-                try:
-                    # Buscar archivo exacto
-                    for root, dirs, files in os.walk(directorio):
-                        for file in files:
-                            if file.lower() == nombre_archivo.lower():
-                                return os.path.join(root, file)
-                            
-                    # Buscar con glob para patrones
-                    patron = os.path.join(directorio, f"**/{nombre_archivo}")
-                    resultados = glob.glob(patron, recursive=True)
-                    if resultados:
-                        return resultados[0]
-                        
-                except (OSError, PermissionError):
-                    continue
-            
-            return None
+            ruta = os.path.expanduser(nombre_archivo.strip())
+            gestor = self.gestor_archivos
+            if os.path.isabs(ruta) and os.path.isfile(ruta):
+                encontrado = ruta
+            elif gestor.file_index is None or any(c in ruta for c in '*?['):
+                # Sin índice (o con comodines) se recorren los directorios habituales
+                encontrado = self._buscar_archivo_recorriendo(nombre_archivo)
+            else:
+                # Tabla hash nombre -> archivos del catálogo; con varios candidatos
+                # gana el más usado / más reciente
+                candidatos = gestor.find_files_by_name(os.path.basename(ruta), max_results=50)
+                if os.sep in ruta or '/' in ruta:
+                    sufijo = os.path.normcase(os.path.normpath(os.sep + ruta))
+                    candidatos = [c for c in candidatos if os.path.normcase(c['path']).endswith(sufijo)]
+                encontrado = candidatos[0]['path'] if candidatos else None
+                if len(candidatos) > 1:
+                    self.logger.info(f"{len(candidatos)} archivos se llaman '{nombre_archivo}'; "
+                                     f"se usa {encontrado}")
+            
+            if encontrado is None:
+                # Sin coincidencia exacta: nombre parecido (erratas del reconocimiento de voz)
+                encontrado = self.buscar_archivo_aproximado(nombre_archivo)
+            if encontrado is not None and gestor.file_index is not None:
+                gestor.record_file_access(encontrado)
+            return encontrado
             
         except Exception as e:
             self.logger.error(f"Error buscando archivo específico: {e}")
             return None
     
+    def _buscar_archivo_recorriendo(self, nombre_archivo: str) -> Optional[str]:
+        """Recorrer los directorios habituales buscando el archivo (sin índice o con comodines)"""
+        # Directorios donde buscar
+        directorios_busqueda = [
+            os.path.expanduser("~"),
+            os.path.expanduser("~/Desktop"),
+            os.path.expanduser("~/Documents"),
+            os.path.expanduser("~/Downloads"),
+            os.path.expanduser("~/Pictures"),
+            os.path.expanduser("~/Videos"),
+            os.path.expanduser("~/Music"),
+            os.path.expanduser("~/OneDrive"),
+            "C:/temp",
+            "C:/tmp"
+        ]
+        
+        for directorio in directorios_busqueda:
+            if not os.path.exists(directorio):
+                continue
+                
+            try:
+                # Buscar archivo exacto
+                for root, dirs, files in os.walk(directorio):
+                    for file in files:
+                        if file.lower() == nombre_archivo.lower():
+                            return os.path.join(root, file)
+                        
+                # Buscar con glob para patrones
+                patron = os.path.join(directorio, f"**/{nombre_archivo}")
+                resultados = glob.glob(patron, recursive=True)
+                if resultados:
+                    return resultados[0]
+                    
+            except (OSError, PermissionError):
+                continue
+        
+        return None
+    
+    @property
+    def gestor_archivos(self) -> FileManager:
+        """Gestor de archivos del núcleo compartido por las búsquedas"""
+        if self._gestor_archivos is None:
+            self._gestor_archivos = FileManager()
+        return self._gestor_archivos
+    
+    def buscar_archivo_aproximado(self, nombre_archivo: str, puntuacion_minima: float = 0.75) -> Optional[str]:
+        """Ruta del archivo indexado con el nombre más parecido (None si ninguno se parece)"""
+        try:
+            parecidos = self.gestor_archivos.find_similar_files(nombre_archivo, max_results=1,
+                                                                min_score=puntuacion_minima)
+            if not parecidos:
+                return None
+            archivo = parecidos[0]
+            self.logger.info(f"'{nombre_archivo}' no existe; se usa el nombre parecido "
+                             f"'{archivo['name']}' ({archivo['fuzzy_score']:.0%})")
+            return archivo['path']
+        except Exception as e:
+            self.logger.error(f"Error en la búsqueda aproximada de {nombre_archivo}: {e}")
+            return None
+    
     def detectar_gestion_correo(self, comando: str) -> Optional[Dict[str, str]]:
         """Detectar si el usuario quiere gestionar correo"""
         comando_lower = comando.lower()
@@ -1639,25 +1798,36 @@ Para integración completa con Outlook:
         comando_lower = comando.lower()
         return any(frase in comando_lower for frase in frases_solicitud)
     
-    def mostrar_ultimos_resultados(self) -> str:
-        """Mostrar los últimos resultados de búsqueda con detalles completos"""
-        if not self.ultima_busqueda['archivos']:
+    def mostrar_ultimos_resultados(self, pagina: Optional[int] = None) -> str:
+        """
+        Mostrar una página de los últimos resultados de búsqueda con detalles completos
+        
+        Args:
+            pagina: Número de página (desde 1; por defecto la primera). El
+                cursor de la sesión recuerda la página para 'siguiente página'
+        """
+        if not self.hay_busqueda_previa():
             return "No hay resultados previos para mostrar."
         
-        archivos = self.ultima_busqueda['archivos']
-        termino = self.ultima_busqueda['termino']
-        timestamp = self.ultima_busqueda['timestamp']
+        conjunto = self.sesion_busqueda.current
+        if not len(conjunto):
+            return "La última búsqueda no encontró archivos."
+        pagina_resultados = conjunto.page(pagina)
+        termino = conjunto.plan.query
         
         # Formatear timestamp
-        tiempo_busqueda = timestamp.strftime("%H:%M:%S") if timestamp else "hace un momento"
+        tiempo_busqueda = datetime.datetime.fromtimestamp(conjunto.created).strftime("%H:%M:%S")
         
         resultado = f"📋 **LISTADO COMPLETO DE ARCHIVOS ENCONTRADOS**\n"
         resultado += f"🔍 Término buscado: '{termino}'\n"
         resultado += f"⏰ Búsqueda realizada: {tiempo_busqueda}\n"
-        resultado += f"📊 Total encontrados: {len(archivos)} archivos\n\n"
+        resultado += f"📊 Total encontrados: {pagina_resultados.total} archivos\n"
+        resultado += f"📄 Página {pagina_resultados.number} de {pagina_resultados.total_pages}\n\n"
         resultado += "═" * 60 + "\n\n"
         
-        for i, archivo in enumerate(archivos, 1):
+        # Sólo se construye el texto de la página pedida
+        for i, registro in enumerate(pagina_resultados.items, pagina_resultados.start + 1):
+            archivo = ArchivoEncontrado.desde_registro(registro)
             resultado += f"📄 **{i}. {archivo['nombre']}**\n"
             resultado += f"   📁 **Ruta completa:** {archivo['ruta']}\n"
             resultado += f"   📏 **Tamaño:** {archivo['tamaño']}\n"
@@ -1671,7 +1841,9 @@ Para integración completa con Outlook:
                 
             resultado += "─" * 50 + "\n\n"
         
-        resultado += f"✅ **Resumen:** Se encontraron {len(archivos)} archivos que contienen '{termino}' en su nombre.\n"
+        if pagina_resultados.number < pagina_resultados.total_pages:
+            resultado += "➡️ Diga 'siguiente página' o 'página N' para ver más.\n"
+        resultado += f"✅ **Resumen:** Se encontraron {pagina_resultados.total} archivos que contienen '{termino}' en su nombre.\n"
         resultado += "💡 **Sugerencia:** Puedo ayudarle a abrir cualquiera de estos archivos si me indica cuál desea."
         
         return resultado
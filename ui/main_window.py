@@ -6,9 +6,18 @@ Maneja la ventana principal y la interacción con el usuario
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog
 import threading
-from typing import Dict, Any, Optional
+import queue
+from typing import Dict, Any, Optional, Callable, Iterator, List
 from datetime import datetime
 
+from core.cancellation import CancellationToken
+from core.conversation_engine import SEARCH_COMMANDS
+from core.file_record import format_file_size
+from core.search_session import SearchSession, parse_follow_up
+
+# Categorías del chat que el plan de consulta conoce con otro nombre
+CATEGORY_QUERIES = {'música': 'audio'}
+
 class MainWindow:
     """Clase para la ventana principal de Jarvis"""
     
@@ -20,6 +29,13 @@ class MainWindow:
         self.is_voice_mode = False
         self.current_theme = "dark"
         
+        # Intervalo (ms) con el que se agrupan los lotes de búsqueda antes de pintarlos
+        self.search_render_interval = 50
+        # Búsqueda en curso por canal (chat, gestor...): una nueva la sustituye
+        self._active_searches: Dict[Any, CancellationToken] = {}
+        # Última búsqueda del chat: las preguntas de seguimiento la refinan o la paginan
+        self.search_session = SearchSession(self.assistant.file_manager)
+        
         # Configurar estilos
         self.setup_styles()
         
@@ -533,6 +549,9 @@ class MainWindow:
         
         # Agregar confirmación por voz
         self.confirm_voice_command(command, parameter)
+        # Tras cualquier otro comando las preguntas de seguimiento ya no se refieren a la última búsqueda
+        if command not in SEARCH_COMMANDS:
+            self.search_session.clear()
         
         try:
             if command == "buscar_archivo":
@@ -541,6 +560,12 @@ class MainWindow:
                 self.smart_search_files(parameter)
             elif command == "buscar_por_categoria":
                 self.search_files_by_category(parameter)
+            elif command == "buscar_duplicados":
+                self.search_duplicates()
+            elif command == "uso_disco":
+                self.show_disk_usage()
+            elif command == "seguimiento_busqueda":
+                self.follow_up_search(parameter)
             elif command == "buscar_en_contenido":
                 self.search_in_file_content(parameter)
             elif command == "abrir_archivo":
@@ -567,21 +592,35 @@ class MainWindow:
             self.add_message("Sistema", f"Error ejecutando comando: {str(e)}", "error")
     
     def search_files(self, query: str):
-        """Buscar archivos"""
+        """Buscar archivos (los resultados quedan en la sesión para las preguntas de seguimiento)"""
         if not query:
             self.add_message("Jarvis", "Por favor especifica qué archivo buscar", "assistant")
             return
-            
-        results = self.assistant.file_manager.search_files(query, max_results=10)
+        self.search_session.clear()
+        self.update_status(f"🔍 Buscando '{query}'...")
+        
+        def on_batch(new_results, progress):
+            self.update_status(f"🔍 {progress['matches']} coincidencias · {progress['elapsed']:.1f}s")
+        
+        def on_done(result):
+            result_set = self.search_session.record(query, result, max_results=50)
+            if len(result_set):
+                page = result_set.page(1)
+                response = f"Encontré {page.total} archivos:\n\n"
+                for i, file_info in enumerate(page.items, 1):
+                    response += f"{i}. {file_info['name']} ({file_info.get('directory', 'N/A')})\n"
+                if page.total_pages > 1:
+                    response += "\n📄 Di 'siguiente página', 'sólo los pdf' o 'dame el listado completo'\n"
+                self.add_message("Jarvis", response, "assistant")
+            else:
+                self.add_message("Jarvis", f"No encontré archivos con '{query}'", "assistant")
+            self.update_status("Listo")
         
-        if results:
-            response = f"Encontré {len(results)} archivos:\n\n"
-            for i, file_info in enumerate(results, 1):
-                response += f"{i}. {file_info['name']} ({file_info['parent']})\n"
-            
-            self.add_message("Jarvis", response, "assistant")
-        else:
-            self.add_message("Jarvis", f"No encontré archivos con '{query}'", "assistant")
+        def on_error(error):
+            self.add_message("Sistema", f"❌ Error buscando archivos: {str(error)}", "error")
+            self.update_status("Error")
+        
+        self.stream_search(query, on_batch, on_done, on_error, max_results=50)
     
     def open_file(self, filename: str):
         """Abrir archivo"""
@@ -897,6 +936,9 @@ class MainWindow:
         ttk.Button(row2_frame, text="📏 Grandes",
                   command=lambda: self.search_large_in_manager(results_area)).pack(side=tk.LEFT, padx=3)
         
+        ttk.Button(row2_frame, text="🔁 Duplicados",
+                  command=lambda: self.search_duplicates_in_manager(results_area)).pack(side=tk.LEFT, padx=3)
+        
         # Área de resultados
         results_frame = tk.Frame(main_frame, bg=self.colors["bg_secondary"], relief="flat", bd=0)
         results_frame.pack(fill=tk.BOTH, expand=True)
@@ -948,12 +990,7 @@ class MainWindow:
             self.show_manager_error(results_area, "Por favor ingresa un término de búsqueda")
             return
         
-        try:
-            # Usar el file manager para búsqueda inteligente
-            results = self.assistant.file_manager.smart_search_files(query)
-            self.display_search_results(results_area, results, f"🔍 Búsqueda: '{query}'")
-        except Exception as e:
-            self.show_manager_error(results_area, f"Error en la búsqueda: {str(e)}")
+        self.stream_search_to_manager(query, results_area, f"🔍 Búsqueda: '{query}'")
     
     def search_category_in_manager(self, category, results_area):
         """Buscar archivos por categoría"""
@@ -966,98 +1003,309 @@ class MainWindow:
         }
         
         query = category_queries.get(category, category)
-        try:
-            results = self.assistant.file_manager.smart_search_files(query)
-            emoji_map = {
-                "documentos": "📄",
-                "imagenes": "🖼️",
-                "videos": "🎥",
-                "codigo": "💾",
-                "audio": "🎵"
-            }
-            emoji = emoji_map.get(category, "📁")
-            self.display_search_results(results_area, results, f"{emoji} Categoría: {category.title()}")
-        except Exception as e:
-            self.show_manager_error(results_area, f"Error buscando categoría {category}: {str(e)}")
+        emoji_map = {
+            "documentos": "📄",
+            "imagenes": "🖼️",
+            "videos": "🎥",
+            "codigo": "💾",
+            "audio": "🎵"
+        }
+        emoji = emoji_map.get(category, "📁")
+        self.stream_search_to_manager(query, results_area, f"{emoji} Categoría: {category.title()}")
     
     def search_recent_in_manager(self, results_area):
         """Buscar archivos recientes"""
-        try:
-            results = self.assistant.file_manager.smart_search_files("archivos recientes del último mes")
-            self.display_search_results(results_area, results, "📊 Archivos Recientes (último mes)")
-        except Exception as e:
-            self.show_manager_error(results_area, f"Error buscando archivos recientes: {str(e)}")
+        self.stream_search_to_manager("archivos recientes del último mes", results_area,
+                                      "📊 Archivos Recientes (último mes)")
     
     def search_large_in_manager(self, results_area):
-        """Buscar archivos grandes"""
-        try:
-            results = self.assistant.file_manager.smart_search_files("archivos grandes más de 10MB")
-            self.display_search_results(results_area, results, "📏 Archivos Grandes (>10MB)")
-        except Exception as e:
-            self.show_manager_error(results_area, f"Error buscando archivos grandes: {str(e)}")
+        """Mostrar las carpetas y los archivos que más ocupan (agregados de uso de disco)"""
+        title = "📏 Carpetas y Archivos Grandes"
+        results_area.config(state=tk.NORMAL)
+        results_area.delete(1.0, tk.END)
+        results_area.insert(tk.END, f"{title}\n")
+        results_area.insert(tk.END, "=" * 50 + "\n")
+        results_area.insert(tk.END, "⏳ Calculando el uso de disco...\n")
+        results_area.config(state=tk.DISABLED)
+        
+        def worker():
+            try:
+                report = self.assistant.file_manager.get_disk_usage_report(limit=15)
+                self.root.after(0, lambda: self.display_disk_usage(results_area, report, title))
+            except Exception as e:
+                error = str(e)
+                self.root.after(0, lambda: self.show_manager_error(results_area,
+                                                                   f"Error calculando el uso de disco: {error}"))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def display_disk_usage(self, results_area, report: Dict[str, Any], title: str):
+        """Mostrar en el gestor el informe de uso de disco"""
+        results_area.config(state=tk.NORMAL)
+        results_area.delete(1.0, tk.END)
+        results_area.insert(tk.END, f"{title}\n")
+        results_area.insert(tk.END, "=" * 50 + "\n\n")
+        
+        for root in report['roots']:
+            results_area.insert(tk.END, f"💽 {root['path']}: {root['size_human']} en {root['files']} archivos\n")
+        results_area.insert(tk.END, "\n")
+        
+        if report['largest_folders']:
+            results_area.insert(tk.END, "📁 Carpetas que más ocupan:\n")
+            for i, folder in enumerate(report['largest_folders'], 1):
+                results_area.insert(tk.END, f"{i}. {folder['size_human']:>10}  {folder['path']} "
+                                            f"({folder['files']} archivos)\n")
+            results_area.insert(tk.END, "\n")
+        
+        if report['largest_files']:
+            results_area.insert(tk.END, "📄 Archivos más grandes:\n")
+            for i, file_info in enumerate(report['largest_files'], 1):
+                results_area.insert(tk.END, f"{i}. {file_info['size_human']:>10}  {file_info['name']}\n")
+                results_area.insert(tk.END, f"   📁 {file_info['directory']}\n")
+            results_area.insert(tk.END, "\n")
+        
+        if report['by_category']:
+            results_area.insert(tk.END, "📊 Por tipo:\n")
+            for category in report['by_category']:
+                results_area.insert(tk.END, f"  • {category['name']}: {category['size_human']} "
+                                            f"({category['files']} archivos)\n")
+        
+        stats = report['stats']
+        results_area.insert(tk.END, f"\n⏱️ {stats['elapsed'] * 1000:.0f} ms · {stats['folders']} carpetas "
+                                    f"({stats['source']})\n")
+        results_area.config(state=tk.DISABLED)
+        results_area.see(1.0)
+    
+    def search_duplicates_in_manager(self, results_area):
+        """Buscar archivos duplicados mostrando los grupos según se confirman"""
+        title = "🔁 Archivos Duplicados"
+        results_area.config(state=tk.NORMAL)
+        results_area.delete(1.0, tk.END)
+        results_area.insert(tk.END, f"{title}\n")
+        results_area.insert(tk.END, "=" * 50 + "\n")
+        results_area.insert(tk.END, "⏳ Agrupando por tamaño y comparando hashes...\n\n")
+        results_area.config(state=tk.DISABLED)
+        
+        def on_batch(groups, progress):
+            results_area.config(state=tk.NORMAL)
+            results_area.delete("3.0", "3.end")
+            results_area.insert("3.0", f"⏳ {progress['groups']} grupos · "
+                                       f"{format_file_size(progress['reclaimable'])} recuperables · "
+                                       f"{progress['candidates']} de {progress['files']} archivos comparten tamaño")
+            for group in groups:
+                self.insert_duplicate_group(results_area, group)
+            results_area.config(state=tk.DISABLED)
+        
+        def on_done(result):
+            stats = result['stats']
+            results_area.config(state=tk.NORMAL)
+            results_area.delete(1.0, tk.END)
+            results_area.insert(tk.END, f"{title}\n")
+            results_area.insert(tk.END, "=" * 50 + "\n\n")
+            if not result['results']:
+                results_area.insert(tk.END, f"✅ No hay archivos duplicados entre {stats['files']} archivos\n")
+            else:
+                results_area.insert(tk.END, f"✅ {stats['groups']} grupos, {stats['duplicate_files']} copias de más: "
+                                            f"{stats['reclaimable_human']} recuperables\n")
+                results_area.insert(tk.END, f"⏱️ {stats['elapsed']:.2f}s · {stats['partial_hashes']} hashes parciales, "
+                                            f"{stats['full_hashes']} completos, {stats['cache_hits']} de la caché\n\n")
+                for group in result['results']:
+                    self.insert_duplicate_group(results_area, group)
+            results_area.config(state=tk.DISABLED)
+            results_area.see(1.0)
+        
+        def on_error(error):
+            self.show_manager_error(results_area, f"Error buscando duplicados: {str(error)}")
+        
+        self.stream_search("", on_batch, on_done, on_error, channel=("manager", id(results_area)),
+                           source=self.assistant.file_manager.iter_duplicates)
+    
+    def insert_duplicate_group(self, results_area, group: Dict[str, Any]):
+        """Añadir un grupo de duplicados al área de resultados del gestor"""
+        results_area.insert(tk.END, f"🔁 {group['count']} copias de {group['size_human']} "
+                                    f"(recuperables {group['reclaimable_human']})\n")
+        for path in group['paths']:
+            results_area.insert(tk.END, f"   🔗 {path}\n")
+        results_area.insert(tk.END, "\n")
+    
+    def stream_search(self, query: str, on_batch: Callable[[List[Dict[str, Any]], Dict[str, Any]], None],
+                      on_done: Callable[[Dict[str, Any]], None],
+                      on_error: Optional[Callable[[Exception], None]] = None,
+                      channel: Any = "chat",
+                      source: Optional[Callable[..., Iterator[Dict[str, Any]]]] = None,
+                      **kwargs) -> CancellationToken:
+        """
+        Ejecutar FileManager.iter_search en un hilo y entregar los lotes en el hilo de Tk
+        
+        Los lotes que llegan mientras hay un repintado pendiente se agrupan en una
+        sola llamada programada con after(), de modo que la interfaz no se satura
+        aunque el motor produzca cientos de lotes por segundo.
+        
+        Cada canal tiene como mucho una búsqueda viva: lanzar otra en el mismo
+        canal cancela la anterior, cuyo hilo termina en cuanto lo detecta y
+        cuyos lotes pendientes ya no se pintan.
+        
+        Args:
+            query: Consulta en lenguaje natural
+            on_batch: Recibe (nuevos resultados, progreso) en el hilo de Tk
+            on_done: Recibe el resultado final (igual que smart_search_files)
+            on_error: Recibe la excepción si la búsqueda falla
+            channel: Clave del destino de los resultados
+            source: Generador de eventos a usar en lugar de iter_search(query, ...)
+                (p. ej. FileManager.iter_duplicates); recibe los **kwargs
+            **kwargs: Parámetros de smart_search_files
+        
+        Returns:
+            CancellationToken de la búsqueda lanzada
+        """
+        token = CancellationToken()
+        previous = self._active_searches.get(channel)
+        if previous is not None:
+            previous.cancel("sustituida")
+        self._active_searches[channel] = token
+        kwargs['cancel_token'] = token
+        
+        events = queue.Queue()
+        flush_lock = threading.Lock()
+        state = {'scheduled': False}
+        
+        def flush():
+            with flush_lock:
+                state['scheduled'] = False
+            if token.is_cancelled():
+                return
+            new_results = []
+            progress = None
+            final = None
+            error = None
+            while True:
+                try:
+                    kind, payload = events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'error':
+                    error = payload
+                elif payload['done']:
+                    final = payload
+                else:
+                    new_results.extend(payload['results'])
+                    progress = payload['progress']
+            if new_results:
+                on_batch(new_results, progress)
+            if final is not None:
+                if self._active_searches.get(channel) is token:
+                    del self._active_searches[channel]
+                on_done(final)
+            if error is not None and on_error:
+                on_error(error)
+        
+        def schedule():
+            with flush_lock:
+                if state['scheduled']:
+                    return
+                state['scheduled'] = True
+            self.root.after(self.search_render_interval, flush)
+        
+        def worker():
+            try:
+                events_iter = (source(**kwargs) if source is not None
+                               else self.assistant.file_manager.iter_search(query, **kwargs))
+                for event in events_iter:
+                    if token.is_cancelled():
+                        break
+                    events.put(('event', event))
+                    schedule()
+            except Exception as e:
+                events.put(('error', e))
+                schedule()
+        
+        threading.Thread(target=worker, daemon=True).start()
+        return token
+    
+    def stream_search_to_manager(self, query, results_area, title, **kwargs):
+        """Mostrar en el gestor los resultados según llegan y, al final, la lista ordenada"""
+        results_area.config(state=tk.NORMAL)
+        results_area.delete(1.0, tk.END)
+        results_area.insert(tk.END, f"{title}\n")
+        results_area.insert(tk.END, "=" * 50 + "\n")
+        results_area.insert(tk.END, "⏳ Buscando...\n\n")
+        results_area.config(state=tk.DISABLED)
+        shown = {'count': 0}
+        
+        def on_batch(new_results, progress):
+            results_area.config(state=tk.NORMAL)
+            # Línea 3: progreso en vivo
+            results_area.delete("3.0", "3.end")
+            results_area.insert("3.0", f"⏳ {progress['matches']} coincidencias · "
+                                       f"{progress['dirs_scanned']} carpetas · "
+                                       f"{progress['files_per_second']:.0f} archivos/s · "
+                                       f"{progress['elapsed']:.2f}s")
+            for file_info in new_results:
+                shown['count'] += 1
+                results_area.insert(tk.END, f"{shown['count']}. {file_info.get('name', '')}  "
+                                            f"({file_info.get('size_human', 'N/A')})\n")
+                results_area.insert(tk.END, f"   📁 {file_info.get('directory', 'N/A')}\n")
+            results_area.config(state=tk.DISABLED)
+        
+        def on_done(result):
+            self.display_search_results(results_area, result, title)
+        
+        def on_error(error):
+            self.show_manager_error(results_area, f"Error en la búsqueda: {str(error)}")
+        
+        self.stream_search(query, on_batch, on_done, on_error,
+                           channel=("manager", id(results_area)), **kwargs)
     
     def display_search_results(self, results_area, results, title):
         """Mostrar resultados de búsqueda en el área de texto"""
         results_area.config(state=tk.NORMAL)
         results_area.delete(1.0, tk.END)
         
+        # Acepta el diccionario de smart_search_files o una lista de registros
+        files = results.get('results', []) if isinstance(results, dict) else list(results or [])
+        
         # Header
         results_area.insert(tk.END, f"{title}\n")
         results_area.insert(tk.END, "=" * 50 + "\n\n")
         
-        if not results:
+        if not files:
             results_area.insert(tk.END, "❌ No se encontraron archivos que coincidan con tu búsqueda.\n\n")
             results_area.insert(tk.END, "💡 Sugerencias:\n")
             results_area.insert(tk.END, "• Intenta con términos más generales\n")
             results_area.insert(tk.END, "• Verifica la ortografía\n")
             results_area.insert(tk.END, "• Usa diferentes categorías\n")
         else:
-            results_area.insert(tk.END, f"✅ Encontrados {len(results)} archivo(s):\n\n")
+            cached = isinstance(results, dict) and results.get('stats', {}).get('cache', {}).get('hit')
+            results_area.insert(tk.END, f"✅ Encontrados {len(files)} archivo(s){' ⚡' if cached else ''}:\n\n")
             
-            for i, file_path in enumerate(results, 1):
-                try:
-                    import os
-                    from pathlib import Path
-                    
-                    path_obj = Path(file_path)
-                    file_name = path_obj.name
-                    file_dir = path_obj.parent
-                    
-                    # Obtener información del archivo
-                    if path_obj.exists():
-                        file_size = path_obj.stat().st_size
-                        size_mb = file_size / (1024 * 1024)
-                        
-                        if size_mb >= 1:
-                            size_str = f"{size_mb:.1f} MB"
-                        else:
-                            size_str = f"{file_size / 1024:.1f} KB"
-                        
-                        # Determinar icono por extensión
-                        ext = path_obj.suffix.lower()
-                        icon = "📄"
-                        if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                            icon = "🖼️"
-                        elif ext in ['.mp4', '.avi', '.mkv', '.wmv', '.mov']:
-                            icon = "🎥"
-                        elif ext in ['.mp3', '.wav', '.flac', '.m4a']:
-                            icon = "🎵"
-                        elif ext in ['.py', '.js', '.html', '.css', '.java']:
-                            icon = "💾"
-                        elif ext in ['.exe', '.msi']:
-                            icon = "⚙️"
-                        elif ext in ['.zip', '.rar', '.7z']:
-                            icon = "📦"
-                        
-                        results_area.insert(tk.END, f"{i}. {icon} {file_name}\n")
-                        results_area.insert(tk.END, f"   📁 {file_dir}\n")
-                        results_area.insert(tk.END, f"   📏 {size_str}\n")
-                        results_area.insert(tk.END, f"   🔗 {file_path}\n\n")
-                    else:
-                        results_area.insert(tk.END, f"{i}. ❌ {file_name} (archivo no existe)\n\n")
-                        
-                except Exception as e:
+            # Los registros ya traen tamaño y extensión: no se vuelve a consultar el disco
+            for i, file_info in enumerate(files, 1):
+                file_name = file_info.get('name', '')
+                file_path = file_info.get('path', '')
+                if 'error' in file_info:
                     results_area.insert(tk.END, f"{i}. ⚠️ Error procesando: {file_path}\n\n")
+                    continue
+                
+                # Determinar icono por extensión
+                ext = file_info.get('extension', '')
+                icon = "📄"
+                if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
+                    icon = "🖼️"
+                elif ext in ['.mp4', '.avi', '.mkv', '.wmv', '.mov']:
+                    icon = "🎥"
+                elif ext in ['.mp3', '.wav', '.flac', '.m4a']:
+                    icon = "🎵"
+                elif ext in ['.py', '.js', '.html', '.css', '.java']:
+                    icon = "💾"
+                elif ext in ['.exe', '.msi']:
+                    icon = "⚙️"
+                elif ext in ['.zip', '.rar', '.7z']:
+                    icon = "📦"
+                
+                results_area.insert(tk.END, f"{i}. {icon} {file_name}\n")
+                results_area.insert(tk.END, f"   📁 {file_info.get('directory', 'N/A')}\n")
+                results_area.insert(tk.END, f"   📏 {file_info.get('size_human', 'N/A')}\n")
+                results_area.insert(tk.END, f"   🔗 {file_path}\n\n")
         
         results_area.config(state=tk.DISABLED)
         # Scroll al inicio
@@ -1225,140 +1473,287 @@ class MainWindow:
     
     def smart_search_files(self, query: str):
         """Búsqueda inteligente de archivos con análisis de lenguaje natural"""
-        def search_thread():
+        # Hasta que termine, un seguimiento no debe filtrar la búsqueda anterior
+        self.search_session.clear()
+        self.update_status("🔍 Realizando búsqueda inteligente...")
+        first_batch = {'shown': False}
+        
+        def on_batch(new_results, progress):
+            # Los primeros resultados se muestran en cuanto llegan; luego sólo el progreso
+            if not first_batch['shown']:
+                first_batch['shown'] = True
+                preview = "⚡ Primeros resultados:\n"
+                for file_info in new_results[:5]:
+                    preview += f"  • {file_info['name']}  ({file_info.get('directory', 'N/A')})\n"
+                self.add_message("Jarvis", preview, "assistant")
+            self.update_status(f"🔍 {progress['matches']} coincidencias · "
+                               f"{progress['files_per_second']:.0f} archivos/s · {progress['elapsed']:.1f}s")
+        
+        def on_done(result):
+            self.search_session.record(query, result, max_results=50)
+            self.show_smart_search_result(query, result)
+            self.update_status("Listo")
+        
+        def on_error(error):
+            self.add_message("Sistema", f"❌ Error en búsqueda inteligente: {str(error)}", "error")
+            self.update_status("Error")
+        
+        self.stream_search(query, on_batch, on_done, on_error, max_results=50)
+    
+    def show_disk_usage(self):
+        """Resumir en el chat qué carpetas y archivos ocupan más espacio"""
+        self.update_status("💽 Calculando el uso de disco...")
+        
+        def worker():
             try:
-                self.update_status("🔍 Realizando búsqueda inteligente...")
-                
-                result = self.assistant.file_manager.smart_search_files(query, max_results=50)
-                
-                if result['success'] and result['results']:
-                    files_found = len(result['results'])
-                    stats = result['stats']
-                    
-                    # Mostrar resumen
-                    summary = f"🎯 Búsqueda inteligente: '{query}'\n"
-                    summary += f"📊 Encontrados: {files_found} archivos en {stats['search_time']:.2f}s\n\n"
-                    
-                    # Mostrar estadísticas por tipo
-                    if stats['by_type']:
-                        summary += "📁 Por tipo:\n"
-                        for file_type, count in stats['by_type'].items():
-                            summary += f"  • {file_type}: {count} archivos\n"
-                        summary += "\n"
-                    
-                    # Mostrar estadísticas por ubicación
-                    if stats['by_location']:
-                        summary += "📍 Por ubicación:\n"
-                        for location, count in stats['by_location'].items():
-                            if count > 0:
-                                summary += f"  • {location}: {count} archivos\n"
-                        summary += "\n"
-                    
-                    self.add_message("Jarvis", summary, "assistant")
-                    
-                    # Mostrar primeros archivos encontrados
-                    display_count = min(10, len(result['results']))
-                    files_text = f"🗂️ Primeros {display_count} resultados:\n\n"
-                    
-                    for i, file_info in enumerate(result['results'][:display_count], 1):
-                        files_text += f"{i}. 📄 {file_info['name']}\n"
-                        files_text += f"   📁 {file_info.get('directory', 'N/A')}\n"
-                        files_text += f"   📏 {file_info.get('size_human', 'N/A')}"
-                        files_text += f"   📅 {file_info.get('modified_human', 'N/A')}\n"
-                        if file_info.get('content_match'):
-                            files_text += "   🔍 ¡Coincidencia en contenido!\n"
-                        files_text += "\n"
-                    
-                    self.add_message("Jarvis", files_text, "assistant")
-                    
-                    # Mostrar sugerencias si las hay
-                    if result.get('suggestions'):
-                        suggestions_text = "💡 Sugerencias:\n"
-                        for suggestion in result['suggestions']:
-                            suggestions_text += f"  • {suggestion}\n"
-                        self.add_message("Jarvis", suggestions_text, "assistant")
-                    
-                else:
-                    self.add_message("Jarvis", f"❌ No se encontraron archivos para '{query}'", "assistant")
-                    if result.get('suggestions'):
-                        suggestions_text = "💡 Sugerencias:\n"
-                        for suggestion in result['suggestions']:
-                            suggestions_text += f"  • {suggestion}\n"
-                        self.add_message("Jarvis", suggestions_text, "assistant")
-                
-                self.update_status("Listo")
-                
+                report = self.assistant.file_manager.get_disk_usage_report(limit=5, max_depth=1)
             except Exception as e:
-                self.add_message("Sistema", f"❌ Error en búsqueda inteligente: {str(e)}", "error")
-                self.update_status("Error")
+                error = str(e)
+                self.root.after(0, lambda: self.add_message("Sistema", f"❌ Error calculando el uso de disco: {error}",
+                                                            "error"))
+                self.root.after(0, lambda: self.update_status("Error"))
+                return
+            text = "💽 Uso de disco:\n"
+            for root in report['roots']:
+                text += f"  • {root['path']}: {root['size_human']} ({root['files']} archivos)\n"
+            if report['largest_folders']:
+                text += "\n📁 Carpetas que más ocupan:\n"
+                for folder in report['largest_folders']:
+                    text += f"  • {folder['name']}: {folder['size_human']}  ({folder['path']})\n"
+            if report['largest_files']:
+                text += "\n📄 Archivos más grandes:\n"
+                for file_info in report['largest_files']:
+                    text += f"  • {file_info['name']}: {file_info['size_human']}  ({file_info['directory']})\n"
+            self.root.after(0, lambda: self.add_message("Jarvis", text, "assistant"))
+            self.root.after(0, lambda: self.update_status("Listo"))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def search_duplicates(self):
+        """Buscar archivos duplicados y resumir en el chat los grupos que más espacio ocupan"""
+        self.update_status("🔁 Buscando duplicados...")
+        
+        def on_batch(groups, progress):
+            self.update_status(f"🔁 {progress['groups']} grupos · "
+                               f"{format_file_size(progress['reclaimable'])} recuperables")
+        
+        def on_done(result):
+            stats = result['stats']
+            groups = result['results']
+            if not groups:
+                self.add_message("Jarvis", f"✅ No encontré archivos duplicados entre {stats['files']} archivos",
+                                 "assistant")
+            else:
+                text = (f"🔁 {stats['groups']} grupos de duplicados: {stats['reclaimable_human']} recuperables "
+                        f"borrando {stats['duplicate_files']} copias\n\n")
+                for i, group in enumerate(groups[:10], 1):
+                    text += f"{i}. {group['name']} · {group['count']} copias de {group['size_human']}\n"
+                    for path in group['paths']:
+                        text += f"   🔗 {path}\n"
+                if len(groups) > 10:
+                    text += f"\n… y {len(groups) - 10} grupos más (ver el gestor de archivos)\n"
+                self.add_message("Jarvis", text, "assistant")
+            self.update_status("Listo")
+        
+        def on_error(error):
+            self.add_message("Sistema", f"❌ Error buscando duplicados: {str(error)}", "error")
+            self.update_status("Error")
+        
+        self.stream_search("", on_batch, on_done, on_error, channel="duplicates",
+                           source=self.assistant.file_manager.iter_duplicates)
+    
+    def follow_up_search(self, message: str):
+        """Refinar, ampliar o paginar la última búsqueda ("sólo los pdf", "siguiente página")"""
+        follow_up = parse_follow_up(message)
+        result_set = self.search_session.follow_up(message, follow_up)
+        if result_set is None:
+            # La búsqueda anterior no terminó (o falló): no hay resultados a los que referirse
+            self.add_message("Jarvis", "❌ No hay una búsqueda terminada a la que aplicar "
+                                       f"'{message}'. Haz primero una búsqueda de archivos", "assistant")
+            return
         
-        threading.Thread(target=search_thread, daemon=True).start()
+        page = result_set.page(result_set.current_page)
+        origin = "filtrados en memoria" if result_set.source == 'memory' else "nueva búsqueda"
+        text = f"🔎 {page.total} archivos ({origin})\n\n"
+        if not page.items:
+            text += "❌ Ningún archivo de la búsqueda anterior cumple ese filtro\n"
+        if follow_up is not None and follow_up.kind == 'all':
+            # Listado completo: todo el conjunto en un solo mensaje
+            page = page._replace(items=result_set.records, start=0, number=1, total_pages=1)
+        for i, file_info in enumerate(page.items, page.start + 1):
+            text += f"{i}. 📄 {file_info['name']}\n"
+            text += f"   📁 {file_info.get('directory', 'N/A')}\n"
+            text += f"   📏 {file_info.get('size_human', 'N/A')}"
+            text += f"   📅 {file_info.get('modified_human', 'N/A')}\n\n"
+        if page.total_pages > 1:
+            text += f"📄 Página {page.number} de {page.total_pages} · di 'siguiente página' o 'página N'\n"
+        self.add_message("Jarvis", text, "assistant")
+    
+    def show_smart_search_result(self, query: str, result: Dict[str, Any]):
+        """Mostrar en el chat el resultado final de una búsqueda inteligente"""
+        if result['success'] and result['results']:
+            files_found = len(result['results'])
+            stats = result['stats']
+            
+            # Mostrar resumen
+            summary = f"🎯 Búsqueda inteligente: '{query}'\n"
+            summary += f"📊 Encontrados: {files_found} archivos en {stats['search_time']:.2f}s\n"
+            if stats.get('fuzzy'):
+                summary += "🔤 Sin coincidencias exactas: se muestran nombres parecidos\n"
+            if stats.get('cache', {}).get('hit'):
+                summary += "⚡ Resultado de una búsqueda anterior (sin cambios en los archivos)\n"
+            summary += "\n"
+            
+            # Mostrar estadísticas por tipo
+            if stats['by_type']:
+                summary += "📁 Por tipo:\n"
+                for file_type, count in stats['by_type'].items():
+                    summary += f"  • {file_type}: {count} archivos\n"
+                summary += "\n"
+            
+            # Mostrar estadísticas por ubicación
+            if stats['by_location']:
+                summary += "📍 Por ubicación:\n"
+                for location, count in stats['by_location'].items():
+                    if count > 0:
+                        summary += f"  • {location}: {count} archivos\n"
+                summary += "\n"
+
+            # Tiempo de recorrido por raíz (sólo si hubo que recorrer directorios)
+            by_root = {root: info for root, info in stats.get('by_root', {}).items() if info['dirs']}
+            if by_root:
+                summary += "⏱️ Recorrido por raíz:\n"
+                for root, info in by_root.items():
+                    pending = "" if info['complete'] else " (incompleta)"
+                    summary += f"  • {root}: {info['time']:.2f}s, {info['dirs']} carpetas{pending}\n"
+                summary += "\n"
+
+            # Montajes de red/FUSE: latencia o motivo de exclusión
+            if stats.get('mounts'):
+                summary += "🌐 Montajes lentos:\n"
+                for mount_point, info in stats['mounts'].items():
+                    if info.get('excluded'):
+                        summary += f"  • {mount_point} ({info['fs_type']}): excluido\n"
+                    else:
+                        limit = " (presupuesto agotado)" if info['budget_exhausted'] else ""
+                        summary += (f"  • {mount_point} ({info['fs_type']}): {info['dirs']} carpetas, "
+                                    f"p90 {info['latency_ms_p90']:.0f} ms{limit}\n")
+                summary += "\n"
+
+            self.add_message("Jarvis", summary, "assistant")
+            
+            # Mostrar primeros archivos encontrados
+            display_count = min(10, len(result['results']))
+            files_text = f"🗂️ Primeros {display_count} resultados:\n\n"
+            
+            for i, file_info in enumerate(result['results'][:display_count], 1):
+                files_text += f"{i}. 📄 {file_info['name']}\n"
+                files_text += f"   📁 {file_info.get('directory', 'N/A')}\n"
+                files_text += f"   📏 {file_info.get('size_human', 'N/A')}"
+                files_text += f"   📅 {file_info.get('modified_human', 'N/A')}\n"
+                if file_info.get('content_match'):
+                    files_text += "   🔍 ¡Coincidencia en contenido!\n"
+                if file_info.get('fuzzy_score'):
+                    files_text += f"   🔤 Parecido: {file_info['fuzzy_score']:.0%}\n"
+                files_text += "\n"
+            
+            self.add_message("Jarvis", files_text, "assistant")
+            
+            # Mostrar sugerencias si las hay
+            if result.get('suggestions'):
+                suggestions_text = "💡 Sugerencias:\n"
+                for suggestion in result['suggestions']:
+                    suggestions_text += f"  • {suggestion}\n"
+                self.add_message("Jarvis", suggestions_text, "assistant")
+            
+        else:
+            self.add_message("Jarvis", f"❌ No se encontraron archivos para '{query}'", "assistant")
+            if result.get('suggestions'):
+                suggestions_text = "💡 Sugerencias:\n"
+                for suggestion in result['suggestions']:
+                    suggestions_text += f"  • {suggestion}\n"
+                self.add_message("Jarvis", suggestions_text, "assistant")
     
     def search_files_by_category(self, category: str):
-        """Buscar archivos por categoría específica"""
-        def search_thread():
-            try:
-                self.update_status(f"📁 Buscando archivos de {category}...")
+        """Buscar archivos por categoría específica (también quedan en la sesión de búsqueda)"""
+        self.search_session.clear()
+        self.update_status(f"📁 Buscando archivos de {category}...")
+        # El plan de consulta reconoce las categorías por su nombre ("documentos", "imágenes"...)
+        query = CATEGORY_QUERIES.get(category, category)
+        
+        def on_batch(new_results, progress):
+            self.update_status(f"📁 {progress['matches']} archivos de {category} · {progress['elapsed']:.1f}s")
+        
+        def on_done(result):
+            result_set = self.search_session.record(query, result, max_results=50)
+            if len(result_set):
+                files_found = len(result_set)
+                response = f"📁 Archivos de categoría '{category}': {files_found} encontrados\n\n"
                 
-                result = self.assistant.file_manager.find_by_category(category, max_results=30)
-                
-                if result['success'] and result['results']:
-                    files_found = len(result['results'])
-                    
-                    response = f"📁 Archivos de categoría '{category}': {files_found} encontrados\n\n"
-                    
-                    for i, file_info in enumerate(result['results'][:15], 1):
-                        response += f"{i}. {file_info['name']}\n"
-                        response += f"   📍 {file_info.get('directory', 'N/A')}\n"
-                        response += f"   📏 {file_info.get('size_human', 'N/A')}\n\n"
-                    
-                    if files_found > 15:
-                        response += f"... y {files_found - 15} archivos más.\n"
-                    
-                    self.add_message("Jarvis", response, "assistant")
-                else:
-                    self.add_message("Jarvis", f"❌ No se encontraron archivos de categoría '{category}'", "assistant")
+                for i, file_info in enumerate(result_set.records[:15], 1):
+                    response += f"{i}. {file_info['name']}\n"
+                    response += f"   📍 {file_info.get('directory', 'N/A')}\n"
+                    response += f"   📏 {file_info.get('size_human', 'N/A')}\n\n"
                 
-                self.update_status("Listo")
+                if files_found > 15:
+                    response += f"... y {files_found - 15} archivos más.\n"
                 
-            except Exception as e:
-                self.add_message("Sistema", f"❌ Error buscando por categoría: {str(e)}", "error")
-                self.update_status("Error")
+                self.add_message("Jarvis", response, "assistant")
+            else:
+                self.add_message("Jarvis", f"❌ No se encontraron archivos de categoría '{category}'", "assistant")
+            self.update_status("Listo")
         
-        threading.Thread(target=search_thread, daemon=True).start()
+        def on_error(error):
+            self.add_message("Sistema", f"❌ Error buscando por categoría: {str(error)}", "error")
+            self.update_status("Error")
+        
+        self.stream_search(query, on_batch, on_done, on_error, max_results=50)
     
     def search_in_file_content(self, keywords: str):
-        """Buscar en contenido de archivos"""
-        def search_thread():
-            try:
-                self.update_status(f"🔎 Buscando '{keywords}' en contenido de archivos...")
+        """Buscar en contenido de archivos (una búsqueda nueva cancela la anterior)"""
+        self.update_status(f"🔎 Buscando '{keywords}' en contenido de archivos...")
+        
+        def on_batch(new_results, progress):
+            self.update_status(f"🔎 {progress['matches']} archivos con '{keywords}' · "
+                               f"{progress['files_scanned']} analizados · {progress['elapsed']:.1f}s")
+        
+        def on_done(result):
+            if result['success'] and result['results']:
+                stats = result['stats']
+                content_matches = stats.get('content_matches', 0)
                 
-                result = self.assistant.file_manager.search_in_content(keywords, max_results=20)
+                response = f"🔍 Búsqueda en contenido: '{keywords}'\n"
+                documents = stats.get('documents', 0)
+                response += (f"📄 {stats.get('files_scanned', 0)} archivos analizados"
+                             f"{f' ({documents} PDF/Office)' if documents else ''}, "
+                             f"{content_matches} con coincidencias "
+                             f"({stats.get('mb_per_second', 0):.0f} MB/s)\n")
+                index_stats = stats.get('content_index')
+                if index_stats:
+                    response += (f"🗂️ Índice de contenido: {index_stats['candidates']} candidatos "
+                                 f"de {index_stats['text_files']} archivos de texto y documentos\n")
+                response += "\n"
                 
-                if result['success'] and result['results']:
-                    files_found = len(result['results'])
-                    content_matches = result['stats'].get('content_matches', 0)
-                    
-                    response = f"🔍 Búsqueda en contenido: '{keywords}'\n"
-                    response += f"📄 {files_found} archivos analizados, {content_matches} con coincidencias\n\n"
-                    
-                    for i, file_info in enumerate(result['results'][:10], 1):
-                        if file_info.get('content_match'):
-                            response += f"{i}. ✅ {file_info['name']}\n"
-                            response += f"   📁 {file_info.get('directory', 'N/A')}\n"
-                            response += f"   📏 {file_info.get('size_human', 'N/A')}\n\n"
-                    
-                    self.add_message("Jarvis", response, "assistant")
-                else:
-                    self.add_message("Jarvis", f"❌ No se encontró '{keywords}' en el contenido de archivos", "assistant")
+                for i, file_info in enumerate(result['results'][:10], 1):
+                    response += f"{i}. ✅ {file_info['name']}\n"
+                    response += f"   📁 {file_info.get('directory', 'N/A')}\n"
+                    for hit in file_info.get('content_hits', []):
+                        response += f"   L{hit['line']}: {hit['snippet']}\n"
+                    response += "\n"
                 
-                self.update_status("Listo")
-                
-            except Exception as e:
-                self.add_message("Sistema", f"❌ Error buscando en contenido: {str(e)}", "error")
-                self.update_status("Error")
+                self.add_message("Jarvis", response, "assistant")
+            else:
+                self.add_message("Jarvis", f"❌ No se encontró '{keywords}' en el contenido de archivos", "assistant")
+            self.update_status("Listo")
+        
+        def on_error(error):
+            self.add_message("Sistema", f"❌ Error buscando en contenido: {str(error)}", "error")
+            self.update_status("Error")
         
-        threading.Thread(target=search_thread, daemon=True).start()
+        file_manager = self.assistant.file_manager
+        self.stream_search(keywords, on_batch, on_done, on_error, channel="content",
+                           source=lambda **kwargs: file_manager.iter_search_in_content(keywords, **kwargs),
+                           max_results=20)
     
     def start_conversation_mode(self):
         """Iniciar modo conversación continua por voz con interfaz mejorada"""
@@ -1567,6 +1962,9 @@ class MainWindow:
             "buscar_archivo": f"Entendido, buscando archivo: {parameter}",
             "buscar_archivo_inteligente": f"Te escuché, realizando búsqueda inteligente de: {parameter}",
             "buscar_por_categoria": f"Perfecto, buscando archivos de categoría: {parameter}",
+            "buscar_duplicados": "Entendido, buscando archivos duplicados",
+            "uso_disco": "Entendido, calculando qué ocupa más espacio",
+            "seguimiento_busqueda": f"Entendido, sobre la última búsqueda: {parameter}",
             "buscar_en_contenido": f"Confirmado, buscando contenido en archivos: {parameter}",
             "abrir_archivo": f"Te escuché, abriendo archivo: {parameter}",
             "crear_archivo": f"Entendido, creando archivo: {parameter}",